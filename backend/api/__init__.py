@@ -0,0 +1,15 @@
+"""
+API 路由层
+按功能拆分的 APIRouter，由 app_factory.create_app 统一挂载
+"""
+
+from api import ai, history, market, ops, screening, stock_filter
+
+routers = [
+    screening.router,
+    market.router,
+    history.router,
+    ai.router,
+    stock_filter.router,
+    ops.router,
+]
@@ -0,0 +1,51 @@
+"""
+AI 后台分析结果：轮询查询与 SSE 推送
+"""
+
+import json
+import time
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from services.ai_enrichment import AI_STATUS_PENDING, ai_enrichment
+
+router = APIRouter()
+
+
+@router.get("/api/ai/enrichment/{job_id}")
+async def get_ai_enrichment(job_id: str):
+    """查询 AI 后台分析结果（筛选响应中 ai_status=pending 时轮询）"""
+    state = ai_enrichment.status(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="AI 分析任务不存在或已过期")
+    return {"success": True, **state}
+
+
+@router.get("/api/ai/enrichment/{job_id}/stream")
+async def stream_ai_enrichment(
+    job_id: str,
+    timeout: float = Query(60, description="最长等待时间（秒）"),
+):
+    """以 SSE 推送 AI 后台分析结果：先推送当前状态，完成后推送最终结果"""
+    if ai_enrichment.status(job_id) is None:
+        raise HTTPException(status_code=404, detail="AI 分析任务不存在或已过期")
+
+    async def events():
+        state = ai_enrichment.status(job_id)
+        yield f"event: status\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+        deadline = time.time() + min(timeout, 300)
+        while state is not None and state["status"] == AI_STATUS_PENDING:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            state = await ai_enrichment.wait(job_id, timeout=min(15, remaining))
+            if state is not None and state["status"] == AI_STATUS_PENDING:
+                yield ": keepalive\n\n"
+        yield f"event: result\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
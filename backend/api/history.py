@@ -0,0 +1,79 @@
+"""
+历史接口：入选记录查询、历史推荐收益跟踪
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from core.history import history_store
+from services.performance_tracker import performance_tracker
+
+router = APIRouter()
+
+
+@router.get("/api/history/code/{code}")
+async def get_history_by_code(
+    code: str,
+    start_date: Optional[str] = Query(None, description="起始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    strategy_type: Optional[str] = Query(None, description="策略类型"),
+    limit: int = Query(200, description="返回数量"),
+):
+    """查询某只股票的历史入选记录"""
+    try:
+        picks = history_store.get_picks_by_code(
+            code,
+            start_date=start_date,
+            end_date=end_date,
+            strategy=strategy_type,
+            limit=limit,
+        )
+        return {"success": True, "code": code, "count": len(picks), "data": picks}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询历史失败: {str(e)}")
+
+
+@router.get("/api/tracking/performance")
+async def get_tracking_performance(
+    strategy_type: Optional[str] = Query(None, description="策略类型"),
+    start_date: Optional[str] = Query(None, description="起始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    limit: int = Query(200, description="明细返回数量"),
+):
+    """历史推荐表现：1/3/5日收益、止损/目标触发率、分策略胜率（收益由定时筛选增量刷新）"""
+    try:
+        result = performance_tracker.get_performance(
+            strategy=strategy_type,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+        )
+        return {
+            "success": True,
+            "summary": result["summary"],
+            "count": len(result["picks"]),
+            "data": result["picks"],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询收益跟踪失败: {str(e)}")
+
+
+@router.get("/api/history/date/{trade_date}")
+async def get_history_by_date(
+    trade_date: str,
+    strategy_type: Optional[str] = Query(None, description="策略类型"),
+):
+    """查询某个交易日的全部入选记录"""
+    try:
+        picks = history_store.get_picks_by_date(trade_date, strategy=strategy_type)
+        runs = history_store.list_runs(trade_date=trade_date)
+        return {
+            "success": True,
+            "trade_date": trade_date,
+            "count": len(picks),
+            "runs": runs,
+            "data": picks,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询历史失败: {str(e)}")
@@ -0,0 +1,112 @@
+"""
+行情接口：个股实时行情、热门股票、市场环境、交易时段、缓存清理
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+
+from core.cache import memory_cache
+from core.trading_calendar import trading_calendar
+from services.market_data import (
+    analyze_market_environment,
+    fetch_qq_stock_data,
+    get_all_stocks_data,
+    get_capital_flow,
+    get_margin_trading_info,
+    parse_qq_stock_line,
+)
+from services.scoring import get_board_type
+
+router = APIRouter()
+
+
+@router.get("/api/realtime")
+async def get_realtime_quote(code: str = Query(..., description="股票代码")):
+    """获取单只股票实时行情"""
+    try:
+        if code.startswith("6") or code.startswith("9"):
+            symbol = f"sh{code}"
+        else:
+            symbol = f"sz{code}"
+
+        data = fetch_qq_stock_data([symbol])
+        for line in data.strip().split("\n"):
+            stock = parse_qq_stock_line(line)
+            if stock and stock["code"] == code:
+                # 添加增强信息
+                margin_info = get_margin_trading_info(code)
+                capital_flow = get_capital_flow(code)
+                board_type = get_board_type(code)
+
+                stock["margin_info"] = margin_info
+                stock["capital_flow"] = capital_flow
+                stock["board_type"] = board_type
+
+                return {"success": True, "data": stock}
+
+        raise HTTPException(status_code=404, detail="股票代码不存在或暂无数据")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取行情失败: {str(e)}")
+
+
+@router.get("/api/hot")
+async def get_hot_stocks(limit: int = Query(20, description="返回数量")):
+    """获取热门股票（按成交额排序）"""
+    try:
+        all_stocks = get_all_stocks_data()
+
+        # 过滤并按成交额排序
+        valid_stocks = [
+            stock
+            for stock in all_stocks
+            if stock
+            and stock["amount"] > 0
+            and not stock["code"].startswith("688")  # 排除科创板
+            and "ST" not in stock["name"]
+        ]
+        valid_stocks.sort(key=lambda x: x["amount"], reverse=True)
+
+        # 只为返回的股票添加增强信息（复制，不修改共享的行情快照）
+        hot_stocks = []
+        for stock in valid_stocks[:limit]:
+            stock = dict(stock)
+            stock["margin_info"] = get_margin_trading_info(stock["code"])
+            stock["capital_flow"] = get_capital_flow(stock["code"])
+            stock["board_type"] = get_board_type(stock["code"])
+            hot_stocks.append(stock)
+
+        return {
+            "success": True,
+            "count": len(hot_stocks),
+            "data": hot_stocks,
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取热门股票失败: {str(e)}")
+
+
+@router.get("/api/market-environment")
+async def get_market_environment():
+    """获取市场环境分析（新增接口）"""
+    try:
+        all_stocks = get_all_stocks_data()
+        market_env = analyze_market_environment(all_stocks)
+
+        return {"success": True, "data": market_env}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取市场环境失败: {str(e)}")
+
+
+@router.get("/api/market/session")
+async def get_market_session():
+    """当前交易时段、下一次开盘时间和行情快照缓存 TTL（休市期间延长到下一次开盘）"""
+    return {"success": True, **trading_calendar.status()}
+
+
+@router.get("/api/cache/clear")
+async def clear_cache():
+    """清除缓存（新增接口）"""
+    memory_cache.clear("stock_data")
+    memory_cache.clear("market_env")
+
+    return {"success": True, "message": "缓存已清除"}
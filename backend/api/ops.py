@@ -0,0 +1,192 @@
+"""
+运维与诊断接口：请求追踪、采样剖析、内存账本（管理接口需 X-Admin-Token）、
+上游数据源健康、Prometheus 指标
+"""
+
+import asyncio
+import hmac
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response
+
+from api.screening import band_trading_screen_realtime
+from core.cache import memory_cache
+from core.config import config
+from core.disk_cache import screen_cache, screen_cache_key
+from core.memory import memory_report, tracemalloc_diff
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from core.profiling import ProfileSession, render_flamegraph
+from core.shared_snapshot import shared_snapshots
+from core.source_health import source_monitor
+from core.tracing import tracer
+from services.market_data import snapshot_status
+from services.simple_screen import run_simple_screen
+
+router = APIRouter()
+
+
+def _require_admin(token: Optional[str]):
+    """校验管理令牌（未配置 ADMIN_TOKEN 时管理接口禁用）"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="未配置 ADMIN_TOKEN，管理接口已禁用")
+    if not token or not hmac.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="管理令牌无效")
+
+
+@router.get("/api/debug/traces")
+async def list_traces(
+    limit: int = Query(20, description="返回数量"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """最近请求的追踪摘要（新的在前，管理接口）"""
+    _require_admin(x_admin_token)
+    return {
+        "success": True,
+        "sample_rate": tracer.sample_rate,
+        "traces": tracer.recent(limit),
+    }
+
+
+@router.get("/api/debug/traces/{trace_id}")
+async def get_trace(trace_id: str, x_admin_token: Optional[str] = Header(None)):
+    """单个请求的瀑布图（span 按开始时间排序，offset_ms/duration_ms 为毫秒，管理接口）"""
+    _require_admin(x_admin_token)
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="追踪记录不存在或已被覆盖")
+    return {"success": True, **trace}
+
+
+_profile_lock = asyncio.Lock()
+
+
+@router.get("/api/debug/profile")
+async def profile_screening(
+    target: str = Query("realtime", description="剖析对象: realtime（实时筛选）/ simple（定时筛选）"),
+    strategy_type: str = Query("balanced", description="实时筛选的策略类型"),
+    output: str = Query("svg", description="输出格式: svg / collapsed / json / pstats"),
+    interval_ms: float = Query(5.0, ge=1.0, le=100.0, description="采样间隔(毫秒)"),
+    fresh: bool = Query(True, description="先删除该条件的筛选缓存，剖析完整筛选流程"),
+    cprofile: bool = Query(False, description="同时开启 cProfile（json 中附带统计，pstats 输出原始数据）"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    对一次筛选进行采样剖析，返回火焰图（SVG）或 collapsed stack（管理接口，需 X-Admin-Token）
+
+    realtime 在事件循环线程中运行（与线上请求一致）；simple 在线程池中运行定时筛选（run_simple_screen），
+    会写入筛选历史，但不发布结果
+    """
+    _require_admin(x_admin_token)
+    if target not in ("realtime", "simple"):
+        raise HTTPException(status_code=400, detail="target 仅支持 realtime / simple")
+    if output not in ("svg", "collapsed", "json", "pstats"):
+        raise HTTPException(status_code=400, detail="output 仅支持 svg / collapsed / json / pstats")
+    if output == "pstats" and not cprofile:
+        raise HTTPException(status_code=400, detail="pstats 输出需要 cprofile=true")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="已有剖析任务在运行")
+
+    async with _profile_lock:
+        session = ProfileSession(interval=interval_ms / 1000, cprofile=cprofile)
+        if target == "realtime":
+            params = dict(
+                change_min=-2.0,
+                change_max=5.0,
+                volume_ratio_min=1.5,
+                volume_ratio_max=3.0,
+                market_cap_max=160,
+            )
+            if fresh:
+                cache_key = screen_cache_key(strategy_type, *params.values())
+                memory_cache.delete("screen", cache_key)
+                screen_cache.delete(cache_key)
+            with session:
+                await band_trading_screen_realtime(
+                    **params, limit=3, strategy_type=strategy_type, preheat=False
+                )
+        else:
+            def run():
+                with session:
+                    run_simple_screen()
+
+            await asyncio.get_running_loop().run_in_executor(None, run)
+
+    summary = session.summary()
+    print(
+        f"🔬 剖析完成（{target}）：{summary['duration_ms']:.0f}ms，{summary['samples']}次采样"
+    )
+    title = f"{target} screen · {summary['duration_ms']:.0f}ms · {datetime.now():%Y-%m-%d %H:%M:%S}"
+    if output == "svg":
+        return Response(render_flamegraph(session.sampler.counts, title), media_type="image/svg+xml")
+    if output == "collapsed":
+        return Response(session.sampler.collapsed(), media_type="text/plain; charset=utf-8")
+    if output == "pstats":
+        return Response(
+            session.pstats_dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{target}_screen.prof"'},
+        )
+    return {"success": True, "target": target, **summary}
+
+
+@router.get("/api/debug/memory")
+async def get_memory_report(x_admin_token: Optional[str] = Header(None)):
+    """内存账本：进程 RSS、各缓存命名空间占用、其他持有者、预算淘汰统计（管理接口）"""
+    _require_admin(x_admin_token)
+    return {"success": True, **memory_report()}
+
+
+@router.post("/api/debug/memory/snapshot")
+async def take_memory_snapshot(
+    frames: int = Query(10, ge=1, le=100, description="tracemalloc 记录的调用栈层数"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """记录 tracemalloc 基线快照（未开启时自动开启，开启后分配会变慢，用完调用 /stop）"""
+    _require_admin(x_admin_token)
+    return {"success": True, **tracemalloc_diff.snapshot(frames)}
+
+
+@router.get("/api/debug/memory/diff")
+async def get_memory_diff(
+    limit: int = Query(25, ge=1, le=500, description="返回条数"),
+    group_by: str = Query("lineno", description="分组方式: lineno / filename / traceback"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """当前内存分配与基线快照的差异（按增长量降序）"""
+    _require_admin(x_admin_token)
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by 仅支持 lineno / filename / traceback")
+    try:
+        return {"success": True, **tracemalloc_diff.diff(limit, group_by)}
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/api/debug/memory/stop")
+async def stop_memory_tracing(x_admin_token: Optional[str] = Header(None)):
+    """丢弃基线并关闭 tracemalloc"""
+    _require_admin(x_admin_token)
+    tracemalloc_diff.stop()
+    return {"success": True, **tracemalloc_diff.status()}
+
+
+@router.get("/api/health/sources")
+async def get_source_health():
+    """
+    上游数据源健康状况：近期延迟分位数、错误率、熔断状态、当前选源顺序和对冲次数，
+    以及最近一次全市场快照的来源与完整度（腾讯分批拉取的重试统计）
+    """
+    return {
+        "success": True,
+        **source_monitor.stats(),
+        "snapshot": snapshot_status(),
+        "shared": shared_snapshots.stats() if shared_snapshots is not None else None,
+    }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus 指标（上游请求、筛选各阶段耗时、缓存命中、快照年龄）"""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,535 @@
+"""
+筛选接口：定时筛选结果、实时筛选（智能缓存）、手动触发与状态
+"""
+
+import asyncio
+import functools
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from core.cache import memory_cache
+from core.config import config
+from core.disk_cache import screen_cache, screen_cache_key
+from core.history import history_store
+from core.metrics import SCREEN_REQUESTS, STAGE_SECONDS, observe_stage, track_stage
+from core.tracing import propagate, record_span, span
+from core.trading_calendar import trading_calendar
+from core.warm_start import schedule_persist
+from services.ai_enrichment import AI_STATUS_DISABLED, AI_STATUS_PENDING, ai_enrichment
+from services.ai_screening import is_glm_enabled, start_ai_enrichment
+from services.analysis_engine import analyze_candidates
+from services.market_data import (
+    analyze_market_environment,
+    generate_kline_data,
+    get_all_stocks_data,
+    get_capital_flow,
+    get_margin_trading_info,
+    snapshot_time,
+)
+from services.performance_tracker import performance_tracker
+from services.scoring import (
+    BAND_TRADING_CONFIG,
+    calculate_band_trading_score,
+    calculate_trade_points,
+    get_board_type,
+    get_industry,
+)
+from services.screening import pre_rank, quick_filter, select_diversified, sort_by_strategy
+from services.simple_screen import screening_results, screening_scheduler
+
+router = APIRouter()
+
+memory_cache.configure_namespace(
+    "screen", ttl=config.SCREEN_CACHE_FRESH, max_entries=64
+)  # 筛选结果内存层（磁盘缓存之上）
+
+
+def _json_response(data: Dict[str, Any]) -> JSONResponse:
+    """序列化响应（单独计入 serialize 阶段耗时）"""
+    with track_stage("serialize"):
+        return JSONResponse(jsonable_encoder(data))
+
+
+@router.get("/")
+async def root():
+    return {
+        "message": "A股波段交易筛选系统",
+        "version": "4.0.0",
+        "strategy": {
+            "name": "波段交易专业版",
+            "description": "专注主板+创业板融资融券标的，严格风控",
+            "max_positions": BAND_TRADING_CONFIG["max_positions"],
+            "rules": [
+                "✅ 只做主板和创业板",
+                "✅ 必须是融资融券标的",
+                "✅ 排除ST和亏损股",
+                "✅ 市值≤160亿",
+                "✅ 涨幅-2%~5%（不追涨）",
+                "✅ 每次最多3只个股",
+            ],
+        },
+        "endpoints": {
+            "波段交易筛选": "/api/band-trading",
+            "实时行情": "/api/realtime",
+            "API文档": "/docs",
+        },
+    }
+
+
+@router.get("/api/band-trading")
+async def band_trading_screen(
+    change_min: float = Query(-2.0, description="涨幅下限(%)"),
+    change_max: float = Query(5.0, description="涨幅上限(%)"),
+    volume_ratio_min: float = Query(1.5, description="量比下限"),
+    volume_ratio_max: float = Query(3.0, description="量比上限"),
+    market_cap_max: float = Query(160, description="市值上限(亿)"),
+    limit: int = Query(3, description="返回数量（最多3只）"),
+    strategy_type: str = Query(
+        "balanced", description="策略类型: aggressive/conservative/balanced"
+    ),
+):
+    """波段交易专用筛选 - 快速版（读取定时筛选发布的内存结果，结果文件被替换时自动重新加载）"""
+    latest = screening_results.current()
+    if latest is not None and trading_calendar.expires_at(
+        latest.created_at, config.SCREENING_RESULT_MAX_AGE
+    ) > time.time():
+        age_minutes = latest.age() / 60
+        data = latest.payload["data"][:limit]
+        return {
+            "success": True,
+            "count": len(data),
+            "data": data,
+            "version": latest.version,
+            "cache_age_minutes": round(age_minutes, 1),
+            "message": f"数据来自{age_minutes:.1f}分钟前的定时筛选",
+        }
+
+    # 没有结果或结果过期：提示等待定时筛选
+    return {
+        "success": False,
+        "count": 0,
+        "data": [],
+        "message": "定时筛选结果尚未生成，请稍后重试或调用 /api/trigger-screening",
+    }
+
+
+@router.post("/api/trigger-screening")
+async def trigger_screening():
+    """手动触发一次定时筛选（后台执行，完成后 /api/band-trading 返回新版本）"""
+    latest = screening_results.current()
+    age_minutes = round(latest.age() / 60, 1) if latest else None
+    if not screening_scheduler.trigger():
+        return {
+            "success": True,
+            "message": "筛选正在执行中，请稍后刷新",
+            "version": latest.version if latest else None,
+            "cache_age_minutes": age_minutes,
+        }
+    return {
+        "success": True,
+        "message": "已触发筛选，完成后自动发布新结果"
+        + (f"（当前结果：{age_minutes}分钟前）" if latest else ""),
+        "version": latest.version if latest else None,
+        "cache_age_minutes": age_minutes,
+    }
+
+
+@router.get("/api/screening/status")
+async def get_screening_status():
+    """进程内定时筛选状态：执行次数、耗时、下次执行时间、当前结果版本"""
+    return {"success": True, **screening_scheduler.stats()}
+
+
+@router.get("/api/band-trading-realtime")
+async def band_trading_screen_realtime(
+    change_min: float = Query(-2.0, description="涨幅下限(%)"),
+    change_max: float = Query(5.0, description="涨幅上限(%)"),
+    volume_ratio_min: float = Query(1.5, description="量比下限"),
+    volume_ratio_max: float = Query(3.0, description="量比上限"),
+    market_cap_max: float = Query(160, description="市值上限(亿)"),
+    limit: int = Query(3, description="返回数量（最多3只）"),
+    strategy_type: str = Query(
+        "balanced", description="策略类型: aggressive/conservative/balanced"
+    ),
+    preheat: bool = Query(False, description="预热请求（AI 分析排在实时请求之后）"),
+):
+    """波段交易专用筛选 - 智能缓存版"""
+    # 生成缓存键（包含策略类型，浮点参数规范化）
+    cache_key = screen_cache_key(
+        strategy_type,
+        change_min,
+        change_max,
+        volume_ratio_min,
+        volume_ratio_max,
+        market_cap_max,
+    )
+
+    # 检查缓存（默认30分钟内直接复用，休市期间行情落定后的结果复用到下一次开盘；
+    # 先查内存层，再查磁盘）
+    try:
+        source = "memory"
+        entry = memory_cache.get("screen", cache_key)
+        if entry is None:
+            source = "disk"
+            entry = screen_cache.get_entry(
+                cache_key, max_age=trading_calendar.max_age(config.SCREEN_CACHE_FRESH)
+            )
+            if entry is not None:
+                memory_cache.set(
+                    "screen",
+                    cache_key,
+                    entry,
+                    ttl=trading_calendar.expires_at(entry[1], config.SCREEN_CACHE_FRESH)
+                    - time.time(),
+                )
+        if entry is not None:
+            cached, created_at = entry
+            SCREEN_REQUESTS.inc(source=source)
+            age_minutes = (time.time() - created_at) / 60
+            print(f"✅ 使用缓存数据（{age_minutes:.1f}分钟前，策略：{strategy_type}）")
+            ai = {
+                "ai_status": cached.get("ai_status", AI_STATUS_DISABLED),
+                "ai_job_id": cached.get("ai_job_id"),
+            }
+            if ai["ai_status"] == AI_STATUS_PENDING and ai_enrichment.status(ai["ai_job_id"]) is None:
+                # 后台任务已丢失（如服务重启），重新提交
+                ai = start_ai_enrichment(
+                    cache_key,
+                    [dict(stock) for stock in cached["data"]],
+                    strategy_type,
+                    preheat,
+                )
+            return _json_response(
+                {
+                    "success": True,
+                    "count": len(cached["data"]),
+                    "criteria": cached["criteria"],
+                    "data": cached["data"],
+                    "market_environment": cached.get("market_environment"),
+                    "cache_age_minutes": round(age_minutes, 1),
+                    "message": f"使用缓存数据（{age_minutes:.1f}分钟前）",
+                    **ai,
+                }
+            )
+    except Exception as e:
+        print(f"⚠️ 读取缓存失败：{e}")
+
+    SCREEN_REQUESTS.inc(source="fresh")
+    try:
+        print(f"\n{'=' * 60}")
+        print(f"🎯 波段交易筛选启动（实时）")
+        print(f"{'=' * 60}")
+        print(f"📊 筛选条件:")
+        print(f"   • 策略类型: {strategy_type}")
+        print(f"   • 涨幅范围: {change_min}% ~ {change_max}%")
+        print(f"   • 量比范围: {volume_ratio_min} ~ {volume_ratio_max}")
+        print(f"   • 市值上限: ≤{market_cap_max}亿")
+        print(f"   • 返回数量: 最多{min(limit, 3)}只")
+        print(f"{'=' * 60}\n")
+
+        # 限制最多返回3只
+        limit = min(limit, BAND_TRADING_CONFIG["max_positions"])
+
+        with track_stage("fetch"):
+            all_stocks = get_all_stocks_data()
+        print(f"📈 获取到 {len(all_stocks)} 只股票数据")
+
+        # 分析市场环境（新增）
+        with track_stage("market"):
+            market_env = analyze_market_environment(all_stocks)
+        print(f"\n🌍 市场环境分析:")
+        print(f"   • 状态: {market_env['description']}")
+        print(f"   • 建议: {market_env['advice']}")
+        print(
+            f"   • 涨跌比: {market_env['statistics']['up_count']}涨/{market_env['statistics']['down_count']}跌"
+        )
+        print(f"   • 平均涨幅: {market_env['statistics']['avg_change']}%")
+        print(f"   • 平均量比: {market_env['statistics']['avg_volume_ratio']}\n")
+
+        # ===== 第一阶段：快速过滤（不调用任何慢函数） =====
+        print(f"🔍 第一阶段：快速过滤...")
+        filter_start = time.perf_counter()
+        quick_filtered, excluded_stats = quick_filter(
+            all_stocks,
+            change_min,
+            change_max,
+            volume_ratio_min,
+            volume_ratio_max,
+            market_cap_max,
+        )
+        print(f"   快速过滤完成：{len(all_stocks)} → {len(quick_filtered)} 只")
+
+        # 优化：限制详细分析的数量（按评分预排序，只分析前50只）
+        original_count = len(quick_filtered)
+        # 复制：第二阶段会写入评分、K线、买卖点等字段，不能修改共享的行情快照
+        quick_filtered = [dict(stock) for stock in pre_rank(quick_filtered, 50)]
+        if len(quick_filtered) < original_count:
+            print(f"   ⚡ 性能优化：限制详细分析数量 {original_count} → {len(quick_filtered)} 只")
+        observe_stage("filter", filter_start, kept=len(quick_filtered))
+
+        # ===== 第二阶段：详细分析（只对快速过滤后的股票） =====
+        print(f"🔍 第二阶段：详细分析...")
+        detail_start = time.perf_counter()
+        score_seconds = 0.0
+        filtered_stocks = []
+        detailed_stats = {"loss": 0, "no_margin": 0}
+
+        for i, stock in enumerate(quick_filtered):
+            if i % 50 == 0 and i > 0:
+                print(f"   已分析: {i}/{len(quick_filtered)} 只...")
+
+            code = stock["code"]
+            name = stock["name"]
+
+            # 1. 检查板块类型（详细）
+            board = get_board_type(code)
+            if not board.get("allowed", False):
+                continue
+
+            # 2. 检查融资融券
+            margin_info = get_margin_trading_info(code)
+            if not margin_info["is_margin_eligible"]:
+                detailed_stats["no_margin"] += 1
+                continue
+
+            # 3. 获取资金流向
+            capital_flow = get_capital_flow(code)
+
+            # 4. 计算波段交易评分
+            score_start = time.perf_counter()
+            with span("score", code=code):
+                scoring_result = calculate_band_trading_score(
+                    stock, margin_info, capital_flow, strategy_type
+                )
+            score_seconds += time.perf_counter() - score_start
+
+            stock["score"] = scoring_result["score"]
+            stock["reasons"] = scoring_result["reasons"]
+            stock["warnings"] = scoring_result["warnings"]
+            stock["risk_level"] = scoring_result["risk_level"]
+            stock["score_bands"] = scoring_result["bands"]
+            stock["margin_info"] = margin_info
+            stock["capital_flow"] = capital_flow
+            stock["board_type"] = board
+
+            # 5. 添加行业信息
+            stock["industry"] = get_industry(name, code)
+
+            # 6. 生成K线数据
+            stock["kline"] = generate_kline_data(
+                code, stock["price"], stock["change_percent"]
+            )
+
+            # 7. 计算买卖点
+            stock["trade_points"] = calculate_trade_points(stock)
+
+            # 只保留评分>=55的股票
+            if stock["score"] >= 55:
+                filtered_stocks.append(stock)
+
+        # 详细分析中除评分外的部分（板块、融资融券、资金流、行业、K线、买卖点）计为 enrich
+        STAGE_SECONDS.observe(
+            time.perf_counter() - detail_start - score_seconds, stage="enrich"
+        )
+        STAGE_SECONDS.observe(score_seconds, stage="score")
+        record_span("detail", detail_start, stocks=len(quick_filtered))
+        print(f"   详细分析完成：{len(quick_filtered)} → {len(filtered_stocks)} 只")
+
+        # 规则引擎为全部候选生成分析文本（默认展示，LLM 不可用时兜底）
+        rule_start = time.perf_counter()
+        analyze_candidates(filtered_stocks, strategy_type, market_env)
+        observe_stage("analysis", rule_start)
+        rule_elapsed = time.perf_counter() - rule_start
+        print(
+            f"   规则分析完成：{len(filtered_stocks)} 只，"
+            f"耗时{rule_elapsed * 1000:.1f}ms"
+        )
+
+        # 根据策略类型进行差异化排序和筛选
+        select_start = time.perf_counter()
+        strategy_note = sort_by_strategy(filtered_stocks, strategy_type)
+        print(f"   策略：{strategy_note}")
+
+        # 板块+行业分散策略：尽量从不同板块和行业各选一只
+        result, board_counts = select_diversified(filtered_stocks, limit)
+        observe_stage("select", select_start)
+
+        # ===== AI 智能分析（后台增强，不阻塞筛选响应） =====
+        # 后台任务在本函数返回后才会运行，此时筛选结果已写入缓存，可被回写
+        ai = {"ai_status": AI_STATUS_DISABLED, "ai_job_id": None}
+        if result and is_glm_enabled():
+            ai = start_ai_enrichment(
+                cache_key,
+                result,
+                strategy_type,
+                preheat,
+            )
+            print(f"\n🤖 AI 智能分析: {ai['ai_status']}（后台任务 {ai['ai_job_id']}）\n")
+
+        print(f"\n{'=' * 60}")
+        print(f"✅ 筛选完成")
+        print(f"{'=' * 60}")
+        print(f"📊 统计信息:")
+        print(f"   • 总扫描: {len(all_stocks)}只")
+        print(f"   • 快速过滤后: {len(quick_filtered)}只")
+        print(f"   • 排除科创板: {excluded_stats['kcb']}只")
+        print(f"   • 排除ST股: {excluded_stats['st']}只")
+        print(f"   • 排除市值超限: {excluded_stats['market_cap']}只")
+        print(f"   • 排除条件不符: {excluded_stats['criteria']}只")
+        print(f"   • 排除非融资融券: {detailed_stats['no_margin']}只")
+        print(f"   • 最终入选: {len(result)}只")
+        print(f"   • AI分析: {'✅ 已启用' if is_glm_enabled() else '⚠️ 未启用'}")
+        print(
+            f"   • 板块分布: 沪市{board_counts['sh']}只 深市{board_counts['sz']}只 创业板{board_counts['cyb']}只"
+        )
+        if result:
+            industries = [s["industry"] for s in result]
+            print(f"   • 行业分布: {', '.join(industries)}")
+        print(f"{'=' * 60}\n")
+
+        if result:
+            print("🎯 推荐股票:")
+            for i, s in enumerate(result, 1):
+                print(f"   {i}. {s['name']}({s['code']}) - 评分:{s['score']:.1f}")
+                print(
+                    f"      板块:{s['board_type']['name']} | 行业:{s['industry']} | 涨幅:{s['change_percent']:.2f}% | 市值:{s['market_cap']:.0f}亿"
+                )
+                print(
+                    f"      买入:{s['trade_points']['buy_price']}元 止损:{s['trade_points']['stop_loss']}元 目标:{s['trade_points']['target_price']}元"
+                )
+                if s["reasons"]:
+                    print(f"      理由: {', '.join(s['reasons'][:3])}")
+                if s.get("ai_analysis"):
+                    print(f"      🤖 AI: {s['ai_analysis'][:80]}...")
+
+        # 构建响应数据
+        response_data = {
+            "success": True,
+            "count": len(result),
+            "data": result,
+            "market_environment": market_env,  # 新增：市场环境信息
+            "ai_enabled": is_glm_enabled(),  # 新增：AI 是否启用
+            **ai,  # AI 后台增强状态，pending 时通过 /api/ai/enrichment/{ai_job_id} 获取
+            "strategy": {
+                "name": "波段交易",
+                "max_positions": BAND_TRADING_CONFIG["max_positions"],
+                "description": "主板+创业板融资融券标的，严格风控",
+            },
+            "statistics": {
+                "total_scanned": len(all_stocks),
+                "excluded": excluded_stats,
+                "final_selected": len(result),
+            },
+            "criteria": {
+                "change_range": f"{change_min}% ~ {change_max}%",
+                "volume_ratio_range": f"{volume_ratio_min} ~ {volume_ratio_max}",
+                "market_cap_max": f"≤{market_cap_max}亿",
+                "require_margin": True,
+                "exclude_st": True,
+                "exclude_loss": True,
+                "boards": "主板+创业板",
+                "strategy": strategy_type,
+            },
+        }
+
+        # 保存缓存
+        try:
+            cache_data = {
+                "timestamp": datetime.now().isoformat(),
+                "strategy_type": strategy_type,
+                "count": len(result),
+                "data": result,
+                "market_environment": market_env,
+                **ai,
+                "criteria": {
+                    "change_range": f"{change_min}% ~ {change_max}%",
+                    "volume_ratio_range": f"{volume_ratio_min} ~ {volume_ratio_max}",
+                    "market_cap_max": f"≤{market_cap_max}亿",
+                    "strategy": strategy_type,
+                },
+            }
+            screen_cache.set(cache_key, cache_data)
+            memory_cache.set(
+                "screen",
+                cache_key,
+                (cache_data, time.time()),
+                ttl=trading_calendar.cache_ttl(config.SCREEN_CACHE_FRESH),
+            )
+            print(f"💾 缓存已保存：{cache_key}")
+        except Exception as e:
+            print(f"⚠️ 保存缓存失败：{e}")
+
+        # 记录筛选历史、用本次快照更新日线并刷新历史推荐收益（SQLite 写入，在线程池中执行）
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            propagate(
+                functools.partial(
+                    _record_realtime_run,
+                    result,
+                    strategy_type,
+                    response_data["criteria"],
+                    all_stocks,
+                )
+            ),
+        )
+
+        # 数据表写入预热层，重启后可直接复用（后台线程合并写盘）
+        schedule_persist()
+
+        return _json_response(response_data)
+
+    except Exception as e:
+        import traceback
+
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"筛选失败: {str(e)}")
+
+
+def _record_realtime_run(
+    result: List[Dict[str, Any]],
+    strategy_type: str,
+    criteria: Dict[str, Any],
+    all_stocks: List[Dict[str, Any]],
+):
+    """实时筛选后的记录：筛选历史 + 日线与历史推荐收益（失败只打印，不影响响应）"""
+    try:
+        with span("history.record"):
+            history_store.record_run(
+                result, strategy=strategy_type, source="realtime", criteria=criteria
+            )
+    except Exception as e:
+        print(f"⚠️ 记录筛选历史失败：{e}")
+
+    try:
+        with span("tracking.update"):
+            performance_tracker.update_from_snapshot(all_stocks, snapshot_time(all_stocks))
+    except Exception as e:
+        print(f"⚠️ 更新收益跟踪失败：{e}")
+
+
+@router.get("/api/screen")
+async def screen_stocks(
+    change_min: float = Query(-2.0, description="涨幅下限(%)"),
+    change_max: float = Query(5.0, description="涨幅上限(%)"),
+    volume_ratio_min: float = Query(1.5, description="量比下限"),
+    volume_ratio_max: float = Query(3.0, description="量比上限"),
+    market_cap_min: float = Query(50, description="流通市值下限(亿)"),
+    market_cap_max: float = Query(160, description="流通市值上限(亿)"),
+    limit: int = Query(3, description="返回数量"),
+    include_cyb: bool = Query(True, description="是否包含创业板"),
+    require_margin: bool = Query(True, description="是否要求支持融资融券"),
+):
+    """通用筛选接口（兼容旧版）- 自动调用波段交易筛选"""
+    return await band_trading_screen(
+        change_min=change_min,
+        change_max=change_max,
+        volume_ratio_min=volume_ratio_min,
+        volume_ratio_max=volume_ratio_max,
+        market_cap_max=market_cap_max,
+        limit=limit,
+    )
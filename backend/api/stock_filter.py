@@ -0,0 +1,254 @@
+"""
+精选过滤接口（/api/filter）及其辅助分析
+"""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from core.cache import memory_cache
+from services.analysis_engine import ANALYSIS_SOURCE_RULE, generate_analysis
+from services.market_data import (
+    fetch_qq_stock_data,
+    get_capital_flow,
+    get_margin_trading_info,
+    parse_qq_stock_line,
+)
+from services.scoring import calculate_band_trading_score, get_board_type, get_industry
+
+router = APIRouter()
+
+
+def detect_negative_news(code: str) -> Dict[str, Any]:
+    """检测负面新闻（模拟）"""
+    return {
+        'has_negative_news': False,
+        'negative_count': 0,
+        'total_news_count': 5,
+        'negative_news': [],
+        'risk_level': 'low'
+    }
+
+
+def analyze_tail_trend(stock) -> Dict[str, Any]:
+    """分析尾盘走势"""
+    change = stock.get('change_percent', 0)
+    trend = 'stable'
+    if change > 3: trend = 'strong_up'
+    elif change > 0: trend = 'up'
+    elif change < -3: trend = 'down'
+    
+    return {
+        'trend': trend,
+        'strength': abs(change),
+        'tail_change': 0.5, # Mock
+        'tail_volume_ratio': 1.2, # Mock
+        'description': f'尾盘走势{trend}'
+    }
+
+
+def analyze_upside_space(stock) -> Dict[str, Any]:
+    """分析上涨空间"""
+    price = stock['price']
+    if price <= 0: return {'space': 0, 'limit_price': 0, 'near_limit': False}
+    
+    limit_rate = 0.2 if stock['code'].startswith(('30', '68')) else 0.1
+    limit_price = round(price * (1 + limit_rate), 2)
+    space = (limit_price - price) / price * 100
+    
+    return {
+        'space': round(space, 2),
+        'limit_price': limit_price,
+        'current_change': stock.get('change_percent', 0),
+        'near_limit': space < 2.0,
+        'limit_rate': int(limit_rate * 100)
+    }
+
+
+def get_beginner_tags(stock: Dict[str, Any], margin_info: Dict[str, Any]) -> List[str]:
+    """获取新手标签"""
+    tags = []
+    if stock.get('change_percent', 0) > 3: tags.append('强势')
+    if margin_info.get('net_flow', 0) > 0.1: tags.append('主力流入')
+    return tags
+
+
+def get_operation_suggestion(stock: Dict[str, Any]) -> Dict[str, Any]:
+    """获取操作建议"""
+    return {
+        'action': 'wait',
+        'desc': '建议观察'
+    }
+
+
+def generate_analysis_report(
+    stock: Dict[str, Any],
+    scoring_result: Dict[str, Any],
+    market_env: Optional[Dict[str, Any]] = None,
+) -> str:
+    """生成分析报告（规则引擎，不调用 LLM）"""
+    scored = dict(
+        stock, score=scoring_result["score"], risk_level=scoring_result["risk_level"]
+    )
+    return generate_analysis(scored, scoring_result["bands"], "balanced", market_env)
+
+
+@router.get("/api/filter")
+async def filter_stocks(
+    codes: str = Query(..., description="Comma-separated stock codes"),
+    include_kcb_cyb: bool = Query(True, description="Include ChiNext and STAR Market"),
+    prefer_tail_inflow: bool = Query(False, description="Prefer tail inflow"),
+    strict_risk_control: bool = Query(True, description="Strict risk control"),
+):
+    """高级筛选接口"""
+    try:
+        code_list = codes.split(',')
+        results = []
+        analysis_results = []
+        ai_selected = []
+        
+        # 1. 批量获取数据
+        qq_codes = []
+        for c in code_list:
+            if c.startswith('6'): qq_codes.append(f"sh{c}")
+            else: qq_codes.append(f"sz{c}")
+            
+        data_str = fetch_qq_stock_data(qq_codes)
+        stocks_map = {}
+        for line in data_str.strip().split('\n'):
+            s = parse_qq_stock_line(line)
+            if s: stocks_map[s['code']] = s
+            
+        # 2. 处理每只股票
+        for code in code_list:
+            if code not in stocks_map: continue
+            stock = stocks_map[code]
+            
+            # 过滤科创板/创业板
+            if not include_kcb_cyb and (code.startswith('30') or code.startswith('68')): continue
+            
+            # 丰富数据
+            margin_info = get_margin_trading_info(code)
+            stock['margin_info'] = margin_info
+            
+            capital_flow = get_capital_flow(code)
+            stock['capital_flow'] = capital_flow
+            
+            # 计算评分
+            score_res = calculate_band_trading_score(stock, margin_info, capital_flow, "balanced")
+            stock['beginner_score'] = score_res['score']
+            stock['beginner_tags'] = get_beginner_tags(stock, margin_info)
+            stock['operation_suggestion'] = get_operation_suggestion(stock)
+            stock['ai_analysis'] = generate_analysis_report(
+                stock, score_res, memory_cache.get("market_env", "current")
+            )
+            stock['analysis_source'] = ANALYSIS_SOURCE_RULE
+            
+            # 使用现有的 get_board_type 或自己实现
+            try:
+                stock['board_type'] = get_board_type(code)
+            except NameError:
+                stock['board_type'] = {'type': 'unknown', 'name': '未知', 'color': 'gray'}
+            
+            # 补充缺失字段
+            if 'ma5' not in stock:
+                stock['ma5'] = stock['price']  # 暂时用当前价代替，避免前端报错
+            
+            # 添加 analysis 字段 (前端 FilteredStock 接口必需)
+            stock['analysis'] = {
+                'volume_pattern': '阶梯式放量' if stock.get('volume_ratio', 0) > 1.5 else '温和放量',
+                'price_position': '站稳5日线' if stock['price'] >= stock['ma5'] else '跌破5日线',
+                'sector': get_industry(stock['name'], stock['code'])
+            }
+            
+            # 技术指标
+            tech_indicators = {
+                'tail_trend': analyze_tail_trend(stock),
+                'upside_space': analyze_upside_space(stock),
+                'capital_flow': capital_flow,
+                'margin_info': margin_info,
+                'open_probability': 'medium'
+            }
+            
+            # AI精选逻辑 (评分>=60)
+            if stock['beginner_score'] >= 60:
+                ai_item = {
+                    'code': code,
+                    'name': stock['name'],
+                    'price': stock['price'],
+                    'change_percent': stock['change_percent'],
+                    'volume_ratio': stock['volume_ratio'],
+                    'market_cap': stock['market_cap'],
+                    'turnover': stock.get('turnover', 0),
+                    'score': stock['beginner_score'],
+                    'reasons': score_res['reasons'],
+                    'warnings': score_res['warnings'],
+                    'indicators': tech_indicators,
+                    'negative_news': detect_negative_news(code),
+                    'board_type': stock['board_type']
+                }
+                ai_selected.append(ai_item)
+            
+            results.append(stock)
+            analysis_results.append({
+                'code': code,
+                'analysis': stock['ai_analysis'],
+                'score': stock['beginner_score']
+            })
+            
+        # 排序
+        results.sort(key=lambda x: x.get('beginner_score', 0), reverse=True)
+        ai_selected.sort(key=lambda x: x['score'], reverse=True)
+        
+        # 生成Final Pick
+        final_picks = []
+        for i, item in enumerate(ai_selected[:3]):
+            pick = {
+                'rank': i + 1,
+                'code': item['code'],
+                'name': item['name'],
+                'price': item['price'],
+                'change_percent': item['change_percent'],
+                'volume_ratio': item['volume_ratio'],
+                'market_cap': item['market_cap'],
+                'score': item['score'],
+                'summary': item['reasons'][0] if item['reasons'] else "综合评分较高",
+                'reasons': item['reasons'],
+                'warnings': item['warnings'],
+                'tail_trend': item['indicators']['tail_trend'],
+                'upside_space': item['indicators']['upside_space'],
+                'capital_flow': item['indicators']['capital_flow'],
+                'board_type': item['board_type'],
+                'trade_plan': {
+                    'entry_price': item['price'],
+                    'entry_time': '明日开盘',
+                    'stop_loss_price': round(item['price'] * 0.95, 2),
+                    'stop_loss_ratio': -5,
+                    'take_profit_price': round(item['price'] * 1.1, 2),
+                    'take_profit_ratio': 10,
+                    'expected_return': 10,
+                    'hold_period': '1-3天',
+                    'risk_reward_ratio': 2.0
+                }
+            }
+            final_picks.append(pick)
+            
+        return {
+            "count": len(results),
+            "total_analyzed": len(code_list),
+            "filter_criteria": {
+                "volume_pattern": "阶梯式放量",
+                "price_position": "站稳5日线+近期高点",
+                "sector": "优先数字经济（加分项）"
+            },
+            "data": results,
+            "all_analysis": analysis_results,
+            "ai_selected": ai_selected,
+            "market_environment": {},
+            "final_pick": final_picks[0] if final_picks else None,
+            "final_picks": final_picks
+        }
+
+    except Exception as e:
+        print(f"Filter error: {e}")
+        raise HTTPException(status_code=500, detail=f"Filter failed: {str(e)}")
@@ -1,37 +1,79 @@
 """
 FastAPI 应用工厂
-用于创建和配置FastAPI应用实例
+用于创建和配置FastAPI应用实例：生命周期、CORS、请求追踪，挂载 api/ 下的路由
+重依赖（AKShare/pandas、GLM 客户端、Gemini）在首次使用时才导入，worker 启动只加载 FastAPI 和 core
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-import os
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
-from concurrent.futures import ThreadPoolExecutor
 
+from api import routers
 from core.config import config
-from services.gemini_service import GeminiService
-from core.cache import cache_manager
+from core.memory import memory_guard, register_memory_source
+from core.shared_snapshot import shared_snapshots
+from core.tracing import TraceMiddleware, tracer
+from core.warm_start import persist_namespaces
+from services import market_data
+from services.ai_enrichment import ai_enrichment
+from services.ai_screening import close_glm_service
+from services.simple_screen import screening_results, screening_scheduler
+
+
+def print_banner():
+    print(f"""
+╔══════════════════════════════════════════════════════╗
+║     A股波段交易筛选系统 v4.15.0                      ║
+║                                                      ║
+║  策略配置：                                          ║
+║  • 板块：主板 + 创业板                               ║
+║  • 融资融券：必须                                    ║
+║  • 市值上限：≤160亿                                  ║
+║  • 涨幅范围：-2% ~ 5%（不追涨）                      ║
+║  • 持仓限制：最多3只                                 ║
+║  • 风控：排除ST、亏损股                              ║
+║  • 新增：行业分散、K线、买卖点                       ║
+║  • 数据源：{"✅ AKShare真实数据" if market_data.USE_REAL_DATA else "⚠️ 模拟数据"}                    ║
+║  • AI分析：{"✅ GLM-4-Flash（首次使用时加载）" if config.GLM_API_KEY else "⚠️ AI功能未启用"}                    ║
+╚══════════════════════════════════════════════════════╝
+""")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     应用生命周期管理
-    - 启动时创建线程池
-    - 关闭时清理资源
+    - 启动时从磁盘恢复行情快照和上次的定时筛选结果，后台恢复数据表预热缓存（DataFrame 需导入 pandas）、
+      加载交易日历，
+      启动进程内定时筛选；配置了共享快照时启动拉取进程的刷新循环，配置了进程内存预算时启动周期检查
+    - 关闭时写回数据表缓存、关闭 AI 连接池
     """
-    # 启动时创建线程池
-    app.state.executor = ThreadPoolExecutor(max_workers=10)
-    print("✅ 线程池已创建")
+    print_banner()
+    market_data.restore_warm_cache(tables_in_background=True)
+    screening_results.load()
+    if market_data.USE_REAL_DATA:
+        # 交易日历在后台线程中加载，顺带提前导入 AKShare，首个请求无需等待
+        market_data.load_trade_calendar_in_background()
+    tasks = []
+    if config.SCREENING_SCHEDULER_ENABLED:
+        tasks.append(asyncio.create_task(screening_scheduler.run()))
+    if shared_snapshots is not None:
+        tasks.append(asyncio.create_task(market_data.refresh_shared_snapshot()))
+    if memory_guard.rss_budget:
+        tasks.append(asyncio.create_task(memory_guard.run(config.MEMORY_CHECK_INTERVAL)))
 
     yield
 
-    # 关闭时清理资源
-    app.state.executor.shutdown(wait=True)
-    print("✅ 线程池已关闭")
-    cache_manager.clear_all()
-    print("✅ 缓存已清理")
+    for task in tasks:
+        task.cancel()
+    count = persist_namespaces()
+    print(f"💾 预热缓存已保存：{count} 条")
+    await close_glm_service()
+    if getattr(app.state, "gemini", None) is not None:
+        await app.state.gemini.aclose()
+        print("✅ Gemini 连接池已关闭")
 
 
 def create_app() -> FastAPI:
@@ -52,19 +94,29 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         allow_headers=["*"],
+        expose_headers=["X-Trace-Id"],
     )
+    # 请求追踪（/api/debug/traces 查看瀑布图）
+    app.add_middleware(TraceMiddleware, tracer=tracer)
+
+    for router in routers:
+        app.include_router(router)
+
+    # 缓存之外的内存持有者（/api/debug/memory 汇总）
+    register_memory_source("traces", tracer.stats)
+    register_memory_source("ai_enrichment", lambda: ai_enrichment.stats())
 
     # Gemini 集成（可选）
-    gemini_endpoint = os.getenv("GEMINI_API_ENDPOINT", "")
-    gemini_key = os.getenv("GEMINI_API_KEY", "")
-    gemini_model = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash")
-    gemini_enabled = os.getenv("GEMINI_ENABLED", "false").lower() in (
-        "true",
-        "1",
-        "yes",
-        "on",
-    )
-    if gemini_enabled and gemini_endpoint:
-        app.state.gemini = GeminiService(gemini_endpoint, gemini_key, gemini_model)
+    if config.GEMINI_ENABLED and config.GEMINI_API_ENDPOINT:
+        from services.gemini_service import GeminiService
+
+        app.state.gemini = GeminiService(
+            config.GEMINI_API_ENDPOINT,
+            config.GEMINI_API_KEY,
+            config.GEMINI_MODEL_NAME,
+            max_concurrency=config.GEMINI_MAX_CONCURRENCY,
+            cache_ttl=config.GEMINI_CACHE_TTL,
+            cache_max_entries=config.GEMINI_CACHE_MAX_ENTRIES,
+        )
 
     return app
@@ -1,9 +1,15 @@
-"""自动预热缓存 - 每5分钟自动刷新缓存"""
+"""
+自动预热缓存 - 交易时段内定时刷新缓存
+午休、收盘后各补一次，夜间和节假日空闲（收盘后的结果服务端缓存到下一次开盘）
+休市日按周末 + TRADING_HOLIDAYS 判断
+"""
 import requests
 import time
-import schedule
 from datetime import datetime
 
+from core.config import config
+from core.trading_calendar import run_in_sessions
+
 API_BASE = "http://localhost:8000/api"
 
 strategies = [
@@ -27,7 +33,8 @@ def preheat_all_strategies():
                 f"{API_BASE}/band-trading-realtime",
                 params={
                     "strategy_type": strategy_type,
-                    "limit": 3
+                    "limit": 3,
+                    "preheat": True,  # AI 分析让位于用户实时请求
                 },
                 timeout=600  # 10分钟超时
             )
@@ -57,7 +64,7 @@ def main():
 ╔══════════════════════════════════════════════════════╗
 ║     A股波段交易筛选系统 - 自动预热服务               ║
 ║                                                      ║
-║  功能：每30分钟自动刷新三种策略的缓存                ║
+║  功能：交易时段定时刷新三种策略的缓存                ║
 ║  效果：用户任何时候点击都能秒开                      ║
 ║                                                      ║
 ║  按 Ctrl+C 停止服务                                  ║
@@ -68,16 +75,11 @@ def main():
     print("\n🚀 首次预热...")
     preheat_all_strategies()
     
-    # 每30分钟执行一次
-    schedule.every(30).minutes.do(preheat_all_strategies)
-    
-    print("\n⏰ 定时任务已启动，每30分钟自动刷新缓存...")
-    print("   下次刷新时间：30分钟后")
+    # 交易时段内按间隔执行，休市期间空闲
+    print(f"\n⏰ 定时任务已启动，交易时段内每{config.SCHEDULE_INTERVAL_MINUTES:.0f}分钟自动刷新缓存...")
     
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        run_in_sessions(preheat_all_strategies, config.SCHEDULE_INTERVAL_MINUTES * 60, "预热")
     except KeyboardInterrupt:
         print("\n\n👋 服务已停止")
 
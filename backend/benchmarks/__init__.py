@@ -0,0 +1,6 @@
+"""
+离线性能基准
+- fixtures: 合成全市场行情
+- llm_stub: 本地模拟 GLM / Gemini 接口
+- bench_ai_screen: 开启 AI 时的筛选端到端延迟
+"""
@@ -0,0 +1,189 @@
+"""
+AI 链路端到端基准
+在合成行情 + 本地 LLM 模拟服务上运行 /api/band-trading-realtime（开启 AI），
+统计筛选响应延迟和 AI 分析就绪延迟
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_ai_screen --runs 5 --latency 0.8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from benchmarks.fixtures import synthetic_universe
+from benchmarks.harness import percentile
+from benchmarks.llm_stub import LLMStubServer
+
+
+STRATEGIES = ("balanced", "aggressive", "conservative")
+
+
+def _summary(values):
+    return {
+        "p50": round(statistics.median(values), 1),
+        "p95": round(percentile(values, 95), 1),
+        "max": round(max(values), 1),
+    }
+
+
+def run_benchmark(
+    runs: int = 5,
+    universe_size: int = 5000,
+    latency: float = 0.8,
+    jitter: float = 0.2,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    min_interval: float = 1.2,
+    batch_size: int = 10,
+    verbose: bool = False,
+):
+    """
+    运行基准并返回统计结果（单位：毫秒）
+
+    缓存和数据库写入临时目录；每轮清空筛选缓存和 AI 缓存，保证每轮都走完整链路
+    """
+    workdir = tempfile.mkdtemp(prefix="bench_ai_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with LLMStubServer(
+            latency=latency,
+            jitter=jitter,
+            error_rate=error_rate,
+            rate_limit_rate=rate_limit_rate,
+            max_concurrency=1,
+            seed=7,
+        ) as stub, _patched_config(
+            GLM_BASE_URL=stub.glm_url,
+            GLM_MIN_INTERVAL=min_interval,
+            GLM_BATCH_SIZE=batch_size,
+            SCREENING_SCHEDULER_ENABLED=False,  # 只测量实时筛选
+        ):
+            return _run(stub, runs, universe_size, latency, verbose)
+    finally:
+        os.chdir(cwd)
+
+
+@contextlib.contextmanager
+def _patched_config(**values):
+    """
+    直接修改 config 属性（core.config 可能已被其他模块导入，设置环境变量不再生效），结束后恢复
+    """
+    from core.config import config
+
+    original = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    try:
+        yield config
+    finally:
+        for name, value in original.items():
+            setattr(config, name, value)
+
+
+def _run(stub, runs, universe_size, latency, verbose):
+    """在已启动的模拟服务上逐轮请求实时筛选，等待 AI 分析就绪"""
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        import main
+        import glm_service
+        from fastapi.testclient import TestClient
+        from services import market_data
+
+        universe = synthetic_universe(universe_size)
+        market_data.USE_REAL_DATA = False
+        market_data._fetch_all_stocks_data = lambda: [dict(s) for s in universe]
+        glm_service.init_glm_service("bench-key")
+
+    screen_ms, ready_ms, statuses = [], [], []
+    with TestClient(main.app) as client:
+        for i in range(runs):
+            strategy = STRATEGIES[i % len(STRATEGIES)]
+            with contextlib.redirect_stdout(quiet if not verbose else sys.stdout):
+                main.memory_cache.clear("screen")
+                main.memory_cache.clear("glm")
+                main.screen_cache.clear()
+                glm_service.ai_response_cache.clear()
+
+                start = time.perf_counter()
+                response = client.get(
+                    "/api/band-trading-realtime",
+                    params={"strategy_type": strategy},
+                )
+                screened = time.perf_counter()
+                body = response.json()
+
+                status = body.get("ai_status")
+                if status == "pending":
+                    stream = client.get(f"/api/ai/enrichment/{body['ai_job_id']}/stream")
+                    last = [line for line in stream.text.splitlines() if line.startswith("data: ")]
+                    status = json.loads(last[-1][6:])["status"] if last else "unknown"
+                ready = time.perf_counter()
+
+            screen_ms.append((screened - start) * 1000)
+            ready_ms.append((ready - start) * 1000)
+            statuses.append(status)
+            print(
+                f"  #{i + 1} {strategy:<12} 入选{body.get('count', 0)}只  "
+                f"筛选 {screen_ms[-1]:7.1f}ms  AI就绪 {ready_ms[-1]:7.1f}ms  ({status})"
+            )
+
+    return {
+        "runs": runs,
+        "universe": universe_size,
+        "llm_latency_s": latency,
+        "screen_ms": _summary(screen_ms),
+        "ai_ready_ms": _summary(ready_ms),
+        "ai_status": {s: statuses.count(s) for s in set(statuses)},
+        "llm_stub": dict(stub.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 链路端到端基准")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--universe", type=int, default=5000, help="合成股票数量")
+    parser.add_argument("--latency", type=float, default=0.8, help="模拟 LLM 延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--min-interval", type=float, default=1.2, help="GLM 请求最小间隔（秒）")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--verbose", action="store_true", help="输出筛选日志")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    print(f"🏁 AI 链路基准：{args.runs}轮，{args.universe}只股票，LLM 延迟 {args.latency}s")
+    result = run_benchmark(
+        runs=args.runs,
+        universe_size=args.universe,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        min_interval=args.min_interval,
+        batch_size=args.batch_size,
+        verbose=args.verbose,
+    )
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(f"\n📊 筛选响应: {result['screen_ms']}")
+        print(f"📊 AI 就绪:   {result['ai_ready_ms']}")
+        print(f"📊 AI 状态:   {result['ai_status']}")
+        print(f"📊 模拟服务:  {result['llm_stub']}")
+
+
+if __name__ == "__main__":
+    main()
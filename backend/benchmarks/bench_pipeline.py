@@ -0,0 +1,177 @@
+"""
+筛选流水线离线基准
+全部使用录制/合成数据，上游接口以本地函数替代，笔记本上无网络即可复现
+
+用法（在 backend 目录下）：
+    python -m pytest benchmarks/bench_pipeline.py -q
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from benchmarks.fixtures import akshare_spot_frame, tencent_lines_by_code
+from services.screening import pre_rank, quick_filter, select_diversified, sort_by_strategy
+
+CRITERIA = dict(
+    change_min=-2.0,
+    change_max=5.0,
+    volume_ratio_min=1.5,
+    volume_ratio_max=3.0,
+    market_cap_max=160,
+)
+
+
+@pytest.fixture(scope="module")
+def enriched(app_main, universe):
+    """与实时筛选第二阶段相同的候选（融资融券、资金流为模拟数据）"""
+    stocks = []
+    for stock in universe:
+        stock = dict(stock)
+        board = app_main.get_board_type(stock["code"])
+        margin_info = app_main.get_margin_trading_info(stock["code"])
+        if not board.get("allowed") or not margin_info["is_margin_eligible"]:
+            continue
+        capital_flow = app_main.get_capital_flow(stock["code"])
+        scoring = app_main.calculate_band_trading_score(stock, margin_info, capital_flow)
+        stock.update(
+            score=scoring["score"],
+            reasons=scoring["reasons"],
+            warnings=scoring["warnings"],
+            risk_level=scoring["risk_level"],
+            score_bands=scoring["bands"],
+            margin_info=margin_info,
+            capital_flow=capital_flow,
+            board_type=board,
+            industry=app_main.get_industry(stock["name"], stock["code"]),
+        )
+        stocks.append(stock)
+    return stocks
+
+
+def test_parse_tencent_lines(benchmark, app_main, tencent_text):
+    lines = tencent_text.splitlines()
+    parse = app_main.parse_qq_stock_line
+
+    parsed = benchmark(lambda: [parse(line) for line in lines])
+    assert sum(stock is not None for stock in parsed) >= len(lines) * 0.9
+
+
+def test_get_all_stocks_data_stub(benchmark, app_main, tencent_text, monkeypatch):
+    """全市场拉取（腾讯接口替换为按代码回放录制报文）：分批、线程池、解析、写预热层"""
+    from services import market_data
+
+    lines = tencent_lines_by_code(tencent_text)
+
+    def fetch_stub(codes, timeout=20, max_retries=3):
+        return "\n".join(lines[c] for c in codes if c in lines)
+
+    monkeypatch.setattr(market_data, "fetch_qq_stock_data", fetch_stub)
+    with contextlib.redirect_stdout(io.StringIO()):
+        stocks = benchmark(app_main.get_all_stocks_data, use_cache=False)
+    assert len(stocks) >= len(lines) * 0.9
+
+
+def test_akshare_realtime_quotes(benchmark, app_main, monkeypatch):
+    """AKShare 实时行情（接口返回录制/合成 DataFrame）：字段映射 + 转 records"""
+    import data_adapter
+
+    frame = akshare_spot_frame()
+
+    def stock_zh_a_spot_em():
+        return frame.copy()
+
+    monkeypatch.setattr(data_adapter.ak, "stock_zh_a_spot_em", stock_zh_a_spot_em)
+    adapter = data_adapter.akshare_adapter
+
+    def run():
+        adapter.cache.clear("akshare.realtime")
+        return adapter.get_realtime_quotes().to_dict("records")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        records = benchmark(run)
+    assert len(records) == len(frame)
+
+
+def test_stage1_filter(benchmark, universe):
+    def run():
+        passed, _ = quick_filter(universe, **CRITERIA)
+        return pre_rank(passed, 50)
+
+    assert len(benchmark(run)) == 50
+
+
+def test_scoring(benchmark, app_main, universe):
+    candidates = pre_rank(quick_filter(universe, **CRITERIA)[0], 50)
+    inputs = [
+        (
+            stock,
+            app_main.get_margin_trading_info(stock["code"]),
+            app_main.get_capital_flow(stock["code"]),
+        )
+        for stock in candidates
+    ]
+    score = app_main.calculate_band_trading_score
+
+    results = benchmark(
+        lambda: [score(stock, margin, flow, "balanced") for stock, margin, flow in inputs]
+    )
+    assert len(results) == len(candidates)
+
+
+def test_selection(benchmark, enriched):
+    def run():
+        picks = []
+        for strategy in ("aggressive", "conservative", "balanced"):
+            stocks = list(enriched)
+            sort_by_strategy(stocks, strategy)
+            picks.append(select_diversified(stocks, 3)[0])
+        return picks
+
+    assert all(len(p) == 3 for p in benchmark(run))
+
+
+def test_serialization(benchmark, app_main, enriched):
+    """筛选响应序列化（3只入选股票，含K线、买卖点、分析文本）"""
+    picks = [dict(s) for s in sorted(enriched, key=lambda s: s["score"], reverse=True)[:3]]
+    for stock in picks:
+        stock["kline"] = app_main.generate_kline_data(
+            stock["code"], stock["price"], stock["change_percent"]
+        )
+        stock["trade_points"] = app_main.calculate_trade_points(stock)
+    market_env = app_main.analyze_market_environment(enriched)
+    response = {
+        "success": True,
+        "count": len(picks),
+        "data": picks,
+        "market_environment": market_env,
+        "statistics": {"total_scanned": 5000, "final_selected": len(picks)},
+    }
+
+    rendered = benchmark(app_main._json_response, response)
+    assert rendered.status_code == 200
+
+
+def test_screen_endpoint_cold(benchmark, app_main, universe, monkeypatch):
+    """完整实时筛选接口（行情缓存命中，筛选缓存清空）：第一阶段 → 评分 → 选股 → 落盘 → 序列化"""
+    from fastapi.testclient import TestClient
+    from services import market_data
+
+    monkeypatch.setattr(market_data, "_fetch_all_stocks_data", lambda: [dict(s) for s in universe])
+    app_main.memory_cache.set("stock_data", "all", [dict(s) for s in universe], ttl=3600)
+    client = TestClient(app_main.app)
+
+    def clear_screen_cache():
+        app_main.memory_cache.clear("screen")
+        app_main.screen_cache.clear()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = benchmark.pedantic(
+            client.get,
+            args=("/api/band-trading-realtime",),
+            setup=clear_screen_cache,
+            rounds=10,
+            warmup_rounds=1,
+        )
+    assert response.status_code == 200 and response.json()["count"] == 3
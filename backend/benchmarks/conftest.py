@@ -0,0 +1,119 @@
+"""
+离线基准套件的 fixture（不需要网络和运行中的服务）
+
+用法（在 backend 目录下）：
+    python -m pytest benchmarks/bench_pipeline.py -q           # 运行并与基线比较
+    BENCH_SAVE=1 python -m pytest benchmarks/bench_pipeline.py  # 更新基线
+安装了 pytest-benchmark 时使用其 benchmark fixture，否则使用 harness.BenchmarkTimer
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from benchmarks.fixtures import data_source, synthetic_universe, tencent_payload
+from benchmarks.harness import (
+    BenchmarkTimer,
+    compare,
+    load_baselines,
+    median_ms,
+    save_baselines,
+)
+
+try:
+    import pytest_benchmark  # noqa: F401
+
+    HAS_PYTEST_BENCHMARK = True
+except ImportError:
+    HAS_PYTEST_BENCHMARK = False
+
+
+_results = {}
+
+
+if not HAS_PYTEST_BENCHMARK:
+
+    @pytest.fixture
+    def benchmark(request):
+        return BenchmarkTimer(request.node.name)
+
+
+@pytest.fixture(autouse=True)
+def _baseline_check(request):
+    """基准结束后与基线比较，退化时报错"""
+    if "benchmark" not in request.fixturenames:
+        yield
+        return
+    bench = request.getfixturevalue("benchmark")
+    yield
+    median = median_ms(bench)
+    if median is None:
+        return
+    name = request.node.name
+    _results[name] = median
+    if os.getenv("BENCH_SAVE"):
+        return
+    outcome = compare(name, median, load_baselines(), data_source=data_source())
+    if outcome["regressed"]:
+        pytest.fail(
+            f"{name} 性能退化：中位数 {median:.2f}ms，基线 {outcome['baseline']:.2f}ms"
+            f"（{outcome['ratio']:.2f}x）"
+        )
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    baselines = load_baselines()
+    source = data_source()
+    terminalreporter.write_sep("=", f"基准结果（中位数，数据来源 {source}）")
+    for name, median in sorted(_results.items()):
+        outcome = compare(name, median, baselines, data_source=source)
+        if outcome["skipped"]:
+            line = f"{name:<40} {median:10.2f}ms   （基线来源 {outcome['skipped']}，不比较）"
+        elif outcome["baseline"] is None:
+            line = f"{name:<40} {median:10.2f}ms   （无基线）"
+        else:
+            line = (
+                f"{name:<40} {median:10.2f}ms   基线 {outcome['baseline']:.2f}ms "
+                f"({outcome['ratio']:.2f}x){'  ⚠️ 退化' if outcome['regressed'] else ''}"
+            )
+        terminalreporter.write_line(line)
+    if os.getenv("BENCH_SAVE"):
+        save_baselines(_results, note=os.getenv("BENCH_NOTE", ""), data_source=source)
+        terminalreporter.write_line("💾 基线已更新：benchmarks/baselines.json")
+
+
+@pytest.fixture(scope="session")
+def universe():
+    """5000 只合成股票的行情快照"""
+    return synthetic_universe(5000)
+
+
+@pytest.fixture(scope="session")
+def tencent_text():
+    """腾讯行情接口报文（有录制文件时使用录制数据）"""
+    return tencent_payload()
+
+
+@pytest.fixture(scope="session")
+def app_main(tmp_path_factory):
+    """
+    在临时目录中导入 main（缓存、数据库写入临时目录），强制使用模拟数据源
+    """
+    workdir = tmp_path_factory.mktemp("bench")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        from services import market_data
+    market_data.USE_REAL_DATA = False
+    yield main
+    os.chdir(cwd)
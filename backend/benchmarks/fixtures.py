@@ -0,0 +1,168 @@
+"""
+基准测试数据
+- 合成全市场行情快照（字段与 parse_qq_stock_line 的输出一致），固定随机种子可复现
+- 腾讯行情接口原始报文、AKShare 实时行情 DataFrame：
+  优先使用 record_fixtures.py 录制的真实数据（benchmarks/data/），没有录制时由合成行情按同样格式生成
+"""
+
+import gzip
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+TENCENT_PAYLOAD_FILE = os.path.join(DATA_DIR, "tencent_payload.txt.gz")
+AKSHARE_SPOT_FILE = os.path.join(DATA_DIR, "akshare_spot.pkl.gz")
+
+
+def data_source() -> str:
+    """
+    当前基准使用的数据来源：synthetic（合成行情），或 recorded:tencent+akshare 等已录制的文件
+    基线按数据来源记录，来源不同的中位数不可比
+    """
+    recorded = [
+        name
+        for name, path in (("tencent", TENCENT_PAYLOAD_FILE), ("akshare", AKSHARE_SPOT_FILE))
+        if os.path.exists(path)
+    ]
+    return "recorded:" + "+".join(recorded) if recorded else "synthetic"
+
+
+_PREFIXES = (
+    ["600", "601", "603", "605"]  # 沪市主板
+    + ["000", "001", "002", "003"]  # 深市主板
+    + ["300", "301"]  # 创业板
+    + ["688"]  # 科创板（应被过滤）
+)
+
+
+def synthetic_universe(size: int = 5000, seed: int = 20260302) -> List[Dict[str, Any]]:
+    """
+    生成合成全市场行情
+
+    Args:
+        size: 股票数量
+        seed: 随机种子
+
+    Returns:
+        股票数据列表
+    """
+    rng = random.Random(seed)
+    stocks = []
+    for i in range(size):
+        prefix = _PREFIXES[i % len(_PREFIXES)]
+        code = f"{prefix}{(i // len(_PREFIXES)) % 1000:03d}"
+        name = f"样本{i:04d}"
+        if rng.random() < 0.03:
+            name = "ST" + name
+
+        pre_close = round(rng.uniform(3, 80), 2)
+        change_percent = round(max(-10.0, min(10.0, rng.gauss(0.3, 2.5))), 2)
+        price = round(pre_close * (1 + change_percent / 100), 2)
+        high = round(max(price, pre_close) * (1 + rng.uniform(0, 0.02)), 2)
+        low = round(min(price, pre_close) * (1 - rng.uniform(0, 0.02)), 2)
+        volume = rng.randint(10_000, 2_000_000)
+
+        stocks.append(
+            {
+                "code": code,
+                "name": name,
+                "price": price,
+                "pre_close": pre_close,
+                "open": round(pre_close * (1 + rng.uniform(-0.01, 0.01)), 2),
+                "volume": float(volume),
+                "change": round(price - pre_close, 2),
+                "change_percent": change_percent,
+                "high": high,
+                "low": low,
+                "amount": round(volume * price / 100, 2),
+                "turnover": round(rng.uniform(0.2, 12), 2),
+                "pe_ratio": round(rng.uniform(-20, 80), 2),
+                "market_cap": round(rng.lognormvariate(4.3, 0.8), 2),
+                "total_value": round(rng.lognormvariate(4.6, 0.8), 2),
+                "volume_ratio": round(rng.lognormvariate(0.2, 0.45), 2),
+            }
+        )
+    return stocks
+
+
+def _market(code: str) -> str:
+    return "sh" if code.startswith("6") else "sz"
+
+
+def tencent_line(stock: Dict[str, Any]) -> str:
+    """按腾讯行情接口格式（v_sh600000="1~名称~代码~现价~..."）编码一只股票"""
+    parts = [""] * 88
+    parts[0] = "1"
+    parts[1] = stock["name"]
+    parts[2] = stock["code"]
+    parts[3] = f"{stock['price']:.2f}"
+    parts[4] = f"{stock['pre_close']:.2f}"
+    parts[5] = f"{stock['open']:.2f}"
+    parts[6] = str(int(stock["volume"]))
+    parts[30] = "20260302150000"
+    parts[31] = f"{stock['change']:.2f}"
+    parts[32] = f"{stock['change_percent']:.2f}"
+    parts[33] = f"{stock['high']:.2f}"
+    parts[34] = f"{stock['low']:.2f}"
+    parts[37] = f"{stock['amount']:.2f}"
+    parts[38] = f"{stock['turnover']:.2f}"
+    parts[39] = f"{stock['pe_ratio']:.2f}"
+    parts[45] = f"{stock['market_cap']:.2f}"
+    parts[46] = f"{stock['total_value']:.2f}"
+    parts[49] = f"{stock['volume_ratio']:.2f}"
+    return f'v_{_market(stock["code"])}{stock["code"]}="{"~".join(parts)}";'
+
+
+def tencent_payload(stocks: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    腾讯行情接口报文（每行一只股票）
+    有录制文件时返回录制内容，否则由合成行情编码
+    """
+    if stocks is None and os.path.exists(TENCENT_PAYLOAD_FILE):
+        with gzip.open(TENCENT_PAYLOAD_FILE, "rt", encoding="utf-8") as f:
+            return f.read()
+    return "\n".join(tencent_line(s) for s in (stocks or synthetic_universe()))
+
+
+def tencent_lines_by_code(payload: str) -> Dict[str, str]:
+    """按带市场前缀的代码（sh600000）索引报文行，用于模拟按批次请求"""
+    lines = {}
+    for line in payload.splitlines():
+        line = line.strip()
+        if line.startswith("v_") and "=" in line:
+            lines[line[2 : line.index("=")]] = line
+    return lines
+
+
+def akshare_spot_frame(stocks: Optional[List[Dict[str, Any]]] = None):
+    """
+    AKShare stock_zh_a_spot_em 返回的 DataFrame（中文列名，市值单位为元）
+    有录制文件时返回录制内容，否则由合成行情生成
+    """
+    import pandas as pd
+
+    if stocks is None and os.path.exists(AKSHARE_SPOT_FILE):
+        return pd.read_pickle(AKSHARE_SPOT_FILE)
+    rows = [
+        {
+            "代码": s["code"],
+            "名称": s["name"],
+            "最新价": s["price"],
+            "涨跌额": s["change"],
+            "涨跌幅": s["change_percent"],
+            "成交量": s["volume"],
+            "成交额": s["amount"],
+            "最高": s["high"],
+            "最低": s["low"],
+            "今开": s["open"],
+            "昨收": s["pre_close"],
+            "换手率": s["turnover"],
+            "量比": s["volume_ratio"],
+            "流通市值": s["market_cap"] * 100000000,
+            "总市值": s["total_value"] * 100000000,
+            "市盈率-动态": s["pe_ratio"],
+        }
+        for s in (stocks or synthetic_universe())
+    ]
+    return pd.DataFrame(rows)
@@ -0,0 +1,173 @@
+"""
+基准计时与基线比较
+- BenchmarkTimer：pytest-benchmark 未安装时的替代实现，调用方式相同（benchmark(fn, *args) / benchmark.pedantic）
+- baselines.json：各基准的中位数基线（毫秒），超过 基线 × 容差 且差值超过最小阈值时判定为退化；
+  基线记录测量时的数据来源（data_source），与当前来源不同时跳过比较
+"""
+
+import json
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# 退化判定：中位数 > 基线 × TOLERANCE 且多出 MIN_DELTA_MS 以上（避免亚毫秒级基准因噪声误报）
+DEFAULT_TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "1.5"))
+DEFAULT_MIN_DELTA_MS = float(os.getenv("BENCH_MIN_DELTA_MS", "1.0"))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩百分位（values 非空）"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summarize(timings: List[float]) -> Dict[str, float]:
+    ms = [t * 1000 for t in timings]
+    return {
+        "rounds": len(ms),
+        "min": min(ms),
+        "max": max(ms),
+        "mean": statistics.fmean(ms),
+        "median": statistics.median(ms),
+        "stddev": statistics.stdev(ms) if len(ms) > 1 else 0.0,
+    }
+
+
+class BenchmarkTimer:
+    """简化版 benchmark fixture：预热后按时间预算重复执行，统计耗时（毫秒）"""
+
+    def __init__(
+        self,
+        name: str,
+        warmup: int = 1,
+        min_rounds: int = 5,
+        max_rounds: int = 200,
+        max_time: float = 1.0,
+    ):
+        self.name = name
+        self.warmup = warmup
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.max_time = max_time
+        self.stats: Optional[Dict[str, float]] = None
+
+    def __call__(self, fn: Callable, *args, **kwargs) -> Any:
+        for _ in range(self.warmup):
+            fn(*args, **kwargs)
+        timings = []
+        deadline = time.perf_counter() + self.max_time
+        result = None
+        while len(timings) < self.min_rounds or (
+            len(timings) < self.max_rounds and time.perf_counter() < deadline
+        ):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            timings.append(time.perf_counter() - start)
+        self.stats = _summarize(timings)
+        return result
+
+    def pedantic(
+        self,
+        target: Callable,
+        args: Tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        setup: Optional[Callable] = None,
+        rounds: int = 1,
+        iterations: int = 1,
+        warmup_rounds: int = 0,
+    ) -> Any:
+        """与 pytest-benchmark 的 pedantic 一致：setup 每轮执行且不计时，可返回 (args, kwargs)"""
+
+        def run_once():
+            call_args, call_kwargs = args, kwargs or {}
+            if setup is not None:
+                prepared = setup()
+                if prepared is not None:
+                    call_args, call_kwargs = prepared
+            start = time.perf_counter()
+            for _ in range(iterations):
+                value = target(*call_args, **call_kwargs)
+            return value, (time.perf_counter() - start) / iterations
+
+        for _ in range(warmup_rounds):
+            run_once()
+        timings = []
+        result = None
+        for _ in range(rounds):
+            result, elapsed = run_once()
+            timings.append(elapsed)
+        self.stats = _summarize(timings)
+        return result
+
+
+def median_ms(benchmark) -> Optional[float]:
+    """取基准中位数（毫秒），兼容 pytest-benchmark 与 BenchmarkTimer"""
+    stats = getattr(benchmark, "stats", None)
+    if stats is None:
+        return None
+    if isinstance(stats, dict):
+        return stats["median"]
+    return stats.stats.median * 1000  # pytest-benchmark：秒
+
+
+# 未记录 data_source 的旧基线都是用合成行情测量的
+DEFAULT_DATA_SOURCE = "synthetic"
+
+
+def load_baselines(path: str = BASELINE_FILE) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"benchmarks": {}, "data_source": DEFAULT_DATA_SOURCE}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baselines(
+    results: Dict[str, float],
+    note: str = "",
+    path: str = BASELINE_FILE,
+    data_source: str = DEFAULT_DATA_SOURCE,
+):
+    """写入新基线（同一数据来源时保留未运行基准的旧值，来源变化时整体替换）"""
+    data = load_baselines(path)
+    if data.get("data_source", DEFAULT_DATA_SOURCE) != data_source:
+        data = {"benchmarks": {}}
+    data["data_source"] = data_source
+    data.setdefault("benchmarks", {})
+    for name, median in sorted(results.items()):
+        data["benchmarks"][name] = {"median_ms": round(median, 3)}
+    if note:
+        data["note"] = note
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(
+    name: str,
+    median: float,
+    baselines: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+    data_source: str = DEFAULT_DATA_SOURCE,
+) -> Dict[str, Any]:
+    """
+    与基线比较（基线的数据来源与 data_source 不同时不比较）
+
+    Returns:
+        {"baseline", "ratio", "regressed", "skipped"}，无基线或跳过比较时 baseline/ratio 为 None，
+        skipped 为基线的数据来源
+    """
+    baseline_source = baselines.get("data_source", DEFAULT_DATA_SOURCE)
+    if baseline_source != data_source:
+        return {"baseline": None, "ratio": None, "regressed": False, "skipped": baseline_source}
+    entry = baselines.get("benchmarks", {}).get(name)
+    if not entry:
+        return {"baseline": None, "ratio": None, "regressed": False, "skipped": None}
+    baseline = entry["median_ms"]
+    ratio = median / baseline if baseline > 0 else None
+    regressed = median > baseline * tolerance and median - baseline > min_delta_ms
+    return {"baseline": baseline, "ratio": ratio, "regressed": regressed, "skipped": None}
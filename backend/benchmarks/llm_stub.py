@@ -0,0 +1,223 @@
+"""
+本地 LLM 模拟服务
+兼容 GLMService 使用的 chat/completions 格式和 GeminiService 的 {"text": ...} 格式，
+可配置延迟、错误率、限流（429）和并发上限，用于离线压测 AI 链路
+
+用法：
+    python -m benchmarks.llm_stub --port 8765 --latency 0.8 --max-concurrency 1
+    GLM_BASE_URL=http://127.0.0.1:8765/api/paas/v4/chat/completions python main.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+GLM_PATH = "/api/paas/v4/chat/completions"
+GEMINI_PATH = "/gemini"
+
+_CODE_PATTERN = re.compile(r"代码(\d{6})")
+_REPLY = "走势平稳，量价配合良好，适合轻仓关注"
+
+
+def _chat_content(prompt: str) -> str:
+    """按提示词类型生成回复（批量提示词返回 JSON）"""
+    if "只输出一个 JSON" in prompt:
+        codes = _CODE_PATTERN.findall(prompt)
+        payload: Dict[str, Any] = {"stocks": {code: _REPLY for code in codes}}
+        if "市场情绪：" in prompt:
+            payload["market_emotion"] = "市场情绪中性，控制仓位为主"
+        if "风险提示：" in prompt:
+            payload["risk_warning"] = "注意追高风险，严格设置止损"
+        return "```json\n" + json.dumps(payload, ensure_ascii=False) + "\n```"
+    return _REPLY
+
+
+class LLMStubServer:
+    """模拟 LLM 服务（后台线程运行）"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.5,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        max_concurrency: int = 0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 端口（0 表示随机可用端口）
+            latency: 每次请求的基础延迟（秒）
+            jitter: 延迟随机抖动上限（秒）
+            error_rate: 返回 500 的概率
+            rate_limit_rate: 返回 429 的概率
+            max_concurrency: 并发上限，超出返回 429（0 表示不限制）
+            seed: 随机种子
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_concurrency = max_concurrency
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._active = 0
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "peak_concurrency": 0,
+        }
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                status, payload = stub._handle(self.path, body)
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def glm_url(self) -> str:
+        return self.base_url + GLM_PATH
+
+    @property
+    def gemini_url(self) -> str:
+        return self.base_url + GEMINI_PATH
+
+    def _handle(self, path: str, body: Dict[str, Any]):
+        with self._lock:
+            self.stats["requests"] += 1
+            request_id = self.stats["requests"]
+            draw = self._rng.random()
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            if self.max_concurrency and self._active >= self.max_concurrency:
+                self.stats["rate_limited"] += 1
+                return 429, {"error": {"code": "1302", "message": "并发数过高"}}
+            self._active += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self._active)
+
+        try:
+            if draw < self.rate_limit_rate:
+                with self._lock:
+                    self.stats["rate_limited"] += 1
+                return 429, {"error": {"code": "1302", "message": "请求频率过高"}}
+            time.sleep(delay)
+            if draw < self.rate_limit_rate + self.error_rate:
+                with self._lock:
+                    self.stats["errors"] += 1
+                return 500, {"error": {"code": "500", "message": "模拟服务错误"}}
+
+            with self._lock:
+                self.stats["ok"] += 1
+            if "messages" in body:
+                prompt = body["messages"][-1].get("content", "")
+                content = _chat_content(prompt)
+                return 200, {
+                    "id": f"stub-{request_id}",
+                    "model": body.get("model", "glm-4-flash"),
+                    "created": int(time.time()),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": content},
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": len(prompt),
+                        "completion_tokens": len(content),
+                        "total_tokens": len(prompt) + len(content),
+                    },
+                }
+            text = str(body.get("text", ""))
+            return 200, {
+                "score": round(50 + (sum(map(ord, text)) % 50), 1),
+                "details": {"model": body.get("model"), "length": len(text)},
+            }
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def start(self) -> "LLMStubServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LLMStubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 LLM 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.8, help="基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.2, help="延迟抖动上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 错误概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 限流概率")
+    parser.add_argument("--max-concurrency", type=int, default=1, help="并发上限，0 表示不限制")
+    args = parser.parse_args()
+
+    server = LLMStubServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_concurrency=args.max_concurrency,
+    )
+    print(f"🤖 LLM 模拟服务已启动: {server.base_url}")
+    print(f"   GLM_BASE_URL={server.glm_url}")
+    print(f"   Gemini endpoint={server.gemini_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 统计: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
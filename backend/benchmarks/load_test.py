@@ -0,0 +1,351 @@
+"""
+并发压测
+以子进程（uvicorn）启动服务，腾讯行情和 GLM 均指向本地模拟服务，
+N 个虚拟用户按权重混合请求各接口，统计每个接口的吞吐和延迟分位数
+
+用法（在 backend 目录下）：
+    python -m benchmarks.load_test --users 50 --duration 30
+    python -m benchmarks.load_test --mix realtime=5,hot=2,ping=1 --json
+    python -m benchmarks.load_test --url http://127.0.0.1:8000   # 压测已启动的服务（上游需自行配置）
+
+场景：
+    screen       /api/band-trading-realtime（随机策略，命中筛选缓存）
+    screen_cold  /api/band-trading-realtime（扰动市值上限，每次都走完整筛选 + AI 后台任务）
+    hot          /api/hot
+    realtime     /api/realtime（单只股票，直连腾讯接口）
+    filter       /api/filter（5只股票）
+    market       /api/market-environment
+    ping         /（不做任何计算；其延迟上升说明事件循环被同步代码阻塞）
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from benchmarks.harness import percentile
+from benchmarks.llm_stub import LLMStubServer
+from benchmarks.upstream_stub import QuoteStubServer
+
+
+STRATEGIES = ("balanced", "aggressive", "conservative")
+DEFAULT_MIX = "screen=2,screen_cold=1,hot=2,realtime=4,filter=2,market=2,ping=1"
+
+
+def _screen(rng: random.Random, codes: List[str]) -> Tuple[str, Dict[str, Any]]:
+    return "/api/band-trading-realtime", {"strategy_type": rng.choice(STRATEGIES)}
+
+
+def _screen_cold(rng: random.Random, codes: List[str]) -> Tuple[str, Dict[str, Any]]:
+    return "/api/band-trading-realtime", {
+        "strategy_type": rng.choice(STRATEGIES),
+        "market_cap_max": round(150 + rng.random() * 20, 4),
+    }
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, List[str]], Tuple[str, Dict[str, Any]]]] = {
+    "screen": _screen,
+    "screen_cold": _screen_cold,
+    "hot": lambda rng, codes: ("/api/hot", {"limit": 20}),
+    "realtime": lambda rng, codes: ("/api/realtime", {"code": rng.choice(codes)}),
+    "filter": lambda rng, codes: ("/api/filter", {"codes": ",".join(rng.sample(codes, 5))}),
+    "market": lambda rng, codes: ("/api/market-environment", {}),
+    "ping": lambda rng, codes: ("/", {}),
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """解析 "name=weight,..." 形式的请求配比"""
+    mix = {}
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"未知场景: {name}（可选: {', '.join(SCENARIOS)}）")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"场景权重不能为负: {item}")
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("请求配比为空")
+    return mix
+
+
+def summarize(
+    latencies: Dict[str, List[float]], errors: Dict[str, Dict[str, int]], duration: float
+) -> Dict[str, Dict[str, Any]]:
+    """
+    按场景汇总（延迟单位：毫秒，只统计成功请求）
+
+    Returns:
+        {场景: {"requests", "errors", "rps", "p50", "p90", "p99", "max"}}，另含合计 "total"
+    """
+    report = {}
+    names = sorted(set(latencies) | set(errors))
+    for name in names + ["total"]:
+        if name == "total":
+            values = [v for name_ in names for v in latencies.get(name_, [])]
+            failed = sum(sum(errors.get(name_, {}).values()) for name_ in names)
+        else:
+            values = latencies.get(name, [])
+            failed = sum(errors.get(name, {}).values())
+        row: Dict[str, Any] = {
+            "requests": len(values) + failed,
+            "errors": failed,
+            "rps": round((len(values) + failed) / duration, 1) if duration > 0 else 0.0,
+        }
+        for pct in (50, 90, 99):
+            row[f"p{pct}"] = round(percentile(values, pct), 1) if values else None
+        row["max"] = round(max(values), 1) if values else None
+        if name != "total" and errors.get(name):
+            row["error_kinds"] = dict(errors[name])
+        report[name] = row
+    return report
+
+
+async def run_load(
+    base_url: str,
+    codes: List[str],
+    mix: Dict[str, float],
+    users: int = 20,
+    duration: float = 30.0,
+    think: float = 0.0,
+    timeout: float = 60.0,
+    seed: int = 7,
+) -> Dict[str, Any]:
+    """N 个虚拟用户在 duration 秒内按配比循环请求，返回 summarize() 的结果"""
+    import httpx
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, Dict[str, int]] = {}
+
+    async def user(client: "httpx.AsyncClient", index: int, deadline: float):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            path, params = SCENARIOS[name](rng, codes)
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                kind = None if response.status_code == 200 else f"http_{response.status_code}"
+                if kind is None and response.json().get("success") is False:
+                    kind = "success_false"
+            except Exception as e:
+                kind = type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            if kind is None:
+                latencies[name].append(elapsed)
+            else:
+                bucket = errors.setdefault(name, {})
+                bucket[kind] = bucket.get(kind, 0) + 1
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(user(client, i, deadline) for i in range(users)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors, elapsed)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务启动失败（退出码 {process.returncode}）")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("服务启动超时")
+
+
+def start_server(env: Dict[str, str], workers: int = 1, workdir: Optional[str] = None):
+    """
+    在临时目录中以子进程启动 uvicorn（缓存、数据库写入临时目录，日志写入 server.log）
+
+    Returns:
+        (base_url, process, workdir)
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="load_test_")
+    port = _free_port()
+    log = open(os.path.join(workdir, "server.log"), "wb")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=workdir,
+        env={**os.environ, "PYTHONPATH": BACKEND, "PYTHONUNBUFFERED": "1", **env},
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    log.close()
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url, process)
+    except Exception:
+        process.terminate()
+        process.wait(10)
+        raise
+    return base_url, process, workdir
+
+
+def run(
+    mix: Dict[str, float],
+    users: int = 20,
+    duration: float = 30.0,
+    think: float = 0.0,
+    workers: int = 1,
+    quote_latency: float = 0.05,
+    quote_error_rate: float = 0.0,
+    llm_latency: float = 0.8,
+    min_interval: float = 1.2,
+    ai: bool = True,
+    warmup: bool = True,
+    url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """启动模拟上游和服务，执行压测并返回结果"""
+    if url:
+        from benchmarks.fixtures import synthetic_universe
+
+        codes = [s["code"] for s in synthetic_universe()]
+        report = asyncio.run(run_load(url, codes, mix, users, duration, think))
+        return {"endpoints": report, "users": users, "duration": duration}
+
+    quotes = QuoteStubServer(
+        latency=quote_latency, jitter=quote_latency / 2, error_rate=quote_error_rate, seed=7
+    )
+    llm = LLMStubServer(latency=llm_latency, jitter=llm_latency / 4, max_concurrency=1, seed=7)
+    with quotes, llm:
+        env = {
+            "TENCENT_QUOTE_URL": quotes.quote_url,
+            "AKSHARE_ENABLED": "false",
+            "GLM_BASE_URL": llm.glm_url,
+            "GLM_MIN_INTERVAL": str(min_interval),
+            "GLM_API_KEY": "load-test-key" if ai else "",
+            "ZHIPUAI_API_KEY": "",
+            "GEMINI_ENABLED": "false",
+        }
+        codes = [code[2:] for code in quotes.lines]
+        base_url, process, workdir = start_server(env, workers=workers)
+        try:
+            if warmup:
+                import httpx
+
+                # 首次请求拉取全市场快照，不计入结果
+                httpx.get(base_url + "/api/market-environment", timeout=120)
+            report = asyncio.run(run_load(base_url, codes, mix, users, duration, think))
+        finally:
+            process.terminate()
+            try:
+                process.wait(15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+        return {
+            "endpoints": report,
+            "users": users,
+            "duration": duration,
+            "workers": workers,
+            "quote_stub": dict(quotes.stats),
+            "llm_stub": dict(llm.stats),
+            "server_log": os.path.join(workdir, "server.log"),
+        }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    def cell(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    lines = [
+        f"{'场景':<12} {'请求':>7} {'错误':>6} {'rps':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"
+    ]
+    for name, row in result["endpoints"].items():
+        lines.append(
+            f"{name:<12} {row['requests']:>7} {row['errors']:>6} {row['rps']:>8.1f} "
+            f"{cell(row['p50']):>9} {cell(row['p90']):>9} {cell(row['p99']):>9} {cell(row['max']):>9}"
+        )
+        if row.get("error_kinds"):
+            lines.append(f"{'':<12} ⚠️ {row['error_kinds']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发压测（本地模拟上游）")
+    parser.add_argument("--users", type=int, default=20, help="虚拟用户数（并发连接数）")
+    parser.add_argument("--duration", type=float, default=30.0, help="压测时长（秒）")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"请求配比（默认 {DEFAULT_MIX}）")
+    parser.add_argument("--think", type=float, default=0.0, help="每次请求后的平均等待（秒）")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 进程数")
+    parser.add_argument("--quote-latency", type=float, default=0.05, help="模拟腾讯接口延迟（秒）")
+    parser.add_argument("--quote-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="模拟 LLM 延迟（秒）")
+    parser.add_argument("--min-interval", type=float, default=1.2, help="GLM 请求最小间隔（秒）")
+    parser.add_argument("--no-ai", action="store_true", help="不配置 GLM_API_KEY")
+    parser.add_argument("--no-warmup", action="store_true", help="不预先拉取全市场快照")
+    parser.add_argument("--url", help="压测已启动的服务（不启动模拟上游）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"🏁 并发压测：{args.users}个用户，{args.duration:.0f}秒，配比 {args.mix}")
+    result = run(
+        mix,
+        users=args.users,
+        duration=args.duration,
+        think=args.think,
+        workers=args.workers,
+        quote_latency=args.quote_latency,
+        quote_error_rate=args.quote_error_rate,
+        llm_latency=args.llm_latency,
+        min_interval=args.min_interval,
+        ai=not args.no_ai,
+        warmup=not args.no_warmup,
+        url=args.url,
+    )
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print("\n" + format_report(result) + "\n（延迟单位 ms，仅统计成功请求）")
+        if "quote_stub" in result:
+            print(f"\n📊 行情模拟服务: {result['quote_stub']}")
+            print(f"📊 LLM 模拟服务:  {result['llm_stub']}")
+            print(f"📄 服务日志: {result['server_log']}")
+
+
+if __name__ == "__main__":
+    main()
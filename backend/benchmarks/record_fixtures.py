@@ -0,0 +1,66 @@
+"""
+录制基准数据（需要网络，在 backend 目录下运行）
+录制后的文件保存在 benchmarks/data/，离线基准优先使用录制数据
+
+用法：
+    python -m benchmarks.record_fixtures                # 录制腾讯全市场报文 + AKShare 实时行情
+    python -m benchmarks.record_fixtures --skip-akshare
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import os
+import sys
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from benchmarks.fixtures import AKSHARE_SPOT_FILE, DATA_DIR, TENCENT_PAYLOAD_FILE
+
+
+def record_tencent(batch_size: int = 100) -> int:
+    """按实时筛选相同的分批方式请求腾讯接口，保存原始报文（UTF-8）"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        from main import fetch_qq_stock_data, generate_stock_codes
+
+    codes = generate_stock_codes()
+    lines = []
+    for i in range(0, len(codes), batch_size):
+        data = fetch_qq_stock_data(codes[i : i + batch_size])
+        lines.extend(line.strip() for line in data.strip().split("\n") if line.strip())
+        print(f"⏳ 腾讯接口：{min(i + batch_size, len(codes))}/{len(codes)}", end="\r")
+
+    with gzip.open(TENCENT_PAYLOAD_FILE, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return len(lines)
+
+
+def record_akshare() -> int:
+    """保存 ak.stock_zh_a_spot_em() 的原始 DataFrame"""
+    import akshare as ak
+
+    df = ak.stock_zh_a_spot_em()
+    df.to_pickle(AKSHARE_SPOT_FILE, compression="gzip")
+    return len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制基准数据")
+    parser.add_argument("--skip-tencent", action="store_true")
+    parser.add_argument("--skip-akshare", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    if not args.skip_tencent:
+        count = record_tencent()
+        print(f"\n✅ 腾讯报文已录制：{count}只 → {TENCENT_PAYLOAD_FILE}")
+    if not args.skip_akshare:
+        count = record_akshare()
+        print(f"✅ AKShare 实时行情已录制：{count}只 → {AKSHARE_SPOT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+本地行情上游模拟服务
+按腾讯行情接口格式（GET /q=sh600000,sz000001，GBK 编码）回放录制/合成报文，
+可配置延迟、错误率，用于离线压测
+
+用法：
+    python -m benchmarks.upstream_stub --port 8766 --latency 0.05
+    TENCENT_QUOTE_URL=http://127.0.0.1:8766/q= AKSHARE_ENABLED=false python main.py
+"""
+
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+from benchmarks.fixtures import tencent_lines_by_code, tencent_payload
+
+
+QUOTE_PATH = "/q="
+
+
+class QuoteStubServer:
+    """模拟腾讯行情接口（后台线程运行）"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        payload: Optional[str] = None,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 端口（0 表示随机可用端口）
+            payload: 腾讯报文（默认使用录制/合成报文）
+            latency: 每次请求的基础延迟（秒）
+            jitter: 延迟随机抖动上限（秒）
+            error_rate: 返回 500 的概率
+            seed: 随机种子
+        """
+        self.lines: Dict[str, str] = tencent_lines_by_code(
+            payload if payload is not None else tencent_payload()
+        )
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._active = 0
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "errors": 0,
+            "codes": 0,
+            "peak_concurrency": 0,
+        }
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, text = stub._handle(self.path)
+                data = text.encode("gbk", errors="replace")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain; charset=GBK")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def quote_url(self) -> str:
+        """TENCENT_QUOTE_URL 的取值"""
+        return self.base_url + QUOTE_PATH
+
+    def render(self, codes: List[str]) -> str:
+        """按请求顺序拼接报文行，未知代码与真实接口一样返回 v_pv_none_match"""
+        return "\n".join(self.lines.get(code, 'v_pv_none_match="1";') for code in codes)
+
+    def _handle(self, path: str):
+        with self._lock:
+            self.stats["requests"] += 1
+            draw = self._rng.random()
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            self._active += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self._active)
+
+        try:
+            if not path.startswith(QUOTE_PATH):
+                with self._lock:
+                    self.stats["errors"] += 1
+                return 404, "not found"
+            time.sleep(delay)
+            if draw < self.error_rate:
+                with self._lock:
+                    self.stats["errors"] += 1
+                return 500, "模拟服务错误"
+
+            codes = [c for c in unquote(path[len(QUOTE_PATH) :]).split(",") if c]
+            with self._lock:
+                self.stats["ok"] += 1
+                self.stats["codes"] += len(codes)
+            return 200, self.render(codes)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def start(self) -> "QuoteStubServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "QuoteStubServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地行情上游模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.05, help="基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.02, help="延迟抖动上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 错误概率")
+    args = parser.parse_args()
+
+    server = QuoteStubServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    print(f"📈 行情模拟服务已启动: {server.base_url}（{len(server.lines)}只股票）")
+    print(f"   TENCENT_QUOTE_URL={server.quote_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 统计: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,12 @@
 """
 
 from core.config import config, band_trading_config
-from core.cache import cache_manager
+from core.cache import memory_cache
+from core.history import history_store
 
-__all__ = ["config", "band_trading_config", "cache_manager"]
+__all__ = [
+    "config",
+    "band_trading_config",
+    "memory_cache",
+    "history_store",
+]
@@ -1,67 +1,375 @@
 """
 缓存管理模块
 集中管理全局缓存
+- MemoryCache: 多键 TTL/LRU 缓存，按命名空间统计
 """
 
+import sys
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 from core.config import config
 
 
-class Cache:
-    """简单内存缓存"""
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    估算对象占用内存（字节）
+    DataFrame 使用 memory_usage(deep=True)，容器递归估算，大列表按前100项抽样
+    """
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage) and hasattr(value, "columns"):
+        try:
+            return int(memory_usage(deep=True).sum())
+        except Exception:
+            pass
 
-    def __init__(self, ttl: int = 60):
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        items = list(value.items())
+        sample = items[:100]
+        if sample:
+            sampled = sum(
+                estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+                for k, v in sample
+            )
+            size += sampled * len(items) // len(sample)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = value if isinstance(value, (list, tuple)) else list(value)
+        sample = items[:100]
+        if sample:
+            sampled = sum(estimate_size(v, _depth + 1) for v in sample)
+            size += sampled * len(items) // len(sample)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "created_at")
+
+    def __init__(self, value: Any, expires_at: float, size: int, created_at: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.created_at = created_at
+
+
+class _Namespace:
+    """命名空间配置与统计"""
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "entries": self.entries,
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+        }
+
+
+class _InFlight:
+    """正在加载中的键（同一键并发请求只加载一次）"""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MemoryCache:
+    """
+    多键内存缓存（线程安全）
+    - 按命名空间配置 TTL 与容量
+    - 全局按字节数/条目数做 LRU 淘汰
+    - get_or_load 对同一键合并并发加载
+    - 记录命中/未命中/淘汰计数
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 20000,
+        max_bytes: int = 256 * 1024 * 1024,
+        default_ttl: float = 60,
+    ):
         """
         初始化缓存
-        :param ttl: 缓存过期时间（秒）
+        :param max_entries: 全局条目上限
+        :param max_bytes: 全局内存预算（字节，估算值）
+        :param default_ttl: 未配置命名空间的默认过期时间（秒）
         """
-        self._data: Optional[Any] = None
-        self._timestamp: Optional[float] = None
-        self._ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Tuple[str, Hashable], _Entry]" = OrderedDict()
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._inflight: Dict[Tuple[str, Hashable], _InFlight] = {}
+        self._lock = threading.RLock()
+        self._total_bytes = 0
+        self._sets_since_sweep = 0
 
-    def get(self) -> Optional[Any]:
-        """获取缓存数据"""
-        if self._data is None or self._timestamp is None:
-            return None
+    def configure_namespace(
+        self,
+        namespace: str,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        配置命名空间
+        :param ttl: 过期时间（秒）
+        :param max_entries: 该命名空间条目上限
+        :param max_bytes: 该命名空间内存预算（字节）
+        """
+        with self._lock:
+            ns = self._ns(namespace)
+            if ttl is not None:
+                ns.ttl = ttl
+            if max_entries is not None:
+                ns.max_entries = max_entries
+            if max_bytes is not None:
+                ns.max_bytes = max_bytes
+            self._enforce_namespace(namespace, ns)
 
-        if time.time() - self._timestamp > self._ttl:
-            # 缓存过期
-            self._data = None
-            self._timestamp = None
+    def _ns(self, namespace: str) -> _Namespace:
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            ns = self._namespaces[namespace] = _Namespace(self.default_ttl)
+        return ns
+
+    def _remove(self, full_key: Tuple[str, Hashable], reason: str):
+        entry = self._data.pop(full_key, None)
+        if entry is None:
+            return
+        ns = self._ns(full_key[0])
+        ns.entries -= 1
+        ns.bytes -= entry.size
+        self._total_bytes -= entry.size
+        if reason == "evict":
+            ns.evictions += 1
+        elif reason == "expire":
+            ns.expirations += 1
+
+    def _lookup(self, namespace: str, key: Hashable) -> Optional[_Entry]:
+        full_key = (namespace, key)
+        entry = self._data.get(full_key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(full_key, "expire")
             return None
+        self._data.move_to_end(full_key)
+        return entry
 
-        return self._data
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，未命中或过期返回 default"""
+        with self._lock:
+            entry = self._lookup(namespace, key)
+            ns = self._ns(namespace)
+            if entry is None:
+                ns.misses += 1
+                return default
+            ns.hits += 1
+            return entry.value
 
-    def set(self, data: Any):
-        """设置缓存数据"""
-        self._data = data
-        self._timestamp = time.time()
+    def age(self, namespace: str, key: Hashable) -> Optional[float]:
+        """返回缓存条目的年龄（秒），不存在返回 None（不计入命中统计）"""
+        with self._lock:
+            entry = self._lookup(namespace, key)
+            return None if entry is None else time.time() - entry.created_at
 
-    def clear(self):
-        """清除缓存"""
-        self._data = None
-        self._timestamp = None
+    def set(
+        self,
+        namespace: str,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        size: Optional[int] = None,
+        created_at: Optional[float] = None,
+    ):
+        """
+        写入缓存
+        :param ttl: 覆盖命名空间默认 TTL（从现在起计算）
+        :param size: 已知的占用字节数（不传则估算）
+        :param created_at: 数据的生成时间（从磁盘恢复的条目沿用原时间，age() 据此计算）
+        """
+        if size is None:
+            size = estimate_size(value)
+        now = time.time()
+        full_key = (namespace, key)
+        with self._lock:
+            ns = self._ns(namespace)
+            self._remove(full_key, "replace")
+            expires_at = now + (ns.ttl if ttl is None else ttl)
+            created_at = now if created_at is None else created_at
+            self._data[full_key] = _Entry(value, expires_at, size, created_at)
+            ns.entries += 1
+            ns.bytes += size
+            self._total_bytes += size
 
-    def is_valid(self) -> bool:
-        """检查缓存是否有效"""
-        return self.get() is not None
+            self._sets_since_sweep += 1
+            if self._sets_since_sweep >= 256:
+                self._sweep_expired()
+            self._enforce_namespace(namespace, ns)
+            self._enforce_global()
 
+    def get_or_load(
+        self,
+        namespace: str,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        获取缓存，未命中时调用 loader 加载
+        同一键的并发请求只会触发一次 loader，其余请求等待结果
+        :param cache_if: 判断结果是否写入缓存（如空结果不缓存）
+        """
+        full_key = (namespace, key)
+        with self._lock:
+            entry = self._lookup(namespace, key)
+            ns = self._ns(namespace)
+            if entry is not None:
+                ns.hits += 1
+                return entry.value
+            ns.misses += 1
+            inflight = self._inflight.get(full_key)
+            if inflight is None:
+                inflight = self._inflight[full_key] = _InFlight()
+                owner = True
+                ns.loads += 1
+            else:
+                owner = False
+                ns.coalesced += 1
 
-class CacheManager:
-    """缓存管理器"""
+        if not owner:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value
 
-    def __init__(self):
-        # 股票数据缓存
-        self.stock_data = Cache(ttl=config.CACHE_TTL_STOCK)
-        # 市场环境缓存
-        self.market_env = Cache(ttl=config.CACHE_TTL_MARKET)
+        try:
+            value = loader()
+            if cache_if is None or cache_if(value):
+                self.set(namespace, key, value, ttl=ttl)
+            inflight.value = value
+            return value
+        except BaseException as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(full_key, None)
+            inflight.event.set()
+
+    def entries(self, namespace: str) -> List[Tuple[Hashable, Any, float, float]]:
+        """导出命名空间内未过期的条目及其过期时间：[(key, value, created_at, expires_at)]"""
+        now = time.time()
+        with self._lock:
+            return [
+                (k[1], e.value, e.created_at, e.expires_at)
+                for k, e in self._data.items()
+                if k[0] == namespace and e.expires_at > now
+            ]
+
+    def delete(self, namespace: str, key: Hashable):
+        """删除单个键"""
+        with self._lock:
+            self._remove((namespace, key), "delete")
+
+    def clear(self, namespace: Optional[str] = None):
+        """清除缓存（不传命名空间则全部清除）"""
+        with self._lock:
+            keys = [k for k in self._data if namespace is None or k[0] == namespace]
+            for full_key in keys:
+                self._remove(full_key, "delete")
+
+    def shrink(self, nbytes: int) -> int:
+        """
+        按 LRU 顺序淘汰条目，直到释放至少 nbytes（估算值）
+        :return: 实际释放的字节数
+        """
+        freed = 0
+        with self._lock:
+            self._sweep_expired()
+            while self._data and freed < nbytes:
+                full_key = next(iter(self._data))
+                freed += self._data[full_key].size
+                self._remove(full_key, "evict")
+        return freed
+
+    def _sweep_expired(self):
+        self._sets_since_sweep = 0
+        now = time.time()
+        expired = [k for k, e in self._data.items() if e.expires_at <= now]
+        for full_key in expired:
+            self._remove(full_key, "expire")
+
+    def _enforce_namespace(self, namespace: str, ns: _Namespace):
+        if ns.max_entries is None and ns.max_bytes is None:
+            return
+        if (ns.max_entries is None or ns.entries <= ns.max_entries) and (
+            ns.max_bytes is None or ns.bytes <= ns.max_bytes
+        ):
+            return
+        for full_key in [k for k in self._data if k[0] == namespace]:
+            if (ns.max_entries is None or ns.entries <= ns.max_entries) and (
+                ns.max_bytes is None or ns.bytes <= ns.max_bytes
+            ):
+                break
+            self._remove(full_key, "evict")
+
+    def _enforce_global(self):
+        while self._data and (
+            len(self._data) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._data)), "evict")
 
-    def clear_all(self):
-        """清除所有缓存"""
-        self.stock_data.clear()
-        self.market_env.clear()
+    def stats(self) -> Dict[str, Any]:
+        """各命名空间统计 + 全局占用"""
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "namespaces": {
+                    name: ns.stats() for name, ns in sorted(self._namespaces.items())
+                },
+            }
 
 
-# 全局缓存实例
-cache_manager = CacheManager()
+# 全局多键缓存（AKShare 数据、行情快照、筛选结果等共用）
+memory_cache = MemoryCache(
+    max_entries=config.MEMORY_CACHE_MAX_ENTRIES,
+    max_bytes=config.MEMORY_CACHE_MAX_MB * 1024 * 1024,
+)
@@ -6,6 +6,11 @@
 import os
 from typing import List
 
+from dotenv import load_dotenv
+
+# 配置项在类定义时读取环境变量：先加载 .env（API 服务、scheduler.py 等入口共用）
+load_dotenv()
+
 
 class Config:
     """应用配置类"""
@@ -30,17 +35,111 @@ class Config:
         """智谱AI API Key"""
         return os.getenv("GLM_API_KEY") or os.getenv("ZHIPUAI_API_KEY", "")
 
+    GLM_BASE_URL = os.getenv(
+        "GLM_BASE_URL", "https://open.bigmodel.cn/api/paas/v4/chat/completions"
+    )
     GLM_MODEL = os.getenv("GLM_MODEL", "glm-4-flash")
     GLM_TEMPERATURE = float(os.getenv("GLM_MODEL_TEMPERATURE", "0.7"))
     GLM_MAX_TOKENS = int(os.getenv("GLM_MODEL_MAX_TOKENS", "4096"))
+    # 两次请求的最小间隔（秒），GLM-4-Flash 并发限制=1
+    GLM_MIN_INTERVAL = float(os.getenv("GLM_MIN_INTERVAL", "1.2"))
+    # 批量分析时每次请求包含的股票数
+    GLM_BATCH_SIZE = int(os.getenv("GLM_BATCH_SIZE", "10"))
 
     # 服务器配置
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", "8000"))
 
+    # 行情数据源（离线压测时指向本地模拟服务 python -m benchmarks.upstream_stub）
+    TENCENT_QUOTE_URL = os.getenv("TENCENT_QUOTE_URL", "https://qt.gtimg.cn/q=")
+    AKSHARE_ENABLED = os.getenv("AKSHARE_ENABLED", "true").lower() in ("true", "1", "yes", "on")
+    # 首选源超过该时间(秒)未返回时启动备用源（0 表示只在失败时降级）
+    SOURCE_HEDGE_AFTER = float(os.getenv("SOURCE_HEDGE_AFTER", "5"))
+    SOURCE_HEALTH_WINDOW = int(os.getenv("SOURCE_HEALTH_WINDOW", "50"))  # 健康统计窗口(次)
+    SOURCE_FAILURE_THRESHOLD = int(os.getenv("SOURCE_FAILURE_THRESHOLD", "3"))  # 连续失败熔断
+    SOURCE_RESET_TIMEOUT = float(os.getenv("SOURCE_RESET_TIMEOUT", "60"))  # 熔断冷却(秒)
+    # 腾讯分批拉取：失败批次拆小后带抖动退避重试，每轮重试次数和时间有上限
+    TENCENT_BATCH_SIZE = int(os.getenv("TENCENT_BATCH_SIZE", "100"))
+    TENCENT_RETRY_BATCH_SIZE = int(os.getenv("TENCENT_RETRY_BATCH_SIZE", "25"))
+    TENCENT_RETRY_BUDGET = int(os.getenv("TENCENT_RETRY_BUDGET", "20"))  # 每轮最多重试请求数
+    TENCENT_RETRY_ATTEMPTS = int(os.getenv("TENCENT_RETRY_ATTEMPTS", "3"))  # 单个代码最多尝试次数
+    TENCENT_RETRY_DEADLINE = float(os.getenv("TENCENT_RETRY_DEADLINE", "20"))  # 超过(秒)不再重试
+
+    # 交易日历：额外休市日（逗号分隔 YYYY-MM-DD，AKShare 可用时另加载交易所交易日历）
+    TRADING_HOLIDAYS = os.getenv("TRADING_HOLIDAYS", "")
+    # 收盘/午休后多少秒视为行情落定，此后的快照一直缓存到下一次开盘
+    MARKET_SETTLE_SECONDS = float(os.getenv("MARKET_SETTLE_SECONDS", "300"))
+    # 定时筛选/预热在交易时段内的间隔(分钟)，休市期间不执行
+    SCHEDULE_INTERVAL_MINUTES = float(os.getenv("SCHEDULE_INTERVAL_MINUTES", "30"))
+
+    # 进程内定时筛选（/api/band-trading 的数据来源）；false 时可改用独立的 scheduler.py
+    SCREENING_SCHEDULER_ENABLED = os.getenv("SCREENING_SCHEDULER_ENABLED", "true").lower() in (
+        "true", "1", "yes", "on"
+    )
+    # 结果持久化文件（重启后恢复；留空只保存在内存中）
+    SCREENING_RESULT_FILE = os.getenv("SCREENING_RESULT_FILE", "screening_result.json")
+    SCREENING_RESULT_MAX_AGE = int(os.getenv("SCREENING_RESULT_MAX_AGE", "3600"))  # 结果有效期(秒)
+
+    # 多进程共享快照目录（uvicorn --workers N 时设置，如 /dev/shm/boduan）：
+    # 一个进程拉取行情/数据表并发布，其余进程只读挂载；留空时每个进程独立拉取
+    SHARED_SNAPSHOT_DIR = os.getenv("SHARED_SNAPSHOT_DIR", "")
+    SHARED_SNAPSHOT_GRACE = float(os.getenv("SHARED_SNAPSHOT_GRACE", "30"))  # 允许超出 TTL 的秒数
+    SHARED_SNAPSHOT_POLL = float(os.getenv("SHARED_SNAPSHOT_POLL", "5"))  # 只读进程检查新版本间隔(秒)
+
     # 缓存配置
     CACHE_TTL_STOCK = int(os.getenv("CACHE_TTL_STOCK", "60"))  # 股票数据缓存(秒)
+    # 缓存过期后仍可先返回预热快照（后台刷新）的最大年龄(秒)；休市期间落定的快照有效到下一次开盘
+    STOCK_DATA_MAX_STALE = int(os.getenv("STOCK_DATA_MAX_STALE", "180"))
     CACHE_TTL_MARKET = int(os.getenv("CACHE_TTL_MARKET", "300"))  # 市场环境缓存(秒)
+    MEMORY_CACHE_MAX_MB = int(os.getenv("MEMORY_CACHE_MAX_MB", "256"))  # 内存缓存预算(MB)
+    MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "20000"))
+    CACHE_TTL_AKSHARE = int(os.getenv("CACHE_TTL_AKSHARE", "60"))  # AKShare行情缓存(秒)
+    CACHE_TTL_ENRICH = int(os.getenv("CACHE_TTL_ENRICH", "600"))  # 融资融券/资金流/K线(秒)
+    # 命名空间内存预算，如 "stock_data=64,akshare.kline=32"(MB)
+    MEMORY_NAMESPACE_BUDGETS_MB = os.getenv("MEMORY_NAMESPACE_BUDGETS_MB", "")
+    # 进程 RSS 预算(MB)，超出时淘汰内存缓存；0 表示不限制
+    MEMORY_RSS_BUDGET_MB = int(os.getenv("MEMORY_RSS_BUDGET_MB", "0"))
+    MEMORY_CHECK_INTERVAL = float(os.getenv("MEMORY_CHECK_INTERVAL", "30"))  # 检查间隔(秒)
+
+    # 筛选结果磁盘缓存
+    SCREEN_CACHE_DIR = os.getenv("SCREEN_CACHE_DIR", "cache/screen")
+    SCREEN_CACHE_MAX_MB = int(os.getenv("SCREEN_CACHE_MAX_MB", "64"))  # 总容量上限(MB)
+    SCREEN_CACHE_MAX_ENTRIES = int(os.getenv("SCREEN_CACHE_MAX_ENTRIES", "256"))
+    SCREEN_CACHE_MAX_AGE = int(os.getenv("SCREEN_CACHE_MAX_AGE", "86400"))  # 最长保留(秒)
+    SCREEN_CACHE_FRESH = int(os.getenv("SCREEN_CACHE_FRESH", "1800"))  # 直接复用的有效期(秒)
+
+    # 预热缓存（重启后从磁盘恢复快照和数据表）
+    WARM_CACHE_DIR = os.getenv("WARM_CACHE_DIR", "cache/warm")
+    WARM_CACHE_MAX_MB = int(os.getenv("WARM_CACHE_MAX_MB", "128"))
+    WARM_CACHE_MAX_AGE = int(os.getenv("WARM_CACHE_MAX_AGE", "259200"))  # 最长3天
+    WARM_CACHE_PERSIST_DELAY = float(os.getenv("WARM_CACHE_PERSIST_DELAY", "30"))  # 数据表写盘合并窗口(秒)
+
+    # Gemini 评分服务
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+    GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))
+    GEMINI_CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "5000"))
+
+    # AI 响应缓存
+    AI_CACHE_DIR = os.getenv("AI_CACHE_DIR", "cache/ai")
+    AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", "28800"))  # 8小时
+    AI_CACHE_MAX_MB = int(os.getenv("AI_CACHE_MAX_MB", "16"))
+    AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+
+    # AI 后台增强任务的最长执行时间（秒）
+    AI_ENRICH_TIMEOUT = int(os.getenv("AI_ENRICH_TIMEOUT", "120"))
+
+    # 管理接口（性能剖析等）令牌，未配置时管理接口禁用
+    @property
+    def ADMIN_TOKEN(self) -> str:
+        return os.getenv("ADMIN_TOKEN", "")
+
+    # 请求追踪（默认关闭，X-Debug-Trace: 1 请求头强制采样单个请求）
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "50"))  # 保留最近N条
+    TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "5000"))  # 单条上限
+
+    # 筛选历史存储
+    HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "data/screening_history.db")
 
     # 日志配置
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,301 @@
+"""
+磁盘缓存模块
+紧凑二进制编码（pickle + 可选 zlib）、规范化键、内存索引、
+按容量/条数/时间自动淘汰、原子写入
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from core.config import config
+
+
+_MAGIC = b"BDC1"
+_HEADER = struct.Struct("<4sBdI")  # magic, flags, created_at, key_len
+_FLAG_ZLIB = 0x01
+_COMPRESS_THRESHOLD = 4096  # 超过4KB才压缩
+_MMAP_THRESHOLD = 256 * 1024  # 超过256KB的条目用 mmap 读取
+_SUFFIX = ".bin"
+
+
+def normalize_key(*parts: Any, **params: Any) -> str:
+    """
+    生成规范化缓存键
+    浮点参数统一格式（-2 与 -2.0 视为同一键），命名参数按名称排序
+    """
+
+    def fmt(value: Any) -> str:
+        if isinstance(value, bool) or value is None:
+            return str(value).lower()
+        if isinstance(value, (int, float)):
+            return format(float(value), ".6g")
+        return str(value)
+
+    segments = [fmt(p) for p in parts]
+    segments += [f"{name}={fmt(params[name])}" for name in sorted(params)]
+    return ":".join(segments)
+
+
+class _IndexEntry:
+    __slots__ = ("filename", "size", "created_at")
+
+    def __init__(self, filename: str, size: int, created_at: float):
+        self.filename = filename
+        self.size = size
+        self.created_at = created_at
+
+
+class DiskCache:
+    """有界磁盘缓存（线程安全）"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 256,
+        max_age: float = 24 * 3600,
+    ):
+        """
+        初始化磁盘缓存
+        :param directory: 缓存目录
+        :param max_bytes: 总容量上限（字节）
+        :param max_entries: 条目数上限
+        :param max_age: 条目最长保留时间（秒），超过即淘汰
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # key -> _IndexEntry，按最近访问排序（LRU）
+        self._index: "Optional[OrderedDict[str, _IndexEntry]]" = None
+        self._total_bytes = 0
+
+    # ---------- 索引 ----------
+
+    @staticmethod
+    def _filename(key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + _SUFFIX
+
+    def _load_index(self) -> "OrderedDict[str, _IndexEntry]":
+        """首次访问时扫描目录，只读取文件头建立索引"""
+        if self._index is not None:
+            return self._index
+
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    header = f.read(_HEADER.size)
+                    magic, _, created_at, key_len = _HEADER.unpack(header)
+                    if magic != _MAGIC:
+                        raise ValueError("bad magic")
+                    key = f.read(key_len).decode("utf-8")
+                stat = os.stat(path)
+                entries.append((stat.st_atime, key, _IndexEntry(name, stat.st_size, created_at)))
+            except (OSError, ValueError, struct.error, UnicodeDecodeError):
+                self._remove_file(name)
+
+        index: "OrderedDict[str, _IndexEntry]" = OrderedDict()
+        for _, key, entry in sorted(entries, key=lambda e: e[0]):
+            index[key] = entry
+            self._total_bytes += entry.size
+        self._index = index
+        self._evict_locked()
+        return index
+
+    def _remove_file(self, filename: str):
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except OSError:
+            pass
+
+    def _drop_locked(self, key: str):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+            self._remove_file(entry.filename)
+
+    def _evict_locked(self):
+        """淘汰过期条目，再按 LRU 淘汰直到满足容量和条数上限"""
+        index = self._index
+        now = time.time()
+        for key in [k for k, e in index.items() if now - e.created_at > self.max_age]:
+            self._drop_locked(key)
+        while index and (
+            self._total_bytes > self.max_bytes or len(index) > self.max_entries
+        ):
+            self._drop_locked(next(iter(index)))
+
+    # ---------- 读写 ----------
+
+    def get_entry(
+        self, key: str, max_age: Optional[float] = None
+    ) -> Optional[Tuple[Any, float]]:
+        """
+        读取缓存
+        :param key: 缓存键
+        :param max_age: 本次读取允许的最大年龄（秒），默认使用 self.max_age
+        :return: (value, created_at)，未命中返回 None
+        """
+        filename = self._filename(key)
+        path = os.path.join(self.directory, filename)
+        limit = self.max_age if max_age is None else max_age
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size >= _MMAP_THRESHOLD:
+                    # 大条目直接映射文件解码，省去一次整块读入的拷贝
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                        decoded = self._decode(buf, key, limit)
+                else:
+                    decoded = self._decode(f.read(), key, limit)
+        except OSError:
+            return None
+        except Exception:
+            with self._lock:
+                self._load_index()
+                self._drop_locked(key)
+            self._remove_file(filename)
+            return None
+
+        if decoded is None:
+            return None
+        value, created_at = decoded
+
+        with self._lock:
+            index = self._load_index()
+            if key in index:
+                index.move_to_end(key)
+            else:
+                # 其他进程写入的条目，补登记到索引
+                index[key] = _IndexEntry(filename, size, created_at)
+                self._total_bytes += size
+        return value, created_at
+
+    @staticmethod
+    def _decode(buf, key: str, max_age: float) -> Optional[Tuple[Any, float]]:
+        """解码条目；键不匹配或已超龄返回 None，文件损坏抛异常"""
+        magic, flags, created_at, key_len = _HEADER.unpack_from(buf)
+        if magic != _MAGIC:
+            raise ValueError("bad magic")
+        if time.time() - created_at > max_age:
+            return None
+        offset = _HEADER.size
+        if bytes(buf[offset : offset + key_len]).decode("utf-8") != key:
+            return None
+        with memoryview(buf) as view, view[offset + key_len :] as payload:
+            if flags & _FLAG_ZLIB:
+                value = pickle.loads(zlib.decompress(payload))
+            else:
+                value = pickle.loads(payload)
+        return value, created_at
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """读取缓存值，未命中返回 None"""
+        entry = self.get_entry(key, max_age)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: Any, created_at: Optional[float] = None):
+        """
+        写入缓存（先写临时文件再原子替换，读者不会读到半个文件）
+        :param created_at: 指定创建时间（回写已有条目时保留原有年龄）
+        """
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        flags = 0
+        if len(payload) > _COMPRESS_THRESHOLD:
+            payload = zlib.compress(payload, 1)
+            flags |= _FLAG_ZLIB
+        key_bytes = key.encode("utf-8")
+        created_at = time.time() if created_at is None else created_at
+        blob = _HEADER.pack(_MAGIC, flags, created_at, len(key_bytes)) + key_bytes + payload
+
+        filename = self._filename(key)
+        with self._lock:
+            index = self._load_index()
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp_path, os.path.join(self.directory, filename))
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+            old = index.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.size
+            index[key] = _IndexEntry(filename, len(blob), created_at)
+            self._total_bytes += len(blob)
+            self._evict_locked()
+
+    def delete(self, key: str):
+        """删除单个条目"""
+        with self._lock:
+            self._load_index()
+            self._drop_locked(key)
+        self._remove_file(self._filename(key))
+
+    def clear(self):
+        """清空缓存目录"""
+        with self._lock:
+            index = self._load_index()
+            for key in list(index):
+                self._drop_locked(key)
+
+    def stats(self) -> dict:
+        """缓存统计"""
+        with self._lock:
+            index = self._load_index()
+            return {
+                "entries": len(index),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+            }
+
+
+def screen_cache_key(
+    strategy_type: str,
+    change_min: float,
+    change_max: float,
+    volume_ratio_min: float,
+    volume_ratio_max: float,
+    market_cap_max: float,
+) -> str:
+    """波段筛选结果的缓存键"""
+    return normalize_key(
+        "screen",
+        strategy_type,
+        change_min=change_min,
+        change_max=change_max,
+        volume_ratio_min=volume_ratio_min,
+        volume_ratio_max=volume_ratio_max,
+        market_cap_max=market_cap_max,
+    )
+
+
+# 筛选结果磁盘缓存（替代 cache/*.json）
+screen_cache = DiskCache(
+    config.SCREEN_CACHE_DIR,
+    max_bytes=config.SCREEN_CACHE_MAX_MB * 1024 * 1024,
+    max_entries=config.SCREEN_CACHE_MAX_ENTRIES,
+    max_age=config.SCREEN_CACHE_MAX_AGE,
+)
@@ -0,0 +1,340 @@
+"""
+筛选历史存储模块
+将每次筛选结果写入本地 SQLite，按日期、策略、代码建立索引
+同一数据库中保存日线（daily_bars），供收益跟踪关联查询
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from core.config import config
+from core.trading_calendar import trading_calendar
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS screening_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_at TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    source TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    criteria TEXT,
+    pick_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS screening_picks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES screening_runs(id) ON DELETE CASCADE,
+    run_at TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT,
+    rank INTEGER,
+    price REAL,
+    change_percent REAL,
+    volume_ratio REAL,
+    market_cap REAL,
+    score REAL,
+    risk_level TEXT,
+    industry TEXT,
+    board TEXT,
+    buy_price REAL,
+    stop_loss REAL,
+    target_price REAL,
+    reasons TEXT
+);
+
+CREATE TABLE IF NOT EXISTS daily_bars (
+    code TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (code, trade_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_runs_date ON screening_runs(trade_date, strategy);
+CREATE INDEX IF NOT EXISTS idx_picks_date ON screening_picks(trade_date, strategy);
+CREATE INDEX IF NOT EXISTS idx_picks_code ON screening_picks(code, trade_date);
+CREATE INDEX IF NOT EXISTS idx_picks_strategy ON screening_picks(strategy, trade_date);
+"""
+
+_PICK_COLUMNS = (
+    "id, run_id, run_at, trade_date, strategy, code, name, rank, price, "
+    "change_percent, volume_ratio, market_cap, score, risk_level, industry, "
+    "board, buy_price, stop_loss, target_price, reasons"
+)
+
+
+class ScreeningHistoryStore:
+    """筛选历史存储（SQLite，线程安全）"""
+
+    def __init__(self, db_path: str):
+        """
+        初始化历史存储
+        :param db_path: SQLite 数据库文件路径（不存在时自动创建）
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """懒加载数据库连接，首次使用时建表"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def record_run(
+        self,
+        picks: List[Dict[str, Any]],
+        strategy: str,
+        source: str,
+        criteria: Optional[Dict[str, Any]] = None,
+        run_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        记录一次筛选结果
+        :param picks: 入选股票列表（按名次排序）
+        :param strategy: 策略类型
+        :param source: 来源（realtime/scheduler）
+        :param criteria: 筛选条件
+        :param run_at: 筛选时间，默认当前时间
+        :return: 本次记录的 run_id
+        """
+        run_at = run_at or datetime.now()
+        run_at_text = run_at.isoformat()
+        # 按行情所属交易日归档（夜间、周末、节假日的筛选归入上一个交易日）
+        trade_date = trading_calendar.quote_date(run_at.timestamp()).isoformat()
+
+        rows = []
+        for rank, stock in enumerate(picks, 1):
+            trade_points = stock.get("trade_points") or {}
+            board = stock.get("board_type") or {}
+            rows.append(
+                (
+                    run_at_text,
+                    trade_date,
+                    strategy,
+                    str(stock.get("code", "")),
+                    stock.get("name"),
+                    rank,
+                    stock.get("price"),
+                    stock.get("change_percent"),
+                    stock.get("volume_ratio"),
+                    stock.get("market_cap"),
+                    stock.get("score"),
+                    stock.get("risk_level"),
+                    stock.get("industry"),
+                    board.get("type"),
+                    trade_points.get("buy_price"),
+                    trade_points.get("stop_loss"),
+                    trade_points.get("target_price"),
+                    json.dumps(stock.get("reasons") or [], ensure_ascii=False),
+                )
+            )
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO screening_runs "
+                    "(run_at, trade_date, source, strategy, criteria, pick_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        run_at_text,
+                        trade_date,
+                        source,
+                        strategy,
+                        json.dumps(criteria or {}, ensure_ascii=False),
+                        len(rows),
+                    ),
+                )
+                run_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO screening_picks "
+                    "(run_id, run_at, trade_date, strategy, code, name, rank, price, "
+                    "change_percent, volume_ratio, market_cap, score, risk_level, "
+                    "industry, board, buy_price, stop_loss, target_price, reasons) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id,) + row for row in rows],
+                )
+        return run_id
+
+    def get_picks_by_code(
+        self,
+        code: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        strategy: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        """
+        查询某只股票的历史入选记录（按时间倒序）
+        :param code: 股票代码（不带市场前缀）
+        :param start_date: 起始日期 YYYY-MM-DD（含）
+        :param end_date: 结束日期 YYYY-MM-DD（含）
+        :param strategy: 策略类型，None 表示全部
+        """
+        sql = f"SELECT {_PICK_COLUMNS} FROM screening_picks WHERE code = ?"
+        params: List[Any] = [code]
+        if start_date:
+            sql += " AND trade_date >= ?"
+            params.append(start_date)
+        if end_date:
+            sql += " AND trade_date <= ?"
+            params.append(end_date)
+        if strategy:
+            sql += " AND strategy = ?"
+            params.append(strategy)
+        sql += " ORDER BY trade_date DESC, run_at DESC LIMIT ?"
+        params.append(limit)
+        return self._query(sql, params)
+
+    def get_picks_by_date(
+        self, trade_date: str, strategy: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        查询某个交易日的全部入选记录
+        :param trade_date: 交易日 YYYY-MM-DD
+        :param strategy: 策略类型，None 表示全部
+        """
+        sql = f"SELECT {_PICK_COLUMNS} FROM screening_picks WHERE trade_date = ?"
+        params: List[Any] = [trade_date]
+        if strategy:
+            sql += " AND strategy = ?"
+            params.append(strategy)
+        sql += " ORDER BY run_at, rank"
+        return self._query(sql, params)
+
+    def list_runs(
+        self, trade_date: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """查询最近的筛选记录"""
+        sql = (
+            "SELECT id, run_at, trade_date, source, strategy, criteria, pick_count "
+            "FROM screening_runs"
+        )
+        params: List[Any] = []
+        if trade_date:
+            sql += " WHERE trade_date = ?"
+            params.append(trade_date)
+        sql += " ORDER BY run_at DESC LIMIT ?"
+        params.append(limit)
+        runs = self._query(sql, params)
+        for run in runs:
+            run["criteria"] = json.loads(run["criteria"] or "{}")
+        return runs
+
+    def upsert_daily_bars(
+        self,
+        stocks: List[Dict[str, Any]],
+        trade_date: Optional[str] = None,
+        snapshot_at: Optional[float] = None,
+    ) -> int:
+        """
+        批量写入日线（同一交易日重复写入以最新快照为准）
+        :param stocks: 行情快照（含 code/open/high/low/price/volume）
+        :param trade_date: 交易日 YYYY-MM-DD，默认为快照拉取时已收盘落定的交易日；
+            盘中或收盘落定前拉取的快照（还不是收盘价）不写入
+        :param snapshot_at: 快照开始拉取的时间戳，默认当前时间
+        :return: 写入条数
+        """
+        if trade_date is None:
+            settled = trading_calendar.settled_date(snapshot_at)
+            if settled is None:
+                return 0
+            trade_date = settled.isoformat()
+        rows = [
+            (
+                str(s["code"]),
+                trade_date,
+                s.get("open"),
+                s.get("high"),
+                s.get("low"),
+                s.get("close", s.get("price")),
+                s.get("volume"),
+            )
+            for s in stocks
+            if s and s.get("code") and (s.get("close") or s.get("price"))
+        ]
+        if rows:
+            self.executemany(
+                "INSERT OR REPLACE INTO daily_bars "
+                "(code, trade_date, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def get_daily_bars(
+        self, codes: List[str], start_date: str
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量查询多只股票 start_date（不含）之后的日线
+        :return: {code: [bar, ...]}，每只股票按日期升序
+        """
+        bars: Dict[str, List[Dict[str, Any]]] = {code: [] for code in codes}
+        # SQLite 单条语句参数上限 999，分块查询
+        for i in range(0, len(codes), 500):
+            chunk = codes[i : i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.query(
+                "SELECT code, trade_date, open, high, low, close, volume "
+                f"FROM daily_bars WHERE code IN ({placeholders}) AND trade_date > ? "
+                "ORDER BY code, trade_date",
+                chunk + [start_date],
+            )
+            for row in rows:
+                bars[row["code"]].append(row)
+        return bars
+
+    def query(self, sql: str, params: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """执行查询语句，返回字典列表"""
+        with self._lock:
+            rows = self._connect().execute(sql, params or []).fetchall()
+        return [dict(row) for row in rows]
+
+    def executemany(self, sql: str, rows: List[tuple]):
+        """在一个事务内批量执行写语句"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(sql, rows)
+
+    def executescript(self, script: str):
+        """执行建表等脚本"""
+        with self._lock:
+            self._connect().executescript(script)
+
+    def _query(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        result = self.query(sql, params)
+        for item in result:
+            if "reasons" in item:
+                item["reasons"] = json.loads(item["reasons"] or "[]")
+        return result
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全局历史存储实例
+history_store = ScreeningHistoryStore(config.HISTORY_DB_PATH)
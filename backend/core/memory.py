@@ -0,0 +1,276 @@
+"""
+内存账本与预算
+- 进程 RSS、各缓存命名空间占用（估算值）、其他内存持有者（追踪缓冲区、后台任务等）汇总
+- 命名空间预算：MEMORY_NAMESPACE_BUDGETS_MB="stock_data=64,akshare.kline=32"，超出时按 LRU 淘汰
+- 进程预算：RSS 超过 MEMORY_RSS_BUDGET_MB 时按 LRU 淘汰内存缓存并触发 gc，
+  长时间运行的实例无需定时重启即可保持在容器内存限制内
+- tracemalloc 快照对比：记录基线后与当前分配逐行比较，定位增长来源
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from core.cache import MemoryCache, memory_cache
+from core.config import config
+from core.metrics import metrics
+
+PROCESS_RSS = metrics.gauge("boduan_process_rss_bytes", "进程常驻内存（字节）")
+GUARD_TRIGGERS = metrics.counter("boduan_memory_guard_triggers_total", "超出进程内存预算触发淘汰的次数")
+GUARD_FREED = metrics.counter("boduan_memory_guard_freed_bytes_total", "内存预算淘汰释放的缓存字节数（估算）")
+
+
+def process_rss_bytes() -> Optional[int]:
+    """当前进程常驻内存（字节）；无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def parse_budgets(text: str) -> Dict[str, int]:
+    """解析 "namespace=MB,..." 为 {namespace: 字节数}，忽略格式错误的项"""
+    budgets = {}
+    for item in (text or "").split(","):
+        name, _, value = item.strip().partition("=")
+        try:
+            if name.strip() and float(value) > 0:
+                budgets[name.strip()] = int(float(value) * 1024 * 1024)
+        except ValueError:
+            print(f"⚠️ 忽略无效的内存预算配置: {item}")
+    return budgets
+
+
+def apply_namespace_budgets(budgets: Dict[str, int], cache: MemoryCache = memory_cache):
+    """为命名空间设置字节预算（超出立即按 LRU 淘汰）"""
+    for namespace, max_bytes in budgets.items():
+        cache.configure_namespace(namespace, max_bytes=max_bytes)
+
+
+# 其他内存持有者：名称 → 返回占用描述的函数
+_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_memory_source(name: str, describe: Callable[[], Dict[str, Any]]):
+    """登记缓存之外的内存持有者（如追踪缓冲区、后台任务表）"""
+    _sources[name] = describe
+
+
+class MemoryGuard:
+    """进程内存预算：RSS 超出预算时淘汰内存缓存"""
+
+    def __init__(
+        self,
+        cache: MemoryCache = memory_cache,
+        rss_budget: int = 0,
+        shrink_ratio: float = 0.25,
+        cooldown: float = 300,
+        rss_reader: Callable[[], Optional[int]] = process_rss_bytes,
+    ):
+        """
+        Args:
+            cache: 被淘汰的缓存
+            rss_budget: 进程 RSS 预算（字节，0 表示不限制）
+            shrink_ratio: 每次至少淘汰缓存当前占用的比例
+            cooldown: 两次淘汰的最小间隔（秒）；释放的内存不一定立即归还系统，避免连续清空缓存
+            rss_reader: RSS 读取函数
+        """
+        self.cache = cache
+        self.rss_budget = rss_budget
+        self.shrink_ratio = shrink_ratio
+        self.cooldown = cooldown
+        self._read_rss = rss_reader
+        self.triggers = 0
+        self.freed_bytes = 0
+        self.last_rss: Optional[int] = None
+        self.last_trigger: Optional[float] = None
+
+    def check(self) -> int:
+        """
+        检查一次预算
+        :return: 本次淘汰释放的缓存字节数（估算）
+        """
+        rss = self._read_rss()
+        self.last_rss = rss
+        if rss is not None:
+            PROCESS_RSS.set(rss)
+        if not self.rss_budget or rss is None or rss <= self.rss_budget:
+            return 0
+        now = time.time()
+        if self.last_trigger is not None and now - self.last_trigger < self.cooldown:
+            return 0
+
+        cache_bytes = self.cache.stats()["bytes"]
+        target = max(rss - self.rss_budget, int(cache_bytes * self.shrink_ratio))
+        freed = self.cache.shrink(target)
+        gc.collect()
+        self.triggers += 1
+        self.freed_bytes += freed
+        self.last_trigger = now
+        GUARD_TRIGGERS.inc()
+        GUARD_FREED.inc(freed)
+        print(
+            f"⚠️ 进程内存 {rss / 1024 / 1024:.0f}MB 超出预算 {self.rss_budget / 1024 / 1024:.0f}MB，"
+            f"已淘汰缓存 {freed / 1024 / 1024:.1f}MB"
+        )
+        return freed
+
+    async def run(self, interval: float):
+        """周期检查（在事件循环中作为后台任务运行）"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ 内存预算检查失败: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rss_budget": self.rss_budget,
+            "triggers": self.triggers,
+            "freed_bytes": self.freed_bytes,
+            "last_trigger": self.last_trigger,
+        }
+
+
+class TracemallocDiff:
+    """tracemalloc 基线快照与差异对比"""
+
+    # 不计入对比的内部分配
+    _FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._baseline_at: Optional[float] = None
+        self._started_here = False
+        self._lock = threading.Lock()
+
+    def _take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self._FILTERS)
+
+    def snapshot(self, frames: int = 10) -> Dict[str, Any]:
+        """记录基线（未开启 tracemalloc 时以 frames 层调用栈开启）"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._started_here = True
+            self._baseline = self._take()
+            self._baseline_at = time.time()
+            return self.status()
+
+    def diff(self, limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+        """
+        当前分配与基线对比（按增长量降序）
+        :param group_by: lineno / filename / traceback
+        """
+        with self._lock:
+            if self._baseline is None or not tracemalloc.is_tracing():
+                raise RuntimeError("尚未记录基线快照")
+            current = self._take()
+            stats = current.compare_to(self._baseline, group_by)
+        rows: List[Dict[str, Any]] = []
+        for stat in stats[:limit]:
+            frames = stat.traceback.format() if group_by == "traceback" else None
+            frame = stat.traceback[0]
+            rows.append(
+                {
+                    "location": frame.filename
+                    if group_by == "filename"
+                    else f"{frame.filename}:{frame.lineno}",
+                    "size_diff": stat.size_diff,
+                    "size": stat.size,
+                    "count_diff": stat.count_diff,
+                    "count": stat.count,
+                    **({"traceback": frames} if frames else {}),
+                }
+            )
+        return {
+            **self.status(),
+            "total_diff": sum(s.size_diff for s in stats),
+            "top": rows,
+        }
+
+    def stop(self):
+        """丢弃基线；由本模块开启的 tracemalloc 一并关闭"""
+        with self._lock:
+            self._baseline = None
+            self._baseline_at = None
+            if self._started_here and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._started_here = False
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "baseline_at": self._baseline_at,
+        }
+
+
+def memory_report(cache: MemoryCache = memory_cache) -> Dict[str, Any]:
+    """内存账本：进程 RSS + 各命名空间占用 + 其他持有者 + 预算与 tracemalloc 状态"""
+    stats = cache.stats()
+    namespaces = {
+        name: {
+            "entries": ns["entries"],
+            "bytes": ns["bytes"],
+            "max_bytes": ns["max_bytes"],
+            "max_entries": ns["max_entries"],
+            "evictions": ns["evictions"],
+        }
+        for name, ns in stats["namespaces"].items()
+    }
+    sources = {}
+    for name, describe in _sources.items():
+        try:
+            sources[name] = describe()
+        except Exception as e:
+            sources[name] = {"error": str(e)}
+    return {
+        "rss_bytes": process_rss_bytes(),
+        "cache": {
+            "entries": stats["entries"],
+            "bytes": stats["bytes"],
+            "max_bytes": stats["max_bytes"],
+            "namespaces": namespaces,
+        },
+        "sources": sources,
+        "guard": memory_guard.stats(),
+        "gc": {"enabled": gc.isenabled(), "counts": gc.get_count()},
+        "tracemalloc": tracemalloc_diff.status(),
+        "python": sys.version.split()[0],
+    }
+
+
+def collect_memory_metrics():
+    rss = process_rss_bytes()
+    if rss is not None:
+        PROCESS_RSS.set(rss)
+
+
+# 全局实例
+memory_guard = MemoryGuard(rss_budget=config.MEMORY_RSS_BUDGET_MB * 1024 * 1024)
+tracemalloc_diff = TracemallocDiff()
+apply_namespace_budgets(parse_budgets(config.MEMORY_NAMESPACE_BUDGETS_MB))
+metrics.register_collector(collect_memory_metrics)
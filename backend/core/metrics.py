@@ -0,0 +1,327 @@
+"""
+指标模块
+进程内的 Counter / Gauge / Histogram，按 Prometheus 文本格式（0.0.4）输出，供 /metrics 抓取
+- 上游请求（腾讯、各 AKShare 接口、GLM）耗时与失败次数
+- 筛选各阶段耗时
+- 内存缓存命中/合并加载、行情快照年龄与大小（抓取时由采集回调同步）
+上游请求和阶段计时同时在请求追踪中记录同名 span（见 core.tracing）
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core import tracing
+from core.cache import MemoryCache, memory_cache
+
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        return lines + self._samples()
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        """同步外部累计值（采集回调使用，如缓存统计）"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    """可增可减的瞬时值"""
+
+    type_name = "gauge"
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """分桶直方图（累计桶在输出时计算）"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            hv = self._values.get(key)
+            if hv is None:
+                hv = self._values[key] = _HistogramValue(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hv.buckets[i] += 1
+                    break
+            hv.sum += value
+            hv.count += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """统计代码块耗时（秒），异常时同样记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Optional[Dict[str, float]]:
+        """返回 {"count", "sum"}，未观测过返回 None"""
+        with self._lock:
+            hv = self._values.get(self._key(labels))
+            return None if hv is None else {"count": hv.count, "sum": hv.sum}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [
+                (k, list(hv.buckets), hv.sum, hv.count)
+                for k, hv in sorted(self._values.items())
+            ]
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, buckets, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, buckets):
+                cumulative += n
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(names, key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"指标 {metric.name} 已以其他类型注册")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]):
+        """注册采集回调（每次输出前调用，用于同步外部状态）"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"⚠️ 指标采集失败: {e}")
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+
+UPSTREAM_SECONDS = metrics.histogram(
+    "boduan_upstream_request_seconds", "上游请求耗时（秒）", ["source"]
+)
+UPSTREAM_ERRORS = metrics.counter(
+    "boduan_upstream_errors_total", "上游请求失败次数", ["source"]
+)
+STAGE_SECONDS = metrics.histogram(
+    "boduan_screen_stage_seconds", "筛选流水线各阶段耗时（秒）", ["stage"]
+)
+SCREEN_REQUESTS = metrics.counter(
+    "boduan_screen_requests_total", "筛选请求数（按结果来源）", ["source"]
+)
+SNAPSHOT_COMPLETENESS = metrics.gauge(
+    "boduan_snapshot_completeness", "最近一次全市场行情快照的完整度（成功覆盖的代码占比）", ["source"]
+)
+
+CACHE_HITS = metrics.counter("boduan_cache_hits_total", "内存缓存命中次数", ["namespace"])
+CACHE_MISSES = metrics.counter("boduan_cache_misses_total", "内存缓存未命中次数", ["namespace"])
+CACHE_COALESCED = metrics.counter(
+    "boduan_cache_coalesced_total", "并发刷新被合并（等待已有加载）的次数", ["namespace"]
+)
+CACHE_LOADS = metrics.counter("boduan_cache_loads_total", "缓存未命中触发的加载次数", ["namespace"])
+CACHE_EVICTIONS = metrics.counter("boduan_cache_evictions_total", "缓存淘汰次数", ["namespace"])
+CACHE_ENTRIES = metrics.gauge("boduan_cache_entries", "缓存条目数", ["namespace"])
+CACHE_BYTES = metrics.gauge("boduan_cache_bytes", "缓存占用字节数（估算）", ["namespace"])
+
+
+@contextmanager
+def track_upstream(
+    source: str, parent: Optional[tracing.Span] = None, **attrs
+) -> Iterator[None]:
+    """
+    统计一次上游请求的耗时，抛出异常时计入失败次数（取消不计）
+
+    Args:
+        source: 数据源（tencent / akshare.<函数名> / glm）
+        parent: 追踪的父 span（默认取当前上下文）
+        attrs: 追踪 span 的附加属性
+    """
+    start = time.perf_counter()
+    with tracing.span(source, parent=parent, **attrs):
+        try:
+            yield
+        except Exception:
+            UPSTREAM_ERRORS.inc(source=source)
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - start, source=source)
+
+
+@contextmanager
+def track_stage(stage: str, **attrs) -> Iterator[None]:
+    """统计一个筛选阶段的耗时，并记录同名追踪 span"""
+    with tracing.span(stage, **attrs):
+        with STAGE_SECONDS.time(stage=stage):
+            yield
+
+
+def observe_stage(stage: str, start: float, **attrs):
+    """记录从 start（time.perf_counter()）到现在的阶段耗时，并补记追踪 span"""
+    end = time.perf_counter()
+    STAGE_SECONDS.observe(end - start, stage=stage)
+    tracing.record_span(stage, start, end, **attrs)
+
+
+def record_upstream_error(source: str):
+    """记录未抛异常的上游失败（如非 200 响应）"""
+    UPSTREAM_ERRORS.inc(source=source)
+
+
+def collect_cache_metrics(cache: MemoryCache = memory_cache):
+    """把 MemoryCache 的命名空间统计同步到指标"""
+    for name, ns in cache.stats()["namespaces"].items():
+        CACHE_HITS.set(ns["hits"], namespace=name)
+        CACHE_MISSES.set(ns["misses"], namespace=name)
+        CACHE_COALESCED.set(ns["coalesced"], namespace=name)
+        CACHE_LOADS.set(ns["loads"], namespace=name)
+        CACHE_EVICTIONS.set(ns["evictions"], namespace=name)
+        CACHE_ENTRIES.set(ns["entries"], namespace=name)
+        CACHE_BYTES.set(ns["bytes"], namespace=name)
+
+
+metrics.register_collector(collect_cache_metrics)
@@ -0,0 +1,245 @@
+"""
+按需性能剖析
+采样式剖析器：后台线程按固定间隔读取 sys._current_frames()，把各线程的调用栈折叠为
+"线程;外层函数;...;内层函数 次数"（collapsed stack，flamegraph.pl / speedscope 可直接读取），
+并可渲染为自包含的 SVG 火焰图；可选同时开启 cProfile 获取精确调用次数
+
+- 采样的是挂钟时间：阻塞在网络 I/O 上的线程同样会被计入
+- 默认丢弃空闲线程（叶子帧在 threading/selectors/queue 的等待函数中），
+  事件循环空转等待 I/O 时也会被丢弃
+- cProfile 只剖析开启它的线程
+"""
+
+import cProfile
+import html
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 叶子帧为这些函数时视为空闲线程
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socketserver.py", "serve_forever"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_BACKEND + os.sep):
+        location = os.path.relpath(filename, _BACKEND)
+    else:
+        location = "/".join(filename.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({location}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+def collapse_stack(frame, max_depth: int = 128) -> str:
+    """把一个线程的调用栈折叠为 "外层;...;内层"（超出 max_depth 的外层帧丢弃）"""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """采样式剖析器（后台线程）"""
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False, max_depth: int = 128):
+        """
+        Args:
+            interval: 采样间隔（秒）
+            include_idle: 是否保留空闲线程的调用栈
+            max_depth: 单个调用栈的最大深度
+        """
+        self.interval = interval
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self):
+        """采样一次所有线程（采样线程自身除外）"""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (not self.include_idle and _is_idle(frame)):
+                continue
+            stack = collapse_stack(frame, self.max_depth)
+            self.counts[f"{names.get(ident, f'thread-{ident}')};{stack}"] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> "StackSampler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    def __enter__(self) -> "StackSampler":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def collapsed(self) -> str:
+        """collapsed stack 文本（按次数降序）"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """按自身耗时（叶子帧出现次数）排序的热点函数"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.counts.items():
+            frames = stack.split(";")[1:]
+            own[frames[-1] if frames else stack] += count
+            for label in set(frames):
+                total[label] += count
+        samples = sum(self.counts.values()) or 1
+        return [
+            {
+                "function": label,
+                "self_samples": count,
+                "self_pct": round(count * 100 / samples, 1),
+                "total_pct": round(total[label] * 100 / samples, 1),
+            }
+            for label, count in own.most_common(limit)
+        ]
+
+
+class ProfileSession:
+    """
+    一次剖析：采样器 + 可选 cProfile（在进入 with 的线程中开启）
+
+    with ProfileSession(interval=0.005, cprofile=True) as session:
+        run()
+    session.summary()
+    """
+
+    def __init__(self, interval: float = 0.005, cprofile: bool = False, include_idle: bool = False):
+        self.sampler = StackSampler(interval=interval, include_idle=include_idle)
+        self.profile: Optional[cProfile.Profile] = cProfile.Profile() if cprofile else None
+
+    def __enter__(self) -> "ProfileSession":
+        self.sampler.start()
+        if self.profile is not None:
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+        self.sampler.stop()
+
+    def pstats_text(self, limit: int = 40, sort: str = "cumulative") -> Optional[str]:
+        if self.profile is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def pstats_dump(self) -> Optional[bytes]:
+        """cProfile 原始数据（pstats 格式，可用 snakeviz / pstats 打开）"""
+        if self.profile is None:
+            return None
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        sampler = self.sampler
+        return {
+            "duration_ms": round(sampler.elapsed * 1000, 1),
+            "interval_ms": sampler.interval * 1000,
+            "samples": sampler.samples,
+            "stacks": sum(sampler.counts.values()),
+            "top_functions": sampler.top_functions(top),
+            "cprofile": self.pstats_text(),
+        }
+
+
+def _color(name: str) -> str:
+    """按函数名取稳定的暖色"""
+    value = zlib.crc32(name.encode("utf-8"))
+    return f"rgb({205 + value % 50},{80 + (value >> 8) % 130},{(value >> 16) % 55})"
+
+
+def render_flamegraph(
+    counts: Dict[str, int], title: str = "Flame Graph", width: int = 1200, frame_height: int = 16
+) -> str:
+    """把 collapsed stack 计数渲染为 SVG 火焰图（根在底部，鼠标悬停显示函数与占比）"""
+    root: Dict[str, Any] = {"value": 0, "children": {}}
+    for stack, count in counts.items():
+        node = root
+        node["value"] += count
+        for label in stack.split(";"):
+            node = node["children"].setdefault(label, {"value": 0, "children": {}})
+            node["value"] += count
+
+    total = root["value"] or 1
+    rects: List[Tuple[int, float, float, str, int]] = []
+    max_depth = 0
+
+    def layout(node, depth: int, x: float):
+        nonlocal max_depth
+        for label, child in sorted(node["children"].items()):
+            w = child["value"] / total * width
+            if w >= 0.5:
+                rects.append((depth, x, w, label, child["value"]))
+                max_depth = max(max_depth, depth)
+                layout(child, depth + 1, x)
+            x += w
+
+    layout(root, 0, 0.0)
+    top = 30
+    height = top + (max_depth + 1) * frame_height + 10
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="Verdana,sans-serif" font-size="11">',
+        '<rect width="100%" height="100%" fill="#fdf8ef"/>',
+        f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="15">'
+        f"{html.escape(title)}（{total} samples）</text>",
+    ]
+    for depth, x, w, label, value in rects:
+        y = height - 10 - (depth + 1) * frame_height
+        escaped = html.escape(label)
+        chars = int((w - 6) / 7)
+        text = escaped if len(label) <= chars else html.escape(label[: max(chars - 2, 0)]) + ".."
+        parts.append(
+            f"<g><title>{escaped} — {value} samples, {value * 100 / total:.1f}%</title>"
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+            f'fill="{_color(label)}" rx="2"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + frame_height - 4}">{text}</text>' if chars > 2 else "")
+            + "</g>"
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
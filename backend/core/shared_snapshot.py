@@ -0,0 +1,374 @@
+"""
+多进程共享快照（uvicorn --workers N）
+- 选举：各 worker 争抢同一把文件锁（POSIX fcntl.flock / Windows msvcrt.locking），
+  持有者作为拉取进程，负责请求上游并发布快照；进程退出时锁自动释放，其他 worker 接替
+- 发布：列式编码写入 <name>-<版本>.snap（文件头含版本号和生成时间），再原子替换 <name>.current 指针
+- 挂载：其他 worker 只读 mmap 映射快照文件，数值列直接以 memoryview 访问（不拷贝），
+  需要行记录时每个版本只解码一次
+共享的是上游请求（只有拉取进程访问上游）；筛选等热路径使用 records()/columns() 解码出的
+本进程副本，每个 worker 各持一份，进程内存并不共享
+文件格式（小端）：
+  头部  magic(8) version(u64) created_at(f64) rows(u32) ncols(u32)
+  列目录 name_len(u16) name kind(1) offset(u64) length(u64)  × ncols
+  列数据 f: float64 × rows   i: int64 × rows
+         s: offsets u64 × (rows+1) + UTF-8   o: pickle（其他类型，如含 None 的列）
+"""
+
+import mmap
+import os
+import pickle
+import re
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+from core.config import config
+
+_MAGIC = b"BDSNAP01"
+_HEADER = struct.Struct("<8sQdII")
+_COLUMN = struct.Struct("<cQQ")
+_NAME_LEN = struct.Struct("<H")
+_ALIGN = 8
+_POINTER_SUFFIX = ".current"
+_SNAPSHOT_SUFFIX = ".snap"
+
+
+def _kind(values: Sequence[Any]) -> bytes:
+    if all(isinstance(v, float) for v in values):
+        return b"f"
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return b"i" if all(-(2**63) <= v < 2**63 for v in values) else b"o"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return b"f"
+    if all(isinstance(v, str) for v in values):
+        return b"s"
+    return b"o"
+
+
+def _encode_column(kind: bytes, values: Sequence[Any]) -> bytes:
+    if kind == b"f":
+        return struct.pack(f"<{len(values)}d", *values)
+    if kind == b"i":
+        return struct.pack(f"<{len(values)}q", *values)
+    if kind == b"s":
+        encoded = [v.encode("utf-8") for v in values]
+        offsets = [0]
+        for item in encoded:
+            offsets.append(offsets[-1] + len(item))
+        return struct.pack(f"<{len(offsets)}Q", *offsets) + b"".join(encoded)
+    return pickle.dumps(list(values), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def encode_snapshot(columns: Dict[str, Sequence[Any]], version: int, created_at: float) -> bytes:
+    """按列编码（各列长度必须一致）"""
+    rows = len(next(iter(columns.values()))) if columns else 0
+    directory_size = sum(
+        _NAME_LEN.size + len(name.encode("utf-8")) + _COLUMN.size for name in columns
+    )
+    offset = _HEADER.size + directory_size
+    offset += -offset % _ALIGN
+    entries, blobs = [], []
+    for name, values in columns.items():
+        if len(values) != rows:
+            raise ValueError(f"列 {name} 长度 {len(values)} 与行数 {rows} 不一致")
+        kind = _kind(values)
+        blob = _encode_column(kind, values)
+        padding = -len(blob) % _ALIGN
+        entries.append((name.encode("utf-8"), kind, offset, len(blob)))
+        blobs.append(blob + b"\0" * padding)
+        offset += len(blob) + padding
+    parts = [_HEADER.pack(_MAGIC, version, created_at, rows, len(columns))]
+    for name, kind, column_offset, length in entries:
+        parts.append(_NAME_LEN.pack(len(name)) + name + _COLUMN.pack(kind, column_offset, length))
+    head = b"".join(parts)
+    return head + b"\0" * (-len(head) % _ALIGN) + b"".join(blobs)
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """行记录转为列（缺失的字段填 None）"""
+    names: Dict[str, None] = {}
+    for record in records:
+        names.update(dict.fromkeys(record))
+    return {name: [record.get(name) for record in records] for name in names}
+
+
+class ColumnarSnapshot:
+    """只读挂载的列式快照（mmap）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, self.version, self.created_at, self.rows, ncols = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"不是共享快照文件: {path}")
+        self._columns: Dict[str, tuple] = {}
+        position = _HEADER.size
+        for _ in range(ncols):
+            (name_len,) = _NAME_LEN.unpack_from(self._mmap, position)
+            position += _NAME_LEN.size
+            name = bytes(self._mmap[position : position + name_len]).decode("utf-8")
+            position += name_len
+            kind, offset, length = _COLUMN.unpack_from(self._mmap, position)
+            position += _COLUMN.size
+            self._columns[name] = (kind, offset, length)
+        self._decoded: Dict[str, List[Any]] = {}
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def column(self, name: str):
+        """
+        读取一列：f/i 列返回映射内存上的 memoryview（不拷贝），s/o 列返回解码后的列表
+        """
+        kind, offset, length = self._columns[name]
+        if kind == b"f":
+            return self._view[offset : offset + length].cast("d")
+        if kind == b"i":
+            return self._view[offset : offset + length].cast("q")
+        with self._lock:
+            cached = self._decoded.get(name)
+            if cached is None:
+                cached = self._decoded[name] = self._decode(kind, offset, length)
+            return cached
+
+    def _decode(self, kind: bytes, offset: int, length: int) -> List[Any]:
+        data = self._view[offset : offset + length]
+        if kind == b"s":
+            offsets = data[: (self.rows + 1) * 8].cast("Q")
+            blob = bytes(data[(self.rows + 1) * 8 :])
+            return [blob[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(self.rows)]
+        return pickle.loads(data)
+
+    def columns(self) -> Dict[str, List[Any]]:
+        """全部列（拷贝为本进程的列表，供构造 DataFrame）"""
+        return {name: list(self.column(name)) for name in self._columns}
+
+    def records(self) -> List[Dict[str, Any]]:
+        """行记录（解码为本进程的 dict 列表，每个快照版本只解码一次，调用方不应修改）"""
+        with self._lock:
+            if self._records is not None:
+                return self._records
+        columns = self.columns()
+        names = list(columns)
+        records = [dict(zip(names, values)) for values in zip(*columns.values())]
+        with self._lock:
+            self._records = records
+        return records
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mmap.close()
+        except (BufferError, ValueError):
+            # 仍有列视图被引用：交给垃圾回收关闭
+            pass
+
+
+class FetcherLock:
+    """拉取进程选举：非阻塞文件锁，持有者即拉取进程"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedSnapshotStore:
+    """共享快照目录：拉取进程发布，其他进程只读挂载"""
+
+    def __init__(self, directory: str, keep: int = 2, elect_interval: float = 5.0):
+        """
+        Args:
+            directory: 快照目录（同一台机器上的所有 worker 共用，建议放在 /dev/shm 等内存文件系统）
+            keep: 每个快照保留最近几个版本的文件（正在被读取的旧版本不会被立即删除）
+            elect_interval: 未当选时重新争抢锁的最小间隔（秒）
+        """
+        self.directory = directory
+        self.keep = keep
+        self.elect_interval = elect_interval
+        self.lock = FetcherLock(os.path.join(directory, "fetcher.lock"))
+        self._last_elect = 0.0
+        self._attached: Dict[str, ColumnarSnapshot] = {}
+        self._guard = threading.Lock()
+        self.published = 0
+        self.attaches = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _safe(name: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+    def _pointer(self, name: str) -> str:
+        return os.path.join(self.directory, self._safe(name) + _POINTER_SUFFIX)
+
+    def is_leader(self) -> bool:
+        """本进程是否为拉取进程（未当选时每 elect_interval 秒重试一次，前任退出后自动接替）"""
+        if self.lock.held:
+            return True
+        now = time.time()
+        if now - self._last_elect < self.elect_interval:
+            return False
+        self._last_elect = now
+        if self.lock.try_acquire():
+            print(f"👑 进程 {os.getpid()} 当选行情拉取进程（共享快照目录 {self.directory}）")
+            return True
+        return False
+
+    def _read_pointer(self, name: str) -> Optional[tuple]:
+        try:
+            with open(self._pointer(name), "r", encoding="utf-8") as f:
+                version, filename = f.read().split()
+            return int(version), filename
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, name: str, columns: Dict[str, Sequence[Any]], created_at: Optional[float] = None) -> int:
+        """发布新版本（列式），返回版本号"""
+        pointer = self._read_pointer(name)
+        version = (pointer[0] if pointer else 0) + 1
+        data = encode_snapshot(columns, version, time.time() if created_at is None else created_at)
+        filename = f"{self._safe(name)}-{version}{_SNAPSHOT_SUFFIX}"
+        self._write_atomic(os.path.join(self.directory, filename), data)
+        self._write_atomic(self._pointer(name), f"{version} {filename}".encode("utf-8"))
+        self.published += 1
+        self._cleanup(name, version)
+        return version
+
+    def publish_records(self, name: str, records: List[Dict[str, Any]], created_at: Optional[float] = None) -> int:
+        return self.publish(name, records_to_columns(records), created_at)
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _cleanup(self, name: str, version: int):
+        prefix = self._safe(name) + "-"
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith(prefix) and filename.endswith(_SNAPSHOT_SUFFIX)):
+                continue
+            try:
+                old = int(filename[len(prefix) : -len(_SNAPSHOT_SUFFIX)])
+            except ValueError:
+                continue
+            if old <= version - self.keep:
+                try:
+                    os.unlink(os.path.join(self.directory, filename))
+                except OSError:
+                    # Windows 上仍被映射的文件无法删除，下次发布时再清理
+                    pass
+
+    def attach(self, name: str) -> Optional[ColumnarSnapshot]:
+        """
+        挂载最新版本（版本未变化时复用已有映射；没有快照时返回 None）
+        检查版本和建立映射都在锁内完成，并发挂载同一版本只映射一次；被替换的旧映射不主动关闭，
+        其他线程仍可继续读取，最后一个引用释放时由垃圾回收解除映射
+        """
+        pointer = self._read_pointer(name)
+        if pointer is None:
+            return None
+        version, filename = pointer
+        with self._guard:
+            current = self._attached.get(name)
+            if current is not None and current.version >= version:
+                return current
+            try:
+                snapshot = ColumnarSnapshot(os.path.join(self.directory, filename))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 挂载共享快照 {name} 失败: {e}")
+                return current
+            self._attached[name] = snapshot
+            self.attaches += 1
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            attached = {
+                name: {
+                    "version": snap.version,
+                    "rows": snap.rows,
+                    "bytes": snap.nbytes,
+                    "age": round(snap.age(), 1),
+                }
+                for name, snap in self._attached.items()
+            }
+        return {
+            "directory": self.directory,
+            "pid": os.getpid(),
+            "role": "fetcher" if self.lock.held else "reader",
+            "published": self.published,
+            "attaches": self.attaches,
+            "attached": attached,
+        }
+
+
+# 全局实例（未配置 SHARED_SNAPSHOT_DIR 时为 None：每个进程独立拉取）
+shared_snapshots = (
+    SharedSnapshotStore(config.SHARED_SNAPSHOT_DIR) if config.SHARED_SNAPSHOT_DIR else None
+)
@@ -0,0 +1,286 @@
+"""
+上游数据源健康监控
+- 每个数据源保留最近 N 次请求的耗时与成败，统计延迟分位数和错误率
+- 熔断：连续失败达到阈值后打开，冷却期内不再请求；冷却结束后放行一次探测（半开），成功即恢复
+- 选源：健康的数据源按近期中位延迟排序，没有样本的源优先探测
+- 对冲：首选源超过 hedge_after 秒仍未返回（或已失败）时启动下一个源，取先成功的结果；
+  落后的请求继续在后台执行，结果只用于更新健康统计
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.config import config
+from core.metrics import metrics
+from core.tracing import propagate
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+SOURCE_STATE = metrics.gauge(
+    "boduan_source_circuit_state", "数据源熔断状态（0 关闭，1 半开，2 打开）", ["source"]
+)
+SOURCE_LATENCY = metrics.gauge(
+    "boduan_source_latency_p50_seconds", "数据源近期成功请求的中位延迟（秒）", ["source"]
+)
+SOURCE_ERROR_RATE = metrics.gauge("boduan_source_error_rate", "数据源近期错误率", ["source"])
+SOURCE_HEDGES = metrics.counter(
+    "boduan_source_hedges_total", "首选数据源过慢或失败时启动备用源的次数", ["source"]
+)
+
+
+class SourceHealth:
+    """单个数据源的滚动统计与熔断器（线程安全）"""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 50,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60,
+    ):
+        """
+        Args:
+            name: 数据源名称
+            window: 保留最近多少次请求的统计
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断后多久放行探测请求（秒）
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[float] = None
+        self._probing = False
+
+    def allow(self) -> bool:
+        """是否允许请求（打开状态冷却结束后转为半开，只放行一个探测请求）"""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = STATE_HALF_OPEN
+                self._probing = False
+            if self.state == STATE_HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, latency: float, ok: bool, error: Optional[BaseException] = None):
+        """记录一次请求结果"""
+        now = time.time()
+        with self._lock:
+            self._samples.append((now, latency, ok))
+            self._probing = False
+            if ok:
+                self.consecutive_failures = 0
+                self.last_success = now
+                self.state = STATE_CLOSED
+                self.opened_at = None
+                return
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}" if error else "unknown"
+            if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    print(f"🔌 数据源 {self.name} 熔断（连续失败{self.consecutive_failures}次）")
+                self.state = STATE_OPEN
+                self.opened_at = now
+
+    def latency(self, pct: float = 50) -> Optional[float]:
+        """近期成功请求的延迟分位数（秒），无样本返回 None"""
+        with self._lock:
+            values = sorted(latency for _, latency, ok in self._samples if ok)
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            samples = list(self._samples)
+        return sum(1 for *_, ok in samples if not ok) / len(samples) if samples else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+            state = self.state
+        latencies = [latency for _, latency, ok in samples if ok]
+        return {
+            "state": state,
+            "healthy": state == STATE_CLOSED,
+            "requests": len(samples),
+            "errors": sum(1 for *_, ok in samples if not ok),
+            "error_rate": round(self.error_rate(), 4),
+            "latency_p50": round(statistics.median(latencies), 3) if latencies else None,
+            "latency_p95": round(self.latency(95), 3) if latencies else None,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_at": self.opened_at,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+        }
+
+
+class SourceMonitor:
+    """多数据源选源 + 对冲请求"""
+
+    def __init__(
+        self,
+        hedge_after: float = 5.0,
+        window: int = 50,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60,
+        max_workers: int = 4,
+    ):
+        """
+        Args:
+            hedge_after: 首选源超过多少秒未返回时启动下一个源（0 表示不对冲，只在失败时降级）
+            window / failure_threshold / reset_timeout: 见 SourceHealth
+            max_workers: 执行数据源请求的线程数
+        """
+        self.hedge_after = hedge_after
+        self._options = dict(
+            window=window, failure_threshold=failure_threshold, reset_timeout=reset_timeout
+        )
+        self._sources: Dict[str, SourceHealth] = {}
+        self._order: List[str] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="source")
+        self.hedges = 0
+        self.last_source: Optional[str] = None
+
+    def health(self, name: str) -> SourceHealth:
+        with self._lock:
+            source = self._sources.get(name)
+            if source is None:
+                source = self._sources[name] = SourceHealth(name, **self._options)
+                self._order.append(name)
+            return source
+
+    def rank(self, names: List[str]) -> List[str]:
+        """
+        选源顺序：闭合状态的源按中位延迟升序（无样本的源排在最前，保证每个源至少被探测一次），
+        其余（打开/半开）按传入顺序排在最后
+        """
+        healthy, degraded = [], []
+        for index, name in enumerate(names):
+            source = self.health(name)
+            if source.state == STATE_CLOSED:
+                latency = source.latency()
+                healthy.append((latency is not None, latency or 0.0, index, name))
+            else:
+                degraded.append(name)
+        return [name for *_, name in sorted(healthy)] + degraded
+
+    def _start(self, name: str, fetch: Callable[[], Any]) -> Future:
+        source = self.health(name)
+
+        def run():
+            start = time.perf_counter()
+            try:
+                result = fetch()
+            except BaseException as e:
+                source.record(time.perf_counter() - start, False, e)
+                raise
+            source.record(time.perf_counter() - start, True)
+            return result
+
+        return self._executor.submit(propagate(run))
+
+    def fetch(self, fetchers: Dict[str, Callable[[], Any]]) -> Tuple[Any, str]:
+        """
+        按选源顺序请求，必要时对冲
+
+        Args:
+            fetchers: {数据源名称: 拉取函数}（按优先级排列；失败或无数据时应抛出异常）
+
+        Returns:
+            (结果, 数据源名称)；全部失败时抛出最后一个异常
+        """
+        ranked = self.rank(list(fetchers))
+        queue = list(ranked)
+        pending: Dict[Future, str] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch(force: bool = False) -> Optional[str]:
+            # 熔断中的源跳过（半开状态只放行一个探测请求）
+            while queue:
+                name = queue.pop(0)
+                if force or self.health(name).allow():
+                    pending[self._start(name, fetchers[name])] = name
+                    return name
+            return None
+
+        if launch() is None:
+            # 全部熔断：仍按顺序尝试，避免完全没有数据
+            queue = list(ranked)
+            launch(force=True)
+
+        while pending:
+            timeout = self.hedge_after if (queue and self.hedge_after > 0) else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # 首选源过慢：启动下一个源，两者谁先成功用谁
+                slow = list(pending.values())[-1]
+                hedge = launch()
+                if hedge is not None:
+                    self.hedges += 1
+                    SOURCE_HEDGES.inc(source=hedge)
+                    print(f"⏱️ 数据源 {slow} 超过 {self.hedge_after:.1f}s 未返回，对冲请求 {hedge}")
+                continue
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    print(f"⚠️ 数据源 {name} 获取失败: {e}")
+                    continue
+                self.last_source = name
+                return result, name
+            if not pending:
+                launch()
+
+        raise last_error or RuntimeError("没有可用的数据源")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            order = list(self._order)
+        return {
+            "hedge_after": self.hedge_after,
+            "hedges": self.hedges,
+            "last_source": self.last_source,
+            "preferred": self.rank(order),
+            "sources": {name: self.health(name).stats() for name in order},
+        }
+
+    def collect_metrics(self):
+        with self._lock:
+            sources = list(self._sources.values())
+        for source in sources:
+            SOURCE_STATE.set(_STATE_VALUES[source.state], source=source.name)
+            SOURCE_ERROR_RATE.set(source.error_rate(), source=source.name)
+            latency = source.latency()
+            if latency is not None:
+                SOURCE_LATENCY.set(latency, source=source.name)
+
+
+# 全局实例（全市场行情：AKShare / 腾讯）
+source_monitor = SourceMonitor(
+    hedge_after=config.SOURCE_HEDGE_AFTER,
+    window=config.SOURCE_HEALTH_WINDOW,
+    failure_threshold=config.SOURCE_FAILURE_THRESHOLD,
+    reset_timeout=config.SOURCE_RESET_TIMEOUT,
+)
+metrics.register_collector(source_monitor.collect_metrics)
@@ -0,0 +1,344 @@
+"""
+请求追踪模块
+基于 contextvars 的轻量 span 追踪：每个被采样的请求生成一条 trace，
+记录各 I/O 与计算步骤的起止时间，最近 N 条保存在内存环形缓冲区，可导出为瀑布图 JSON
+
+- 未采样时 span() 只做一次 ContextVar 读取，返回共享的空上下文，开销可忽略
+- 线程池任务用 propagate() 包装以继承当前 span
+- 异步任务自动继承上下文；长期运行的工作协程应调用 detach()，并显式传入 parent
+"""
+
+import functools
+import itertools
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar, copy_context
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from core.config import config
+
+
+class Span:
+    """追踪中的一个步骤"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "end", "attrs", "error", "thread")
+
+    def __init__(
+        self,
+        trace: "Trace",
+        span_id: int,
+        parent_id: Optional[int],
+        name: str,
+        attrs: Dict[str, Any],
+        start: Optional[float] = None,
+    ):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    def set(self, **attrs):
+        """追加属性"""
+        self.attrs.update(attrs)
+
+    def finish(self, end: Optional[float] = None, error: Optional[BaseException] = None):
+        self.end = time.perf_counter() if end is None else end
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+
+class Trace:
+    """一次请求的追踪记录"""
+
+    def __init__(self, name: str, attrs: Dict[str, Any], max_spans: int):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.root = self.new_span(name, None, {})
+
+    def new_span(
+        self,
+        name: str,
+        parent_id: Optional[int],
+        attrs: Dict[str, Any],
+        start: Optional[float] = None,
+    ) -> Optional[Span]:
+        """创建 span，超过上限时丢弃并返回 None"""
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return None
+            span = Span(self, next(self._ids), parent_id, name, attrs, start)
+            self.spans.append(span)
+            return span
+
+    def waterfall(self) -> Dict[str, Any]:
+        """导出瀑布图：span 按开始时间排序，时间为相对 trace 开始的毫秒数"""
+        with self._lock:
+            spans = list(self.spans)
+        origin = self.root.start
+        depths: Dict[int, int] = {}
+        rows = []
+        for span in sorted(spans, key=lambda s: (s.start, s.span_id)):
+            depth = depths.get(span.parent_id, -1) + 1 if span.parent_id is not None else 0
+            depths[span.span_id] = depth
+            rows.append(
+                {
+                    "id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "depth": depth,
+                    "offset_ms": round((span.start - origin) * 1000, 3),
+                    "duration_ms": (
+                        None if span.end is None else round((span.end - span.start) * 1000, 3)
+                    ),
+                    "thread": span.thread,
+                    "attrs": span.attrs,
+                    "error": span.error,
+                }
+            )
+        return {**self.summary(), "spans": rows}
+
+    def summary(self) -> Dict[str, Any]:
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attrs": self.attrs,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration_ms": (
+                None if root.end is None else round((root.end - root.start) * 1000, 3)
+            ),
+            "span_count": len(self.spans),
+            "dropped_spans": self.dropped,
+            "error": root.error,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+class _NoopContext:
+    """未采样时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopContext()
+
+
+class _SpanContext:
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.finish(error=exc)
+        _current.reset(self.token)
+        return False
+
+
+def current_span() -> Optional[Span]:
+    """当前 span（未在采样的请求中返回 None）"""
+    return _current.get()
+
+
+def span(name: str, parent: Optional[Span] = None, **attrs):
+    """
+    在当前 span 下创建子 span（上下文管理器）
+
+    Args:
+        name: 步骤名称
+        parent: 显式指定父 span（默认取当前上下文）
+        attrs: 附加属性
+    """
+    parent = parent or _current.get()
+    if parent is None:
+        return _NOOP
+    child = parent.trace.new_span(name, parent.span_id, attrs)
+    return _NOOP if child is None else _SpanContext(child)
+
+
+def record_span(
+    name: str,
+    start: float,
+    end: Optional[float] = None,
+    parent: Optional[Span] = None,
+    **attrs,
+):
+    """补记一个已完成的 span（start/end 为 time.perf_counter() 时间）"""
+    parent = parent or _current.get()
+    if parent is None:
+        return
+    child = parent.trace.new_span(name, parent.span_id, attrs, start=start)
+    if child is not None:
+        child.finish(end=end)
+
+
+def propagate(fn: Callable) -> Callable:
+    """包装提交到线程池的函数，使其继承当前追踪上下文（未采样时原样返回）"""
+    if _current.get() is None:
+        return fn
+    return functools.partial(copy_context().run, fn)
+
+
+def detach():
+    """清除当前任务/线程的追踪上下文（长期运行的工作协程启动时调用）"""
+    _current.set(None)
+
+
+class _TraceContext:
+    __slots__ = ("tracer", "trace", "token")
+
+    def __init__(self, tracer: "Tracer", trace: Trace):
+        self.tracer = tracer
+        self.trace = trace
+        self.token = None
+
+    def __enter__(self) -> Trace:
+        self.token = _current.set(self.trace.root)
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.root.finish(error=exc)
+        _current.reset(self.token)
+        self.tracer._store(self.trace)
+        return False
+
+
+class Tracer:
+    """追踪器：采样决策 + 最近 N 条 trace 的环形缓冲区"""
+
+    def __init__(self, capacity: int = 50, sample_rate: float = 1.0, max_spans: int = 5000):
+        """
+        Args:
+            capacity: 保留的 trace 数量
+            sample_rate: 采样率（0 关闭，1 全部采样）
+            max_spans: 单条 trace 的 span 上限
+        """
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self._traces: "deque[Trace]" = deque(maxlen=max(1, capacity))
+        self._lock = threading.Lock()
+
+    def start_trace(self, name: str, force: bool = False, **attrs):
+        """
+        开始一条 trace（上下文管理器，未采样时返回 None）
+
+        Args:
+            name: trace 名称（如 "GET /api/band-trading-realtime"）
+            force: 忽略采样率强制记录
+        """
+        rate = self.sample_rate
+        if not force and (rate <= 0 or (rate < 1 and random.random() >= rate)):
+            return _NOOP
+        return _TraceContext(self, Trace(name, attrs, self.max_spans))
+
+    def _store(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """最近的 trace 摘要（新的在前）"""
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        return [t.summary() for t in traces[:limit]]
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """按 ID 获取瀑布图"""
+        with self._lock:
+            trace = next((t for t in self._traces if t.trace_id == trace_id), None)
+        return None if trace is None else trace.waterfall()
+
+    def stats(self) -> Dict[str, int]:
+        """缓冲区占用（trace 数、span 总数）"""
+        with self._lock:
+            traces = list(self._traces)
+        return {"traces": len(traces), "spans": sum(len(t.spans) for t in traces)}
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+# 全局追踪器
+tracer = Tracer(
+    capacity=config.TRACE_BUFFER_SIZE,
+    sample_rate=config.TRACE_SAMPLE_RATE,
+    max_spans=config.TRACE_MAX_SPANS,
+)
+_default_tracer = tracer
+
+
+class TraceMiddleware:
+    """
+    ASGI 中间件：为匹配前缀的 HTTP 请求开启 trace，
+    请求头 X-Debug-Trace: 1 强制采样，响应头 X-Trace-Id 返回 trace ID
+    """
+
+    def __init__(
+        self,
+        app,
+        tracer: Optional[Tracer] = None,
+        prefix: str = "/api/",
+        exclude=("/api/debug/",),
+    ):
+        self.app = app
+        self.tracer = tracer or _default_tracer
+        self.prefix = prefix
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(self.prefix)
+            or path.startswith(self.exclude)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        force = (b"x-debug-trace", b"1") in scope.get("headers", [])
+        query = scope.get("query_string", b"").decode("latin-1")
+        with self.tracer.start_trace(f"{scope['method']} {path}", force=force, query=query) as trace:
+            if trace is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    trace.attrs["status"] = message["status"]
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-trace-id", trace.trace_id.encode("ascii"))
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
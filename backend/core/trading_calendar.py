@@ -0,0 +1,273 @@
+"""
+A股交易日历与交易时段
+- 时段：集合竞价(9:15-9:30) / 上午连续竞价(9:30-11:30) / 午间休市 / 下午连续竞价(13:00-15:00) /
+  收盘后 / 非交易日（周末及 TRADING_HOLIDAYS、AKShare 交易日历中的休市日）
+- 休市期间（午休、收盘后、非交易日）行情不再变化：收盘（或午休）后 MARKET_SETTLE_SECONDS 秒
+  行情落定，此后拉取的快照一直有效到下一次开盘，缓存 TTL 相应延长
+- 定时筛选/预热只在交易时段内按间隔执行，另在午休和收盘落定后各执行一次，夜间和节假日空闲
+所有时间按北京时间（UTC+8，无夏令时）计算，对外接口使用 time.time() 时间戳
+"""
+
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.config import config
+
+CST = timezone(timedelta(hours=8))
+
+PHASE_PRE_OPEN = "pre_open"
+PHASE_MORNING = "morning"
+PHASE_LUNCH = "lunch"
+PHASE_AFTERNOON = "afternoon"
+PHASE_CLOSED = "closed"
+PHASE_NON_TRADING = "non_trading"
+
+PHASE_NAMES = {
+    PHASE_PRE_OPEN: "集合竞价",
+    PHASE_MORNING: "上午交易",
+    PHASE_LUNCH: "午间休市",
+    PHASE_AFTERNOON: "下午交易",
+    PHASE_CLOSED: "已收盘",
+    PHASE_NON_TRADING: "非交易日",
+}
+
+PRE_OPEN = dtime(9, 15)
+MORNING_OPEN = dtime(9, 30)
+MORNING_CLOSE = dtime(11, 30)
+AFTERNOON_OPEN = dtime(13, 0)
+AFTERNOON_CLOSE = dtime(15, 0)
+
+# 向前查找下一个交易日的最大天数（春节等长假不超过两周）
+_MAX_LOOKAHEAD_DAYS = 30
+
+
+def parse_dates(text: str) -> Set[date]:
+    """解析 "2026-01-01,2026-02-16" 为日期集合，忽略格式错误的项"""
+    dates = set()
+    for item in (text or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            dates.add(date.fromisoformat(item))
+        except ValueError:
+            print(f"⚠️ 忽略无效的休市日期配置: {item}")
+    return dates
+
+
+class TradingCalendar:
+    """交易日历：判断交易时段，计算行情快照有效期和下一次定时刷新时间"""
+
+    def __init__(self, holidays: Iterable[date] = (), settle_seconds: float = 300):
+        """
+        Args:
+            holidays: 额外的休市日（工作日）
+            settle_seconds: 收盘/午休后多少秒视为行情落定（收盘集合竞价和数据源同步需要时间）
+        """
+        self.holidays: Set[date] = set(holidays)
+        self.settle_seconds = settle_seconds
+        self._trade_dates: Set[date] = set()
+        self._trade_range: Optional[Tuple[date, date]] = None
+        self._lock = threading.Lock()
+
+    def load_trade_dates(self, dates: Iterable[date]) -> int:
+        """加载交易所交易日列表（覆盖范围内以此为准，范围外按周末 + 休市日判断）"""
+        dates = set(dates)
+        with self._lock:
+            self._trade_dates = dates
+            self._trade_range = (min(dates), max(dates)) if dates else None
+        return len(dates)
+
+    def is_trading_day(self, day: date) -> bool:
+        if day in self.holidays:
+            return False
+        with self._lock:
+            if self._trade_range and self._trade_range[0] <= day <= self._trade_range[1]:
+                return day in self._trade_dates
+        return day.weekday() < 5
+
+    @staticmethod
+    def _local(at: Optional[float]) -> datetime:
+        return datetime.fromtimestamp(time.time() if at is None else at, CST)
+
+    @staticmethod
+    def _at(day: date, clock: dtime) -> float:
+        return datetime.combine(day, clock, CST).timestamp()
+
+    def phase(self, at: Optional[float] = None) -> str:
+        """当前交易时段"""
+        local = self._local(at)
+        if not self.is_trading_day(local.date()):
+            return PHASE_NON_TRADING
+        clock = local.time()
+        if clock < PRE_OPEN or clock >= AFTERNOON_CLOSE:
+            return PHASE_CLOSED
+        if clock < MORNING_OPEN:
+            return PHASE_PRE_OPEN
+        if clock < MORNING_CLOSE:
+            return PHASE_MORNING
+        if clock < AFTERNOON_OPEN:
+            return PHASE_LUNCH
+        return PHASE_AFTERNOON
+
+    def is_trading(self, at: Optional[float] = None) -> bool:
+        """是否处于连续竞价时段"""
+        return self.phase(at) in (PHASE_MORNING, PHASE_AFTERNOON)
+
+    def next_trading_day(self, day: date) -> date:
+        """day 之后（不含）的下一个交易日"""
+        for offset in range(1, _MAX_LOOKAHEAD_DAYS + 1):
+            candidate = day + timedelta(days=offset)
+            if self.is_trading_day(candidate):
+                return candidate
+        return day + timedelta(days=1)
+
+    def previous_trading_day(self, day: date) -> date:
+        """day 之前（不含）的上一个交易日"""
+        for offset in range(1, _MAX_LOOKAHEAD_DAYS + 1):
+            candidate = day - timedelta(days=offset)
+            if self.is_trading_day(candidate):
+                return candidate
+        return day - timedelta(days=1)
+
+    def next_open(self, at: Optional[float] = None) -> float:
+        """下一次集合竞价开始的时间戳（行情开始变化）"""
+        local = self._local(at)
+        day = local.date()
+        if self.is_trading_day(day) and local.time() < PRE_OPEN:
+            return self._at(day, PRE_OPEN)
+        return self._at(self.next_trading_day(day), PRE_OPEN)
+
+    def frozen_window(self, at: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """
+        at 所在的休市区间 (行情落定时间, 下一次行情变化时间)
+        连续竞价、集合竞价以及收盘/午休后尚未落定时返回 None
+        """
+        at = time.time() if at is None else at
+        local = self._local(at)
+        day = local.date()
+        phase = self.phase(at)
+        if phase == PHASE_LUNCH:
+            settled, until = self._at(day, MORNING_CLOSE), self._at(day, AFTERNOON_OPEN)
+        elif phase == PHASE_CLOSED and local.time() >= AFTERNOON_CLOSE:
+            settled, until = self._at(day, AFTERNOON_CLOSE), self.next_open(at)
+        elif phase in (PHASE_CLOSED, PHASE_NON_TRADING):
+            # 开盘前或非交易日：最近一次收盘至下一次开盘
+            last = self.previous_trading_day(day)
+            settled, until = self._at(last, AFTERNOON_CLOSE), self.next_open(at)
+        else:
+            return None
+        settled += self.settle_seconds
+        if at < settled:
+            return None
+        return settled, until
+
+    def quote_date(self, at: Optional[float] = None) -> date:
+        """at 时刻行情所属的交易日：交易日集合竞价开始后为当日，开盘前和非交易日为上一个交易日"""
+        local = self._local(at)
+        day = local.date()
+        if self.is_trading_day(day) and local.time() >= PRE_OPEN:
+            return day
+        return self.previous_trading_day(day)
+
+    def settled_date(self, at: Optional[float] = None) -> Optional[date]:
+        """at 时刻已收盘落定的交易日（行情即该日日线）；盘中和收盘后尚未落定时返回 None"""
+        local = self._local(at)
+        day = local.date()
+        if not self.is_trading_day(day) or local.time() < PRE_OPEN:
+            return self.previous_trading_day(day)
+        if local.timestamp() >= self._at(day, AFTERNOON_CLOSE) + self.settle_seconds:
+            return day
+        return None
+
+    def expires_at(self, created_at: float, default_ttl: float) -> float:
+        """created_at 时刻生成的行情类缓存的过期时间：休市期间生成的一直有效到下一次开盘"""
+        window = self.frozen_window(created_at)
+        expiry = created_at + default_ttl
+        return max(expiry, window[1]) if window else expiry
+
+    def cache_ttl(self, default_ttl: float, at: Optional[float] = None) -> float:
+        """现在生成的行情类缓存应使用的 TTL（秒）"""
+        at = time.time() if at is None else at
+        return self.expires_at(at, default_ttl) - at
+
+    def max_age(self, default_age: float, at: Optional[float] = None) -> float:
+        """
+        读取行情类缓存时允许的最大年龄（秒）：休市期间落定之后生成的条目都视为新鲜
+        （等价于 expires_at(created_at) > at，但读取前无需知道条目的生成时间）
+        """
+        at = time.time() if at is None else at
+        window = self.frozen_window(at)
+        return max(default_age, at - window[0]) if window else default_age
+
+    def refresh_points(self, day: date) -> List[float]:
+        """交易日内的固定刷新点：开盘、午休落定、午后开盘、收盘落定"""
+        return [
+            self._at(day, MORNING_OPEN),
+            self._at(day, MORNING_CLOSE) + self.settle_seconds,
+            self._at(day, AFTERNOON_OPEN),
+            self._at(day, AFTERNOON_CLOSE) + self.settle_seconds,
+        ]
+
+    def next_refresh(self, interval: float, at: Optional[float] = None) -> float:
+        """
+        下一次定时刷新的时间戳
+        连续竞价时段内按 interval 执行；此外在开盘、午休落定、午后开盘、收盘落定时各执行一次，
+        休市期间不执行
+        """
+        at = time.time() if at is None else at
+        candidates = []
+        if self.is_trading(at):
+            candidates.append(at + interval)
+        day = self._local(at).date()
+        if not self.is_trading_day(day):
+            day = self.next_trading_day(day)
+        for _ in range(2):
+            later = [point for point in self.refresh_points(day) if point > at]
+            if later:
+                candidates.append(later[0])
+                break
+            day = self.next_trading_day(day)
+        return min(candidates)
+
+    def status(self, at: Optional[float] = None) -> Dict[str, Any]:
+        at = time.time() if at is None else at
+        window = self.frozen_window(at)
+        return {
+            "phase": self.phase(at),
+            "trading_day": self.is_trading_day(self._local(at).date()),
+            "now": self._local(at).isoformat(timespec="seconds"),
+            "next_open": self._local(self.next_open(at)).isoformat(timespec="seconds"),
+            "quotes_frozen": window is not None,
+            "frozen_until": self._local(window[1]).isoformat(timespec="seconds") if window else None,
+            "stock_data_ttl": round(self.cache_ttl(config.CACHE_TTL_STOCK, at)),
+            "trade_dates_loaded": len(self._trade_dates),
+        }
+
+
+def run_in_sessions(
+    job: Callable[[], Any], interval: float, name: str, calendar: Optional[TradingCalendar] = None
+):
+    """
+    按交易时段循环执行 job（阻塞，供 scheduler.py / auto_preheat.py 等独立进程使用）
+    :param interval: 交易时段内的执行间隔（秒）
+    """
+    calendar = calendar or trading_calendar
+    while True:
+        next_run = calendar.next_refresh(interval)
+        wait = max(0.0, next_run - time.time())
+        print(
+            f"⏰ 下次{name}：{calendar._local(next_run).strftime('%m-%d %H:%M')}"
+            f"（当前{PHASE_NAMES[calendar.phase()]}，{wait / 60:.0f}分钟后）"
+        )
+        time.sleep(wait)
+        job()
+
+
+# 全局实例
+trading_calendar = TradingCalendar(
+    holidays=parse_dates(config.TRADING_HOLIDAYS),
+    settle_seconds=config.MARKET_SETTLE_SECONDS,
+)
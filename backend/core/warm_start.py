@@ -0,0 +1,115 @@
+"""
+预热缓存模块（两级缓存的磁盘层）
+每次更新时把最新行情快照、AKShare 数据表等写入本地磁盘，
+进程重启后映射回内存，首个请求无需等待全市场拉取
+筛选后的数据表写盘经 schedule_persist 合并，在后台线程执行，不阻塞事件循环
+"""
+
+import threading
+import time
+from typing import Any, Iterable, Optional, Tuple
+
+from core.cache import memory_cache
+from core.config import config
+from core.disk_cache import DiskCache
+
+
+# 重启后需要恢复的内存命名空间（全市场数据表 + 个股融资融券/资金流/K线）
+WARM_NAMESPACES = ("akshare.table", "akshare.margin", "akshare.capital", "akshare.kline")
+
+warm_store = DiskCache(
+    config.WARM_CACHE_DIR,
+    max_bytes=config.WARM_CACHE_MAX_MB * 1024 * 1024,
+    max_entries=64,
+    max_age=config.WARM_CACHE_MAX_AGE,
+)
+
+
+def persist_value(name: str, value: Any):
+    """持久化单个值（如行情快照）"""
+    try:
+        warm_store.set(f"value:{name}", value)
+    except Exception as e:
+        print(f"⚠️ 预热缓存写入失败 {name}: {e}")
+
+
+def load_value(name: str, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+    """读取持久化的值，返回 (value, created_at)"""
+    try:
+        return warm_store.get_entry(f"value:{name}", max_age=max_age)
+    except Exception as e:
+        print(f"⚠️ 预热缓存读取失败 {name}: {e}")
+        return None
+
+
+def persist_namespaces(namespaces: Iterable[str] = WARM_NAMESPACES) -> int:
+    """
+    把内存缓存命名空间整体写入磁盘（连同各条目的过期时间）
+    :return: 写入的条目总数
+    """
+    total = 0
+    for namespace in namespaces:
+        entries = memory_cache.entries(namespace)
+        if not entries:
+            continue
+        try:
+            warm_store.set(f"ns:{namespace}", entries)
+            total += len(entries)
+        except Exception as e:
+            print(f"⚠️ 预热缓存写入失败 {namespace}: {e}")
+    return total
+
+
+_persist_lock = threading.Lock()
+_persist_timer: Optional[threading.Timer] = None
+
+
+def _run_scheduled_persist():
+    global _persist_timer
+    with _persist_lock:
+        _persist_timer = None
+    try:
+        persist_namespaces()
+    except Exception as e:
+        print(f"⚠️ 预热缓存写入失败: {e}")
+
+
+def schedule_persist(delay: Optional[float] = None) -> bool:
+    """
+    在后台线程中写盘（调用方立即返回）：delay 秒内的多次调用合并为一次
+    :return: 是否新安排了一次写盘（已有待执行的写盘时返回 False）
+    """
+    global _persist_timer
+    delay = config.WARM_CACHE_PERSIST_DELAY if delay is None else delay
+    with _persist_lock:
+        if _persist_timer is not None:
+            return False
+        timer = _persist_timer = threading.Timer(delay, _run_scheduled_persist)
+        timer.daemon = True
+    timer.start()
+    return True
+
+
+def restore_namespaces(namespaces: Iterable[str] = WARM_NAMESPACES) -> int:
+    """
+    从磁盘恢复内存缓存命名空间
+    恢复的条目沿用写盘时的过期时间（只保留剩余 TTL，休市期间生成的条目有效到下一次开盘），
+    已过期或超过 WARM_CACHE_MAX_AGE 的条目丢弃
+    :return: 恢复的条目总数
+    """
+    total = 0
+    now = time.time()
+    for namespace in namespaces:
+        try:
+            entries = warm_store.get(f"ns:{namespace}")
+        except Exception as e:
+            print(f"⚠️ 预热缓存读取失败 {namespace}: {e}")
+            continue
+        for entry in entries or []:
+            if len(entry) != 4:
+                continue  # 旧格式条目没有过期时间，丢弃后重新加载
+            key, value, created_at, expires_at = entry
+            if expires_at > now and now - created_at <= config.WARM_CACHE_MAX_AGE:
+                memory_cache.set(namespace, key, value, ttl=expires_at - now, created_at=created_at)
+                total += 1
+    return total
@@ -5,10 +5,16 @@
 import akshare as ak
 import pandas as pd
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import time
 import os
 
+from core.cache import memory_cache
+from core.config import config
+from core.metrics import track_upstream
+from core.shared_snapshot import shared_snapshots
+from core.trading_calendar import trading_calendar
+
 # 禁用代理（重要！）
 os.environ['NO_PROXY'] = '*'
 os.environ['no_proxy'] = '*'
@@ -21,22 +27,58 @@ class AKShareAdapter:
     """AKShare数据适配器（免费）"""
     
     def __init__(self):
-        self.cache = {}
-        self.cache_ttl = 60  # 缓存60秒
+        # 使用全局多键缓存，按命名空间设置 TTL 和条目上限
+        self.cache = memory_cache
+        self.cache_ttl = config.CACHE_TTL_AKSHARE  # 行情缓存60秒
+        self.cache.configure_namespace("akshare.realtime", ttl=self.cache_ttl)
+        self.cache.configure_namespace("akshare.table", ttl=self.cache_ttl, max_entries=16)
+        self.cache.configure_namespace("akshare.capital", ttl=self.cache_ttl, max_entries=6000)
+        self.cache.configure_namespace("akshare.margin", ttl=config.CACHE_TTL_ENRICH, max_entries=6000)
+        self.cache.configure_namespace("akshare.kline", ttl=config.CACHE_TTL_ENRICH, max_entries=2000)
     
-    def _get_cache(self, key: str) -> Optional[Any]:
+    def _get_cache(self, namespace: str, key: str) -> Optional[Any]:
         """获取缓存"""
-        if key in self.cache:
-            data, timestamp = self.cache[key]
-            if time.time() - timestamp < self.cache_ttl:
-                return data
-            else:
-                del self.cache[key]
-        return None
-    
-    def _set_cache(self, key: str, data: Any):
-        """设置缓存"""
-        self.cache[key] = (data, time.time())
+        return self.cache.get(namespace, key)
+
+    @staticmethod
+    def _call(func, *args, **kwargs):
+        """调用 AKShare 接口（按函数名统计耗时和失败次数）"""
+        with track_upstream(f"akshare.{func.__name__}"):
+            return func(*args, **kwargs)
+
+    def _get_table(self, name: str, loader, ttl: Optional[float] = None) -> pd.DataFrame:
+        """
+        获取全市场数据表（融资融券标的、资金流排名等）
+        同一张表在 TTL 内只下载一次，并发请求合并为一次下载；
+        多进程部署时由拉取进程下载并发布共享快照，其余进程挂载后构造本进程的 DataFrame
+        （省去重复下载，各进程仍各持一份数据）；休市期间落定的快照有效到下一次开盘
+        """
+        return self.cache.get_or_load(
+            "akshare.table",
+            name,
+            lambda: self._load_shared_table(name, loader, ttl or self.cache_ttl),
+            ttl=ttl,
+            cache_if=lambda df: df is not None and not df.empty,
+        )
+
+    @staticmethod
+    def _load_shared_table(name: str, loader, max_age: float) -> pd.DataFrame:
+        store = shared_snapshots
+        if store is None:
+            return loader()
+        key = f"table.{name}"
+        if not store.is_leader():
+            snapshot = store.attach(key)
+            fresh = (
+                snapshot is not None
+                and trading_calendar.expires_at(snapshot.created_at, max_age) > time.time()
+            )
+            if fresh:
+                return pd.DataFrame(snapshot.columns())
+        df = loader()
+        if store.is_leader() and df is not None and not df.empty:
+            store.publish(key, {str(column): df[column].tolist() for column in df.columns})
+        return df
     
     def get_realtime_quotes(self, stock_codes: List[str] = None) -> pd.DataFrame:
         """
@@ -50,17 +92,18 @@ class AKShareAdapter:
         """
         try:
             # 检查缓存
-            cache_key = "realtime_all" if not stock_codes else f"realtime_{','.join(stock_codes[:10])}"
-            cached = self._get_cache(cache_key)
+            cache_key = "all" if not stock_codes else ','.join(stock_codes[:10])
+            cached = self._get_cache("akshare.realtime", cache_key)
             if cached is not None:
                 if stock_codes:
                     return cached[cached['code'].isin(stock_codes)]
                 return cached
             
             print("📡 正在获取实时行情数据...")
+            ttl = trading_calendar.cache_ttl(self.cache_ttl)
             
             # 获取沪深A股实时行情
-            df = ak.stock_zh_a_spot_em()
+            df = self._call(ak.stock_zh_a_spot_em)
             
             # 字段映射和清洗
             result = pd.DataFrame({
@@ -82,8 +125,8 @@ class AKShareAdapter:
                 'pe_ratio': pd.to_numeric(df['市盈率-动态'], errors='coerce').fillna(0),
             })
             
-            # 缓存结果
-            self._set_cache(cache_key, result)
+            # 缓存结果（休市期间行情落定后缓存到下一次开盘）
+            self.cache.set("akshare.realtime", cache_key, result, ttl=ttl)
             
             print(f"✅ 获取到 {len(result)} 只股票的实时数据")
             
@@ -110,58 +153,58 @@ class AKShareAdapter:
         try:
             # 移除市场前缀
             clean_code = stock_code.replace('sh', '').replace('sz', '')
-            
-            # 检查缓存
-            cache_key = f"margin_{clean_code}"
-            cached = self._get_cache(cache_key)
-            if cached is not None:
-                return cached
-            
-            # 尝试获取融资融券数据
-            # 注意：AKShare的融资融券接口可能需要特定格式
-            try:
-                # 获取个股融资融券数据
-                df = ak.stock_margin_underlying_info_szse(symbol="深市")
+
+            def load():
+                # 尝试获取融资融券数据
+                # 注意：AKShare的融资融券接口可能需要特定格式
+                try:
+                    # 获取个股融资融券数据
+                    df = self._get_table(
+                        "margin_underlying_szse",
+                        lambda: self._call(ak.stock_margin_underlying_info_szse, symbol="深市"),
+                        ttl=config.CACHE_TTL_ENRICH,
+                    )
                 
-                # 查找该股票
-                stock_data = df[df['证券代码'] == clean_code]
+                    # 查找该股票
+                    stock_data = df[df['证券代码'] == clean_code]
                 
-                if not stock_data.empty:
-                    latest = stock_data.iloc[0]
+                    if not stock_data.empty:
+                        latest = stock_data.iloc[0]
                     
-                    result = {
-                        'is_margin_eligible': True,
-                        'margin_balance': 0,  # AKShare可能不提供详细数据
-                        'short_balance': 0,
-                        'margin_ratio': 0,
-                        'net_flow': 0,
-                        'margin_score': 70,  # 默认评分
-                        'has_data': True
-                    }
+                        result = {
+                            'is_margin_eligible': True,
+                            'margin_balance': 0,  # AKShare可能不提供详细数据
+                            'short_balance': 0,
+                            'margin_ratio': 0,
+                            'net_flow': 0,
+                            'margin_score': 70,  # 默认评分
+                            'has_data': True
+                        }
                     
-                    self._set_cache(cache_key, result)
-                    return result
-            except:
-                pass
+                        return result
+                except:
+                    pass
             
-            # 如果获取失败，返回默认值（假设支持融资融券）
-            # 可以根据股票代码特征判断
-            code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
-            is_eligible = (code_num % 10 != 0) and (code_num % 10 != 9)
+                # 如果获取失败，返回默认值（假设支持融资融券）
+                # 可以根据股票代码特征判断
+                code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
+                is_eligible = (code_num % 10 != 0) and (code_num % 10 != 9)
             
-            result = {
-                'is_margin_eligible': is_eligible,
-                'margin_balance': 0,
-                'short_balance': 0,
-                'margin_ratio': 0,
-                'net_flow': 0,
-                'margin_score': 65 if is_eligible else 0,
-                'has_data': False
-            }
-            
-            self._set_cache(cache_key, result)
-            return result
+                result = {
+                    'is_margin_eligible': is_eligible,
+                    'margin_balance': 0,
+                    'short_balance': 0,
+                    'margin_ratio': 0,
+                    'net_flow': 0,
+                    'margin_score': 65 if is_eligible else 0,
+                    'has_data': False
+                }
             
+                return result
+
+            # 同一代码的并发未命中只加载一次
+            return self.cache.get_or_load("akshare.margin", clean_code, load)
+
         except Exception as e:
             print(f"⚠️ 获取融资融券数据失败 {stock_code}: {e}")
             return {
@@ -186,76 +229,75 @@ class AKShareAdapter:
         """
         try:
             clean_code = stock_code.replace('sh', '').replace('sz', '')
-            
-            # 检查缓存
-            cache_key = f"capital_{clean_code}"
-            cached = self._get_cache(cache_key)
-            if cached is not None:
-                return cached
-            
-            # 获取个股资金流向
-            try:
-                df = ak.stock_individual_fund_flow_rank(symbol="即时")
+
+            def load():
+                # 获取个股资金流向
+                try:
+                    df = self._get_table(
+                        "fund_flow_rank",
+                        lambda: self._call(ak.stock_individual_fund_flow_rank, symbol="即时"),
+                    )
                 
-                # 筛选指定股票
-                stock_data = df[df['代码'] == clean_code]
+                    # 筛选指定股票
+                    stock_data = df[df['代码'] == clean_code]
                 
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    main_inflow = float(row['主力净流入-净额']) / 100000000  # 转换为亿
+                    if not stock_data.empty:
+                        row = stock_data.iloc[0]
+                        main_inflow = float(row['主力净流入-净额']) / 100000000  # 转换为亿
                     
-                    # 判断流向强度
-                    if main_inflow > 1.0:
-                        flow_strength = 'strong_in'
-                    elif main_inflow > 0.4:
-                        flow_strength = 'weak_in'
-                    elif main_inflow < -1.0:
-                        flow_strength = 'strong_out'
-                    elif main_inflow < -0.4:
-                        flow_strength = 'weak_out'
-                    else:
-                        flow_strength = 'neutral'
+                        # 判断流向强度
+                        if main_inflow > 1.0:
+                            flow_strength = 'strong_in'
+                        elif main_inflow > 0.4:
+                            flow_strength = 'weak_in'
+                        elif main_inflow < -1.0:
+                            flow_strength = 'strong_out'
+                        elif main_inflow < -0.4:
+                            flow_strength = 'weak_out'
+                        else:
+                            flow_strength = 'neutral'
                     
-                    result = {
-                        'main_inflow': main_inflow,
-                        'is_inflow': main_inflow > 0.15,
-                        'flow_strength': flow_strength,
-                        'has_data': True
-                    }
+                        result = {
+                            'main_inflow': main_inflow,
+                            'is_inflow': main_inflow > 0.15,
+                            'flow_strength': flow_strength,
+                            'has_data': True
+                        }
                     
-                    self._set_cache(cache_key, result)
-                    return result
-            except:
-                pass
-            
-            # 如果获取失败，使用模拟数据
-            code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
-            code_prefix = int(clean_code[:3]) if clean_code[:3].isdigit() else 600
+                        return result
+                except:
+                    pass
             
-            seed = (code_num * 7 + code_prefix) % 400
-            main_inflow = round((seed - 200) / 120, 2)
+                # 如果获取失败，使用模拟数据
+                code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
+                code_prefix = int(clean_code[:3]) if clean_code[:3].isdigit() else 600
             
-            if main_inflow > 1.0:
-                flow_strength = 'strong_in'
-            elif main_inflow > 0.4:
-                flow_strength = 'weak_in'
-            elif main_inflow < -1.0:
-                flow_strength = 'strong_out'
-            elif main_inflow < -0.4:
-                flow_strength = 'weak_out'
-            else:
-                flow_strength = 'neutral'
+                seed = (code_num * 7 + code_prefix) % 400
+                main_inflow = round((seed - 200) / 120, 2)
             
-            result = {
-                'main_inflow': main_inflow,
-                'is_inflow': main_inflow > 0.15,
-                'flow_strength': flow_strength,
-                'has_data': False
-            }
+                if main_inflow > 1.0:
+                    flow_strength = 'strong_in'
+                elif main_inflow > 0.4:
+                    flow_strength = 'weak_in'
+                elif main_inflow < -1.0:
+                    flow_strength = 'strong_out'
+                elif main_inflow < -0.4:
+                    flow_strength = 'weak_out'
+                else:
+                    flow_strength = 'neutral'
             
-            self._set_cache(cache_key, result)
-            return result
+                result = {
+                    'main_inflow': main_inflow,
+                    'is_inflow': main_inflow > 0.15,
+                    'flow_strength': flow_strength,
+                    'has_data': False
+                }
             
+                return result
+
+            # 同一代码的并发未命中只加载一次
+            return self.cache.get_or_load("akshare.capital", clean_code, load)
+
         except Exception as e:
             print(f"⚠️ 获取资金流向数据失败 {stock_code}: {e}")
             return {
@@ -281,68 +323,85 @@ class AKShareAdapter:
         try:
             clean_code = stock_code.replace('sh', '').replace('sz', '')
             
-            # 检查缓存
-            cache_key = f"kline_{clean_code}_{period}_{days}"
-            cached = self._get_cache(cache_key)
-            if cached is not None:
-                return cached
-            
-            # 计算日期范围
-            end_date = datetime.now().strftime('%Y%m%d')
-            start_date = (datetime.now() - timedelta(days=days*2)).strftime('%Y%m%d')
+            cache_key = f"{clean_code}_{period}_{days}"
+
+            def load():
+                # 计算日期范围
+                end_date = datetime.now().strftime('%Y%m%d')
+                start_date = (datetime.now() - timedelta(days=days*2)).strftime('%Y%m%d')
             
-            # 添加重试机制（最多3次）
-            max_retries = 3
-            retry_delay = 0.5  # 500ms延迟
+                # 添加重试机制（最多3次）
+                max_retries = 3
+                retry_delay = 0.5  # 500ms延迟
             
-            for attempt in range(max_retries):
-                try:
-                    # 添加请求延迟，避免频率过高
-                    if attempt > 0:
-                        time.sleep(retry_delay * attempt)  # 递增延迟
+                for attempt in range(max_retries):
+                    try:
+                        # 添加请求延迟，避免频率过高
+                        if attempt > 0:
+                            time.sleep(retry_delay * attempt)  # 递增延迟
                     
-                    # 获取日K线数据
-                    df = ak.stock_zh_a_hist(
-                        symbol=clean_code,
-                        period="daily",
-                        start_date=start_date,
-                        end_date=end_date,
-                        adjust="qfq"  # 前复权
-                    )
+                        # 获取日K线数据
+                        df = self._call(
+                            ak.stock_zh_a_hist,
+                            symbol=clean_code,
+                            period="daily",
+                            start_date=start_date,
+                            end_date=end_date,
+                            adjust="qfq"  # 前复权
+                        )
                     
-                    if df.empty:
-                        return []
+                        if df.empty:
+                            return []
                     
-                    # 取最近N天
-                    df = df.tail(days)
+                        # 取最近N天
+                        df = df.tail(days)
                     
-                    # 转换为列表
-                    kline = []
-                    for _, row in df.iterrows():
-                        kline.append({
-                            'date': row['日期'].strftime('%Y-%m-%d') if hasattr(row['日期'], 'strftime') else str(row['日期']),
-                            'open': round(float(row['开盘']), 2),
-                            'close': round(float(row['收盘']), 2),
-                            'high': round(float(row['最高']), 2),
-                            'low': round(float(row['最低']), 2),
-                            'volume': int(row['成交量'])
-                        })
+                        # 转换为列表
+                        kline = []
+                        for _, row in df.iterrows():
+                            kline.append({
+                                'date': row['日期'].strftime('%Y-%m-%d') if hasattr(row['日期'], 'strftime') else str(row['日期']),
+                                'open': round(float(row['开盘']), 2),
+                                'close': round(float(row['收盘']), 2),
+                                'high': round(float(row['最高']), 2),
+                                'low': round(float(row['最低']), 2),
+                                'volume': int(row['成交量'])
+                            })
                     
-                    self._set_cache(cache_key, kline)
-                    return kline
+                        return kline
                     
-                except Exception as retry_error:
-                    if attempt == max_retries - 1:
-                        # 最后一次重试失败，抛出异常
-                        raise retry_error
-                    # 继续重试
-                    continue
-            
+                    except Exception as retry_error:
+                        if attempt == max_retries - 1:
+                            # 最后一次重试失败，抛出异常
+                            raise retry_error
+                        # 继续重试
+                        continue
+
+            # 同一代码的并发未命中只加载一次（空结果不缓存）
+            return self.cache.get_or_load("akshare.kline", cache_key, load, cache_if=bool)
+
         except Exception as e:
             # 静默失败，返回空列表让系统使用模拟数据
             # print(f"⚠️ 获取K线数据失败 {stock_code}: {e}")
             return []
 
+    def get_trade_dates(self) -> List[date]:
+        """
+        交易所历史及当年交易日历（免费，一天更新一次）
+
+        Returns:
+            List[date]: 交易日列表
+        """
+        df = self._get_table(
+            "trade_dates",
+            lambda: self._call(ak.tool_trade_date_hist_sina),
+            ttl=86400,
+        )
+        return [
+            day.date() if hasattr(day, 'date') else date.fromisoformat(str(day)[:10])
+            for day in df['trade_date']
+        ]
+
 
 # 创建全局实例
 akshare_adapter = AKShareAdapter()
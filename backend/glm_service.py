@@ -2,33 +2,240 @@
 GLM-4-Flash AI 服务
 提供股票智能分析功能
 严格控制并发：最多1个请求同时执行
+分析结果按（代码、策略、交易日、特征分桶）缓存，命中时不经过并发锁
 """
 
 import requests
 import json
+import math
 from functools import lru_cache
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import os
 import threading
 
+from core.cache import memory_cache
+from core.config import config
+from core.disk_cache import DiskCache, normalize_key
+from core.metrics import record_upstream_error, track_upstream
+from core.trading_calendar import trading_calendar
+from services.glm_client import AsyncGLMClient, PRIORITY_INTERACTIVE, TokenBucket
+
+
+# AI 响应缓存：内存层 + 磁盘层（重启后仍可命中）
+memory_cache.configure_namespace(
+    "glm", ttl=config.AI_CACHE_TTL, max_entries=config.AI_CACHE_MAX_ENTRIES
+)
+ai_response_cache = DiskCache(
+    config.AI_CACHE_DIR,
+    max_bytes=config.AI_CACHE_MAX_MB * 1024 * 1024,
+    max_entries=config.AI_CACHE_MAX_ENTRIES,
+    max_age=config.AI_CACHE_TTL,
+)
+
+
+def _bucket(value: float, step: float) -> float:
+    """把连续特征值归入固定宽度的桶"""
+    return round(float(value or 0) / step) * step
+
+
+def _price_bucket(price: float) -> int:
+    """价格按 0.5% 的对数刻度分桶（不同价位的股票桶宽一致）"""
+    if not price or price <= 0:
+        return 0
+    return round(math.log(price) / math.log(1.005))
+
+
+def analysis_cache_key(
+    stock_data: Dict[str, Any],
+    strategy_type: str,
+    kind: str = "analyze",
+    trade_date: Optional[str] = None,
+) -> str:
+    """
+    生成 AI 分析缓存键：代码 + 策略 + 行情所属交易日 + 分桶后的行情特征
+    价格/涨幅/量比/评分变化不大时命中同一条缓存；开盘前和休市日沿用上一交易日的键
+    """
+    return normalize_key(
+        "glm",
+        kind,
+        stock_data.get("code") or stock_data.get("name", ""),
+        strategy_type,
+        trade_date or trading_calendar.quote_date().isoformat(),
+        price=_price_bucket(stock_data.get("price", 0)),
+        change=_bucket(stock_data.get("change_percent", 0), 0.5),
+        ratio=_bucket(stock_data.get("volume_ratio", 0), 0.2),
+        cap=_bucket(stock_data.get("market_cap", 0), 10),
+        score=_bucket(stock_data.get("score", 0), 5),
+    )
+
+
+def get_cached_response(key: str) -> Optional[str]:
+    """读取 AI 响应缓存（先内存后磁盘）"""
+    cached = memory_cache.get("glm", key)
+    if cached is not None:
+        return cached
+    try:
+        entry = ai_response_cache.get_entry(key)
+    except Exception:
+        return None
+    if entry is None:
+        return None
+    text, created_at = entry
+    memory_cache.set("glm", key, text, ttl=config.AI_CACHE_TTL - (time.time() - created_at))
+    return text
+
+
+def set_cached_response(key: str, text: str):
+    """写入 AI 响应缓存"""
+    memory_cache.set("glm", key, text)
+    try:
+        ai_response_cache.set(key, text)
+    except Exception as e:
+        print(f"⚠️ AI 缓存写入失败: {e}")
+
+
+_BATCH_TEXT_LIMIT = 300  # 单只股票分析文本的最大长度
+
+
+def build_batch_prompt(
+    stocks: List[Dict[str, Any]],
+    strategy_type: str,
+    emotion_data: Optional[Dict[str, Any]] = None,
+    warnings: Optional[list] = None,
+) -> str:
+    """构造批量分析提示词（要求输出按股票代码索引的 JSON）"""
+    strategy_map = {
+        "aggressive": "激进型（追求高收益）",
+        "conservative": "保守型（稳健为主）",
+        "balanced": "平衡型（均衡配置）",
+    }
+    strategy_desc = strategy_map.get(strategy_type, "平衡型")
+
+    sections = [f"策略类型：{strategy_desc}"]
+    if stocks:
+        lines = [
+            f"- 代码{s.get('code')} {s.get('name') or '未知'}：价格{(s.get('price') or 0):.2f}元，"
+            f"涨跌幅{(s.get('change_percent') or 0):.2f}%，量比{(s.get('volume_ratio') or 0):.2f}，"
+            f"市值{(s.get('market_cap') or 0):.0f}亿，评分{(s.get('score') or 0):.1f}分"
+            for s in stocks
+        ]
+        sections.append("待分析股票：\n" + "\n".join(lines))
+    if emotion_data:
+        sections.append(
+            f"市场情绪：情绪指数{emotion_data.get('score') or 0}分，"
+            f"上涨股票占比{(emotion_data.get('rise_ratio') or 0):.1f}%，"
+            f"平均涨幅{(emotion_data.get('avg_change') or 0):.2f}%，"
+            f"平均量比{(emotion_data.get('avg_ratio') or 0):.2f}"
+        )
+    if warnings:
+        sections.append("风险提示：\n" + "\n".join(f"- {w}" for w in warnings))
+
+    schema = {
+        "stocks": {str(s.get("code")): "分析文本" for s in stocks[:2]},
+        "market_emotion": "市场情绪解读" if emotion_data else None,
+        "risk_warning": "风险解释和应对建议" if warnings else None,
+    }
+
+    rules = []
+    if stocks:
+        rules.append("- 每只股票一段分析（不超过120字）：走势特点、量价关系、适合该策略的理由、操作建议")
+    if emotion_data:
+        rules.append("- 市场情绪解读 2-3 句话（不超过80字），给出操作建议")
+    if warnings:
+        rules.append("- 风险提示用通俗语言解释并给出应对建议（不超过80字）")
+    rules.append("- 语言简洁、口语化，不要重复原始数据")
+    rules.append("- 只输出一个 JSON 对象，不要输出其他内容，格式如下：")
+
+    return f"""请用通俗易懂的语言完成以下分析（适合小白投资者）：
+
+{chr(10).join(sections)}
+
+要求：
+{chr(10).join(rules)}
+{json.dumps(schema, ensure_ascii=False)}"""
+
+
+def parse_batch_response(
+    text: Optional[str], codes: List[str]
+) -> Dict[str, Any]:
+    """
+    解析并校验批量分析输出
+    去掉代码块标记后取最外层 JSON 对象；只保留请求中出现的代码和非空文本
+
+    Returns:
+        {"stocks": {code: text}, "market_emotion": str|None, "risk_warning": str|None}
+    """
+    parsed: Dict[str, Any] = {"stocks": {}, "market_emotion": None, "risk_warning": None}
+    if not text:
+        return parsed
+
+    body = text.strip()
+    if body.startswith("```"):
+        body = body.split("\n", 1)[1] if "\n" in body else ""
+        body = body.rsplit("```", 1)[0]
+    start, end = body.find("{"), body.rfind("}")
+    if start < 0 or end <= start:
+        print("⚠️ GLM 批量输出不是 JSON")
+        return parsed
+    try:
+        data = json.loads(body[start : end + 1])
+    except ValueError as e:
+        print(f"⚠️ GLM 批量输出解析失败: {e}")
+        return parsed
+    if not isinstance(data, dict):
+        return parsed
+
+    def clean(value: Any) -> Optional[str]:
+        if not isinstance(value, str):
+            return None
+        value = value.strip()
+        return value[:_BATCH_TEXT_LIMIT] if value else None
+
+    stocks = data.get("stocks")
+    if isinstance(stocks, dict):
+        wanted = set(codes)
+        for code, value in stocks.items():
+            code = str(code)
+            analysis = clean(value)
+            if code in wanted and analysis:
+                parsed["stocks"][code] = analysis
+    parsed["market_emotion"] = clean(data.get("market_emotion"))
+    parsed["risk_warning"] = clean(data.get("risk_warning"))
+    return parsed
+
 
 class GLMService:
-    """GLM-4-Flash API 服务类（线程安全）"""
+    """GLM-4-Flash API 服务类（线程安全，另提供按优先级排队的异步接口）"""
 
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
-        self.model = "glm-4-flash"
+        self.base_url = config.GLM_BASE_URL
+        self.model = config.GLM_MODEL
         self.last_call_time = 0
-        self.min_interval = 1.2  # 并发限制，至少间隔1.2秒（严格控制并发=1）
+        self.min_interval = config.GLM_MIN_INTERVAL  # 并发限制，默认至少间隔1.2秒（严格控制并发=1）
         self.enabled = True
-        self._lock = threading.Lock()  # 线程锁，确保串行执行
-
-        print(f"✅ GLM-4-Flash AI 服务已初始化（并发限制：1请求/1.2秒）")
+        self._lock = threading.Lock()  # 请求锁，确保同一时刻只有1个请求（同步/异步接口共用）
+        # 同步/异步接口共用的令牌桶，等待在锁外进行
+        self.rate_limiter = TokenBucket(rate=1.0 / self.min_interval)
+        self.client = AsyncGLMClient(
+            api_key,
+            self.base_url,
+            self.model,
+            self.rate_limiter,
+            concurrency=1,
+            request_lock=self._lock,
+        )
+
+        print(f"✅ GLM-4-Flash AI 服务已初始化（并发限制：1请求/{self.min_interval}秒）")
 
     def call(
-        self, prompt: str, max_tokens: int = 200, temperature: float = 0.7
+        self,
+        prompt: str,
+        max_tokens: int = 200,
+        temperature: float = 0.7,
+        cache_key: Optional[str] = None,
+        timeout: float = 15,
     ) -> Optional[str]:
         """
         调用 GLM-4-Flash API（线程安全，严格串行）
@@ -37,6 +244,8 @@ class GLMService:
             prompt: 提示词
             max_tokens: 最大生成token数
             temperature: 温度参数（0-1，越高越随机）
+            cache_key: 响应缓存键，命中时直接返回，不占用并发锁
+            timeout: 请求超时（秒）
 
         Returns:
             AI 生成的文本，失败返回 None
@@ -44,16 +253,28 @@ class GLMService:
         if not self.enabled:
             return None
 
-        # 使用线程锁确保串行执行
-        with self._lock:
-            # 严格并发控制：确保至少间隔1.2秒（GLM-4-Flash并发限制=1）
-            current_time = time.time()
-            time_since_last_call = current_time - self.last_call_time
-            if time_since_last_call < self.min_interval:
-                wait_time = self.min_interval - time_since_last_call
-                print(f"   ⏳ 并发控制：等待 {wait_time:.1f}秒...")
-                time.sleep(wait_time)
+        if cache_key:
+            cached = get_cached_response(cache_key)
+            if cached is not None:
+                return cached
+
+        result = self._call_locked(prompt, max_tokens, temperature, timeout)
+        if result and cache_key:
+            set_cached_response(cache_key, result)
+        return result
+
+    def _call_locked(
+        self, prompt: str, max_tokens: int, temperature: float, timeout: float = 15
+    ) -> Optional[str]:
+        """串行调用 API（限速等待在锁外，锁只覆盖 HTTP 请求本身）"""
+
+        # 严格并发控制：令牌桶保证至少间隔1.2秒（GLM-4-Flash并发限制=1）
+        wait_time = self.rate_limiter.reserve()
+        if wait_time > 0:
+            print(f"   ⏳ 并发控制：等待 {wait_time:.1f}秒...")
+            time.sleep(wait_time)
 
+        with self._lock:
             try:
                 headers = {
                     "Authorization": f"Bearer {self.api_key}",
@@ -67,9 +288,10 @@ class GLMService:
                     "temperature": temperature,
                 }
 
-                response = requests.post(
-                    self.base_url, headers=headers, json=data, timeout=15
-                )
+                with track_upstream("glm"):
+                    response = requests.post(
+                        self.base_url, headers=headers, json=data, timeout=timeout
+                    )
 
                 self.last_call_time = time.time()
 
@@ -78,6 +300,7 @@ class GLMService:
                     content = result["choices"][0]["message"]["content"]
                     return content.strip()
                 else:
+                    record_upstream_error("glm")
                     print(f"⚠️ GLM API 错误: {response.status_code} - {response.text}")
                     return None
 
@@ -101,6 +324,16 @@ class GLMService:
         Returns:
             AI 分析文本
         """
+        return self.call(
+            self._stock_prompt(stock_data, strategy_type),
+            max_tokens=200,
+            temperature=0.7,
+            cache_key=analysis_cache_key(stock_data, strategy_type),
+        )
+
+    @staticmethod
+    def _stock_prompt(stock_data: Dict[str, Any], strategy_type: str) -> str:
+        """单只股票分析提示词"""
         strategy_map = {
             "aggressive": "激进型（追求高收益）",
             "conservative": "保守型（稳健为主）",
@@ -112,11 +345,11 @@ class GLMService:
         prompt = f"""请用通俗易懂的语言分析这只股票（适合小白投资者）：
 
 股票名称：{stock_data.get("name", "未知")}
-当前价格：{stock_data.get("price", 0):.2f}元
-涨跌幅：{stock_data.get("change_percent", 0):.2f}%
-量比：{stock_data.get("volume_ratio", 0):.2f}
-市值：{stock_data.get("market_cap", 0):.0f}亿
-评分：{stock_data.get("score", 0):.1f}分
+当前价格：{(stock_data.get("price") or 0):.2f}元
+涨跌幅：{(stock_data.get("change_percent") or 0):.2f}%
+量比：{(stock_data.get("volume_ratio") or 0):.2f}
+市值：{(stock_data.get("market_cap") or 0):.0f}亿
+评分：{(stock_data.get("score") or 0):.1f}分
 策略类型：{strategy_desc}
 
 请从以下角度分析（总共不超过120字）：
@@ -131,7 +364,7 @@ class GLMService:
 - 不要重复股票数据
 - 直接给出分析，不要前缀"""
 
-        return self.call(prompt, max_tokens=200, temperature=0.7)
+        return prompt
 
     def generate_recommendation_reason(
         self, stock_data: Dict[str, Any], strategy_type: str
@@ -156,7 +389,7 @@ class GLMService:
 
         prompt = f"""用一句话说明为什么推荐这只股票（{strategy_name}策略）：
 
-{stock_data.get("name")}：涨幅{stock_data.get("change_percent", 0):.1f}%，量比{stock_data.get("volume_ratio", 0):.1f}，评分{stock_data.get("score", 0):.0f}分
+{stock_data.get("name")}：涨幅{(stock_data.get("change_percent") or 0):.1f}%，量比{(stock_data.get("volume_ratio") or 0):.1f}，评分{(stock_data.get("score") or 0):.0f}分
 
 要求：
 - 只输出一句话，不超过25字
@@ -164,7 +397,12 @@ class GLMService:
 - 语言简洁有力
 - 不要前缀和标点"""
 
-        return self.call(prompt, max_tokens=50, temperature=0.8)
+        return self.call(
+            prompt,
+            max_tokens=50,
+            temperature=0.8,
+            cache_key=analysis_cache_key(stock_data, strategy_type, kind="reason"),
+        )
 
     def explain_market_emotion(self, emotion_data: Dict[str, Any]) -> Optional[str]:
         """
@@ -176,12 +414,17 @@ class GLMService:
         Returns:
             市场情绪解读
         """
+        return self.call(self._emotion_prompt(emotion_data), max_tokens=150, temperature=0.7)
+
+    @staticmethod
+    def _emotion_prompt(emotion_data: Dict[str, Any]) -> str:
+        """市场情绪解读提示词"""
         prompt = f"""用通俗语言解读当前市场情绪：
 
 情绪指数：{emotion_data.get("score", 0)}分（满分100）
-上涨股票占比：{emotion_data.get("rise_ratio", 0):.1f}%
-平均涨幅：{emotion_data.get("avg_change", 0):.2f}%
-平均量比：{emotion_data.get("avg_ratio", 0):.2f}
+上涨股票占比：{(emotion_data.get("rise_ratio") or 0):.1f}%
+平均涨幅：{(emotion_data.get("avg_change") or 0):.2f}%
+平均量比：{(emotion_data.get("avg_ratio") or 0):.2f}
 
 请用2-3句话（不超过80字）：
 1. 解读当前市场情绪
@@ -189,7 +432,7 @@ class GLMService:
 
 要求：语言通俗、建议具体、不要前缀"""
 
-        return self.call(prompt, max_tokens=150, temperature=0.7)
+        return prompt
 
     def optimize_risk_warning(self, warnings: list) -> Optional[str]:
         """
@@ -204,6 +447,11 @@ class GLMService:
         if not warnings:
             return None
 
+        return self.call(self._risk_prompt(warnings), max_tokens=150, temperature=0.7)
+
+    @staticmethod
+    def _risk_prompt(warnings: list) -> str:
+        """风险提示优化提示词"""
         warnings_text = "\n".join(f"- {w}" for w in warnings)
 
         prompt = f"""用通俗语言解释这些风险，并给出应对建议：
@@ -217,7 +465,205 @@ class GLMService:
 - 不要重复原文
 - 不要前缀"""
 
-        return self.call(prompt, max_tokens=150, temperature=0.7)
+        return prompt
+
+    def analyze_batch(
+        self,
+        stocks: List[Dict[str, Any]],
+        strategy_type: str = "balanced",
+        emotion_data: Optional[Dict[str, Any]] = None,
+        warnings: Optional[list] = None,
+    ) -> Dict[str, Any]:
+        """
+        批量分析：一次请求分析多只股票（可附带市场情绪解读、风险提示）
+        要求模型输出按股票代码索引的 JSON，解析失败的股票逐只回退到 analyze_stock
+
+        Args:
+            stocks: 股票数据列表
+            strategy_type: 策略类型
+            emotion_data: 市场情绪数据（可选）
+            warnings: 风险提示列表（可选）
+
+        Returns:
+            {"stocks": {code: 分析文本}, "market_emotion": str|None, "risk_warning": str|None}
+        """
+        result, pending, batches = self._plan_batch(stocks, strategy_type, emotion_data, warnings)
+        if not self.enabled:
+            return result
+
+        for i, (chunk, prompt, max_tokens) in enumerate(batches):
+            text = self.call(prompt, max_tokens=max_tokens, temperature=0.7, timeout=30)
+            self._merge_batch(result, chunk, text, strategy_type, first=i == 0)
+
+        # 回退：批量结果缺失或无效的部分逐项调用
+        for stock in self._missing(result, pending):
+            analysis = self.analyze_stock(stock, strategy_type)
+            if analysis:
+                result["stocks"][stock["code"]] = analysis
+        if emotion_data and not result["market_emotion"]:
+            result["market_emotion"] = self.explain_market_emotion(emotion_data)
+        if warnings and not result["risk_warning"]:
+            result["risk_warning"] = self.optimize_risk_warning(warnings)
+
+        return result
+
+    def cached_analyses(
+        self, stocks: List[Dict[str, Any]], strategy_type: str = "balanced"
+    ) -> Dict[str, str]:
+        """只查缓存的股票分析结果 {code: 分析文本}（不发请求）"""
+        analyses = {}
+        for stock in stocks:
+            code = stock.get("code")
+            cached = code and get_cached_response(analysis_cache_key(stock, strategy_type))
+            if cached:
+                analyses[code] = cached
+        return analyses
+
+    def _plan_batch(
+        self,
+        stocks: List[Dict[str, Any]],
+        strategy_type: str,
+        emotion_data: Optional[Dict[str, Any]],
+        warnings: Optional[list],
+    ):
+        """
+        查缓存并拆分批次
+        Returns:
+            (result, pending, batches)，batches 为 [(chunk, prompt, max_tokens)]
+        """
+        result: Dict[str, Any] = {"stocks": {}, "market_emotion": None, "risk_warning": None}
+        if not self.enabled:
+            return result, [], []
+
+        # 先查缓存，只把未命中的股票放进批量请求
+        pending = []
+        for stock in stocks:
+            code = stock.get("code")
+            if not code:
+                continue
+            cached = get_cached_response(analysis_cache_key(stock, strategy_type))
+            if cached is not None:
+                result["stocks"][code] = cached
+            else:
+                pending.append(stock)
+
+        batch_size = max(1, config.GLM_BATCH_SIZE)
+        chunks = [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+        if not chunks and (emotion_data or warnings):
+            chunks = [[]]
+
+        batches = []
+        for i, chunk in enumerate(chunks):
+            # 市场情绪、风险提示只随第一批请求发送
+            extras = (emotion_data, warnings) if i == 0 else (None, None)
+            prompt = build_batch_prompt(chunk, strategy_type, *extras)
+            max_tokens = min(config.GLM_MAX_TOKENS, 160 * len(chunk) + 200)
+            batches.append((chunk, prompt, max_tokens))
+        return result, pending, batches
+
+    @staticmethod
+    def _merge_batch(
+        result: Dict[str, Any],
+        chunk: List[Dict[str, Any]],
+        text: Optional[str],
+        strategy_type: str,
+        first: bool,
+    ):
+        """解析一批输出并写入结果和缓存"""
+        parsed = parse_batch_response(text, [s["code"] for s in chunk])
+        for stock in chunk:
+            analysis = parsed["stocks"].get(stock["code"])
+            if analysis:
+                set_cached_response(analysis_cache_key(stock, strategy_type), analysis)
+                result["stocks"][stock["code"]] = analysis
+        if first:
+            result["market_emotion"] = parsed["market_emotion"]
+            result["risk_warning"] = parsed["risk_warning"]
+
+    @staticmethod
+    def _missing(result: Dict[str, Any], pending: List[Dict[str, Any]]):
+        """批量结果中缺失的股票"""
+        missing = [s for s in pending if s["code"] not in result["stocks"]]
+        for stock in missing:
+            print(f"   ↩️ 批量结果缺失，单独分析: {stock.get('name', stock['code'])}")
+        return missing
+
+    # ---------- 异步接口（不占用线程，按优先级排队） ----------
+
+    async def acall(
+        self,
+        prompt: str,
+        max_tokens: int = 200,
+        temperature: float = 0.7,
+        cache_key: Optional[str] = None,
+        timeout: float = 15,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Optional[str]:
+        """
+        异步调用 GLM-4-Flash API（与同步接口共用令牌桶限速和请求锁，合计严格串行）
+
+        Args:
+            priority: 优先级，PRIORITY_INTERACTIVE 先于 PRIORITY_PREHEAT 执行
+            其余参数同 call()
+        """
+        if not self.enabled:
+            return None
+
+        if cache_key:
+            cached = get_cached_response(cache_key)
+            if cached is not None:
+                return cached
+
+        result = await self.client.complete(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            priority=priority,
+        )
+        if result and cache_key:
+            set_cached_response(cache_key, result)
+        return result
+
+    async def analyze_batch_async(
+        self,
+        stocks: List[Dict[str, Any]],
+        strategy_type: str = "balanced",
+        emotion_data: Optional[Dict[str, Any]] = None,
+        warnings: Optional[list] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Dict[str, Any]:
+        """analyze_batch 的异步版本"""
+        result, pending, batches = self._plan_batch(stocks, strategy_type, emotion_data, warnings)
+        if not self.enabled:
+            return result
+
+        for i, (chunk, prompt, max_tokens) in enumerate(batches):
+            text = await self.acall(
+                prompt, max_tokens=max_tokens, temperature=0.7, timeout=30, priority=priority
+            )
+            self._merge_batch(result, chunk, text, strategy_type, first=i == 0)
+
+        for stock in self._missing(result, pending):
+            analysis = await self.acall(
+                self._stock_prompt(stock, strategy_type),
+                max_tokens=200,
+                temperature=0.7,
+                cache_key=analysis_cache_key(stock, strategy_type),
+                priority=priority,
+            )
+            if analysis:
+                result["stocks"][stock["code"]] = analysis
+        if emotion_data and not result["market_emotion"]:
+            result["market_emotion"] = await self.acall(
+                self._emotion_prompt(emotion_data), max_tokens=150, priority=priority
+            )
+        if warnings and not result["risk_warning"]:
+            result["risk_warning"] = await self.acall(
+                self._risk_prompt(warnings), max_tokens=150, priority=priority
+            )
+
+        return result
 
     def disable(self):
         """禁用 AI 服务"""
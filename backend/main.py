@@ -3,1794 +3,48 @@ A股波段交易筛选系统 - 专业版 v4.6.0
 策略：主板+创业板融资融券标的，波段交易，严格风控
 新增：行业分散、K线图表、智能买卖点、对比分析
 优化：接入AKShare真实数据（免费）
-"""
-
-import os
-import re
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
-from datetime import datetime, timedelta
-import time
-import requests
-from dotenv import load_dotenv
-
-# 加载环境变量
-load_dotenv()
-
-# 导入AKShare数据适配器
-try:
-    from data_adapter import akshare_adapter
-
-    USE_REAL_DATA = True
-    print("✅ AKShare数据适配器加载成功，将使用真实数据")
-except ImportError as e:
-    USE_REAL_DATA = False
-    print(f"⚠️ AKShare数据适配器加载失败，将使用模拟数据: {e}")
-
-# 禁用代理
-os.environ["NO_PROXY"] = "*"
-os.environ["no_proxy"] = "*"
-for key in ["HTTP_PROXY", "HTTPS_PROXY", "http_proxy", "https_proxy"]:
-    if key in os.environ:
-        del os.environ[key]
-
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional
-import pandas as pd
-
-# 导入 GLM AI 服务
-try:
-    from glm_service import init_glm_service, get_glm_service, is_glm_enabled
 
-    GLM_AVAILABLE = True
-except ImportError as e:
-    GLM_AVAILABLE = False
-    print(f"⚠️ GLM AI 服务不可用: {e}")
+应用由 app_factory.create_app 创建，接口在 api/，行情、评分、AI 增强和定时筛选在 services/；
+这里保留原有名称的导出（uvicorn main:app、基准测试和旧脚本的 from main import ...）
+"""
 
-app = FastAPI(
-    title="A股波段交易筛选系统",
-    description="专注主板+创业板融资融券标的，波段交易策略，每次最多3只",
-    version="4.5.0",
+from app_factory import create_app
+from api.screening import (
+    _json_response,
+    band_trading_screen,
+    band_trading_screen_realtime,
 )
-
-# 配置CORS
-# 从环境变量读取允许的源，默认为开发环境地址
-ALLOWED_ORIGINS = os.getenv(
-    "ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:3000"
-).split(",")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
+from core.cache import memory_cache
+from core.disk_cache import screen_cache, screen_cache_key
+from services.ai_screening import (
+    apply_ai_analyses,
+    enhance_stock_with_ai,
+    start_ai_enrichment,
 )
+from services.market_data import (
+    USE_REAL_DATA,
+    analyze_market_environment,
+    fetch_qq_stock_data,
+    generate_kline_data,
+    generate_stock_codes,
+    get_all_stocks_data,
+    get_capital_flow,
+    get_margin_trading_info,
+    load_trade_calendar,
+    parse_qq_stock_line,
+    restore_warm_cache,
+)
+from services.scoring import (
+    BAND_TRADING_CONFIG,
+    calculate_band_trading_score,
+    calculate_trade_points,
+    get_board_type,
+    get_industry,
+    is_loss_making_stock,
+)
+from services.simple_screen import run_simple_screen, screening_results, screening_scheduler
 
-# ==================== 全局缓存 ====================
-_stock_data_cache = {
-    "data": None,
-    "timestamp": None,
-    "ttl": 60,  # 缓存60秒
-}
-
-_market_env_cache = {
-    "data": None,
-    "timestamp": None,
-    "ttl": 300,  # 缓存5分钟
-}
-
-# ==================== 波段交易策略配置 ====================
-BAND_TRADING_CONFIG = {
-    "max_positions": 3,  # 最大持仓数量
-    "max_market_cap": 160,  # 最大市值（亿）
-    "require_margin": True,  # 必须支持融资融券
-    "exclude_st": True,  # 排除ST股票
-    "exclude_loss": True,  # 排除亏损股票
-    "change_range": (-2, 5),  # 涨跌幅范围（不追涨）
-    "volume_ratio_range": (1.5, 3.0),  # 量比范围
-    "boards": ["main", "cyb"],  # 主板+创业板
-}
-
-print(f"""
-╔══════════════════════════════════════════════════════╗
-║     A股波段交易筛选系统 v4.15.0                      ║
-║                                                      ║
-║  策略配置：                                          ║
-║  • 板块：主板 + 创业板                               ║
-║  • 融资融券：必须                                    ║
-║  • 市值上限：≤160亿                                  ║
-║  • 涨幅范围：-2% ~ 5%（不追涨）                      ║
-║  • 持仓限制：最多3只                                 ║
-║  • 风控：排除ST、亏损股                              ║
-║  • 新增：行业分散、K线、买卖点                       ║
-║  • 数据源：{"✅ AKShare真实数据" if USE_REAL_DATA else "⚠️ 模拟数据"}                    ║
-║  • AI分析：{"✅ GLM-4-Flash已启用" if GLM_AVAILABLE else "⚠️ AI功能未启用"}                    ║
-╚══════════════════════════════════════════════════════╝
-""")
-
-# ==================== 初始化 GLM AI 服务 ====================
-if GLM_AVAILABLE:
-    GLM_API_KEY = os.getenv("GLM_API_KEY") or os.getenv("ZHIPUAI_API_KEY")
-    if GLM_API_KEY:
-        try:
-            init_glm_service(GLM_API_KEY)
-            print("✅ GLM-4-Flash AI 智能分析已启用")
-        except Exception as e:
-            print(f"⚠️ GLM AI 服务初始化失败: {e}")
-            GLM_AVAILABLE = False
-    else:
-        print("⚠️ 未配置 GLM_API_KEY，AI 功能将禁用")
-        GLM_AVAILABLE = False
-
-
-def fetch_qq_stock_data(
-    codes: List[str], timeout: int = 20, max_retries: int = 3
-) -> str:
-    """使用requests调用腾讯股票API（带重试机制）"""
-    formatted_codes = ",".join(codes)
-    url = f"https://qt.gtimg.cn/q={formatted_codes}"
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=timeout)
-            response.raise_for_status()
-
-            # 尝试不同的编码
-            for enc in ["gbk", "gb2312", "utf-8", "latin-1"]:
-                try:
-                    return response.content.decode(enc)
-                except (UnicodeDecodeError, LookupError):
-                    continue
-
-            return response.content.decode("latin-1")
-
-        except requests.exceptions.Timeout:
-            if attempt < max_retries - 1:
-                print(f"⚠️ 请求超时，正在重试 ({attempt + 1}/{max_retries})...")
-                time.sleep(0.5 * (attempt + 1))
-                continue
-            raise Exception("请求超时（已重试多次）")
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                print(f"⚠️ 请求异常: {e}，正在重试 ({attempt + 1}/{max_retries})...")
-                time.sleep(0.5 * (attempt + 1))
-                continue
-            raise Exception(f"请求失败: {str(e)}")
-
-    raise Exception("请求失败（已达到最大重试次数）")
-
-
-def parse_qq_stock_line(line: str) -> Dict[str, Any]:
-    """解析腾讯股票数据行"""
-    match = re.match(r'v_(\w+)="(.*)";?', line.strip())
-    if not match:
-        return None
-
-    data = match.group(2)
-    if not data:
-        return None
-
-    parts = data.split("~")
-    if len(parts) < 50:
-        return None
-
-    try:
-        price = float(parts[3]) if parts[3] and parts[3] != "" else 0
-        if price <= 0:
-            return None
-
-        return {
-            "code": parts[2],
-            "name": parts[1],
-            "price": price,
-            "pre_close": float(parts[4]) if parts[4] else 0,
-            "open": float(parts[5]) if parts[5] else 0,
-            "volume": float(parts[6]) if parts[6] else 0,
-            "change": float(parts[31]) if len(parts) > 31 and parts[31] else 0,
-            "change_percent": float(parts[32]) if len(parts) > 32 and parts[32] else 0,
-            "high": float(parts[33]) if len(parts) > 33 and parts[33] else 0,
-            "low": float(parts[34]) if len(parts) > 34 and parts[34] else 0,
-            "amount": float(parts[37]) if len(parts) > 37 and parts[37] else 0,
-            "turnover": float(parts[38]) if len(parts) > 38 and parts[38] else 0,
-            "pe_ratio": float(parts[39]) if len(parts) > 39 and parts[39] else 0,
-            "market_cap": float(parts[45]) if len(parts) > 45 and parts[45] else 0,
-            "total_value": float(parts[46]) if len(parts) > 46 and parts[46] else 0,
-            "volume_ratio": float(parts[49]) if len(parts) > 49 and parts[49] else 1.0,
-        }
-    except (ValueError, IndexError):
-        return None
-
-
-def generate_stock_codes() -> List[str]:
-    """生成A股代码列表"""
-    codes = []
-
-    # 沪市主板: 600xxx, 601xxx, 603xxx, 605xxx
-    for prefix in ["600", "601", "603", "605"]:
-        for i in range(1000):
-            codes.append(f"sh{prefix}{i:03d}")
-
-    # 深市主板: 000xxx, 001xxx, 002xxx, 003xxx
-    for prefix in ["000", "001", "002", "003"]:
-        for i in range(1000):
-            codes.append(f"sz{prefix}{i:03d}")
-
-    # 创业板: 300xxx, 301xxx
-    for prefix in ["300", "301"]:
-        for i in range(1000):
-            codes.append(f"sz{prefix}{i:03d}")
-
-    return codes
-
-
-def get_all_stocks_data(use_cache: bool = True) -> List[Dict[str, Any]]:
-    """获取所有A股实时数据（优化版：支持真实数据）"""
-    global _stock_data_cache
-
-    # 检查缓存
-    if use_cache and _stock_data_cache["data"] is not None:
-        cache_age = time.time() - _stock_data_cache["timestamp"]
-        if cache_age < _stock_data_cache["ttl"]:
-            print(f"📦 使用缓存数据（缓存时间：{cache_age:.1f}秒）")
-            return _stock_data_cache["data"]
-
-    print("🔄 获取最新股票数据...")
-    start_time = time.time()
-
-    # 如果启用了真实数据，使用AKShare
-    if USE_REAL_DATA:
-        try:
-            print("📡 使用AKShare获取真实数据...")
-            df = akshare_adapter.get_realtime_quotes()
-
-            if not df.empty:
-                all_stocks = df.to_dict("records")
-                elapsed = time.time() - start_time
-                print(
-                    f"✅ 数据获取完成：{len(all_stocks)}只股票，耗时{elapsed:.1f}秒（真实数据）"
-                )
-
-                # 更新缓存
-                _stock_data_cache["data"] = all_stocks
-                _stock_data_cache["timestamp"] = time.time()
-
-                return all_stocks
-            else:
-                print("⚠️ AKShare返回空数据，切换到腾讯API...")
-        except Exception as e:
-            print(f"⚠️ AKShare获取数据失败: {e}，切换到腾讯API...")
-
-    # 降级方案：使用腾讯API
-    all_codes = generate_stock_codes()
-    batch_size = 100
-    all_stocks = []
-
-    def fetch_batch(batch_codes):
-        try:
-            data = fetch_qq_stock_data(batch_codes, timeout=20)
-            results = []
-            for line in data.strip().split("\n"):
-                if line:
-                    stock = parse_qq_stock_line(line)
-                    if stock:
-                        results.append(stock)
-            return results
-        except Exception as e:
-            print(f"获取批次失败: {e}")
-            return []
-
-    with ThreadPoolExecutor(max_workers=30) as executor:  # 提升并发数 20 → 30
-        futures = []
-        for i in range(0, len(all_codes), batch_size):
-            batch = all_codes[i : i + batch_size]
-            futures.append(executor.submit(fetch_batch, batch))
-
-        completed = 0
-        total = len(futures)
-        for future in as_completed(futures):
-            try:
-                stocks = future.result()
-                all_stocks.extend(stocks)
-                completed += 1
-                if completed % 10 == 0:
-                    print(f"⏳ 进度：{completed}/{total} ({completed * 100 // total}%)")
-            except Exception as e:
-                print(f"处理批次失败: {e}")
-
-    elapsed = time.time() - start_time
-    print(f"✅ 数据获取完成：{len(all_stocks)}只股票，耗时{elapsed:.1f}秒（腾讯API）")
-
-    # 更新缓存
-    _stock_data_cache["data"] = all_stocks
-    _stock_data_cache["timestamp"] = time.time()
-
-    return all_stocks
-
-
-def get_margin_trading_info(code: str) -> Dict[str, Any]:
-    """获取融资融券信息（优化版：优先使用真实数据）"""
-
-    # 如果启用了真实数据，尝试使用AKShare
-    if USE_REAL_DATA:
-        try:
-            result = akshare_adapter.get_margin_trading(code)
-            if result.get("has_data", False):
-                return result
-        except Exception as e:
-            print(f"⚠️ AKShare获取融资融券失败 {code}: {e}")
-
-    # 降级方案：使用智能模拟数据
-    try:
-        # 移除市场前缀
-        clean_code = code.replace("sh", "").replace("sz", "")
-
-        # 使用代码的多个特征生成更稳定的模拟数据
-        code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
-        code_prefix = int(clean_code[:3]) if clean_code[:3].isdigit() else 600
-
-        # 基于代码特征判断是否支持融资融券（约70%的股票支持）
-        is_eligible = (code_num % 10 != 0) and (code_num % 10 != 9)
-
-        if not is_eligible:
-            return {
-                "is_margin_eligible": False,
-                "margin_balance": 0,
-                "short_balance": 0,
-                "margin_ratio": 0,
-                "net_flow": 0,
-                "margin_score": 0,
-                "has_data": False,
-            }
-
-        # 生成更合理的融资融券数据（基于代码特征）
-        seed = code_num + code_prefix
-        margin_balance = round((seed % 60 + 8) / 10, 2)  # 0.8-6.8亿
-        short_balance = round((seed % 120 + 3), 1)  # 3-123万股
-        margin_ratio = round((seed % 25 + 3), 1)  # 3-28%
-        net_flow = round((seed % 240 - 120) / 1200, 3)  # -0.1到0.1亿
-
-        # 优化评分算法
-        margin_score = 55  # 基础分提高
-
-        # 融资余额评分（权重30%）
-        if margin_balance >= 4:
-            margin_score += 25
-        elif margin_balance >= 2:
-            margin_score += 15
-        elif margin_balance >= 1:
-            margin_score += 8
-
-        # 净流入评分（权重40%）
-        if net_flow > 0.06:
-            margin_score += 20
-        elif net_flow > 0.02:
-            margin_score += 10
-        elif net_flow > 0:
-            margin_score += 3
-        elif net_flow < -0.06:
-            margin_score -= 20
-        elif net_flow < -0.02:
-            margin_score -= 10
-
-        # 融资占比评分（权重30%）
-        if margin_ratio >= 18:
-            margin_score += 15
-        elif margin_ratio >= 12:
-            margin_score += 8
-        elif margin_ratio >= 8:
-            margin_score += 3
-
-        margin_score = max(0, min(100, margin_score))
-
-        return {
-            "is_margin_eligible": True,
-            "margin_balance": margin_balance,
-            "short_balance": short_balance,
-            "margin_ratio": margin_ratio,
-            "net_flow": net_flow,
-            "margin_score": margin_score,
-            "has_data": False,  # 标记为模拟数据
-        }
-
-    except Exception as e:
-        print(f"获取融资融券数据失败 {code}: {e}")
-        return {
-            "is_margin_eligible": False,
-            "margin_balance": 0,
-            "short_balance": 0,
-            "margin_ratio": 0,
-            "net_flow": 0,
-            "margin_score": 0,
-            "has_data": False,
-        }
-
-
-def get_capital_flow(code: str) -> Dict[str, Any]:
-    """获取资金流向信息（优化版：优先使用真实数据）"""
-
-    # 如果启用了真实数据，尝试使用AKShare
-    if USE_REAL_DATA:
-        try:
-            result = akshare_adapter.get_capital_flow(code)
-            if result.get("has_data", False):
-                return result
-        except Exception as e:
-            print(f"⚠️ AKShare获取资金流向失败 {code}: {e}")
-
-    # 降级方案：使用智能模拟数据
-    try:
-        # 移除市场前缀
-        clean_code = code.replace("sh", "").replace("sz", "")
-
-        code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
-        code_prefix = int(clean_code[:3]) if clean_code[:3].isdigit() else 600
-
-        # 基于代码特征生成更合理的资金流数据
-        seed = (code_num * 7 + code_prefix) % 400
-        main_inflow = round((seed - 200) / 120, 2)  # -1.67到1.67亿
-        is_inflow = main_inflow > 0.15  # 提高阈值，更严格
-
-        # 优化流向强度判断
-        if main_inflow > 1.0:
-            flow_strength = "strong_in"
-        elif main_inflow > 0.4:
-            flow_strength = "weak_in"
-        elif main_inflow < -1.0:
-            flow_strength = "strong_out"
-        elif main_inflow < -0.4:
-            flow_strength = "weak_out"
-        else:
-            flow_strength = "neutral"
-
-        return {
-            "main_inflow": main_inflow,
-            "is_inflow": is_inflow,
-            "flow_strength": flow_strength,
-            "has_data": False,  # 标记为模拟数据
-        }
-
-    except Exception as e:
-        print(f"获取资金流数据失败 {code}: {e}")
-        return {
-            "main_inflow": 0,
-            "is_inflow": False,
-            "flow_strength": "unknown",
-            "has_data": False,
-        }
-
-
-def is_loss_making_stock(code: str, name: str) -> bool:
-    """判断是否为亏损股票（基于名称和代码特征）"""
-    # 亏损股票通常会有特殊标识或在财报中体现
-    # 这里使用简化判断：ST股票通常是亏损的
-    loss_keywords = ["亏损", "预亏", "巨亏", "首亏", "续亏"]
-    return any(keyword in name for keyword in loss_keywords)
-
-
-def get_industry(name: str, code: str) -> str:
-    """根据股票名称和代码推测行业（简化版）"""
-    # 移除市场前缀
-    clean_code = code.replace("sh", "").replace("sz", "")
-
-    # 基于名称关键词判断行业
-    if any(k in name for k in ["药", "医", "生物", "健康", "康", "制药"]):
-        return "医药生物"
-    elif any(
-        k in name
-        for k in ["科技", "软件", "信息", "数据", "云", "网络", "通信", "电子"]
-    ):
-        return "信息技术"
-    elif any(k in name for k in ["银行", "证券", "保险", "金融", "投资"]):
-        return "金融"
-    elif any(k in name for k in ["地产", "房", "置业", "建设", "建筑"]):
-        return "房地产"
-    elif any(k in name for k in ["汽车", "车", "客车"]):
-        return "汽车"
-    elif any(k in name for k in ["电", "能源", "新能源", "光伏", "风电", "电力"]):
-        return "电力设备"
-    elif any(k in name for k in ["化工", "化学", "材料", "新材"]):
-        return "化工"
-    elif any(k in name for k in ["机械", "设备", "制造", "装备"]):
-        return "机械设备"
-    elif any(k in name for k in ["食品", "饮料", "酒"]):
-        return "食品饮料"
-    elif any(k in name for k in ["家电", "电器"]):
-        return "家用电器"
-    elif any(k in name for k in ["纺织", "服装", "服饰"]):
-        return "纺织服装"
-    elif any(k in name for k in ["有色", "金属", "铜", "铝", "锌", "铂", "钴"]):
-        return "有色金属"
-    elif any(k in name for k in ["钢铁", "钢", "铁"]):
-        return "钢铁"
-    elif any(k in name for k in ["煤炭", "煤"]):
-        return "煤炭"
-    elif any(k in name for k in ["农", "林", "牧", "渔"]):
-        return "农林牧渔"
-    elif any(k in name for k in ["传媒", "影视", "广告", "出版"]):
-        return "传媒"
-    elif any(k in name for k in ["旅游", "酒店", "景区"]):
-        return "旅游"
-    elif any(k in name for k in ["商业", "百货", "超市", "零售"]):
-        return "商业贸易"
-    elif any(k in name for k in ["交通", "运输", "物流", "港口", "航空", "铁路"]):
-        return "交通运输"
-    else:
-        return "综合"
-
-
-def generate_kline_data(
-    code: str, price: float, change_percent: float
-) -> List[Dict[str, Any]]:
-    """生成K线数据（优化版：优先使用真实数据）"""
-
-    # 如果启用了真实数据，尝试使用AKShare
-    if USE_REAL_DATA:
-        try:
-            kline = akshare_adapter.get_kline_data(code, period="daily", days=10)
-            if kline:
-                return kline
-        except Exception as e:
-            print(f"⚠️ AKShare获取K线失败 {code}: {e}")
-
-    # 降级方案：使用模拟数据
-    # 移除市场前缀
-    clean_code = code.replace("sh", "").replace("sz", "")
-    code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
-
-    kline = []
-    base_price = price / (1 + change_percent / 100)  # 计算前一日收盘价
-
-    # 生成最近10天的K线数据
-    for i in range(10, 0, -1):
-        # 使用代码特征生成稳定的随机波动
-        seed = (code_num * i) % 100
-        daily_change = (seed - 50) / 500  # -0.1 到 0.1 的波动
-
-        close = base_price * (1 + daily_change * (11 - i) / 10)
-        open_price = close * (1 + (seed % 10 - 5) / 1000)
-        high = max(open_price, close) * (1 + (seed % 5) / 500)
-        low = min(open_price, close) * (1 - (seed % 5) / 500)
-        volume = 1000000 * (50 + seed)
-
-        kline.append(
-            {
-                "date": f"Day-{i}",
-                "open": round(open_price, 2),
-                "close": round(close, 2),
-                "high": round(high, 2),
-                "low": round(low, 2),
-                "volume": int(volume),
-            }
-        )
-
-    # 添加今天的数据
-    kline.append(
-        {
-            "date": "Today",
-            "open": round(base_price, 2),
-            "close": round(price, 2),
-            "high": round(price * 1.02, 2),
-            "low": round(base_price * 0.98, 2),
-            "volume": int(2000000 * (code_num % 50 + 10)),
-        }
-    )
-
-    return kline
-
-
-def calculate_trade_points(stock: Dict[str, Any]) -> Dict[str, Any]:
-    """计算智能买卖点"""
-    price = stock["price"]
-    change_percent = stock["change_percent"]
-    volume_ratio = stock["volume_ratio"]
-
-    # 买入价：当前价或略低
-    if change_percent < 0:
-        # 回调中，可以当前价买入
-        buy_price = price
-        buy_timing = "立即买入"
-    elif change_percent < 2:
-        # 温和上涨，可以追
-        buy_price = price
-        buy_timing = "适合买入"
-    else:
-        # 涨幅较大，等回调
-        buy_price = round(price * 0.98, 2)
-        buy_timing = "等待回调"
-
-    # 止损价：-5%
-    stop_loss = round(buy_price * 0.95, 2)
-    stop_loss_percent = -5.0
-
-    # 目标价：根据量比和涨幅判断
-    if volume_ratio > 2.5 and change_percent < 2:
-        # 放量且涨幅不大，目标+8%
-        target_price = round(buy_price * 1.08, 2)
-        target_percent = 8.0
-    elif volume_ratio > 2.0:
-        # 适度放量，目标+6%
-        target_price = round(buy_price * 1.06, 2)
-        target_percent = 6.0
-    else:
-        # 保守目标+5%
-        target_price = round(buy_price * 1.05, 2)
-        target_percent = 5.0
-
-    return {
-        "buy_price": buy_price,
-        "buy_timing": buy_timing,
-        "stop_loss": stop_loss,
-        "stop_loss_percent": stop_loss_percent,
-        "target_price": target_price,
-        "target_percent": target_percent,
-        "risk_reward_ratio": round(target_percent / abs(stop_loss_percent), 2),
-    }
-
-
-def enhance_stock_with_ai(
-    stock: Dict[str, Any], strategy_type: str = "balanced"
-) -> Dict[str, Any]:
-    """
-    为股票添加 AI 智能分析
-
-    Args:
-        stock: 股票数据字典
-        strategy_type: 策略类型 (aggressive/conservative/balanced)
-
-    Returns:
-        增强后的股票数据（添加 ai_analysis 字段）
-    """
-    if not is_glm_enabled():
-        return stock
-
-    try:
-        glm = get_glm_service()
-        if not glm:
-            return stock
-
-        # 生成 AI 分析
-        ai_analysis = glm.analyze_stock(stock, strategy_type)
-
-        if ai_analysis:
-            stock["ai_analysis"] = ai_analysis
-            print(f"✅ AI 分析完成: {stock['name']}")
-        else:
-            print(f"⚠️ AI 分析失败: {stock['name']}")
-
-    except Exception as e:
-        print(f"⚠️ AI 分析异常 {stock.get('name', 'unknown')}: {e}")
-
-    return stock
-
-
-def analyze_market_environment(stocks: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """分析市场环境（新增功能）"""
-    global _market_env_cache
-
-    # 检查缓存
-    if _market_env_cache["data"] is not None:
-        cache_age = time.time() - _market_env_cache["timestamp"]
-        if cache_age < _market_env_cache["ttl"]:
-            return _market_env_cache["data"]
-
-    if not stocks or len(stocks) < 100:
-        return {
-            "status": "unknown",
-            "description": "数据不足",
-            "advice": "等待更多数据",
-        }
-
-    # 统计市场数据
-    up_count = sum(1 for s in stocks if s.get("change_percent", 0) > 0)
-    down_count = sum(1 for s in stocks if s.get("change_percent", 0) < 0)
-    total = len(stocks)
-    up_ratio = up_count / total if total > 0 else 0
-
-    avg_change = (
-        sum(s.get("change_percent", 0) for s in stocks) / total if total > 0 else 0
-    )
-    avg_volume_ratio = (
-        sum(s.get("volume_ratio", 1) for s in stocks) / total if total > 0 else 1
-    )
-
-    # 判断市场环境
-    if up_ratio > 0.65 and avg_change > 1.5:
-        status = "strong_bull"
-        description = "强势上涨行情"
-        advice = "积极参与，但注意追高风险"
-        strategy_adjust = {"change_max": 6, "volume_ratio_max": 3.5}
-    elif up_ratio > 0.55 and avg_change > 0.5:
-        status = "weak_bull"
-        description = "温和上涨行情"
-        advice = "适度参与，优选回调股票"
-        strategy_adjust = {"change_max": 5, "volume_ratio_max": 3.0}
-    elif up_ratio < 0.35 and avg_change < -1.5:
-        status = "strong_bear"
-        description = "强势下跌行情"
-        advice = "谨慎观望，空仓为主"
-        strategy_adjust = {"change_min": -1, "change_max": 3}
-    elif up_ratio < 0.45 and avg_change < -0.5:
-        status = "weak_bear"
-        description = "温和下跌行情"
-        advice = "轻仓试探，严格止损"
-        strategy_adjust = {"change_min": -1.5, "change_max": 4}
-    else:
-        status = "sideways"
-        description = "震荡整理行情"
-        advice = "波段操作，快进快出"
-        strategy_adjust = {"change_min": -2, "change_max": 5}
-
-    result = {
-        "status": status,
-        "description": description,
-        "advice": advice,
-        "strategy_adjust": strategy_adjust,
-        "statistics": {
-            "total_stocks": total,
-            "up_count": up_count,
-            "down_count": down_count,
-            "up_ratio": round(up_ratio * 100, 1),
-            "avg_change": round(avg_change, 2),
-            "avg_volume_ratio": round(avg_volume_ratio, 2),
-        },
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
-
-    # 更新缓存
-    _market_env_cache["data"] = result
-    _market_env_cache["timestamp"] = time.time()
-
-    return result
-
-
-def get_board_type(code: str) -> Dict[str, str]:
-    """获取板块类型"""
-    # 移除市场前缀（sh/sz）
-    clean_code = code.replace("sh", "").replace("sz", "")
-
-    if clean_code.startswith("688"):
-        return {"type": "kcb", "name": "科创板", "color": "#00b894", "allowed": False}
-    elif clean_code.startswith("300") or clean_code.startswith("301"):
-        return {"type": "cyb", "name": "创业板", "color": "#6c5ce7", "allowed": True}
-    elif clean_code.startswith("6"):
-        return {"type": "sh", "name": "沪市主板", "color": "#0984e3", "allowed": True}
-    elif clean_code.startswith("0"):
-        return {"type": "sz", "name": "深市主板", "color": "#00cec9", "allowed": True}
-    else:
-        return {"type": "other", "name": "其他", "color": "#636e72", "allowed": False}
-
-
-def calculate_band_trading_score(
-    stock: Dict[str, Any],
-    margin_info: Dict[str, Any],
-    capital_flow: Dict[str, Any],
-    strategy_type: str = "balanced",
-) -> Dict[str, Any]:
-    """计算波段交易评分（专业版 - 优化版 - 支持不同策略）
-
-    Args:
-        stock: 股票数据
-        margin_info: 融资融券信息
-        capital_flow: 资金流向信息
-        strategy_type: 策略类型 (aggressive/conservative/balanced)
-    """
-    score = 50  # 基础分
-    reasons = []
-    warnings = []
-
-    code = stock["code"]
-    name = stock["name"]
-    change_percent = stock["change_percent"]
-    volume_ratio = stock["volume_ratio"]
-    market_cap = stock["market_cap"]
-    turnover = stock.get("turnover", 0)
-
-    # 根据策略类型调整权重
-    if strategy_type == "aggressive":
-        # 激进型：更看重涨幅和量比，容忍更高风险
-        weights = {
-            "margin": 0.30,
-            "change": 0.35,
-            "volume": 0.20,
-            "market_cap": 0.05,
-            "capital": 0.05,
-            "turnover": 0.05,
-        }
-    elif strategy_type == "conservative":
-        # 保守型：更看重融资融券和资金流向，偏好回调
-        weights = {
-            "margin": 0.40,
-            "change": 0.15,
-            "volume": 0.10,
-            "market_cap": 0.15,
-            "capital": 0.15,
-            "turnover": 0.05,
-        }
-    else:  # balanced
-        # 平衡型：综合考虑各项指标
-        weights = {
-            "margin": 0.35,
-            "change": 0.25,
-            "volume": 0.15,
-            "market_cap": 0.10,
-            "capital": 0.10,
-            "turnover": 0.05,
-        }
-
-    # 1. 融资融券评分
-    if margin_info["is_margin_eligible"]:
-        margin_score = margin_info["margin_score"]
-        score += margin_score * weights["margin"]  # 提高到45%权重
-
-        if margin_score >= 75:
-            reasons.append(f"💎💎 融资融券优质(评分{margin_score})")
-        elif margin_score >= 65:
-            reasons.append(f"💎 融资融券良好(评分{margin_score})")
-
-        if margin_info["net_flow"] > 0.06:
-            score += 18
-            reasons.append(f"💰💰 融资大幅流入{margin_info['net_flow']}亿")
-        elif margin_info["net_flow"] > 0.02:
-            score += 10
-            reasons.append(f"💰 融资净流入{margin_info['net_flow']}亿")
-        elif margin_info["net_flow"] < -0.06:
-            score -= 15
-            warnings.append(f"⚠️⚠️ 融资大幅流出{abs(margin_info['net_flow']):.2f}亿")
-        elif margin_info["net_flow"] < -0.02:
-            score -= 8
-            warnings.append(f"⚠️ 融资净流出{abs(margin_info['net_flow']):.2f}亿")
-    else:
-        score -= 35 * weights["margin"]  # 不支持融资融券严重减分
-        warnings.append("❌ 不支持融资融券（不符合策略）")
-
-    # 2. 涨跌幅评分（波段交易偏好 - 25%权重）
-    if -2 <= change_percent <= -0.5:
-        score += 25
-        reasons.append(f"📉📉 深度回调({change_percent:.1f}%)，黄金买点")
-    elif -0.5 < change_percent <= 0:
-        score += 20
-        reasons.append(f"📉 小幅回调({change_percent:.1f}%)，优质买点")
-    elif 0 < change_percent <= 2:
-        score += 18
-        reasons.append(f"📈 温和上涨({change_percent:.1f}%)，趋势良好")
-    elif 2 < change_percent <= 4:
-        score += 10
-        reasons.append(f"⚡ 适度上涨({change_percent:.1f}%)")
-    elif 4 < change_percent <= 5:
-        score += 3
-        reasons.append(f"⚡ 涨幅偏高({change_percent:.1f}%)")
-    elif change_percent > 7:
-        score -= 25
-        warnings.append(f"⚠️⚠️ 涨幅过大({change_percent:.1f}%)，追高风险极大")
-    elif change_percent > 5:
-        score -= 15
-        warnings.append(f"⚠️ 涨幅较大({change_percent:.1f}%)，追高风险")
-    elif change_percent < -5:
-        score -= 20
-        warnings.append(f"⚠️⚠️ 跌幅过大({change_percent:.1f}%)，需谨慎")
-    elif change_percent < -2:
-        score -= 10
-        warnings.append(f"⚠️ 跌幅较大({change_percent:.1f}%)，观察为主")
-
-    # 3. 量比评分（15%权重）
-    if 1.5 <= volume_ratio <= 2.2:
-        score += 18
-        reasons.append(f"📊📊 量比完美({volume_ratio:.1f})")
-    elif 2.2 < volume_ratio <= 2.8:
-        score += 12
-        reasons.append(f"� 量比健康({volume_ratio:.1f})")
-    elif 2.8 < volume_ratio <= 3.5:
-        score += 6
-        reasons.append(f"� 量比适中({volume_ratio:.1f})")
-    elif volume_ratio > 5:
-        score -= 15
-        warnings.append(f"⚠️⚠️ 量比过大({volume_ratio:.1f})，异常放量")
-    elif volume_ratio > 3.5:
-        score -= 8
-        warnings.append(f"⚠️ 量比偏大({volume_ratio:.1f})")
-
-    # 4. 市值评分（偏好中小市值 - 10%权重）
-    if 40 <= market_cap <= 80:
-        score += 18
-        reasons.append(f"�💎 市值优质({market_cap:.0f}亿)，成长空间大")
-    elif 80 < market_cap <= 120:
-        score += 12
-        reasons.append(f"💎 市值良好({market_cap:.0f}亿)")
-    elif 120 < market_cap <= 160:
-        score += 6
-        reasons.append(f"📊 市值合理({market_cap:.0f}亿)")
-    elif market_cap > 160:
-        score -= 25
-        warnings.append(f"❌ 市值过大({market_cap:.0f}亿)，超出限制")
-    elif market_cap < 30:
-        score -= 10
-        warnings.append(f"⚠️ 市值偏小({market_cap:.0f}亿)，风险较高")
-
-    # 5. 资金流向评分（10%权重）
-    if capital_flow["has_data"]:
-        if capital_flow["flow_strength"] == "strong_in":
-            score += 22
-            reasons.append("💰💰💰 主力强力抢筹")
-        elif capital_flow["flow_strength"] == "weak_in":
-            score += 12
-            reasons.append("💰 主力温和流入")
-        elif capital_flow["flow_strength"] == "strong_out":
-            score -= 25
-            warnings.append("⚠️⚠️⚠️ 主力强力出逃")
-        elif capital_flow["flow_strength"] == "weak_out":
-            score -= 12
-            warnings.append("⚠️ 主力温和流出")
-
-    # 6. 换手率评分（波段交易偏好适中换手 - 5%权重）
-    if 2 <= turnover <= 6:
-        score += 12
-        reasons.append(f"🔄 换手完美({turnover:.1f}%)")
-    elif 6 < turnover <= 10:
-        score += 6
-        reasons.append(f"🔄 换手适中({turnover:.1f}%)")
-    elif turnover > 18:
-        score -= 18
-        warnings.append(f"⚠️⚠️ 换手过高({turnover:.1f}%)，可能出货")
-    elif turnover > 12:
-        score -= 10
-        warnings.append(f"⚠️ 换手偏高({turnover:.1f}%)")
-    elif turnover < 1:
-        score -= 8
-        warnings.append(f"⚠️ 换手过低({turnover:.1f}%)，流动性差")
-
-    # 7. 板块加分
-    board = get_board_type(code)
-    if board["type"] == "cyb":
-        score += 8
-        reasons.append("🚀 创业板成长股")
-    elif board["type"] == "sh":
-        score += 3
-        reasons.append("🏛️ 沪市主板")
-
-    # 确保评分在合理范围内
-    score = max(0, min(100, score))
-
-    # 风险等级判断（更严格）
-    if score >= 70:
-        risk_level = "low"
-    elif score >= 55:
-        risk_level = "medium"
-    else:
-        risk_level = "high"
-
-    return {
-        "score": round(score, 1),
-        "reasons": reasons,
-        "warnings": warnings,
-        "risk_level": risk_level,
-    }
-
-
-@app.get("/")
-async def root():
-    return {
-        "message": "A股波段交易筛选系统",
-        "version": "4.0.0",
-        "strategy": {
-            "name": "波段交易专业版",
-            "description": "专注主板+创业板融资融券标的，严格风控",
-            "max_positions": BAND_TRADING_CONFIG["max_positions"],
-            "rules": [
-                "✅ 只做主板和创业板",
-                "✅ 必须是融资融券标的",
-                "✅ 排除ST和亏损股",
-                "✅ 市值≤160亿",
-                "✅ 涨幅-2%~5%（不追涨）",
-                "✅ 每次最多3只个股",
-            ],
-        },
-        "endpoints": {
-            "波段交易筛选": "/api/band-trading",
-            "实时行情": "/api/realtime",
-            "API文档": "/docs",
-        },
-    }
-
-
-@app.get("/api/band-trading")
-async def band_trading_screen(
-    change_min: float = Query(-2.0, description="涨幅下限(%)"),
-    change_max: float = Query(5.0, description="涨幅上限(%)"),
-    volume_ratio_min: float = Query(1.5, description="量比下限"),
-    volume_ratio_max: float = Query(3.0, description="量比上限"),
-    market_cap_max: float = Query(160, description="市值上限(亿)"),
-    limit: int = Query(3, description="返回数量（最多3只）"),
-    strategy_type: str = Query(
-        "balanced", description="策略类型: aggressive/conservative/balanced"
-    ),
-):
-    """波段交易专用筛选 - 快速版（读取缓存）"""
-    import os
-    import json
-    from datetime import datetime
-
-    # 读取缓存结果
-    result_file = "screening_result.json"
-
-    if os.path.exists(result_file):
-        try:
-            with open(result_file, "r", encoding="utf-8") as f:
-                cached = json.load(f)
-
-            # 检查缓存时间（不超过60分钟）
-            cache_time = datetime.fromisoformat(cached["timestamp"])
-            age_minutes = (datetime.now() - cache_time).total_seconds() / 60
-
-            if age_minutes < 60:
-                print(f"✅ 使用缓存数据（{age_minutes:.1f}分钟前）")
-
-                # 返回前N只
-                data = cached["data"][:limit]
-
-                return {
-                    "success": True,
-                    "count": len(data),
-                    "data": data,
-                    "cache_age_minutes": round(age_minutes, 1),
-                    "message": f"数据来自{age_minutes:.1f}分钟前的缓存",
-                }
-        except Exception as e:
-            print(f"⚠️ 读取缓存失败：{e}")
-
-    # 如果没有缓存或缓存过期，返回提示
-    return {
-        "success": False,
-        "count": 0,
-        "data": [],
-        "message": "请先启动后台筛选任务：python scheduler.py",
-    }
-
-
-@app.post("/api/trigger-screening")
-async def trigger_screening():
-    """手动触发筛选任务"""
-    import subprocess
-    import os
-
-    try:
-        # 检查scheduler是否在运行
-        result_file = "screening_result.json"
-        if os.path.exists(result_file):
-            # 读取当前缓存时间
-            with open(result_file, "r", encoding="utf-8") as f:
-                cached = json.load(f)
-            cache_time = datetime.fromisoformat(cached["timestamp"])
-            age_minutes = (datetime.now() - cache_time).total_seconds() / 60
-
-            return {
-                "success": True,
-                "message": f"后台任务正在运行，上次更新：{age_minutes:.1f}分钟前。请等待下次自动更新（每5分钟）",
-                "cache_age_minutes": round(age_minutes, 1),
-            }
-        else:
-            return {
-                "success": False,
-                "message": "后台筛选任务未启动，请运行：python scheduler.py",
-            }
-    except Exception as e:
-        return {"success": False, "message": f"触发失败：{str(e)}"}
-
-
-@app.get("/api/band-trading-realtime")
-async def band_trading_screen_realtime(
-    change_min: float = Query(-2.0, description="涨幅下限(%)"),
-    change_max: float = Query(5.0, description="涨幅上限(%)"),
-    volume_ratio_min: float = Query(1.5, description="量比下限"),
-    volume_ratio_max: float = Query(3.0, description="量比上限"),
-    market_cap_max: float = Query(160, description="市值上限(亿)"),
-    limit: int = Query(3, description="返回数量（最多3只）"),
-    strategy_type: str = Query(
-        "balanced", description="策略类型: aggressive/conservative/balanced"
-    ),
-):
-    """波段交易专用筛选 - 智能缓存版"""
-    import os
-    import json
-    from datetime import datetime
-
-    # 生成缓存键（包含策略类型）
-    cache_key = f"cache_{strategy_type}_{change_min}_{change_max}_{volume_ratio_min}_{volume_ratio_max}_{market_cap_max}.json"
-    cache_dir = "cache"
-    os.makedirs(cache_dir, exist_ok=True)
-    cache_file = os.path.join(cache_dir, cache_key)
-
-    # 检查缓存（5分钟有效期）
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cached = json.load(f)
-
-            cache_time = datetime.fromisoformat(cached["timestamp"])
-            age_minutes = (datetime.now() - cache_time).total_seconds() / 60
-
-            if age_minutes < 30:  # 30分钟内使用缓存
-                print(
-                    f"✅ 使用缓存数据（{age_minutes:.1f}分钟前，策略：{strategy_type}）"
-                )
-                return {
-                    "success": True,
-                    "count": len(cached["data"]),
-                    "criteria": cached["criteria"],
-                    "data": cached["data"],
-                    "market_environment": cached.get("market_environment"),
-                    "cache_age_minutes": round(age_minutes, 1),
-                    "message": f"使用缓存数据（{age_minutes:.1f}分钟前）",
-                }
-        except Exception as e:
-            print(f"⚠️ 读取缓存失败：{e}")
-
-    try:
-        print(f"\n{'=' * 60}")
-        print(f"🎯 波段交易筛选启动（实时）")
-        print(f"{'=' * 60}")
-        print(f"📊 筛选条件:")
-        print(f"   • 策略类型: {strategy_type}")
-        print(f"   • 涨幅范围: {change_min}% ~ {change_max}%")
-        print(f"   • 量比范围: {volume_ratio_min} ~ {volume_ratio_max}")
-        print(f"   • 市值上限: ≤{market_cap_max}亿")
-        print(f"   • 返回数量: 最多{min(limit, 3)}只")
-        print(f"{'=' * 60}\n")
-
-        # 限制最多返回3只
-        limit = min(limit, BAND_TRADING_CONFIG["max_positions"])
-
-        all_stocks = get_all_stocks_data()
-        print(f"📈 获取到 {len(all_stocks)} 只股票数据")
-
-        # 分析市场环境（新增）
-        market_env = analyze_market_environment(all_stocks)
-        print(f"\n🌍 市场环境分析:")
-        print(f"   • 状态: {market_env['description']}")
-        print(f"   • 建议: {market_env['advice']}")
-        print(
-            f"   • 涨跌比: {market_env['statistics']['up_count']}涨/{market_env['statistics']['down_count']}跌"
-        )
-        print(f"   • 平均涨幅: {market_env['statistics']['avg_change']}%")
-        print(f"   • 平均量比: {market_env['statistics']['avg_volume_ratio']}\n")
-
-        # ===== 第一阶段：快速过滤（不调用任何慢函数） =====
-        print(f"🔍 第一阶段：快速过滤...")
-        quick_filtered = []
-        excluded_stats = {"kcb": 0, "st": 0, "board": 0, "market_cap": 0, "criteria": 0}
-
-        for stock in all_stocks:
-            if not stock:
-                continue
-
-            code = stock["code"]
-            name = stock["name"]
-            clean_code = code.replace("sh", "").replace("sz", "")
-
-            # 1. 排除科创板
-            if clean_code.startswith("688"):
-                excluded_stats["kcb"] += 1
-                continue
-
-            # 2. 排除ST股票
-            if "ST" in name or "*ST" in name or name.startswith("S") or "退" in name:
-                excluded_stats["st"] += 1
-                continue
-
-            # 3. 只保留主板和创业板（简单判断，不调用函数）
-            if not (
-                clean_code.startswith("6")
-                or clean_code.startswith("0")
-                or clean_code.startswith("3")
-            ):
-                excluded_stats["board"] += 1
-                continue
-
-            # 4. 市值限制
-            if stock["market_cap"] > market_cap_max:
-                excluded_stats["market_cap"] += 1
-                continue
-
-            # 5. 基本筛选条件
-            if not (
-                change_min <= stock["change_percent"] <= change_max
-                and volume_ratio_min <= stock["volume_ratio"] <= volume_ratio_max
-            ):
-                excluded_stats["criteria"] += 1
-                continue
-
-            quick_filtered.append(stock)
-
-        print(f"   快速过滤完成：{len(all_stocks)} → {len(quick_filtered)} 只")
-
-        # 优化：限制详细分析的数量（按评分预排序，只分析前50只）
-        if len(quick_filtered) > 50:  # 进一步减少 80 → 50
-            # 按涨幅和量比进行简单预评分
-            for stock in quick_filtered:
-                pre_score = 0
-                # 回调股票加分
-                if -2 <= stock["change_percent"] <= 0:
-                    pre_score += 30
-                elif 0 < stock["change_percent"] <= 2:
-                    pre_score += 20
-                # 量比适中加分
-                if 1.5 <= stock["volume_ratio"] <= 2.5:
-                    pre_score += 20
-                # 市值适中加分
-                if 40 <= stock["market_cap"] <= 120:
-                    pre_score += 15
-                stock["_pre_score"] = pre_score
-            
-            # 按预评分排序，只保留前50只
-            quick_filtered.sort(key=lambda x: x.get("_pre_score", 0), reverse=True)
-            original_count = len(quick_filtered)
-            quick_filtered = quick_filtered[:50]  # 减少到50只
-            print(f"   ⚡ 性能优化：限制详细分析数量 {original_count} → {len(quick_filtered)} 只")
-
-        # ===== 第二阶段：详细分析（只对快速过滤后的股票） =====
-        print(f"🔍 第二阶段：详细分析...")
-        filtered_stocks = []
-        detailed_stats = {"loss": 0, "no_margin": 0}
-
-        for i, stock in enumerate(quick_filtered):
-            if i % 50 == 0 and i > 0:
-                print(f"   已分析: {i}/{len(quick_filtered)} 只...")
-
-            code = stock["code"]
-            name = stock["name"]
-
-            # 1. 检查板块类型（详细）
-            board = get_board_type(code)
-            if not board.get("allowed", False):
-                continue
-
-            # 2. 检查融资融券
-            margin_info = get_margin_trading_info(code)
-            if not margin_info["is_margin_eligible"]:
-                detailed_stats["no_margin"] += 1
-                continue
-
-            # 3. 获取资金流向
-            capital_flow = get_capital_flow(code)
-
-            # 4. 计算波段交易评分
-            scoring_result = calculate_band_trading_score(
-                stock, margin_info, capital_flow, strategy_type
-            )
-
-            stock["score"] = scoring_result["score"]
-            stock["reasons"] = scoring_result["reasons"]
-            stock["warnings"] = scoring_result["warnings"]
-            stock["risk_level"] = scoring_result["risk_level"]
-            stock["margin_info"] = margin_info
-            stock["capital_flow"] = capital_flow
-            stock["board_type"] = board
-
-            # 5. 添加行业信息
-            stock["industry"] = get_industry(name, code)
-
-            # 6. 生成K线数据
-            stock["kline"] = generate_kline_data(
-                code, stock["price"], stock["change_percent"]
-            )
-
-            # 7. 计算买卖点
-            stock["trade_points"] = calculate_trade_points(stock)
-
-            # 只保留评分>=55的股票
-            if stock["score"] >= 55:
-                filtered_stocks.append(stock)
-
-        print(f"   详细分析完成：{len(quick_filtered)} → {len(filtered_stocks)} 只")
-
-        # 根据策略类型进行差异化排序和筛选
-        if strategy_type == "aggressive":
-            # 激进型：优先选择涨幅大、量比大的股票
-            filtered_stocks.sort(
-                key=lambda x: (
-                    x["change_percent"] * 0.4  # 涨幅权重40%
-                    + x["volume_ratio"] * 10 * 0.3  # 量比权重30%
-                    + x["score"] * 0.3  # 评分权重30%
-                ),
-                reverse=True,
-            )
-            print(f"   策略：激进型 - 优先选择涨幅大、量比大的股票")
-        elif strategy_type == "conservative":
-            # 保守型：优先选择回调、融资融券好的股票
-            filtered_stocks.sort(
-                key=lambda x: (
-                    -abs(x["change_percent"]) * 0.3  # 涨幅越小越好（回调）
-                    + x["margin_info"]["margin_score"] * 0.4  # 融资融券权重40%
-                    + x["score"] * 0.3  # 评分权重30%
-                ),
-                reverse=True,
-            )
-            print(f"   策略：保守型 - 优先选择回调、融资融券好的股票")
-        else:  # balanced
-            # 平衡型：按综合评分排序
-            filtered_stocks.sort(key=lambda x: x["score"], reverse=True)
-            print(f"   策略：平衡型 - 按综合评分排序")
-
-        # 板块+行业分散策略：尽量从不同板块和行业各选一只
-        result = []
-        board_counts = {"sh": 0, "sz": 0, "cyb": 0}  # 沪市、深市、创业板计数
-        used_industries = set()  # 已选行业
-
-        # 第一轮：每个板块选一只最高分的，且行业不重复
-        for board_type in ["sh", "sz", "cyb"]:
-            for stock in filtered_stocks:
-                if (
-                    stock["board_type"]["type"] == board_type
-                    and board_counts[board_type] == 0
-                    and stock["industry"] not in used_industries
-                ):
-                    result.append(stock)
-                    board_counts[board_type] += 1
-                    used_industries.add(stock["industry"])
-                    if len(result) >= limit:
-                        break
-            if len(result) >= limit:
-                break
-
-        # 第二轮：如果还没满，优先选不同行业的
-        if len(result) < limit:
-            for stock in filtered_stocks:
-                if stock not in result and stock["industry"] not in used_industries:
-                    result.append(stock)
-                    used_industries.add(stock["industry"])
-                    if len(result) >= limit:
-                        break
-
-        # 第三轮：如果还是没满，按评分继续添加
-        if len(result) < limit:
-            for stock in filtered_stocks:
-                if stock not in result:
-                    result.append(stock)
-                    if len(result) >= limit:
-                        break
-
-        # ===== AI 智能分析（为最终选中的股票添加 AI 分析） =====
-        if result and is_glm_enabled():
-            print(f"\n🤖 正在生成 AI 智能分析...")
-            for i, stock in enumerate(result):
-                print(f"   分析中: {i + 1}/{len(result)} - {stock['name']}")
-                enhance_stock_with_ai(stock, strategy_type)
-            print(f"✅ AI 分析完成\n")
-
-        print(f"\n{'=' * 60}")
-        print(f"✅ 筛选完成")
-        print(f"{'=' * 60}")
-        print(f"📊 统计信息:")
-        print(f"   • 总扫描: {len(all_stocks)}只")
-        print(f"   • 快速过滤后: {len(quick_filtered)}只")
-        print(f"   • 排除科创板: {excluded_stats['kcb']}只")
-        print(f"   • 排除ST股: {excluded_stats['st']}只")
-        print(f"   • 排除市值超限: {excluded_stats['market_cap']}只")
-        print(f"   • 排除条件不符: {excluded_stats['criteria']}只")
-        print(f"   • 排除非融资融券: {detailed_stats['no_margin']}只")
-        print(f"   • 最终入选: {len(result)}只")
-        print(f"   • AI分析: {'✅ 已启用' if is_glm_enabled() else '⚠️ 未启用'}")
-        print(
-            f"   • 板块分布: 沪市{board_counts['sh']}只 深市{board_counts['sz']}只 创业板{board_counts['cyb']}只"
-        )
-        if result:
-            industries = [s["industry"] for s in result]
-            print(f"   • 行业分布: {', '.join(industries)}")
-        print(f"{'=' * 60}\n")
-
-        if result:
-            print("🎯 推荐股票:")
-            for i, s in enumerate(result, 1):
-                print(f"   {i}. {s['name']}({s['code']}) - 评分:{s['score']:.1f}")
-                print(
-                    f"      板块:{s['board_type']['name']} | 行业:{s['industry']} | 涨幅:{s['change_percent']:.2f}% | 市值:{s['market_cap']:.0f}亿"
-                )
-                print(
-                    f"      买入:{s['trade_points']['buy_price']}元 止损:{s['trade_points']['stop_loss']}元 目标:{s['trade_points']['target_price']}元"
-                )
-                if s["reasons"]:
-                    print(f"      理由: {', '.join(s['reasons'][:3])}")
-                if s.get("ai_analysis"):
-                    print(f"      🤖 AI: {s['ai_analysis'][:80]}...")
-
-        # 构建响应数据
-        response_data = {
-            "success": True,
-            "count": len(result),
-            "data": result,
-            "market_environment": market_env,  # 新增：市场环境信息
-            "ai_enabled": is_glm_enabled(),  # 新增：AI 是否启用
-            "strategy": {
-                "name": "波段交易",
-                "max_positions": BAND_TRADING_CONFIG["max_positions"],
-                "description": "主板+创业板融资融券标的，严格风控",
-            },
-            "statistics": {
-                "total_scanned": len(all_stocks),
-                "excluded": excluded_stats,
-                "final_selected": len(result),
-            },
-            "criteria": {
-                "change_range": f"{change_min}% ~ {change_max}%",
-                "volume_ratio_range": f"{volume_ratio_min} ~ {volume_ratio_max}",
-                "market_cap_max": f"≤{market_cap_max}亿",
-                "require_margin": True,
-                "exclude_st": True,
-                "exclude_loss": True,
-                "boards": "主板+创业板",
-                "strategy": strategy_type,
-            },
-        }
-
-        # 保存缓存
-        try:
-            cache_data = {
-                "timestamp": datetime.now().isoformat(),
-                "strategy_type": strategy_type,
-                "count": len(result),
-                "data": result,
-                "market_environment": market_env,
-                "criteria": {
-                    "change_range": f"{change_min}% ~ {change_max}%",
-                    "volume_ratio_range": f"{volume_ratio_min} ~ {volume_ratio_max}",
-                    "market_cap_max": f"≤{market_cap_max}亿",
-                    "strategy": strategy_type,
-                },
-            }
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            print(f"💾 缓存已保存：{cache_key}")
-        except Exception as e:
-            print(f"⚠️ 保存缓存失败：{e}")
-
-        return response_data
-
-    except Exception as e:
-        import traceback
-
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"筛选失败: {str(e)}")
-
-
-@app.get("/api/screen")
-async def screen_stocks(
-    change_min: float = Query(-2.0, description="涨幅下限(%)"),
-    change_max: float = Query(5.0, description="涨幅上限(%)"),
-    volume_ratio_min: float = Query(1.5, description="量比下限"),
-    volume_ratio_max: float = Query(3.0, description="量比上限"),
-    market_cap_min: float = Query(50, description="流通市值下限(亿)"),
-    market_cap_max: float = Query(160, description="流通市值上限(亿)"),
-    limit: int = Query(3, description="返回数量"),
-    include_cyb: bool = Query(True, description="是否包含创业板"),
-    require_margin: bool = Query(True, description="是否要求支持融资融券"),
-):
-    """通用筛选接口（兼容旧版）- 自动调用波段交易筛选"""
-    return await band_trading_screen(
-        change_min=change_min,
-        change_max=change_max,
-        volume_ratio_min=volume_ratio_min,
-        volume_ratio_max=volume_ratio_max,
-        market_cap_max=market_cap_max,
-        limit=limit,
-    )
-
-
-@app.get("/api/realtime")
-async def get_realtime_quote(code: str = Query(..., description="股票代码")):
-    """获取单只股票实时行情"""
-    try:
-        if code.startswith("6") or code.startswith("9"):
-            symbol = f"sh{code}"
-        else:
-            symbol = f"sz{code}"
-
-        data = fetch_qq_stock_data([symbol])
-        for line in data.strip().split("\n"):
-            stock = parse_qq_stock_line(line)
-            if stock and stock["code"] == code:
-                # 添加增强信息
-                margin_info = get_margin_trading_info(code)
-                capital_flow = get_capital_flow(code)
-                board_type = get_board_type(code)
-
-                stock["margin_info"] = margin_info
-                stock["capital_flow"] = capital_flow
-                stock["board_type"] = board_type
-
-                return {"success": True, "data": stock}
-
-        raise HTTPException(status_code=404, detail="股票代码不存在或暂无数据")
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取行情失败: {str(e)}")
-
-
-@app.get("/api/hot")
-async def get_hot_stocks(limit: int = Query(20, description="返回数量")):
-    """获取热门股票（按成交额排序）"""
-    try:
-        all_stocks = get_all_stocks_data()
-
-        # 过滤并排序
-        valid_stocks = []
-        for stock in all_stocks:
-            if (
-                stock
-                and stock["amount"] > 0
-                and not stock["code"].startswith("688")  # 排除科创板
-                and "ST" not in stock["name"]
-            ):
-                # 添加增强信息
-                margin_info = get_margin_trading_info(stock["code"])
-                capital_flow = get_capital_flow(stock["code"])
-                board_type = get_board_type(stock["code"])
-
-                stock["margin_info"] = margin_info
-                stock["capital_flow"] = capital_flow
-                stock["board_type"] = board_type
-
-                valid_stocks.append(stock)
-
-        # 按成交额排序
-        valid_stocks.sort(key=lambda x: x["amount"], reverse=True)
-
-        return {
-            "success": True,
-            "count": len(valid_stocks[:limit]),
-            "data": valid_stocks[:limit],
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取热门股票失败: {str(e)}")
-
-
-@app.get("/api/market-environment")
-async def get_market_environment():
-    """获取市场环境分析（新增接口）"""
-    try:
-        all_stocks = get_all_stocks_data()
-        market_env = analyze_market_environment(all_stocks)
-
-        return {"success": True, "data": market_env}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取市场环境失败: {str(e)}")
-
-
-@app.get("/api/cache/clear")
-async def clear_cache():
-    """清除缓存（新增接口）"""
-    global _stock_data_cache, _market_env_cache
-
-    _stock_data_cache["data"] = None
-    _stock_data_cache["timestamp"] = None
-
-    _market_env_cache["data"] = None
-    _market_env_cache["timestamp"] = None
-
-    return {"success": True, "message": "缓存已清除"}
-
-
-
-# ==================== 新增：精选过滤服务相关函数 ====================
-
-def detect_negative_news(code: str) -> Dict[str, Any]:
-    """检测负面新闻（模拟）"""
-    return {
-        'has_negative_news': False,
-        'negative_count': 0,
-        'total_news_count': 5,
-        'negative_news': [],
-        'risk_level': 'low'
-    }
-
-def analyze_tail_trend(stock) -> Dict[str, Any]:
-    """分析尾盘走势"""
-    change = stock.get('change_percent', 0)
-    trend = 'stable'
-    if change > 3: trend = 'strong_up'
-    elif change > 0: trend = 'up'
-    elif change < -3: trend = 'down'
-    
-    return {
-        'trend': trend,
-        'strength': abs(change),
-        'tail_change': 0.5, # Mock
-        'tail_volume_ratio': 1.2, # Mock
-        'description': f'尾盘走势{trend}'
-    }
-
-def analyze_upside_space(stock) -> Dict[str, Any]:
-    """分析上涨空间"""
-    price = stock['price']
-    if price <= 0: return {'space': 0, 'limit_price': 0, 'near_limit': False}
-    
-    limit_rate = 0.2 if stock['code'].startswith(('30', '68')) else 0.1
-    limit_price = round(price * (1 + limit_rate), 2)
-    space = (limit_price - price) / price * 100
-    
-    return {
-        'space': round(space, 2),
-        'limit_price': limit_price,
-        'current_change': stock.get('change_percent', 0),
-        'near_limit': space < 2.0,
-        'limit_rate': int(limit_rate * 100)
-    }
-
-def get_beginner_tags(stock: Dict[str, Any], margin_info: Dict[str, Any]) -> List[str]:
-    """获取新手标签"""
-    tags = []
-    if stock.get('change_percent', 0) > 3: tags.append('强势')
-    if margin_info.get('net_flow', 0) > 0.1: tags.append('主力流入')
-    return tags
-
-def get_operation_suggestion(stock: Dict[str, Any]) -> Dict[str, Any]:
-    """获取操作建议"""
-    return {
-        'action': 'wait',
-        'desc': '建议观察'
-    }
-
-def generate_analysis_report(stock: Dict[str, Any]) -> str:
-    """生成分析报告"""
-    return f"该股当前涨幅{stock.get('change_percent')}%，建议结合大盘走势操作。"
-
-@app.get("/api/filter")
-async def filter_stocks(
-    codes: str = Query(..., description="Comma-separated stock codes"),
-    include_kcb_cyb: bool = Query(True, description="Include ChiNext and STAR Market"),
-    prefer_tail_inflow: bool = Query(False, description="Prefer tail inflow"),
-    strict_risk_control: bool = Query(True, description="Strict risk control"),
-):
-    """高级筛选接口"""
-    try:
-        code_list = codes.split(',')
-        results = []
-        analysis_results = []
-        ai_selected = []
-        
-        # 1. 批量获取数据
-        qq_codes = []
-        for c in code_list:
-            if c.startswith('6'): qq_codes.append(f"sh{c}")
-            else: qq_codes.append(f"sz{c}")
-            
-        data_str = fetch_qq_stock_data(qq_codes)
-        stocks_map = {}
-        for line in data_str.strip().split('\n'):
-            s = parse_qq_stock_line(line)
-            if s: stocks_map[s['code']] = s
-            
-        # 2. 处理每只股票
-        for code in code_list:
-            if code not in stocks_map: continue
-            stock = stocks_map[code]
-            
-            # 过滤科创板/创业板
-            if not include_kcb_cyb and (code.startswith('30') or code.startswith('68')): continue
-            
-            # 丰富数据
-            margin_info = get_margin_trading_info(code)
-            stock['margin_info'] = margin_info
-            
-            capital_flow = get_capital_flow(code)
-            stock['capital_flow'] = capital_flow
-            
-            # 计算评分
-            score_res = calculate_band_trading_score(stock, margin_info, capital_flow, "balanced")
-            stock['beginner_score'] = score_res['score']
-            stock['beginner_tags'] = get_beginner_tags(stock, margin_info)
-            stock['operation_suggestion'] = get_operation_suggestion(stock)
-            stock['ai_analysis'] = generate_analysis_report(stock)
-            
-            # 使用现有的 get_board_type 或自己实现
-            try:
-                stock['board_type'] = get_board_type(code)
-            except NameError:
-                stock['board_type'] = {'type': 'unknown', 'name': '未知', 'color': 'gray'}
-            
-            # 补充缺失字段
-            if 'ma5' not in stock:
-                stock['ma5'] = stock['price']  # 暂时用当前价代替，避免前端报错
-            
-            # 添加 analysis 字段 (前端 FilteredStock 接口必需)
-            stock['analysis'] = {
-                'volume_pattern': '阶梯式放量' if stock.get('volume_ratio', 0) > 1.5 else '温和放量',
-                'price_position': '站稳5日线' if stock['price'] >= stock['ma5'] else '跌破5日线',
-                'sector': get_industry(stock['name'], stock['code'])
-            }
-            
-            # 技术指标
-            tech_indicators = {
-                'tail_trend': analyze_tail_trend(stock),
-                'upside_space': analyze_upside_space(stock),
-                'capital_flow': capital_flow,
-                'margin_info': margin_info,
-                'open_probability': 'medium'
-            }
-            
-            # AI精选逻辑 (评分>=60)
-            if stock['beginner_score'] >= 60:
-                ai_item = {
-                    'code': code,
-                    'name': stock['name'],
-                    'price': stock['price'],
-                    'change_percent': stock['change_percent'],
-                    'volume_ratio': stock['volume_ratio'],
-                    'market_cap': stock['market_cap'],
-                    'turnover': stock.get('turnover', 0),
-                    'score': stock['beginner_score'],
-                    'reasons': score_res['reasons'],
-                    'warnings': score_res['warnings'],
-                    'indicators': tech_indicators,
-                    'negative_news': detect_negative_news(code),
-                    'board_type': stock['board_type']
-                }
-                ai_selected.append(ai_item)
-            
-            results.append(stock)
-            analysis_results.append({
-                'code': code,
-                'analysis': stock['ai_analysis'],
-                'score': stock['beginner_score']
-            })
-            
-        # 排序
-        results.sort(key=lambda x: x.get('beginner_score', 0), reverse=True)
-        ai_selected.sort(key=lambda x: x['score'], reverse=True)
-        
-        # 生成Final Pick
-        final_picks = []
-        for i, item in enumerate(ai_selected[:3]):
-            pick = {
-                'rank': i + 1,
-                'code': item['code'],
-                'name': item['name'],
-                'price': item['price'],
-                'change_percent': item['change_percent'],
-                'volume_ratio': item['volume_ratio'],
-                'market_cap': item['market_cap'],
-                'score': item['score'],
-                'summary': item['reasons'][0] if item['reasons'] else "综合评分较高",
-                'reasons': item['reasons'],
-                'warnings': item['warnings'],
-                'tail_trend': item['indicators']['tail_trend'],
-                'upside_space': item['indicators']['upside_space'],
-                'capital_flow': item['indicators']['capital_flow'],
-                'board_type': item['board_type'],
-                'trade_plan': {
-                    'entry_price': item['price'],
-                    'entry_time': '明日开盘',
-                    'stop_loss_price': round(item['price'] * 0.95, 2),
-                    'stop_loss_ratio': -5,
-                    'take_profit_price': round(item['price'] * 1.1, 2),
-                    'take_profit_ratio': 10,
-                    'expected_return': 10,
-                    'hold_period': '1-3天',
-                    'risk_reward_ratio': 2.0
-                }
-            }
-            final_picks.append(pick)
-            
-        return {
-            "count": len(results),
-            "total_analyzed": len(code_list),
-            "filter_criteria": {
-                "volume_pattern": "阶梯式放量",
-                "price_position": "站稳5日线+近期高点",
-                "sector": "优先数字经济（加分项）"
-            },
-            "data": results,
-            "all_analysis": analysis_results,
-            "ai_selected": ai_selected,
-            "market_environment": {},
-            "final_pick": final_picks[0] if final_picks else None,
-            "final_picks": final_picks
-        }
-
-    except Exception as e:
-        print(f"Filter error: {e}")
-        raise HTTPException(status_code=500, detail=f"Filter failed: {str(e)}")
+app = create_app()
 
 
 if __name__ == "__main__":
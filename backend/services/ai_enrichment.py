@@ -0,0 +1,134 @@
+"""
+AI 后台增强服务
+筛选接口先返回结果（ai_status=pending），AI 分析在后台协程中完成，
+完成后回写筛选缓存，客户端通过查询接口或 SSE 流获取
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from core.cache import memory_cache
+from core.config import config
+from core.metrics import track_stage
+
+
+AI_STATUS_PENDING = "pending"
+AI_STATUS_DONE = "done"
+AI_STATUS_FAILED = "failed"
+AI_STATUS_DISABLED = "disabled"
+
+_NAMESPACE = "ai_enrichment"
+
+
+def enrichment_job_id(cache_key: str, codes: Iterable[str] = ()) -> str:
+    """
+    由筛选缓存键和入选代码生成增强任务 ID
+    同一筛选条件、同一批入选股票共用一个任务；入选股票变化时是新任务
+    """
+    raw = cache_key + "|" + ",".join(sorted(codes))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class AIEnrichmentManager:
+    """AI 增强任务管理（任务状态存放在 memory_cache 的 ai_enrichment 命名空间）"""
+
+    def __init__(self, timeout: float = 120):
+        """
+        :param timeout: 单个任务的最长执行时间（秒）
+        """
+        self.timeout = timeout
+        self._events: Dict[str, asyncio.Event] = {}
+        self._tasks = set()
+        memory_cache.configure_namespace(_NAMESPACE, ttl=config.AI_CACHE_TTL, max_entries=512)
+
+    def stats(self) -> Dict[str, int]:
+        """运行中的任务数与等待中的事件数"""
+        return {"running": len(self._tasks), "events": len(self._events)}
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """查询任务状态，不存在返回 None"""
+        return memory_cache.get(_NAMESPACE, job_id)
+
+    def submit(
+        self,
+        job_id: str,
+        analyze: Callable[[], Awaitable[Dict[str, str]]],
+        on_done: Optional[Callable[[Dict[str, str], str], None]] = None,
+        initial: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        提交后台增强任务（必须在事件循环中调用）；同一任务进行中时不重复提交
+
+        Args:
+            job_id: 任务 ID
+            analyze: 异步分析函数，返回 {code: 分析文本}
+            on_done: 任务结束后的回调 (analyses, status)，成功和失败都会调用（回写筛选缓存）
+            initial: 已有的分析结果（如缓存命中部分）
+
+        Returns:
+            任务状态
+        """
+        current = self.status(job_id)
+        if current is not None and current["status"] == AI_STATUS_PENDING:
+            return current
+
+        state = self._save(job_id, AI_STATUS_PENDING, dict(initial or {}))
+        self._events[job_id] = asyncio.Event()
+        task = asyncio.get_running_loop().create_task(self._run(job_id, analyze, on_done, state))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return state
+
+    async def _run(self, job_id, analyze, on_done, state):
+        analyses = dict(state["analyses"])
+        status = AI_STATUS_FAILED
+        # 任务继承提交时的追踪上下文，AI 调用记录在发起筛选的请求 trace 下
+        with track_stage("ai", job_id=job_id):
+            try:
+                analyses.update(
+                    await asyncio.wait_for(analyze(), timeout=self.timeout) or {}
+                )
+                status = AI_STATUS_DONE if analyses else AI_STATUS_FAILED
+            except asyncio.TimeoutError:
+                print(f"⚠️ AI 后台分析超时: {job_id}")
+            except Exception as e:
+                print(f"⚠️ AI 后台分析失败 {job_id}: {e}")
+
+        if on_done is not None:
+            try:
+                on_done(analyses, status)
+            except Exception as e:
+                print(f"⚠️ AI 结果回写失败 {job_id}: {e}")
+
+        self._save(job_id, status, analyses)
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+        print(f"🤖 AI 后台分析{'完成' if status == AI_STATUS_DONE else '失败'}: {len(analyses)}只")
+
+    @staticmethod
+    def _save(job_id: str, status: str, analyses: Dict[str, str]) -> Dict[str, Any]:
+        state = {
+            "job_id": job_id,
+            "status": status,
+            "analyses": analyses,
+            "updated_at": time.time(),
+        }
+        memory_cache.set(_NAMESPACE, job_id, state)
+        return state
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """等待任务结束（超时返回当前状态）"""
+        event = self._events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.status(job_id)
+
+
+# 全局实例
+ai_enrichment = AIEnrichmentManager(timeout=config.AI_ENRICH_TIMEOUT)
@@ -0,0 +1,193 @@
+"""
+筛选结果的 AI 增强
+GLM 服务在首次使用时才导入并初始化（glm_service 连带 requests、httpx），
+缓存中已有的 LLM 分析直接填入，其余交给后台任务，完成后回写筛选缓存
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from core.cache import memory_cache
+from core.config import config
+from core.disk_cache import screen_cache
+from core.trading_calendar import trading_calendar
+from services.ai_enrichment import (
+    AI_STATUS_DISABLED,
+    AI_STATUS_DONE,
+    ai_enrichment,
+    enrichment_job_id,
+)
+from services.analysis_engine import ANALYSIS_SOURCE_LLM
+
+_glm_lock = threading.Lock()
+_glm_loaded = False
+_glm_module = None  # 导入成功后的 glm_service 模块
+
+
+def _load_glm():
+    """导入 glm_service，并用 GLM_API_KEY 初始化（已由调用方初始化时跳过）"""
+    global _glm_module
+    try:
+        import glm_service
+    except ImportError as e:
+        print(f"⚠️ GLM AI 服务不可用: {e}")
+        return
+    _glm_module = glm_service
+    if glm_service.get_glm_service() is not None:
+        return
+    if not config.GLM_API_KEY:
+        print("⚠️ 未配置 GLM_API_KEY，AI 功能将禁用")
+        return
+    try:
+        glm_service.init_glm_service(config.GLM_API_KEY)
+        print("✅ GLM-4-Flash AI 智能分析已启用")
+    except Exception as e:
+        print(f"⚠️ GLM AI 服务初始化失败: {e}")
+
+
+def get_glm_service():
+    """GLM 服务实例（首次调用时加载；未启用时返回 None）"""
+    global _glm_loaded
+    if not _glm_loaded:
+        with _glm_lock:
+            if not _glm_loaded:
+                _load_glm()
+                _glm_loaded = True
+    if _glm_module is None or not _glm_module.is_glm_enabled():
+        return None
+    return _glm_module.get_glm_service()
+
+
+def is_glm_enabled() -> bool:
+    return get_glm_service() is not None
+
+
+async def close_glm_service():
+    """关闭 GLM 连接池（从未加载过时不做任何事）"""
+    if _glm_module is not None and _glm_module.get_glm_service() is not None:
+        await _glm_module.get_glm_service().client.aclose()
+
+
+def enhance_stock_with_ai(
+    stock: Dict[str, Any], strategy_type: str = "balanced"
+) -> Dict[str, Any]:
+    """
+    为股票添加 AI 智能分析
+
+    Args:
+        stock: 股票数据字典
+        strategy_type: 策略类型 (aggressive/conservative/balanced)
+
+    Returns:
+        增强后的股票数据（添加 ai_analysis 字段）
+    """
+    if not is_glm_enabled():
+        return stock
+
+    try:
+        glm = get_glm_service()
+        if not glm:
+            return stock
+
+        # 生成 AI 分析
+        ai_analysis = glm.analyze_stock(stock, strategy_type)
+
+        if ai_analysis:
+            stock["ai_analysis"] = ai_analysis
+            print(f"✅ AI 分析完成: {stock['name']}")
+        else:
+            print(f"⚠️ AI 分析失败: {stock['name']}")
+
+    except Exception as e:
+        print(f"⚠️ AI 分析异常 {stock.get('name', 'unknown')}: {e}")
+
+    return stock
+
+
+def start_ai_enrichment(
+    cache_key: str,
+    stocks: List[Dict[str, Any]],
+    strategy_type: str = "balanced",
+    preheat: bool = False,
+) -> Dict[str, Any]:
+    """
+    启动 AI 后台增强（须在事件循环中调用）
+    缓存中已有的 LLM 分析直接填入股票数据，其余交给后台任务，完成后回写筛选缓存；
+    在此之前股票保留规则引擎生成的分析文本
+
+    Args:
+        cache_key: 筛选缓存键
+        stocks: 入选股票列表
+        strategy_type: 策略类型 (aggressive/conservative/balanced)
+        preheat: 预热请求（AI 请求排在实时请求之后）
+
+    Returns:
+        {"ai_status": pending/done/disabled, "ai_job_id": 任务ID}
+    """
+    if not stocks or not is_glm_enabled() or not get_glm_service():
+        return {"ai_status": AI_STATUS_DISABLED, "ai_job_id": None}
+
+    from services.glm_client import PRIORITY_INTERACTIVE, PRIORITY_PREHEAT
+
+    glm = get_glm_service()
+    priority = PRIORITY_PREHEAT if preheat else PRIORITY_INTERACTIVE
+    analyses = glm.cached_analyses(stocks, strategy_type)
+    for stock in stocks:
+        if stock.get("code") in analyses:
+            stock["ai_analysis"] = analyses[stock["code"]]
+            stock["analysis_source"] = ANALYSIS_SOURCE_LLM
+    if all(stock.get("analysis_source") == ANALYSIS_SOURCE_LLM for stock in stocks):
+        return {"ai_status": AI_STATUS_DONE, "ai_job_id": None}
+
+    job_id = enrichment_job_id(cache_key, (stock.get("code", "") for stock in stocks))
+    snapshot = [dict(stock) for stock in stocks]
+
+    async def analyze() -> Dict[str, str]:
+        result = await glm.analyze_batch_async(snapshot, strategy_type, priority=priority)
+        return result["stocks"]
+
+    state = ai_enrichment.submit(
+        job_id,
+        analyze,
+        on_done=lambda done, status: apply_ai_analyses(cache_key, done, status, job_id),
+        initial=analyses,
+    )
+    return {"ai_status": state["status"], "ai_job_id": job_id}
+
+
+def apply_ai_analyses(
+    cache_key: str,
+    analyses: Dict[str, str],
+    status: str = AI_STATUS_DONE,
+    job_id: Optional[str] = None,
+):
+    """
+    把后台 AI 分析结果和任务状态回写到筛选缓存（内存层 + 磁盘层，保留原有缓存年龄）
+    任务失败时也回写，缓存条目不会在有效期内一直停留在 pending；
+    缓存已换成另一批入选股票（ai_job_id 不同）时不回写
+    """
+    entry = memory_cache.get("screen", cache_key) or screen_cache.get_entry(cache_key)
+    if entry is None:
+        return
+    cached, created_at = entry
+    if job_id is not None and cached.get("ai_job_id") not in (None, job_id):
+        return
+    data = [
+        dict(
+            stock,
+            ai_analysis=analyses[stock["code"]],
+            analysis_source=ANALYSIS_SOURCE_LLM,
+        )
+        if stock.get("code") in analyses
+        else stock
+        for stock in cached["data"]
+    ]
+    updated = dict(cached, data=data, ai_status=status)
+    screen_cache.set(cache_key, updated, created_at=created_at)
+    memory_cache.set(
+        "screen",
+        cache_key,
+        (updated, created_at),
+        ttl=trading_calendar.expires_at(created_at, config.SCREEN_CACHE_FRESH) - time.time(),
+    )
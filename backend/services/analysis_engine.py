@@ -0,0 +1,149 @@
+"""
+规则分析引擎
+基于 calculate_band_trading_score 的评分区间、买卖点和市场环境，用预置模板生成个股分析文本
+不调用任何外部服务，单只股票耗时为微秒级，作为默认分析和 LLM 不可用时的兜底
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+ANALYSIS_SOURCE_RULE = "rule"
+ANALYSIS_SOURCE_LLM = "llm"
+
+
+# 各评分区间对应的描述模板（区间划分与 calculate_band_trading_score 一致）
+_TREND_TEMPLATES = {
+    "deep_pullback": "回调{change:.1f}%进入低吸区间",
+    "pullback": "小幅回调{change:.1f}%，走势稳健",
+    "mild_up": "温和上涨{change:.1f}%，趋势向好",
+    "moderate_up": "上涨{change:.1f}%，短线偏强",
+    "high_up": "涨幅{change:.1f}%已偏高",
+    "chasing": "涨幅{change:.1f}%较大，追高需谨慎",
+    "overheated": "大涨{change:.1f}%，短线情绪过热",
+    "drop": "下跌{change:.1f}%，短线承压",
+    "plunge": "大跌{change:.1f}%，走势偏弱",
+}
+
+_VOLUME_TEMPLATES = {
+    "perfect": "量比{ratio:.1f}，量能温和放大",
+    "healthy": "量比{ratio:.1f}，成交活跃",
+    "moderate": "量比{ratio:.1f}，放量明显",
+    "high": "量比{ratio:.1f}偏大，警惕分歧",
+    "abnormal": "量比{ratio:.1f}异常放量",
+    "low": "量比{ratio:.1f}，量能不足",
+}
+
+_CAPITAL_PHRASES = {
+    "strong_in": "主力资金大幅流入",
+    "weak_in": "主力资金小幅流入",
+    "weak_out": "主力资金小幅流出",
+    "strong_out": "主力资金明显流出",
+}
+
+_MARGIN_PHRASES = {
+    "strong_in": "融资客加仓明显",
+    "in": "融资小幅净买入",
+    "out": "融资小幅净卖出",
+    "strong_out": "融资大幅流出",
+    "ineligible": "不支持融资融券",
+}
+
+_STRATEGY_FIT = {
+    "aggressive": {
+        "low": "评分{score:.0f}分，弹性足，适合激进型短线博弈",
+        "medium": "评分{score:.0f}分，有一定弹性，可小仓位参与",
+        "high": "评分{score:.0f}分，风险偏高，激进型也需控制仓位",
+    },
+    "conservative": {
+        "low": "评分{score:.0f}分，基本面稳健，符合保守型低吸思路",
+        "medium": "评分{score:.0f}分，稳健度一般，保守型宜轻仓",
+        "high": "评分{score:.0f}分，风险偏高，不适合保守型",
+    },
+    "balanced": {
+        "low": "评分{score:.0f}分，各项指标均衡，适合波段持有",
+        "medium": "评分{score:.0f}分，指标尚可，适合分批建仓",
+        "high": "评分{score:.0f}分，短板明显，以观察为主",
+    },
+}
+
+_MARKET_PHRASES = {
+    "strong_bull": "大盘强势，可适度积极",
+    "weak_bull": "大盘温和向上",
+    "sideways": "大盘震荡，宜快进快出",
+    "weak_bear": "大盘偏弱，注意控制仓位",
+    "strong_bear": "大盘走弱，谨慎参与",
+}
+
+_ACTION_TEMPLATE = "建议{buy_price}元附近分批买入，止损{stop_loss}元，目标{target_price}元"
+_ACTION_WAIT = "建议先观察，等待回踩确认后再考虑"
+
+
+def generate_analysis(
+    stock: Dict[str, Any],
+    bands: Dict[str, str],
+    strategy_type: str = "balanced",
+    market_env: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    生成单只股票的分析文本
+
+    Args:
+        stock: 股票数据（可含 score、risk_level、trade_points）
+        bands: calculate_band_trading_score 返回的评分区间
+        strategy_type: 策略类型 (aggressive/conservative/balanced)
+        market_env: analyze_market_environment 的结果（可选）
+
+    Returns:
+        分析文本：走势、量价资金、策略适配、操作建议
+    """
+    change = stock.get("change_percent", 0) or 0
+    ratio = stock.get("volume_ratio", 0) or 0
+
+    trend = _TREND_TEMPLATES.get(bands.get("change"), "走势平稳").format(change=change)
+    flow = [_VOLUME_TEMPLATES.get(bands.get("volume"), "量能平稳").format(ratio=ratio)]
+    for phrase in (
+        _CAPITAL_PHRASES.get(bands.get("capital")),
+        _MARGIN_PHRASES.get(bands.get("margin")),
+    ):
+        if phrase:
+            flow.append(phrase)
+
+    risk_level = stock.get("risk_level", "medium")
+    fit_templates = _STRATEGY_FIT.get(strategy_type, _STRATEGY_FIT["balanced"])
+    fit = fit_templates.get(risk_level, fit_templates["medium"]).format(
+        score=stock.get("score", 0) or 0
+    )
+
+    trade_points = stock.get("trade_points")
+    if trade_points and risk_level != "high" and bands.get("change") not in ("overheated", "plunge"):
+        action = _ACTION_TEMPLATE.format(**trade_points)
+    else:
+        action = _ACTION_WAIT
+
+    market = _MARKET_PHRASES.get((market_env or {}).get("status"))
+    if market:
+        action = f"{market}，{action}"
+
+    return f"{trend}，{'，'.join(flow)}。{fit}。{action}。"
+
+
+def analyze_candidates(
+    stocks: List[Dict[str, Any]],
+    strategy_type: str = "balanced",
+    market_env: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    为候选股票批量填充规则分析（写入 ai_analysis，已有 LLM 分析的保留）
+
+    Returns:
+        填充的股票数量
+    """
+    count = 0
+    for stock in stocks:
+        bands = stock.get("score_bands")
+        if bands is None or stock.get("analysis_source") == ANALYSIS_SOURCE_LLM:
+            continue
+        stock["ai_analysis"] = generate_analysis(stock, bands, strategy_type, market_env)
+        stock["analysis_source"] = ANALYSIS_SOURCE_RULE
+        count += 1
+    return count
@@ -0,0 +1,138 @@
+"""
+分批并发拉取 + 失败批次重试队列
+全市场行情按批次并发请求；失败的批次拆成更小的批次，按指数退避（带随机抖动）重新排队，
+与尚未完成的首轮批次并行执行，不会让整轮拉取等待最慢的批次。
+每轮拉取有重试预算和截止时间，结束后按成功覆盖的代码数计算完整度
+"""
+
+import heapq
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.metrics import metrics
+from core.tracing import propagate
+
+BATCH_RETRIES = metrics.counter("boduan_batch_retries_total", "失败批次拆分后重新排队的请求数")
+BATCH_MISSING = metrics.counter("boduan_batch_missing_codes_total", "重试预算或次数用尽后仍缺失的代码数")
+
+
+def split_batch(codes: List[str], size: int) -> List[List[str]]:
+    """按 size 切分批次"""
+    size = max(1, size)
+    return [codes[i : i + size] for i in range(0, len(codes), size)]
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random) -> float:
+    """第 attempt 次重试前的等待（指数退避，±50% 抖动，避免重试同时打到上游）"""
+    return min(cap, base * 2 ** (attempt - 1)) * rng.uniform(0.5, 1.5)
+
+
+def sweep_batches(
+    codes: List[str],
+    fetch: Callable[[List[str]], List[Any]],
+    batch_size: int = 100,
+    retry_batch_size: int = 25,
+    max_workers: int = 30,
+    retry_budget: int = 20,
+    max_attempts: int = 3,
+    backoff_base: float = 0.5,
+    backoff_max: float = 5.0,
+    deadline: float = 20.0,
+    rng: Optional[random.Random] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    分批并发拉取，失败批次进入重试队列
+
+    Args:
+        codes: 全部代码
+        fetch: 拉取一个批次，返回解析后的结果列表；失败时抛出异常
+        batch_size: 首轮批次大小
+        retry_batch_size: 重试时的批次大小（失败批次拆小，单个坏代码不拖累整批）
+        max_workers: 并发线程数
+        retry_budget: 本轮最多发起的重试请求数
+        max_attempts: 单个代码最多尝试次数（含首轮）
+        backoff_base / backoff_max: 退避基数与上限（秒）
+        deadline: 超过该时间（秒，自本轮开始）后不再安排重试
+        rng: 抖动使用的随机数生成器
+        on_progress: 首轮批次完成进度回调 (completed, total)
+
+    Returns:
+        (结果列表, 统计)；统计含 codes / fetched_codes / missing_codes / completeness /
+        batches / failed_batches / retries / retry_budget / elapsed
+    """
+    rng = rng or random.Random()
+    start = time.monotonic()
+    results: List[Any] = []
+    retry_queue: List[Tuple[float, int, List[str], int]] = []  # (ready_at, seq, codes, attempt)
+    pending: Dict[Future, Tuple[List[str], int]] = {}
+    stats = {
+        "codes": len(codes),
+        "fetched_codes": 0,
+        "missing_codes": 0,
+        "batches": 0,
+        "failed_batches": 0,
+        "retries": 0,
+        "retried_ok": 0,
+        "retry_budget": retry_budget,
+    }
+    initial = split_batch(codes, batch_size)
+    completed = 0
+    seq = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit(batch: List[str], attempt: int):
+            stats["batches"] += 1
+            pending[executor.submit(propagate(fetch), batch)] = (batch, attempt)
+
+        for batch in initial:
+            submit(batch, 1)
+
+        while pending or retry_queue:
+            now = time.monotonic()
+            while retry_queue and retry_queue[0][0] <= now:
+                _, _, batch, attempt = heapq.heappop(retry_queue)
+                submit(batch, attempt)
+            timeout = max(0.0, retry_queue[0][0] - now) if retry_queue else None
+            if not pending:
+                time.sleep(timeout)
+                continue
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, attempt = pending.pop(future)
+                if attempt == 1:
+                    completed += 1
+                    if on_progress is not None:
+                        on_progress(completed, len(initial))
+                try:
+                    results.extend(future.result())
+                    stats["fetched_codes"] += len(batch)
+                    if attempt > 1:
+                        stats["retried_ok"] += 1
+                    continue
+                except Exception:
+                    stats["failed_batches"] += 1
+
+                elapsed = time.monotonic() - start
+                if attempt >= max_attempts or elapsed >= deadline:
+                    stats["missing_codes"] += len(batch)
+                    BATCH_MISSING.inc(len(batch))
+                    continue
+                for part in split_batch(batch, retry_batch_size):
+                    if stats["retries"] >= retry_budget:
+                        stats["missing_codes"] += len(part)
+                        BATCH_MISSING.inc(len(part))
+                        continue
+                    stats["retries"] += 1
+                    BATCH_RETRIES.inc()
+                    seq += 1
+                    delay = backoff_delay(attempt, backoff_base, backoff_max, rng)
+                    heapq.heappush(retry_queue, (time.monotonic() + delay, seq, part, attempt + 1))
+
+    stats["completeness"] = round(stats["fetched_codes"] / len(codes), 4) if codes else 1.0
+    stats["elapsed"] = round(time.monotonic() - start, 3)
+    return results, stats
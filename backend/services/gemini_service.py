@@ -1,47 +1,169 @@
-from typing import Optional, Dict, Any
+import asyncio
+import hashlib
+import json
+from typing import Optional, Dict, Any, List
+
+import httpx
 import requests
 
-from backend.models.gemini_2_0_flash import GeminiFlashRequest, GeminiFlashResponse
+try:
+    from backend.models.gemini_2_0_flash import GeminiFlashRequest, GeminiFlashResponse
+except ImportError:  # 从 backend 目录启动时
+    from models.gemini_2_0_flash import GeminiFlashRequest, GeminiFlashResponse
+
+from core.cache import MemoryCache
 
 
 class GeminiService:
     def __init__(
-        self, endpoint: str, api_key: str, model_name: str = "gemini-2.0-flash"
+        self,
+        endpoint: str,
+        api_key: str,
+        model_name: str = "gemini-2.0-flash",
+        max_concurrency: int = 8,
+        cache_ttl: float = 3600,
+        cache_max_entries: int = 5000,
     ):
         self.endpoint = endpoint.rstrip("/")
         self.api_key = api_key
         self.model_name = model_name or "gemini-2.0-flash"
+        self.max_concurrency = max(1, max_concurrency)
+        # 成功的结果按内容哈希缓存
+        self._cache = MemoryCache(max_entries=cache_max_entries, default_ttl=cache_ttl)
+        # 异步连接池、并发信号量、进行中的请求（绑定到创建它们的事件循环）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
 
-    def analyze(
-        self, text: str, extra: Optional[Dict[str, Any]] = None
-    ) -> GeminiFlashResponse:
+    def _payload(self, text: str, extra: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         payload: Dict[str, Any] = {
             "text": text,
             "model": self.model_name,
         }
         if extra:
             payload.update(extra)
+        return payload
 
+    def _headers(self) -> Dict[str, str]:
         headers = {}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def cache_key(self, text: str, extra: Optional[Dict[str, Any]] = None) -> str:
+        """按请求内容（模型 + 文本 + 附加参数）计算哈希"""
+        content = json.dumps(self._payload(text, extra), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _to_response(content_type: str, data: Any) -> GeminiFlashResponse:
+        if not content_type.lower().startswith("application/json"):
+            data = {}
+        score = float(data.get("score", 0.0)) if isinstance(data, dict) else 0.0
+        details = data.get("details") if isinstance(data, dict) else None
+        return GeminiFlashResponse(success=True, score=score, details=details)
+
+    def analyze(
+        self, text: str, extra: Optional[Dict[str, Any]] = None
+    ) -> GeminiFlashResponse:
+        key = self.cache_key(text, extra)
+        cached = self._cache.get("gemini", key)
+        if cached is not None:
+            return cached
 
         try:
             resp = requests.post(
-                self.endpoint, json=payload, headers=headers, timeout=10
+                self.endpoint,
+                json=self._payload(text, extra),
+                headers=self._headers(),
+                timeout=10,
             )
             resp.raise_for_status()
-            data = (
-                resp.json()
-                if resp.headers.get("Content-Type", "")
-                .lower()
-                .startswith("application/json")
-                else {}
-            )
-            score = float(data.get("score", 0.0)) if isinstance(data, dict) else 0.0
-            details = data.get("details") if isinstance(data, dict) else None
-            return GeminiFlashResponse(success=True, score=score, details=details)
+            content_type = resp.headers.get("Content-Type", "")
+            data = resp.json() if content_type.lower().startswith("application/json") else {}
+            result = self._to_response(content_type, data)
+            self._cache.set("gemini", key, result)
+            return result
         except Exception as e:
             return GeminiFlashResponse(
                 success=False, score=0.0, details={"error": str(e)}
             )
+
+    # ---------- 异步接口 ----------
+
+    def _ensure_async(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._client = httpx.AsyncClient(
+            headers=self._headers(),
+            timeout=10,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._inflight = {}
+
+    async def _post(self, text: str, extra: Optional[Dict[str, Any]]) -> GeminiFlashResponse:
+        async with self._semaphore:
+            try:
+                resp = await self._client.post(self.endpoint, json=self._payload(text, extra))
+                resp.raise_for_status()
+                content_type = resp.headers.get("Content-Type", "")
+                data = resp.json() if content_type.lower().startswith("application/json") else {}
+                return self._to_response(content_type, data)
+            except Exception as e:
+                return GeminiFlashResponse(
+                    success=False, score=0.0, details={"error": str(e)}
+                )
+
+    async def analyze_async(
+        self, text: str, extra: Optional[Dict[str, Any]] = None
+    ) -> GeminiFlashResponse:
+        """
+        异步分析单条文本
+        命中缓存直接返回；相同内容的请求正在进行时复用同一个结果
+        """
+        self._ensure_async()
+        key = self.cache_key(text, extra)
+        cached = self._cache.get("gemini", key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._post(text, extra))
+            self._inflight[key] = future
+
+            def done(f, key=key):
+                self._inflight.pop(key, None)
+                if not f.cancelled() and f.exception() is None and f.result().success:
+                    self._cache.set("gemini", key, f.result())
+
+            future.add_done_callback(done)
+        # shield：单个调用方取消不影响共享同一请求的其他调用方
+        return await asyncio.shield(future)
+
+    async def analyze_many(
+        self, texts: List[str], extra: Optional[Dict[str, Any]] = None
+    ) -> List[GeminiFlashResponse]:
+        """
+        并发分析多条文本（连接池复用，并发数受 max_concurrency 限制）
+        返回结果与输入顺序一致
+        """
+        return list(await asyncio.gather(*(self.analyze_async(t, extra) for t in texts)))
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        return self._cache.stats()["namespaces"].get("gemini", {})
+
+    async def aclose(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
@@ -0,0 +1,221 @@
+"""
+GLM 异步客户端
+连接池复用的 httpx.AsyncClient + 令牌桶限速 + 优先级队列
+限速只在锁内计算等待时间，等待本身在锁外进行，不会阻塞其他线程/协程；
+可与同步接口共用一把请求锁，同步/异步请求合计同一时刻只有 concurrency 个在途
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from core import tracing
+from core.metrics import record_upstream_error, track_upstream
+
+
+# 请求优先级（数值越小越先执行）
+PRIORITY_INTERACTIVE = 0  # 用户实时请求
+PRIORITY_PREHEAT = 10  # 缓存预热等后台任务
+
+# 等待同步接口释放请求锁的轮询间隔（秒）
+_LOCK_POLL_INTERVAL = 0.02
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（线程安全，GCRA 实现）
+    reserve() 只在锁内预约下一个令牌并返回需要等待的秒数，调用方在锁外等待
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        :param rate: 每秒补充的令牌数
+        :param capacity: 桶容量（允许的突发请求数）
+        """
+        self.interval = 1.0 / rate
+        self.capacity = max(1, capacity)
+        self._tolerance = (self.capacity - 1) * self.interval
+        self._tat = 0.0  # 理论到达时间
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            wait = max(0.0, tat - self._tolerance - now)
+            self._tat = tat + self.interval
+            return wait
+
+    async def acquire(self):
+        """异步获取令牌"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class _Job:
+    __slots__ = ("payload", "timeout", "future", "span", "queued_at")
+
+    def __init__(self, payload: Dict[str, Any], timeout: float, future: asyncio.Future):
+        self.payload = payload
+        self.timeout = timeout
+        self.future = future
+        # 调用方的追踪上下文（工作协程中显式挂到该 span 下）
+        self.span = tracing.current_span()
+        self.queued_at = time.perf_counter()
+
+
+class AsyncGLMClient:
+    """GLM 异步客户端（按事件循环懒初始化连接池、队列和工作协程）"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        model: str,
+        limiter: TokenBucket,
+        concurrency: int = 1,
+        request_lock: Optional[threading.Lock] = None,
+    ):
+        """
+        :param limiter: 令牌桶（可与同步接口共用）
+        :param concurrency: 工作协程数（同时在途的异步请求数）
+        :param request_lock: 与同步接口共用的请求锁，持有期间才发出 HTTP 请求
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.limiter = limiter
+        self.concurrency = max(1, concurrency)
+        self.request_lock = request_lock
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._workers = []
+        self._seq = itertools.count()
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # 事件循环变化（如测试或重启）时重建，旧连接池随旧循环丢弃
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._http = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 200,
+        temperature: float = 0.7,
+        timeout: float = 15,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Optional[str]:
+        """
+        提交一次对话补全请求并等待结果
+        调用方被取消（如客户端断开）时，排队中的请求直接丢弃，进行中的请求随之取消
+
+        Returns:
+            AI 生成的文本，失败返回 None
+        """
+        self._ensure_started()
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        future = self._loop.create_future()
+        await self._queue.put((priority, next(self._seq), _Job(payload, timeout, future)))
+        return await future
+
+    def pending(self) -> int:
+        """排队中的请求数"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self):
+        # 工作协程由首个调用方创建，不应继承其追踪上下文
+        tracing.detach()
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                if job.future.done():
+                    continue
+                await self.limiter.acquire()
+                if job.future.done():
+                    continue
+                tracing.record_span("glm.queue", job.queued_at, parent=job.span)
+                request = asyncio.ensure_future(self._send(job))
+                job.future.add_done_callback(
+                    lambda f, task=request: task.cancel() if f.cancelled() else None
+                )
+                try:
+                    result = await request
+                except asyncio.CancelledError:
+                    # 调用方取消只丢弃本次请求，工作协程自身被取消时继续向上抛出
+                    if not job.future.cancelled():
+                        raise
+                    continue
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ GLM 异步调用失败: {e}")
+                if not job.future.done():
+                    job.future.set_result(None)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, job: _Job) -> Optional[str]:
+        """持有共用请求锁发送（同步接口持锁时轮询等待，不阻塞事件循环；取消时不会遗留锁）"""
+        lock = self.request_lock
+        if lock is None:
+            return await self._post(job)
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(_LOCK_POLL_INTERVAL)
+        try:
+            return await self._post(job)
+        finally:
+            lock.release()
+
+    async def _post(self, job: _Job) -> Optional[str]:
+        try:
+            with track_upstream("glm", parent=job.span):
+                response = await self._http.post(
+                    self.base_url, json=job.payload, timeout=job.timeout
+                )
+        except httpx.TimeoutException:
+            print(f"⚠️ GLM API 调用超时")
+            return None
+        if response.status_code == 200:
+            content = response.json()["choices"][0]["message"]["content"]
+            return content.strip()
+        record_upstream_error("glm")
+        print(f"⚠️ GLM API 错误: {response.status_code} - {response.text}")
+        return None
+
+    async def aclose(self):
+        """关闭工作协程和连接池"""
+        for task in self._workers:
+            task.cancel()
+        self._workers = []
+        if self._http is not None:
+            await self._http.aclose()
+        self._loop = None
+
@@ -0,0 +1,779 @@
+"""
+全市场行情快照与个股数据
+- 行情快照：腾讯API分批拉取 / AKShare，按数据源健康状况选源，预热层（内存 + 磁盘）与多进程共享快照
+- 个股数据：融资融券、资金流向、K线（AKShare 优先，失败时使用基于代码特征的模拟数据）
+- 市场环境分析
+AKShare 连带 pandas 导入约需 1 秒，推迟到首次请求真实数据时（get_akshare_adapter），
+API 进程启动和 scheduler.py 等命令行工具不再为此付出代价
+"""
+
+import asyncio
+import importlib.util
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.cache import memory_cache
+from core.config import config
+from core.memory import register_memory_source
+from core.metrics import SNAPSHOT_COMPLETENESS, metrics, track_stage, track_upstream
+from core.shared_snapshot import shared_snapshots
+from core.source_health import source_monitor
+from core.tracing import span
+from core.trading_calendar import trading_calendar
+from core.warm_start import load_value, persist_value, restore_namespaces
+from services.batch_sweep import sweep_batches
+
+# 是否使用 AKShare 真实数据（只检查是否已安装，导入推迟到首次使用）
+if not config.AKSHARE_ENABLED:
+    USE_REAL_DATA = False
+    print("⚠️ AKSHARE_ENABLED=false，将使用模拟数据")
+elif importlib.util.find_spec("akshare") is None:
+    USE_REAL_DATA = False
+    print("⚠️ 未安装 AKShare，将使用模拟数据")
+else:
+    USE_REAL_DATA = True
+
+# 禁用代理
+os.environ["NO_PROXY"] = "*"
+os.environ["no_proxy"] = "*"
+for key in ["HTTP_PROXY", "HTTPS_PROXY", "http_proxy", "https_proxy"]:
+    if key in os.environ:
+        del os.environ[key]
+
+memory_cache.configure_namespace("stock_data", ttl=config.CACHE_TTL_STOCK)  # 缓存60秒
+memory_cache.configure_namespace("market_env", ttl=config.CACHE_TTL_MARKET)  # 缓存5分钟
+if shared_snapshots is not None:
+    register_memory_source("shared_snapshots", shared_snapshots.stats)
+
+# ==================== 指标 ====================
+SNAPSHOT_AGE = metrics.gauge(
+    "boduan_snapshot_age_seconds", "行情快照年龄（秒）", ["tier"]
+)
+SNAPSHOT_STOCKS = metrics.gauge(
+    "boduan_snapshot_stocks", "行情快照股票数量", ["tier"]
+)
+
+
+def collect_snapshot_metrics():
+    """同步行情快照（live: 当前缓存，warm: 预热层）的年龄和大小"""
+    SNAPSHOT_AGE.clear()
+    SNAPSHOT_STOCKS.clear()
+    now = time.time()
+    for tier, namespace in (("live", "stock_data"), ("warm", "stock_data.warm")):
+        for key, stocks, created_at, _ in memory_cache.entries(namespace):
+            if key == "all":
+                SNAPSHOT_AGE.set(now - created_at, tier=tier)
+                SNAPSHOT_STOCKS.set(len(stocks), tier=tier)
+
+
+metrics.register_collector(collect_snapshot_metrics)
+
+
+def get_akshare_adapter():
+    """AKShare 数据适配器（首次调用时才导入 data_adapter，连带 akshare、pandas）"""
+    from data_adapter import akshare_adapter
+
+    return akshare_adapter
+
+
+def fetch_qq_stock_data(
+    codes: List[str], timeout: int = 20, max_retries: int = 3
+) -> str:
+    """使用requests调用腾讯股票API（带重试机制）"""
+    import requests
+
+    formatted_codes = ",".join(codes)
+    url = f"{config.TENCENT_QUOTE_URL}{formatted_codes}"
+
+    for attempt in range(max_retries):
+        try:
+            with track_upstream("tencent"):
+                response = requests.get(url, timeout=timeout)
+                response.raise_for_status()
+
+            # 尝试不同的编码
+            for enc in ["gbk", "gb2312", "utf-8", "latin-1"]:
+                try:
+                    return response.content.decode(enc)
+                except (UnicodeDecodeError, LookupError):
+                    continue
+
+            return response.content.decode("latin-1")
+
+        except requests.exceptions.Timeout:
+            if attempt < max_retries - 1:
+                print(f"⚠️ 请求超时，正在重试 ({attempt + 1}/{max_retries})...")
+                time.sleep(0.5 * (attempt + 1))
+                continue
+            raise Exception("请求超时（已重试多次）")
+        except requests.exceptions.RequestException as e:
+            if attempt < max_retries - 1:
+                print(f"⚠️ 请求异常: {e}，正在重试 ({attempt + 1}/{max_retries})...")
+                time.sleep(0.5 * (attempt + 1))
+                continue
+            raise Exception(f"请求失败: {str(e)}")
+
+    raise Exception("请求失败（已达到最大重试次数）")
+
+
+def parse_qq_stock_line(line: str) -> Dict[str, Any]:
+    """解析腾讯股票数据行"""
+    match = re.match(r'v_(\w+)="(.*)";?', line.strip())
+    if not match:
+        return None
+
+    data = match.group(2)
+    if not data:
+        return None
+
+    parts = data.split("~")
+    if len(parts) < 50:
+        return None
+
+    try:
+        price = float(parts[3]) if parts[3] and parts[3] != "" else 0
+        if price <= 0:
+            return None
+
+        return {
+            "code": parts[2],
+            "name": parts[1],
+            "price": price,
+            "pre_close": float(parts[4]) if parts[4] else 0,
+            "open": float(parts[5]) if parts[5] else 0,
+            "volume": float(parts[6]) if parts[6] else 0,
+            "change": float(parts[31]) if len(parts) > 31 and parts[31] else 0,
+            "change_percent": float(parts[32]) if len(parts) > 32 and parts[32] else 0,
+            "high": float(parts[33]) if len(parts) > 33 and parts[33] else 0,
+            "low": float(parts[34]) if len(parts) > 34 and parts[34] else 0,
+            "amount": float(parts[37]) if len(parts) > 37 and parts[37] else 0,
+            "turnover": float(parts[38]) if len(parts) > 38 and parts[38] else 0,
+            "pe_ratio": float(parts[39]) if len(parts) > 39 and parts[39] else 0,
+            "market_cap": float(parts[45]) if len(parts) > 45 and parts[45] else 0,
+            "total_value": float(parts[46]) if len(parts) > 46 and parts[46] else 0,
+            "volume_ratio": float(parts[49]) if len(parts) > 49 and parts[49] else 1.0,
+        }
+    except (ValueError, IndexError):
+        return None
+
+
+def generate_stock_codes() -> List[str]:
+    """生成A股代码列表"""
+    codes = []
+
+    # 沪市主板: 600xxx, 601xxx, 603xxx, 605xxx
+    for prefix in ["600", "601", "603", "605"]:
+        for i in range(1000):
+            codes.append(f"sh{prefix}{i:03d}")
+
+    # 深市主板: 000xxx, 001xxx, 002xxx, 003xxx
+    for prefix in ["000", "001", "002", "003"]:
+        for i in range(1000):
+            codes.append(f"sz{prefix}{i:03d}")
+
+    # 创业板: 300xxx, 301xxx
+    for prefix in ["300", "301"]:
+        for i in range(1000):
+            codes.append(f"sz{prefix}{i:03d}")
+
+    return codes
+
+
+def get_all_stocks_data(use_cache: bool = True, allow_stale: bool = True) -> List[Dict[str, Any]]:
+    """
+    获取所有A股实时数据（优化版：支持真实数据）
+    交易时段缓存 CACHE_TTL_STOCK 秒；休市期间（午休、收盘后、非交易日）行情落定后拉取的快照
+    一直缓存到下一次开盘；多进程共享快照的只读进程每 SHARED_SNAPSHOT_POLL 秒检查一次新版本
+    :param allow_stale: 缓存过期时是否先返回不超过 STOCK_DATA_MAX_STALE 秒的预热快照（后台刷新）；
+        定时筛选、收益跟踪等需要最新行情的调用方传 False，等待重新拉取
+    """
+    ttl = trading_calendar.cache_ttl(config.CACHE_TTL_STOCK)
+    if shared_snapshots is not None and not shared_snapshots.is_leader():
+        ttl = min(ttl, config.SHARED_SNAPSHOT_POLL)
+    if not use_cache:
+        all_stocks = _refresh_stock_data()
+        memory_cache.set("stock_data", "all", all_stocks, ttl=ttl)
+        return all_stocks
+
+    # 检查缓存
+    cache_age = memory_cache.age("stock_data", "all")
+    if cache_age is not None:
+        print(f"📦 使用缓存数据（缓存时间：{cache_age:.1f}秒）")
+    elif allow_stale:
+        # 缓存过期但有足够新的预热快照：先返回快照，后台刷新
+        warm = _recent_warm_snapshot()
+        if warm is not None:
+            print("♨️ 使用预热快照，后台刷新中...")
+            _refresh_stock_data_in_background()
+            return warm
+
+    # 缓存失效时并发请求只触发一次全市场刷新
+    return memory_cache.get_or_load("stock_data", "all", _refresh_stock_data, ttl=ttl)
+
+
+def _recent_warm_snapshot() -> Optional[List[Dict[str, Any]]]:
+    """预热快照不超过 STOCK_DATA_MAX_STALE 秒（或为休市期间落定后的快照）时返回，否则 None"""
+    age = memory_cache.age("stock_data.warm", "all")
+    if age is None:
+        return None
+    now = time.time()
+    if trading_calendar.expires_at(now - age, config.STOCK_DATA_MAX_STALE) <= now:
+        return None
+    return memory_cache.get("stock_data.warm", "all")
+
+
+def _refresh_stock_data() -> List[Dict[str, Any]]:
+    """
+    拉取全市场行情，并写入预热层（内存 + 磁盘）
+    多进程部署时只有拉取进程请求上游并发布共享快照，其余进程挂载快照（快照过期时才自行拉取）
+    """
+    if shared_snapshots is not None and not shared_snapshots.is_leader():
+        shared = _attach_shared_stock_data()
+        if shared is not None:
+            return shared
+    started = time.time()
+    all_stocks = _fetch_all_stocks_data()
+    _remember_snapshot_time(all_stocks, started)
+    if all_stocks:
+        memory_cache.set(
+            "stock_data.warm",
+            "all",
+            all_stocks,
+            ttl=trading_calendar.cache_ttl(config.WARM_CACHE_MAX_AGE),
+        )
+        persist_value("stock_data", all_stocks)
+        if shared_snapshots is not None and shared_snapshots.is_leader():
+            version = shared_snapshots.publish_records("stock_data", all_stocks, created_at=started)
+            print(f"📤 共享快照已发布：版本 {version}，{len(all_stocks)}只股票")
+    return all_stocks
+
+
+def _attach_shared_stock_data() -> Optional[List[Dict[str, Any]]]:
+    """挂载拉取进程发布的行情快照，解码为本进程的行记录（不存在或已过期时返回 None）"""
+    snapshot = shared_snapshots.attach("stock_data")
+    if snapshot is None:
+        return None
+    max_age = config.CACHE_TTL_STOCK + config.SHARED_SNAPSHOT_GRACE
+    now = time.time()
+    window = trading_calendar.frozen_window(now)
+    if trading_calendar.expires_at(snapshot.created_at, max_age) <= now or (
+        window is not None and snapshot.created_at < window[0]
+    ):
+        # 休市落定后，落定前拉取的快照（如收盘前一刻）也视为过期
+        print(f"⚠️ 共享快照已过期（{snapshot.age():.0f}秒前），本进程自行拉取")
+        return None
+    records = snapshot.records()
+    _remember_snapshot_time(records, snapshot.created_at)
+    return records
+
+
+# 最近几份行情快照（列表对象）的拉取时间：写入日线时据此判断快照是否为收盘落定后的行情
+_snapshot_times: "OrderedDict[int, Tuple[List[Dict[str, Any]], float]]" = OrderedDict()
+_snapshot_times_lock = threading.Lock()
+_SNAPSHOT_TIMES_KEEP = 4
+
+
+def _remember_snapshot_time(stocks: List[Dict[str, Any]], created_at: float):
+    with _snapshot_times_lock:
+        _snapshot_times[id(stocks)] = (stocks, created_at)
+        _snapshot_times.move_to_end(id(stocks))
+        while len(_snapshot_times) > _SNAPSHOT_TIMES_KEEP:
+            _snapshot_times.popitem(last=False)
+
+
+def snapshot_time(stocks: List[Dict[str, Any]]) -> Optional[float]:
+    """get_all_stocks_data 返回的快照开始拉取的时间戳（不是最近几份快照之一时返回 None）"""
+    with _snapshot_times_lock:
+        entry = _snapshot_times.get(id(stocks))
+    return entry[1] if entry is not None and entry[0] is stocks else None
+
+
+async def refresh_shared_snapshot():
+    """多进程部署：拉取进程在快照过期时主动刷新并发布（请求落在其他进程时快照也保持新鲜）"""
+    loop = asyncio.get_running_loop()
+    while True:
+        if shared_snapshots.is_leader() and memory_cache.age("stock_data", "all") is None:
+            try:
+                await loop.run_in_executor(None, get_all_stocks_data)
+            except Exception as e:
+                print(f"⚠️ 刷新共享快照失败: {e}")
+        await asyncio.sleep(config.SHARED_SNAPSHOT_POLL)
+
+
+_background_refresh_lock = threading.Lock()
+
+
+def _refresh_stock_data_in_background():
+    """后台刷新行情（同一时间只有一个刷新线程）"""
+    if not _background_refresh_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            memory_cache.get_or_load(
+                "stock_data",
+                "all",
+                _refresh_stock_data,
+                ttl=trading_calendar.cache_ttl(config.CACHE_TTL_STOCK),
+            )
+        except Exception as e:
+            print(f"⚠️ 后台刷新行情失败: {e}")
+        finally:
+            _background_refresh_lock.release()
+
+    threading.Thread(target=run, name="stock-data-refresh", daemon=True).start()
+
+
+def restore_warm_cache(tables_in_background: bool = False):
+    """
+    从磁盘恢复上次的行情快照和 AKShare 数据表（重启后首个请求直接使用）
+    快照是本次休市期间行情落定后拉取的（如收盘后），直接作为当前行情使用到下一次开盘
+    :param tables_in_background: 数据表（含 DataFrame，反序列化需导入 pandas）在后台线程中恢复，
+        API 启动只同步恢复行情快照
+    """
+    start_time = time.time()
+    if tables_in_background:
+        threading.Thread(target=_restore_warm_tables, name="warm-restore", daemon=True).start()
+        restored = None
+    else:
+        restored = restore_namespaces()
+    entry = load_value("stock_data")
+    if entry is not None:
+        stocks, created_at = entry
+        _remember_snapshot_time(stocks, created_at)
+        age = time.time() - created_at
+        memory_cache.set(
+            "stock_data.warm",
+            "all",
+            stocks,
+            ttl=trading_calendar.expires_at(created_at, config.WARM_CACHE_MAX_AGE) - time.time(),
+            created_at=created_at,
+        )
+        remaining = trading_calendar.expires_at(created_at, config.CACHE_TTL_STOCK) - time.time()
+        if remaining > 0:
+            memory_cache.set("stock_data", "all", stocks, ttl=remaining, created_at=created_at)
+            print(f"🌙 休市中，收盘快照有效至下一次开盘（{remaining / 3600:.1f}小时）")
+        tables = "数据表后台恢复中" if restored is None else f"数据表{restored}条"
+        print(
+            f"♨️ 预热快照已恢复：{len(stocks)}只股票（{age / 60:.1f}分钟前），"
+            f"{tables}，耗时{(time.time() - start_time) * 1000:.0f}ms"
+        )
+    elif restored:
+        print(f"♨️ 预热数据表已恢复：{restored}条")
+
+
+def _restore_warm_tables():
+    start_time = time.time()
+    restored = restore_namespaces()
+    if restored:
+        print(f"♨️ 预热数据表已恢复：{restored}条，耗时{(time.time() - start_time) * 1000:.0f}ms")
+
+
+def load_trade_calendar():
+    """加载交易所交易日历（失败时按周末 + TRADING_HOLIDAYS 判断交易日）"""
+    try:
+        count = trading_calendar.load_trade_dates(get_akshare_adapter().get_trade_dates())
+        print(f"📅 交易日历已加载：{count}个交易日")
+    except Exception as e:
+        print(f"⚠️ 交易日历加载失败，按周末和 TRADING_HOLIDAYS 判断: {e}")
+
+
+def load_trade_calendar_in_background():
+    threading.Thread(target=load_trade_calendar, name="trade-calendar", daemon=True).start()
+
+
+def _fetch_from_akshare() -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """AKShare 全市场实时行情（空数据视为失败），返回 (行情, None)"""
+    start_time = time.time()
+    print("📡 使用AKShare获取真实数据...")
+    df = get_akshare_adapter().get_realtime_quotes()
+    if df.empty:
+        raise Exception("AKShare返回空数据")
+
+    with track_stage("parse"):
+        all_stocks = df.to_dict("records")
+    elapsed = time.time() - start_time
+    print(f"✅ 数据获取完成：{len(all_stocks)}只股票，耗时{elapsed:.1f}秒（真实数据）")
+    return all_stocks, None
+
+
+def _fetch_from_tencent() -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    腾讯API分批并发拉取全市场行情
+    失败批次拆小后进入重试队列（抖动退避，每轮有重试预算），不阻塞其他批次；
+    全部批次失败视为失败，返回 (行情, 分批拉取报告)，部分缺失时报告中的完整度低于 1
+    """
+    start_time = time.time()
+    all_codes = generate_stock_codes()
+
+    def fetch_batch(batch_codes):
+        with span("tencent.batch", codes=len(batch_codes), first=batch_codes[0]):
+            # 单次请求不在批内重试：失败交给重试队列，批次拆小后再排队
+            data = fetch_qq_stock_data(batch_codes, timeout=20, max_retries=1)
+            results = []
+            with track_stage("parse"):
+                for line in data.strip().split("\n"):
+                    if line:
+                        stock = parse_qq_stock_line(line)
+                        if stock:
+                            results.append(stock)
+            return results
+
+    def on_progress(completed, total):
+        if completed % 10 == 0:
+            print(f"⏳ 进度：{completed}/{total} ({completed * 100 // total}%)")
+
+    all_stocks, report = sweep_batches(
+        all_codes,
+        fetch_batch,
+        batch_size=config.TENCENT_BATCH_SIZE,
+        retry_batch_size=config.TENCENT_RETRY_BATCH_SIZE,
+        max_workers=30,
+        retry_budget=config.TENCENT_RETRY_BUDGET,
+        max_attempts=config.TENCENT_RETRY_ATTEMPTS,
+        deadline=config.TENCENT_RETRY_DEADLINE,
+        on_progress=on_progress,
+    )
+
+    if not all_stocks:
+        raise Exception("腾讯API未返回任何数据")
+    elapsed = time.time() - start_time
+    print(f"✅ 数据获取完成：{len(all_stocks)}只股票，耗时{elapsed:.1f}秒（腾讯API）")
+    if report["retries"]:
+        print(
+            f"🔁 重试批次 {report['retries']}/{report['retry_budget']}，"
+            f"成功 {report['retried_ok']}，完整度 {report['completeness']:.1%}"
+        )
+    if report["completeness"] < 0.98:
+        print(f"⚠️ 行情快照不完整：缺失 {report['missing_codes']} 个代码")
+
+    return all_stocks, report
+
+
+# 最近一次全市场行情快照的来源与完整度（/api/health/sources 查看）
+_snapshot_meta: Dict[str, Any] = {}
+
+
+def _record_snapshot(source: str, completeness: float, sweep: Optional[Dict[str, Any]] = None):
+    _snapshot_meta.clear()
+    _snapshot_meta.update(
+        source=source, completeness=completeness, sweep=sweep, fetched_at=time.time()
+    )
+    SNAPSHOT_COMPLETENESS.set(completeness, source=source)
+
+
+def _fetch_all_stocks_data() -> List[Dict[str, Any]]:
+    """
+    从数据源拉取全市场行情
+    由 source_monitor 按健康状况选源（默认 AKShare 优先），首选源过慢时对冲请求腾讯API，
+    连续失败的数据源熔断（/api/health/sources 查看）；
+    只记录实际采用的数据源的完整度（对冲落败的源即使稍后完成也不覆盖）
+    """
+    print("🔄 获取最新股票数据...")
+    fetchers = {}
+    if USE_REAL_DATA:
+        fetchers["akshare"] = _fetch_from_akshare
+    fetchers["tencent"] = _fetch_from_tencent
+    (all_stocks, sweep), source = source_monitor.fetch(fetchers)
+    _record_snapshot(source, sweep["completeness"] if sweep else 1.0, sweep)
+    return all_stocks
+
+
+def get_margin_trading_info(code: str) -> Dict[str, Any]:
+    """获取融资融券信息（优化版：优先使用真实数据）"""
+
+    # 如果启用了真实数据，尝试使用AKShare
+    if USE_REAL_DATA:
+        try:
+            result = get_akshare_adapter().get_margin_trading(code)
+            if result.get("has_data", False):
+                return result
+        except Exception as e:
+            print(f"⚠️ AKShare获取融资融券失败 {code}: {e}")
+
+    # 降级方案：使用智能模拟数据
+    try:
+        # 移除市场前缀
+        clean_code = code.replace("sh", "").replace("sz", "")
+
+        # 使用代码的多个特征生成更稳定的模拟数据
+        code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
+        code_prefix = int(clean_code[:3]) if clean_code[:3].isdigit() else 600
+
+        # 基于代码特征判断是否支持融资融券（约70%的股票支持）
+        is_eligible = (code_num % 10 != 0) and (code_num % 10 != 9)
+
+        if not is_eligible:
+            return {
+                "is_margin_eligible": False,
+                "margin_balance": 0,
+                "short_balance": 0,
+                "margin_ratio": 0,
+                "net_flow": 0,
+                "margin_score": 0,
+                "has_data": False,
+            }
+
+        # 生成更合理的融资融券数据（基于代码特征）
+        seed = code_num + code_prefix
+        margin_balance = round((seed % 60 + 8) / 10, 2)  # 0.8-6.8亿
+        short_balance = round((seed % 120 + 3), 1)  # 3-123万股
+        margin_ratio = round((seed % 25 + 3), 1)  # 3-28%
+        net_flow = round((seed % 240 - 120) / 1200, 3)  # -0.1到0.1亿
+
+        # 优化评分算法
+        margin_score = 55  # 基础分提高
+
+        # 融资余额评分（权重30%）
+        if margin_balance >= 4:
+            margin_score += 25
+        elif margin_balance >= 2:
+            margin_score += 15
+        elif margin_balance >= 1:
+            margin_score += 8
+
+        # 净流入评分（权重40%）
+        if net_flow > 0.06:
+            margin_score += 20
+        elif net_flow > 0.02:
+            margin_score += 10
+        elif net_flow > 0:
+            margin_score += 3
+        elif net_flow < -0.06:
+            margin_score -= 20
+        elif net_flow < -0.02:
+            margin_score -= 10
+
+        # 融资占比评分（权重30%）
+        if margin_ratio >= 18:
+            margin_score += 15
+        elif margin_ratio >= 12:
+            margin_score += 8
+        elif margin_ratio >= 8:
+            margin_score += 3
+
+        margin_score = max(0, min(100, margin_score))
+
+        return {
+            "is_margin_eligible": True,
+            "margin_balance": margin_balance,
+            "short_balance": short_balance,
+            "margin_ratio": margin_ratio,
+            "net_flow": net_flow,
+            "margin_score": margin_score,
+            "has_data": False,  # 标记为模拟数据
+        }
+
+    except Exception as e:
+        print(f"获取融资融券数据失败 {code}: {e}")
+        return {
+            "is_margin_eligible": False,
+            "margin_balance": 0,
+            "short_balance": 0,
+            "margin_ratio": 0,
+            "net_flow": 0,
+            "margin_score": 0,
+            "has_data": False,
+        }
+
+
+def get_capital_flow(code: str) -> Dict[str, Any]:
+    """获取资金流向信息（优化版：优先使用真实数据）"""
+
+    # 如果启用了真实数据，尝试使用AKShare
+    if USE_REAL_DATA:
+        try:
+            result = get_akshare_adapter().get_capital_flow(code)
+            if result.get("has_data", False):
+                return result
+        except Exception as e:
+            print(f"⚠️ AKShare获取资金流向失败 {code}: {e}")
+
+    # 降级方案：使用智能模拟数据
+    try:
+        # 移除市场前缀
+        clean_code = code.replace("sh", "").replace("sz", "")
+
+        code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
+        code_prefix = int(clean_code[:3]) if clean_code[:3].isdigit() else 600
+
+        # 基于代码特征生成更合理的资金流数据
+        seed = (code_num * 7 + code_prefix) % 400
+        main_inflow = round((seed - 200) / 120, 2)  # -1.67到1.67亿
+        is_inflow = main_inflow > 0.15  # 提高阈值，更严格
+
+        # 优化流向强度判断
+        if main_inflow > 1.0:
+            flow_strength = "strong_in"
+        elif main_inflow > 0.4:
+            flow_strength = "weak_in"
+        elif main_inflow < -1.0:
+            flow_strength = "strong_out"
+        elif main_inflow < -0.4:
+            flow_strength = "weak_out"
+        else:
+            flow_strength = "neutral"
+
+        return {
+            "main_inflow": main_inflow,
+            "is_inflow": is_inflow,
+            "flow_strength": flow_strength,
+            "has_data": False,  # 标记为模拟数据
+        }
+
+    except Exception as e:
+        print(f"获取资金流数据失败 {code}: {e}")
+        return {
+            "main_inflow": 0,
+            "is_inflow": False,
+            "flow_strength": "unknown",
+            "has_data": False,
+        }
+
+
+def generate_kline_data(
+    code: str, price: float, change_percent: float
+) -> List[Dict[str, Any]]:
+    """生成K线数据（优化版：优先使用真实数据）"""
+
+    # 如果启用了真实数据，尝试使用AKShare
+    if USE_REAL_DATA:
+        try:
+            kline = get_akshare_adapter().get_kline_data(code, period="daily", days=10)
+            if kline:
+                return kline
+        except Exception as e:
+            print(f"⚠️ AKShare获取K线失败 {code}: {e}")
+
+    # 降级方案：使用模拟数据
+    # 移除市场前缀
+    clean_code = code.replace("sh", "").replace("sz", "")
+    code_num = int(clean_code[-3:]) if clean_code[-3:].isdigit() else 100
+
+    kline = []
+    base_price = price / (1 + change_percent / 100)  # 计算前一日收盘价
+
+    # 生成最近10天的K线数据
+    for i in range(10, 0, -1):
+        # 使用代码特征生成稳定的随机波动
+        seed = (code_num * i) % 100
+        daily_change = (seed - 50) / 500  # -0.1 到 0.1 的波动
+
+        close = base_price * (1 + daily_change * (11 - i) / 10)
+        open_price = close * (1 + (seed % 10 - 5) / 1000)
+        high = max(open_price, close) * (1 + (seed % 5) / 500)
+        low = min(open_price, close) * (1 - (seed % 5) / 500)
+        volume = 1000000 * (50 + seed)
+
+        kline.append(
+            {
+                "date": f"Day-{i}",
+                "open": round(open_price, 2),
+                "close": round(close, 2),
+                "high": round(high, 2),
+                "low": round(low, 2),
+                "volume": int(volume),
+            }
+        )
+
+    # 添加今天的数据
+    kline.append(
+        {
+            "date": "Today",
+            "open": round(base_price, 2),
+            "close": round(price, 2),
+            "high": round(price * 1.02, 2),
+            "low": round(base_price * 0.98, 2),
+            "volume": int(2000000 * (code_num % 50 + 10)),
+        }
+    )
+
+    return kline
+
+
+def analyze_market_environment(stocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """分析市场环境（新增功能）"""
+    # 检查缓存
+    cached = memory_cache.get("market_env", "current")
+    if cached is not None:
+        return cached
+
+    if not stocks or len(stocks) < 100:
+        return {
+            "status": "unknown",
+            "description": "数据不足",
+            "advice": "等待更多数据",
+        }
+
+    # 统计市场数据
+    up_count = sum(1 for s in stocks if s.get("change_percent", 0) > 0)
+    down_count = sum(1 for s in stocks if s.get("change_percent", 0) < 0)
+    total = len(stocks)
+    up_ratio = up_count / total if total > 0 else 0
+
+    avg_change = (
+        sum(s.get("change_percent", 0) for s in stocks) / total if total > 0 else 0
+    )
+    avg_volume_ratio = (
+        sum(s.get("volume_ratio", 1) for s in stocks) / total if total > 0 else 1
+    )
+
+    # 判断市场环境
+    if up_ratio > 0.65 and avg_change > 1.5:
+        status = "strong_bull"
+        description = "强势上涨行情"
+        advice = "积极参与，但注意追高风险"
+        strategy_adjust = {"change_max": 6, "volume_ratio_max": 3.5}
+    elif up_ratio > 0.55 and avg_change > 0.5:
+        status = "weak_bull"
+        description = "温和上涨行情"
+        advice = "适度参与，优选回调股票"
+        strategy_adjust = {"change_max": 5, "volume_ratio_max": 3.0}
+    elif up_ratio < 0.35 and avg_change < -1.5:
+        status = "strong_bear"
+        description = "强势下跌行情"
+        advice = "谨慎观望，空仓为主"
+        strategy_adjust = {"change_min": -1, "change_max": 3}
+    elif up_ratio < 0.45 and avg_change < -0.5:
+        status = "weak_bear"
+        description = "温和下跌行情"
+        advice = "轻仓试探，严格止损"
+        strategy_adjust = {"change_min": -1.5, "change_max": 4}
+    else:
+        status = "sideways"
+        description = "震荡整理行情"
+        advice = "波段操作，快进快出"
+        strategy_adjust = {"change_min": -2, "change_max": 5}
+
+    result = {
+        "status": status,
+        "description": description,
+        "advice": advice,
+        "strategy_adjust": strategy_adjust,
+        "statistics": {
+            "total_stocks": total,
+            "up_count": up_count,
+            "down_count": down_count,
+            "up_ratio": round(up_ratio * 100, 1),
+            "avg_change": round(avg_change, 2),
+            "avg_volume_ratio": round(avg_volume_ratio, 2),
+        },
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    # 更新缓存
+    memory_cache.set(
+        "market_env", "current", result, ttl=trading_calendar.cache_ttl(config.CACHE_TTL_MARKET)
+    )
+
+    return result
+
+
+def snapshot_status() -> Optional[Dict[str, Any]]:
+    """最近一次全市场行情快照的来源、完整度和腾讯分批拉取的重试统计（尚未拉取时为 None）"""
+    return dict(_snapshot_meta) or None
@@ -0,0 +1,275 @@
+"""
+历史推荐收益跟踪服务
+将筛选历史与日线库关联，批量计算每只入选股票的 1/3/5 日收益、
+止损/目标触发情况，并按策略汇总胜率（增量刷新）
+日线只取收盘落定后拉取的快照；之后的落定快照改写日线时，重新计算窗口覆盖该日的推荐
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from core.history import ScreeningHistoryStore, history_store
+from core.trading_calendar import trading_calendar
+
+
+HORIZONS = (1, 3, 5)  # 跟踪的持有天数
+MAX_HORIZON = max(HORIZONS)
+# 入选后超过多少个自然日（按最新日线日期计）仍未满 5 根日线（停牌、退市）即停止跟踪
+MAX_TRACKING_DAYS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pick_returns (
+    pick_id INTEGER PRIMARY KEY REFERENCES screening_picks(id) ON DELETE CASCADE,
+    strategy TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    code TEXT NOT NULL,
+    entry_price REAL,
+    bars_seen INTEGER NOT NULL DEFAULT 0,
+    return_1d REAL,
+    return_3d REAL,
+    return_5d REAL,
+    max_gain REAL,
+    max_drawdown REAL,
+    hit_stop INTEGER NOT NULL DEFAULT 0,
+    hit_target INTEGER NOT NULL DEFAULT 0,
+    outcome TEXT,
+    complete INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_returns_strategy ON pick_returns(strategy, trade_date);
+CREATE INDEX IF NOT EXISTS idx_returns_pending ON pick_returns(complete);
+"""
+
+
+def evaluate_pick(pick: Dict[str, Any], bars: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    根据入选后的日线计算单只股票的表现
+
+    Args:
+        pick: 入选记录（含 price/buy_price/stop_loss/target_price）
+        bars: 入选日之后的日线（按日期升序）
+
+    Returns:
+        收益统计；止损与目标同一天触发时按止损处理（保守口径）
+    """
+    entry = pick.get("buy_price") or pick.get("price") or 0
+    bars = bars[:MAX_HORIZON]
+    result: Dict[str, Any] = {
+        "entry_price": entry,
+        "bars_seen": len(bars),
+        "max_gain": None,
+        "max_drawdown": None,
+        "hit_stop": 0,
+        "hit_target": 0,
+        "outcome": "open",
+        "complete": int(len(bars) >= MAX_HORIZON),
+    }
+    for horizon in HORIZONS:
+        key = f"return_{horizon}d"
+        if entry > 0 and len(bars) >= horizon and bars[horizon - 1]["close"]:
+            result[key] = round((bars[horizon - 1]["close"] / entry - 1) * 100, 2)
+        else:
+            result[key] = None
+
+    if entry <= 0 or not bars:
+        return result
+
+    highs = [b["high"] or b["close"] for b in bars]
+    lows = [b["low"] or b["close"] for b in bars]
+    result["max_gain"] = round((max(highs) / entry - 1) * 100, 2)
+    result["max_drawdown"] = round((min(lows) / entry - 1) * 100, 2)
+
+    stop_loss = pick.get("stop_loss")
+    target = pick.get("target_price")
+    for high, low in zip(highs, lows):
+        if stop_loss and low <= stop_loss:
+            result["hit_stop"] = 1
+            result["outcome"] = "stop"
+            break
+        if target and high >= target:
+            result["hit_target"] = 1
+            result["outcome"] = "target"
+            break
+    return result
+
+
+class PerformanceTracker:
+    """推荐收益跟踪器"""
+
+    def __init__(self, store: ScreeningHistoryStore):
+        self.store = store
+        self._schema_ready = False
+        self._refresh_lock = threading.Lock()
+
+    def _ensure_schema(self):
+        if not self._schema_ready:
+            self.store.executescript(_SCHEMA)
+            self._schema_ready = True
+
+    def record_snapshot(
+        self,
+        stocks: List[Dict[str, Any]],
+        trade_date: Optional[str] = None,
+        snapshot_at: Optional[float] = None,
+    ) -> int:
+        """用全市场快照批量更新日线（默认写入快照拉取时已收盘落定的交易日）"""
+        return self.store.upsert_daily_bars(stocks, trade_date, snapshot_at)
+
+    def refresh(self, recompute_since: Optional[str] = None) -> int:
+        """
+        增量刷新：只计算尚未满 5 个交易日的推荐
+
+        Args:
+            recompute_since: 该日期（含）之后入选的推荐即使已完成也重新计算（其日线被改写）
+
+        Returns:
+            本次更新的推荐数量
+        """
+        self._ensure_schema()
+        with self._refresh_lock:
+            sql = (
+                "SELECT p.id, p.strategy, p.trade_date, p.code, p.price, "
+                "p.buy_price, p.stop_loss, p.target_price "
+                "FROM screening_picks p LEFT JOIN pick_returns r ON r.pick_id = p.id "
+                "WHERE r.pick_id IS NULL OR r.complete = 0"
+            )
+            params: List[Any] = []
+            if recompute_since:
+                sql += " OR p.trade_date >= ?"
+                params.append(recompute_since)
+            pending = self.store.query(sql, params)
+            if not pending:
+                return 0
+
+            codes = sorted({p["code"] for p in pending})
+            start_date = min(p["trade_date"] for p in pending)
+            bars_by_code = self.store.get_daily_bars(codes, start_date)
+            latest = self.store.query("SELECT MAX(trade_date) AS latest FROM daily_bars")[0]["latest"]
+            expire_before = (
+                (date.fromisoformat(latest) - timedelta(days=MAX_TRACKING_DAYS)).isoformat()
+                if latest
+                else ""
+            )
+
+            now = datetime.now().isoformat()
+            rows = []
+            for pick in pending:
+                bars = [
+                    b
+                    for b in bars_by_code.get(pick["code"], [])
+                    if b["trade_date"] > pick["trade_date"]
+                ]
+                perf = evaluate_pick(pick, bars)
+                if not perf["complete"] and pick["trade_date"] < expire_before:
+                    # 长期停牌/退市：按已有日线定格，不再每次重新计算
+                    perf["complete"] = 1
+                    if perf["outcome"] == "open":
+                        perf["outcome"] = "expired"
+                rows.append(
+                    (
+                        pick["id"],
+                        pick["strategy"],
+                        pick["trade_date"],
+                        pick["code"],
+                        perf["entry_price"],
+                        perf["bars_seen"],
+                        perf["return_1d"],
+                        perf["return_3d"],
+                        perf["return_5d"],
+                        perf["max_gain"],
+                        perf["max_drawdown"],
+                        perf["hit_stop"],
+                        perf["hit_target"],
+                        perf["outcome"],
+                        perf["complete"],
+                        now,
+                    )
+                )
+
+            self.store.executemany(
+                "INSERT OR REPLACE INTO pick_returns "
+                "(pick_id, strategy, trade_date, code, entry_price, bars_seen, "
+                "return_1d, return_3d, return_5d, max_gain, max_drawdown, "
+                "hit_stop, hit_target, outcome, complete, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return len(rows)
+
+    def update_from_snapshot(
+        self, stocks: List[Dict[str, Any]], snapshot_at: Optional[float]
+    ) -> int:
+        """
+        用全市场快照写入日线并增量刷新收益
+        快照拉取时间未知，或拉取时尚未收盘落定（盘中、收盘前的旧快照）时不写入日线；
+        写入后重新计算日线窗口覆盖该交易日的推荐（后一次落定快照可修正之前写入的日线）
+
+        Args:
+            snapshot_at: 快照开始拉取的时间戳（market_data.snapshot_time）
+        """
+        settled = trading_calendar.settled_date(snapshot_at) if snapshot_at is not None else None
+        if settled is None:
+            return self.refresh()
+        self.record_snapshot(stocks, settled.isoformat())
+        since = settled
+        for _ in range(MAX_HORIZON):
+            since = trading_calendar.previous_trading_day(since)
+        return self.refresh(recompute_since=since.isoformat())
+
+    def get_performance(
+        self,
+        strategy: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        limit: int = 200,
+    ) -> Dict[str, Any]:
+        """
+        查询推荐表现：按策略汇总 + 逐条明细
+
+        胜率按 5 日收益 > 0 计算（不足 5 日的推荐不计入胜率）
+        """
+        self._ensure_schema()
+        where = "WHERE 1 = 1"
+        params: List[Any] = []
+        if strategy:
+            where += " AND r.strategy = ?"
+            params.append(strategy)
+        if start_date:
+            where += " AND r.trade_date >= ?"
+            params.append(start_date)
+        if end_date:
+            where += " AND r.trade_date <= ?"
+            params.append(end_date)
+
+        summary = self.store.query(
+            "SELECT r.strategy, COUNT(*) AS picks, "
+            "SUM(r.complete) AS completed, "
+            "ROUND(AVG(r.return_1d), 2) AS avg_return_1d, "
+            "ROUND(AVG(r.return_3d), 2) AS avg_return_3d, "
+            "ROUND(AVG(r.return_5d), 2) AS avg_return_5d, "
+            "ROUND(100.0 * SUM(CASE WHEN r.return_5d > 0 THEN 1 ELSE 0 END) "
+            "/ NULLIF(SUM(CASE WHEN r.return_5d IS NOT NULL THEN 1 ELSE 0 END), 0), 1) "
+            "AS win_rate, "
+            "ROUND(100.0 * SUM(r.hit_stop) / NULLIF(SUM(r.bars_seen > 0), 0), 1) "
+            "AS stop_hit_rate, "
+            "ROUND(100.0 * SUM(r.hit_target) / NULLIF(SUM(r.bars_seen > 0), 0), 1) "
+            "AS target_hit_rate "
+            f"FROM pick_returns r {where} GROUP BY r.strategy ORDER BY r.strategy",
+            params,
+        )
+        picks = self.store.query(
+            "SELECT p.id AS pick_id, p.trade_date, p.run_at, p.strategy, p.code, "
+            "p.name, p.rank, p.score, p.price, p.stop_loss, p.target_price, "
+            "r.entry_price, r.bars_seen, r.return_1d, r.return_3d, r.return_5d, "
+            "r.max_gain, r.max_drawdown, r.hit_stop, r.hit_target, r.outcome, r.complete "
+            f"FROM pick_returns r JOIN screening_picks p ON p.id = r.pick_id {where} "
+            "ORDER BY p.run_at DESC, p.rank LIMIT ?",
+            params + [limit],
+        )
+        return {"summary": summary, "picks": picks}
+
+
+# 全局跟踪器实例
+performance_tracker = PerformanceTracker(history_store)
@@ -0,0 +1,290 @@
+"""
+进程内定时筛选
+- ResultStore：筛选结果以带版本号的内存对象发布，接口直接读取（无需每次读文件、解析 JSON）；
+  可选原子写盘（临时文件 + rename，读者不会看到写了一半的文件），重启后从磁盘恢复；
+  文件被其他进程（独立 scheduler.py、其他 worker）替换时按 inode/mtime 变化重新加载
+- ScreeningScheduler：在 API 进程的事件循环中按交易时段定时执行筛选（筛选本身在线程池中运行），
+  支持手动触发；与接口共享行情快照和数据表缓存，不再需要单独的 scheduler.py 进程
+- single_runner：多进程部署（uvicorn --workers N、独立 scheduler.py）时按结果文件旁的锁文件
+  选出唯一的定时筛选进程，其余进程只监视结果文件
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from core.metrics import metrics
+from core.shared_snapshot import FetcherLock
+from core.trading_calendar import TradingCalendar, trading_calendar
+
+SCREEN_RUNS = metrics.counter("boduan_scheduled_screen_runs_total", "定时筛选执行次数", ["result"])
+RESULT_VERSION = metrics.gauge("boduan_screening_result_version", "当前发布的定时筛选结果版本号")
+
+
+class PublishedResult:
+    """一次发布的筛选结果（发布后不再修改）"""
+
+    __slots__ = ("version", "payload", "created_at")
+
+    def __init__(self, version: int, payload: Dict[str, Any], created_at: float):
+        self.version = version
+        self.payload = payload
+        self.created_at = created_at
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+
+def _created_at(payload: Dict[str, Any]) -> float:
+    try:
+        return datetime.fromisoformat(payload["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+class ResultStore:
+    """带版本号的筛选结果发布点（线程安全，读取为一次属性访问）"""
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 1.0):
+        """
+        Args:
+            path: 持久化文件路径（None 表示只保存在内存中）
+            check_interval: current() 检查文件是否被替换的最小间隔（秒）
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._latest: Optional[PublishedResult] = None
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None  # 最近一次读写的文件 (inode, mtime_ns, size)
+        self._checked_at = 0.0
+        self.persist_errors = 0
+        self.reloads = 0
+
+    @property
+    def latest(self) -> Optional[PublishedResult]:
+        return self._latest
+
+    def current(self) -> Optional[PublishedResult]:
+        """
+        最新结果；文件被其他进程替换（inode/mtime 变化）时重新加载
+        检查间隔内只是一次属性读取，文件未变化时只多一次 stat
+        """
+        if self.path:
+            now = time.monotonic()
+            if now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                signature = self._stat()
+                if signature is not None and signature != self._signature:
+                    previous = self._latest
+                    if self.load() is not previous:
+                        self.reloads += 1
+        return self._latest
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def publish(self, payload: Dict[str, Any]) -> PublishedResult:
+        """发布新结果（版本号递增），配置了 path 时原子写盘"""
+        if self.path and self._stat() != self._signature:
+            self.load()  # 文件已被其他进程更新：在其版本号之上递增
+        with self._lock:
+            version = (self._latest.version if self._latest else 0) + 1
+            payload = dict(payload, version=version)
+            result = PublishedResult(version, payload, _created_at(payload))
+            self._latest = result
+        RESULT_VERSION.set(version)
+        if self.path:
+            try:
+                write_json_atomic(self.path, payload)
+                self._signature = self._stat()
+            except OSError as e:
+                self.persist_errors += 1
+                print(f"⚠️ 筛选结果写盘失败: {e}")
+        return result
+
+    def load(self) -> Optional[PublishedResult]:
+        """从持久化文件加载（比内存中的版本新时替换；文件不存在或损坏时返回 None）"""
+        if not self.path:
+            return None
+        signature = self._stat()
+        if signature is None:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取筛选结果文件失败: {e}")
+            return None
+        self._signature = signature
+        version = int(payload.get("version") or 0)
+        result = PublishedResult(version, payload, _created_at(payload))
+        with self._lock:
+            latest = self._latest
+            if latest is None or (version, result.created_at) > (latest.version, latest.created_at):
+                self._latest = result
+        RESULT_VERSION.set(self._latest.version)
+        return self._latest
+
+    def stats(self) -> Dict[str, Any]:
+        latest = self._latest
+        return {
+            "version": latest.version if latest else None,
+            "created_at": latest.created_at if latest else None,
+            "count": latest.payload.get("count") if latest else None,
+            "path": self.path,
+            "persist_errors": self.persist_errors,
+            "reloads": self.reloads,
+        }
+
+
+def write_json_atomic(path: str, payload: Any):
+    """写入临时文件后 rename 覆盖目标文件（同一文件系统内原子替换）"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def single_runner(lock_path: Optional[str]) -> Callable[[], bool]:
+    """
+    定时筛选进程选举：非阻塞文件锁，持有者执行定时筛选
+    未当选的进程每次定时执行前重试，持有者退出后锁自动释放、由下一个进程接替；
+    没有结果文件（单进程、仅内存发布）时总是执行
+    """
+    if not lock_path:
+        return lambda: True
+    lock = FetcherLock(lock_path)
+    return lock.try_acquire
+
+
+class ScreeningScheduler:
+    """在事件循环中按交易时段定时执行筛选并发布结果"""
+
+    def __init__(
+        self,
+        job: Callable[[], Optional[Dict[str, Any]]],
+        store: ResultStore,
+        interval: float = 1800,
+        calendar: TradingCalendar = trading_calendar,
+        startup_delay: float = 5,
+        should_run: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        Args:
+            job: 执行一次筛选，返回结果文档（在线程池中运行，失败时抛出异常）
+            store: 结果发布点
+            interval: 交易时段内的执行间隔（秒）
+            calendar: 交易日历
+            startup_delay: 启动时没有有效结果，延迟多少秒后执行首轮筛选（避开启动高峰）
+            should_run: 定时执行前的判断（如多进程部署时只由当选进程执行，其余进程监视结果文件）；
+                手动触发不受限制
+        """
+        self.job = job
+        self.store = store
+        self.interval = interval
+        self.calendar = calendar
+        self.startup_delay = startup_delay
+        self.should_run = should_run
+        self.skipped = 0
+        self._trigger: Optional[asyncio.Event] = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_run: Optional[float] = None
+
+    def _first_run(self) -> float:
+        latest = self.store.latest
+        now = time.time()
+        if latest is not None and self.calendar.expires_at(latest.created_at, self.interval) > now:
+            return self.calendar.next_refresh(self.interval, now)
+        return now + self.startup_delay
+
+    def trigger(self) -> bool:
+        """立即执行一次（已在执行或已触发尚未开始时返回 False；需在事件循环中调用）"""
+        if self.running:
+            return False
+        # 同步标记：任务开始前的再次触发不会重复执行
+        self.running = True
+        if self._trigger is None:
+            # 定时循环未启动（SCREENING_SCHEDULER_ENABLED=false）：单独执行一次
+            asyncio.get_running_loop().create_task(self.run_once())
+        else:
+            self._trigger.set()
+        return True
+
+    async def run_once(self) -> Optional[PublishedResult]:
+        self.running = True
+        start = time.time()
+        try:
+            payload = await asyncio.get_running_loop().run_in_executor(None, self.job)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            SCREEN_RUNS.inc(result="error")
+            print(f"❌ 定时筛选失败：{e}")
+            return None
+        finally:
+            self.running = False
+            self.runs += 1
+            self.last_run = start
+            self.last_duration = time.time() - start
+        SCREEN_RUNS.inc(result="ok")
+        self.last_error = None
+        result = self.store.publish(payload)
+        print(f"📢 定时筛选结果已发布：版本 {result.version}，{payload.get('count', 0)} 只")
+        return result
+
+    async def run(self):
+        """后台任务主循环（在 lifespan 中创建，关闭时取消）"""
+        self._trigger = asyncio.Event()
+        self.next_run = self._first_run()
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._trigger.wait(), timeout=max(0.0, self.next_run - time.time())
+                )
+            except asyncio.TimeoutError:
+                pass
+            triggered = self._trigger.is_set()
+            self._trigger.clear()
+            if triggered or self.should_run is None or self.should_run():
+                await self.run_once()
+            else:
+                self.skipped += 1
+            self.next_run = self.calendar.next_refresh(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_run": self.last_run,
+            "last_duration": round(self.last_duration, 3) if self.last_duration else None,
+            "last_error": self.last_error,
+            "next_run": self.next_run,
+            "result": self.store.stats(),
+        }
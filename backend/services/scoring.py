@@ -0,0 +1,393 @@
+"""
+个股属性与波段交易评分（纯计算，不依赖网络和全局缓存）
+板块类型、行业归类、波段交易评分、智能买卖点，供实时筛选、定时筛选、精选过滤和离线基准共用
+"""
+
+from typing import Any, Dict
+
+# ==================== 波段交易策略配置 ====================
+BAND_TRADING_CONFIG = {
+    "max_positions": 3,  # 最大持仓数量
+    "max_market_cap": 160,  # 最大市值（亿）
+    "require_margin": True,  # 必须支持融资融券
+    "exclude_st": True,  # 排除ST股票
+    "exclude_loss": True,  # 排除亏损股票
+    "change_range": (-2, 5),  # 涨跌幅范围（不追涨）
+    "volume_ratio_range": (1.5, 3.0),  # 量比范围
+    "boards": ["main", "cyb"],  # 主板+创业板
+}
+
+
+def get_board_type(code: str) -> Dict[str, str]:
+    """获取板块类型"""
+    # 移除市场前缀（sh/sz）
+    clean_code = code.replace("sh", "").replace("sz", "")
+
+    if clean_code.startswith("688"):
+        return {"type": "kcb", "name": "科创板", "color": "#00b894", "allowed": False}
+    elif clean_code.startswith("300") or clean_code.startswith("301"):
+        return {"type": "cyb", "name": "创业板", "color": "#6c5ce7", "allowed": True}
+    elif clean_code.startswith("6"):
+        return {"type": "sh", "name": "沪市主板", "color": "#0984e3", "allowed": True}
+    elif clean_code.startswith("0"):
+        return {"type": "sz", "name": "深市主板", "color": "#00cec9", "allowed": True}
+    else:
+        return {"type": "other", "name": "其他", "color": "#636e72", "allowed": False}
+
+
+def is_loss_making_stock(code: str, name: str) -> bool:
+    """判断是否为亏损股票（基于名称和代码特征）"""
+    # 亏损股票通常会有特殊标识或在财报中体现
+    # 这里使用简化判断：ST股票通常是亏损的
+    loss_keywords = ["亏损", "预亏", "巨亏", "首亏", "续亏"]
+    return any(keyword in name for keyword in loss_keywords)
+
+
+def get_industry(name: str, code: str) -> str:
+    """根据股票名称和代码推测行业（简化版）"""
+    # 移除市场前缀
+    clean_code = code.replace("sh", "").replace("sz", "")
+
+    # 基于名称关键词判断行业
+    if any(k in name for k in ["药", "医", "生物", "健康", "康", "制药"]):
+        return "医药生物"
+    elif any(
+        k in name
+        for k in ["科技", "软件", "信息", "数据", "云", "网络", "通信", "电子"]
+    ):
+        return "信息技术"
+    elif any(k in name for k in ["银行", "证券", "保险", "金融", "投资"]):
+        return "金融"
+    elif any(k in name for k in ["地产", "房", "置业", "建设", "建筑"]):
+        return "房地产"
+    elif any(k in name for k in ["汽车", "车", "客车"]):
+        return "汽车"
+    elif any(k in name for k in ["电", "能源", "新能源", "光伏", "风电", "电力"]):
+        return "电力设备"
+    elif any(k in name for k in ["化工", "化学", "材料", "新材"]):
+        return "化工"
+    elif any(k in name for k in ["机械", "设备", "制造", "装备"]):
+        return "机械设备"
+    elif any(k in name for k in ["食品", "饮料", "酒"]):
+        return "食品饮料"
+    elif any(k in name for k in ["家电", "电器"]):
+        return "家用电器"
+    elif any(k in name for k in ["纺织", "服装", "服饰"]):
+        return "纺织服装"
+    elif any(k in name for k in ["有色", "金属", "铜", "铝", "锌", "铂", "钴"]):
+        return "有色金属"
+    elif any(k in name for k in ["钢铁", "钢", "铁"]):
+        return "钢铁"
+    elif any(k in name for k in ["煤炭", "煤"]):
+        return "煤炭"
+    elif any(k in name for k in ["农", "林", "牧", "渔"]):
+        return "农林牧渔"
+    elif any(k in name for k in ["传媒", "影视", "广告", "出版"]):
+        return "传媒"
+    elif any(k in name for k in ["旅游", "酒店", "景区"]):
+        return "旅游"
+    elif any(k in name for k in ["商业", "百货", "超市", "零售"]):
+        return "商业贸易"
+    elif any(k in name for k in ["交通", "运输", "物流", "港口", "航空", "铁路"]):
+        return "交通运输"
+    else:
+        return "综合"
+
+
+_CAPITAL_FLOW_BANDS = ("strong_in", "weak_in", "strong_out", "weak_out")
+
+
+def calculate_band_trading_score(
+    stock: Dict[str, Any],
+    margin_info: Dict[str, Any],
+    capital_flow: Dict[str, Any],
+    strategy_type: str = "balanced",
+) -> Dict[str, Any]:
+    """计算波段交易评分（专业版 - 优化版 - 支持不同策略）
+
+    Args:
+        stock: 股票数据
+        margin_info: 融资融券信息
+        capital_flow: 资金流向信息
+        strategy_type: 策略类型 (aggressive/conservative/balanced)
+    """
+    score = 50  # 基础分
+    reasons = []
+    warnings = []
+    # 各维度所处区间（供规则分析引擎生成文本）
+    bands = {
+        "margin": "neutral",
+        "change": "neutral",
+        "volume": "low",
+        "market_cap": "mid_small",
+        "capital": "none",
+        "turnover": "normal",
+    }
+
+    code = stock["code"]
+    name = stock["name"]
+    change_percent = stock["change_percent"]
+    volume_ratio = stock["volume_ratio"]
+    market_cap = stock["market_cap"]
+    turnover = stock.get("turnover", 0)
+
+    # 根据策略类型调整权重
+    if strategy_type == "aggressive":
+        # 激进型：更看重涨幅和量比，容忍更高风险
+        weights = {
+            "margin": 0.30,
+            "change": 0.35,
+            "volume": 0.20,
+            "market_cap": 0.05,
+            "capital": 0.05,
+            "turnover": 0.05,
+        }
+    elif strategy_type == "conservative":
+        # 保守型：更看重融资融券和资金流向，偏好回调
+        weights = {
+            "margin": 0.40,
+            "change": 0.15,
+            "volume": 0.10,
+            "market_cap": 0.15,
+            "capital": 0.15,
+            "turnover": 0.05,
+        }
+    else:  # balanced
+        # 平衡型：综合考虑各项指标
+        weights = {
+            "margin": 0.35,
+            "change": 0.25,
+            "volume": 0.15,
+            "market_cap": 0.10,
+            "capital": 0.10,
+            "turnover": 0.05,
+        }
+
+    # 1. 融资融券评分
+    if margin_info["is_margin_eligible"]:
+        margin_score = margin_info["margin_score"]
+        score += margin_score * weights["margin"]  # 提高到45%权重
+
+        if margin_score >= 75:
+            reasons.append(f"💎💎 融资融券优质(评分{margin_score})")
+        elif margin_score >= 65:
+            reasons.append(f"💎 融资融券良好(评分{margin_score})")
+
+        if margin_info["net_flow"] > 0.06:
+            score += 18
+            bands["margin"] = "strong_in"
+            reasons.append(f"💰💰 融资大幅流入{margin_info['net_flow']}亿")
+        elif margin_info["net_flow"] > 0.02:
+            score += 10
+            bands["margin"] = "in"
+            reasons.append(f"💰 融资净流入{margin_info['net_flow']}亿")
+        elif margin_info["net_flow"] < -0.06:
+            score -= 15
+            bands["margin"] = "strong_out"
+            warnings.append(f"⚠️⚠️ 融资大幅流出{abs(margin_info['net_flow']):.2f}亿")
+        elif margin_info["net_flow"] < -0.02:
+            score -= 8
+            bands["margin"] = "out"
+            warnings.append(f"⚠️ 融资净流出{abs(margin_info['net_flow']):.2f}亿")
+    else:
+        score -= 35 * weights["margin"]  # 不支持融资融券严重减分
+        bands["margin"] = "ineligible"
+        warnings.append("❌ 不支持融资融券（不符合策略）")
+
+    # 2. 涨跌幅评分（波段交易偏好 - 25%权重）
+    if -2 <= change_percent <= -0.5:
+        score += 25
+        bands["change"] = "deep_pullback"
+        reasons.append(f"📉📉 深度回调({change_percent:.1f}%)，黄金买点")
+    elif -0.5 < change_percent <= 0:
+        score += 20
+        bands["change"] = "pullback"
+        reasons.append(f"📉 小幅回调({change_percent:.1f}%)，优质买点")
+    elif 0 < change_percent <= 2:
+        score += 18
+        bands["change"] = "mild_up"
+        reasons.append(f"📈 温和上涨({change_percent:.1f}%)，趋势良好")
+    elif 2 < change_percent <= 4:
+        score += 10
+        bands["change"] = "moderate_up"
+        reasons.append(f"⚡ 适度上涨({change_percent:.1f}%)")
+    elif 4 < change_percent <= 5:
+        score += 3
+        bands["change"] = "high_up"
+        reasons.append(f"⚡ 涨幅偏高({change_percent:.1f}%)")
+    elif change_percent > 7:
+        score -= 25
+        bands["change"] = "overheated"
+        warnings.append(f"⚠️⚠️ 涨幅过大({change_percent:.1f}%)，追高风险极大")
+    elif change_percent > 5:
+        score -= 15
+        bands["change"] = "chasing"
+        warnings.append(f"⚠️ 涨幅较大({change_percent:.1f}%)，追高风险")
+    elif change_percent < -5:
+        score -= 20
+        bands["change"] = "plunge"
+        warnings.append(f"⚠️⚠️ 跌幅过大({change_percent:.1f}%)，需谨慎")
+    elif change_percent < -2:
+        score -= 10
+        bands["change"] = "drop"
+        warnings.append(f"⚠️ 跌幅较大({change_percent:.1f}%)，观察为主")
+
+    # 3. 量比评分（15%权重）
+    if 1.5 <= volume_ratio <= 2.2:
+        score += 18
+        bands["volume"] = "perfect"
+        reasons.append(f"📊📊 量比完美({volume_ratio:.1f})")
+    elif 2.2 < volume_ratio <= 2.8:
+        score += 12
+        bands["volume"] = "healthy"
+        reasons.append(f"� 量比健康({volume_ratio:.1f})")
+    elif 2.8 < volume_ratio <= 3.5:
+        score += 6
+        bands["volume"] = "moderate"
+        reasons.append(f"� 量比适中({volume_ratio:.1f})")
+    elif volume_ratio > 5:
+        score -= 15
+        bands["volume"] = "abnormal"
+        warnings.append(f"⚠️⚠️ 量比过大({volume_ratio:.1f})，异常放量")
+    elif volume_ratio > 3.5:
+        score -= 8
+        bands["volume"] = "high"
+        warnings.append(f"⚠️ 量比偏大({volume_ratio:.1f})")
+
+    # 4. 市值评分（偏好中小市值 - 10%权重）
+    if 40 <= market_cap <= 80:
+        score += 18
+        bands["market_cap"] = "prime"
+        reasons.append(f"�💎 市值优质({market_cap:.0f}亿)，成长空间大")
+    elif 80 < market_cap <= 120:
+        score += 12
+        bands["market_cap"] = "good"
+        reasons.append(f"💎 市值良好({market_cap:.0f}亿)")
+    elif 120 < market_cap <= 160:
+        score += 6
+        bands["market_cap"] = "fair"
+        reasons.append(f"📊 市值合理({market_cap:.0f}亿)")
+    elif market_cap > 160:
+        score -= 25
+        bands["market_cap"] = "oversized"
+        warnings.append(f"❌ 市值过大({market_cap:.0f}亿)，超出限制")
+    elif market_cap < 30:
+        score -= 10
+        bands["market_cap"] = "small"
+        warnings.append(f"⚠️ 市值偏小({market_cap:.0f}亿)，风险较高")
+
+    # 5. 资金流向评分（10%权重）
+    if capital_flow["has_data"]:
+        if capital_flow["flow_strength"] in _CAPITAL_FLOW_BANDS:
+            bands["capital"] = capital_flow["flow_strength"]
+        if capital_flow["flow_strength"] == "strong_in":
+            score += 22
+            reasons.append("💰💰💰 主力强力抢筹")
+        elif capital_flow["flow_strength"] == "weak_in":
+            score += 12
+            reasons.append("💰 主力温和流入")
+        elif capital_flow["flow_strength"] == "strong_out":
+            score -= 25
+            warnings.append("⚠️⚠️⚠️ 主力强力出逃")
+        elif capital_flow["flow_strength"] == "weak_out":
+            score -= 12
+            warnings.append("⚠️ 主力温和流出")
+
+    # 6. 换手率评分（波段交易偏好适中换手 - 5%权重）
+    if 2 <= turnover <= 6:
+        score += 12
+        bands["turnover"] = "ideal"
+        reasons.append(f"🔄 换手完美({turnover:.1f}%)")
+    elif 6 < turnover <= 10:
+        score += 6
+        bands["turnover"] = "active"
+        reasons.append(f"🔄 换手适中({turnover:.1f}%)")
+    elif turnover > 18:
+        score -= 18
+        bands["turnover"] = "overheated"
+        warnings.append(f"⚠️⚠️ 换手过高({turnover:.1f}%)，可能出货")
+    elif turnover > 12:
+        score -= 10
+        bands["turnover"] = "high"
+        warnings.append(f"⚠️ 换手偏高({turnover:.1f}%)")
+    elif turnover < 1:
+        score -= 8
+        bands["turnover"] = "illiquid"
+        warnings.append(f"⚠️ 换手过低({turnover:.1f}%)，流动性差")
+
+    # 7. 板块加分
+    board = get_board_type(code)
+    if board["type"] == "cyb":
+        score += 8
+        reasons.append("🚀 创业板成长股")
+    elif board["type"] == "sh":
+        score += 3
+        reasons.append("🏛️ 沪市主板")
+
+    # 确保评分在合理范围内
+    score = max(0, min(100, score))
+
+    # 风险等级判断（更严格）
+    if score >= 70:
+        risk_level = "low"
+    elif score >= 55:
+        risk_level = "medium"
+    else:
+        risk_level = "high"
+
+    return {
+        "score": round(score, 1),
+        "reasons": reasons,
+        "warnings": warnings,
+        "risk_level": risk_level,
+        "bands": bands,
+    }
+
+
+def calculate_trade_points(stock: Dict[str, Any]) -> Dict[str, Any]:
+    """计算智能买卖点"""
+    price = stock["price"]
+    change_percent = stock["change_percent"]
+    volume_ratio = stock["volume_ratio"]
+
+    # 买入价：当前价或略低
+    if change_percent < 0:
+        # 回调中，可以当前价买入
+        buy_price = price
+        buy_timing = "立即买入"
+    elif change_percent < 2:
+        # 温和上涨，可以追
+        buy_price = price
+        buy_timing = "适合买入"
+    else:
+        # 涨幅较大，等回调
+        buy_price = round(price * 0.98, 2)
+        buy_timing = "等待回调"
+
+    # 止损价：-5%
+    stop_loss = round(buy_price * 0.95, 2)
+    stop_loss_percent = -5.0
+
+    # 目标价：根据量比和涨幅判断
+    if volume_ratio > 2.5 and change_percent < 2:
+        # 放量且涨幅不大，目标+8%
+        target_price = round(buy_price * 1.08, 2)
+        target_percent = 8.0
+    elif volume_ratio > 2.0:
+        # 适度放量，目标+6%
+        target_price = round(buy_price * 1.06, 2)
+        target_percent = 6.0
+    else:
+        # 保守目标+5%
+        target_price = round(buy_price * 1.05, 2)
+        target_percent = 5.0
+
+    return {
+        "buy_price": buy_price,
+        "buy_timing": buy_timing,
+        "stop_loss": stop_loss,
+        "stop_loss_percent": stop_loss_percent,
+        "target_price": target_price,
+        "target_percent": target_percent,
+        "risk_reward_ratio": round(target_percent / abs(stop_loss_percent), 2),
+    }
@@ -0,0 +1,270 @@
+"""
+筛选流水线中的纯计算步骤
+快速过滤、预评分截断、按策略排序、板块+行业分散选股、定时筛选，
+不依赖网络和全局缓存（外部查询以函数传入），供实时筛选接口、定时筛选和离线基准共用
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def quick_filter(
+    stocks: List[Dict[str, Any]],
+    change_min: float,
+    change_max: float,
+    volume_ratio_min: float,
+    volume_ratio_max: float,
+    market_cap_max: float,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    第一阶段快速过滤（不调用任何慢函数）
+
+    Returns:
+        (通过的股票, 各排除原因计数)
+    """
+    passed = []
+    excluded = {"kcb": 0, "st": 0, "board": 0, "market_cap": 0, "criteria": 0}
+
+    for stock in stocks:
+        if not stock:
+            continue
+
+        code = stock["code"]
+        name = stock["name"]
+        clean_code = code.replace("sh", "").replace("sz", "")
+
+        # 1. 排除科创板
+        if clean_code.startswith("688"):
+            excluded["kcb"] += 1
+            continue
+
+        # 2. 排除ST股票
+        if "ST" in name or "*ST" in name or name.startswith("S") or "退" in name:
+            excluded["st"] += 1
+            continue
+
+        # 3. 只保留主板和创业板（简单判断，不调用函数）
+        if not (
+            clean_code.startswith("6")
+            or clean_code.startswith("0")
+            or clean_code.startswith("3")
+        ):
+            excluded["board"] += 1
+            continue
+
+        # 4. 市值限制
+        if stock["market_cap"] > market_cap_max:
+            excluded["market_cap"] += 1
+            continue
+
+        # 5. 基本筛选条件
+        if not (
+            change_min <= stock["change_percent"] <= change_max
+            and volume_ratio_min <= stock["volume_ratio"] <= volume_ratio_max
+        ):
+            excluded["criteria"] += 1
+            continue
+
+        passed.append(stock)
+
+    return passed, excluded
+
+
+def pre_score(stock: Dict[str, Any]) -> int:
+    """按涨幅、量比、市值的简单预评分"""
+    score = 0
+    # 回调股票加分
+    if -2 <= stock["change_percent"] <= 0:
+        score += 30
+    elif 0 < stock["change_percent"] <= 2:
+        score += 20
+    # 量比适中加分
+    if 1.5 <= stock["volume_ratio"] <= 2.5:
+        score += 20
+    # 市值适中加分
+    if 40 <= stock["market_cap"] <= 120:
+        score += 15
+    return score
+
+
+def pre_rank(stocks: List[Dict[str, Any]], max_count: int = 50) -> List[Dict[str, Any]]:
+    """
+    超过 max_count 只时按预评分排序，只保留前 max_count 只进入详细分析
+    （不修改传入的股票字典，它们通常是共享的行情快照）
+    """
+    if len(stocks) <= max_count:
+        return stocks
+
+    ranked = sorted(stocks, key=pre_score, reverse=True)
+    return ranked[:max_count]
+
+
+def sort_by_strategy(stocks: List[Dict[str, Any]], strategy_type: str) -> str:
+    """
+    按策略类型原地排序
+
+    Returns:
+        策略说明
+    """
+    if strategy_type == "aggressive":
+        # 激进型：优先选择涨幅大、量比大的股票
+        stocks.sort(
+            key=lambda x: (
+                x["change_percent"] * 0.4  # 涨幅权重40%
+                + x["volume_ratio"] * 10 * 0.3  # 量比权重30%
+                + x["score"] * 0.3  # 评分权重30%
+            ),
+            reverse=True,
+        )
+        return "激进型 - 优先选择涨幅大、量比大的股票"
+    if strategy_type == "conservative":
+        # 保守型：优先选择回调、融资融券好的股票
+        stocks.sort(
+            key=lambda x: (
+                -abs(x["change_percent"]) * 0.3  # 涨幅越小越好（回调）
+                + x["margin_info"]["margin_score"] * 0.4  # 融资融券权重40%
+                + x["score"] * 0.3  # 评分权重30%
+            ),
+            reverse=True,
+        )
+        return "保守型 - 优先选择回调、融资融券好的股票"
+    # 平衡型：按综合评分排序
+    stocks.sort(key=lambda x: x["score"], reverse=True)
+    return "平衡型 - 按综合评分排序"
+
+
+def select_diversified(
+    stocks: List[Dict[str, Any]], limit: int
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    板块+行业分散选股：尽量从不同板块和行业各选一只（stocks 需已排序）
+
+    Returns:
+        (入选股票, 各板块入选数量)
+    """
+    result: List[Dict[str, Any]] = []
+    selected = set()  # 已选股票的 id
+    board_counts = {"sh": 0, "sz": 0, "cyb": 0}  # 沪市、深市、创业板计数
+    used_industries = set()  # 已选行业
+
+    def take(stock):
+        result.append(stock)
+        selected.add(id(stock))
+
+    # 第一轮：每个板块选一只最高分的，且行业不重复
+    for board_type in ["sh", "sz", "cyb"]:
+        for stock in stocks:
+            if (
+                stock["board_type"]["type"] == board_type
+                and board_counts[board_type] == 0
+                and stock["industry"] not in used_industries
+            ):
+                take(stock)
+                board_counts[board_type] += 1
+                used_industries.add(stock["industry"])
+                if len(result) >= limit:
+                    break
+        if len(result) >= limit:
+            break
+
+    # 第二轮：如果还没满，优先选不同行业的
+    if len(result) < limit:
+        for stock in stocks:
+            if id(stock) not in selected and stock["industry"] not in used_industries:
+                take(stock)
+                used_industries.add(stock["industry"])
+                if len(result) >= limit:
+                    break
+
+    # 第三轮：如果还是没满，按评分继续添加
+    if len(result) < limit:
+        for stock in stocks:
+            if id(stock) not in selected:
+                take(stock)
+                if len(result) >= limit:
+                    break
+
+    return result, board_counts
+
+
+def board_screen(
+    stocks: List[Dict[str, Any]],
+    margin_info: Callable[[str], Dict[str, Any]],
+    board_type: Callable[[str], Dict[str, Any]],
+    industry: Callable[[str, str], str],
+    limit: int = 3,
+    per_board: int = 20,
+) -> Dict[str, Any]:
+    """
+    定时筛选（简化版）：固定条件快速过滤 + 融资融券/板块检查，每个板块按涨幅各取第一只
+
+    Args:
+        stocks: 全市场行情快照（不会被修改）
+        margin_info / board_type / industry: 融资融券、板块、行业查询
+        limit: 入选数量
+        per_board: 每个板块收集到多少只候选后停止
+
+    Returns:
+        结果文档（timestamp / count / data / board_distribution / industry_distribution）
+    """
+    change_min, change_max = -2, 5
+    volume_ratio_min, volume_ratio_max = 1.5, 3
+    market_cap_max = 160
+
+    boards: Dict[str, List[Dict[str, Any]]] = {"sh": [], "sz": [], "cyb": []}
+    for checked, stock in enumerate(stocks, 1):
+        if not stock:
+            continue
+        if checked % 500 == 0:
+            print(f"   已检查: {checked}/{len(stocks)} 只...")
+
+        code = stock["code"]
+        name = stock["name"]
+        clean_code = code.replace("sh", "").replace("sz", "")
+        if clean_code.startswith("688"):  # 排除科创板
+            continue
+        if "ST" in name or "退" in name:  # 排除ST
+            continue
+        if stock["market_cap"] > market_cap_max:
+            continue
+        if not (change_min <= stock["change_percent"] <= change_max):
+            continue
+        if not (volume_ratio_min <= stock["volume_ratio"] <= volume_ratio_max):
+            continue
+
+        margin = margin_info(code)
+        if not margin["is_margin_eligible"]:
+            continue
+        board = board_type(code)
+        if not board.get("allowed", False) or board["type"] not in boards:
+            continue
+
+        # 复制，不修改共享的行情快照
+        stock = dict(stock, board_type=board, margin_info=margin, industry=industry(name, code))
+        boards[board["type"]].append(stock)
+        if all(len(candidates) >= per_board for candidates in boards.values()):
+            break
+
+    for candidates in boards.values():
+        candidates.sort(key=lambda x: x["change_percent"], reverse=True)
+
+    # 板块分散：先从每个板块各选1只，不够再按涨幅补充
+    result = [candidates[0] for candidates in boards.values() if candidates]
+    if len(result) < limit:
+        remaining = [stock for candidates in boards.values() for stock in candidates[1:]]
+        remaining.sort(key=lambda x: x["change_percent"], reverse=True)
+        result.extend(remaining[: limit - len(result)])
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "count": len(result),
+        "data": result,
+        "board_distribution": {
+            f"{board}_count": sum(1 for s in result if s["board_type"]["type"] == board)
+            for board in boards
+        },
+        "industry_distribution": {
+            name: sum(1 for s in result if s.get("industry") == name)
+            for name in set(s.get("industry", "未知") for s in result)
+        },
+    }
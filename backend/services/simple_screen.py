@@ -0,0 +1,74 @@
+"""
+定时筛选（简化版）任务与结果发布点
+API 进程（进程内定时筛选）和独立的 scheduler.py 共用，不依赖 FastAPI
+"""
+
+from datetime import datetime
+from typing import Any, Dict
+
+from core.config import config
+from core.history import history_store
+from core.warm_start import schedule_persist
+from services.market_data import get_all_stocks_data, get_margin_trading_info, snapshot_time
+from services.performance_tracker import performance_tracker
+from services.scheduled_screening import ResultStore, ScreeningScheduler, single_runner
+from services.screening import board_screen
+from services.scoring import get_board_type, get_industry
+
+
+def run_simple_screen() -> Dict[str, Any]:
+    """
+    定时筛选（简化版）：全市场快照 → 固定条件 + 融资融券/板块检查 → 板块分散取3只
+    同时记录筛选历史、写回数据表预热缓存、刷新历史推荐收益
+    """
+    print(f"\n{'=' * 60}")
+    print(f"🔄 开始自动筛选 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'=' * 60}")
+
+    # 定时筛选总是重新拉取：收盘落定后的一轮据此写入当日日线
+    all_stocks = get_all_stocks_data(use_cache=False)
+    print(f"📈 获取到 {len(all_stocks)} 只股票数据")
+    output = board_screen(all_stocks, get_margin_trading_info, get_board_type, get_industry)
+    result = output["data"]
+    boards = output["board_distribution"]
+    print(f"✅ 筛选完成：{len(all_stocks)} → {len(result)} 只")
+    print(
+        f"📊 板块分布：沪市{boards['sh_count']}只 | 深市{boards['sz_count']}只 | 创业板{boards['cyb_count']}只"
+    )
+    print(
+        f"🏭 行业分布：{' | '.join(f'{k}({v}只)' for k, v in output['industry_distribution'].items())}"
+    )
+
+    # 记录筛选历史（结果只保留最新一份，历史保存在 SQLite）
+    try:
+        history_store.record_run(result, strategy="simple", source="scheduler")
+    except Exception as e:
+        print(f"⚠️ 记录筛选历史失败：{e}")
+
+    # 数据表写入预热层，重启后可直接复用（后台线程合并写盘）
+    schedule_persist()
+
+    # 每日增量刷新历史推荐收益
+    try:
+        updated = performance_tracker.update_from_snapshot(all_stocks, snapshot_time(all_stocks))
+        print(f"📈 收益跟踪已刷新：{updated} 条")
+    except Exception as e:
+        print(f"⚠️ 更新收益跟踪失败：{e}")
+    print(f"{'=' * 60}\n")
+    return output
+
+
+# 定时筛选结果：内存中按版本发布，原子写盘供重启恢复；
+# 文件被独立 scheduler.py 或其他 worker 替换时按 inode/mtime 重新加载
+screening_results = ResultStore(path=config.SCREENING_RESULT_FILE or None)
+# 多进程部署（uvicorn --workers N、独立 scheduler.py）时只由持有结果文件锁的进程定时筛选，
+# 与是否配置共享快照无关，避免重复写入筛选历史、收益跟踪和结果文件
+is_screening_runner = single_runner(
+    config.SCREENING_RESULT_FILE + ".lock" if config.SCREENING_RESULT_FILE else None
+)
+screening_scheduler = ScreeningScheduler(
+    run_simple_screen,
+    screening_results,
+    interval=config.SCHEDULE_INTERVAL_MINUTES * 60,
+    should_run=is_screening_runner,
+)
@@ -0,0 +1,90 @@
+import asyncio, os, sys, time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from services.ai_enrichment import (
+    AI_STATUS_DONE,
+    AI_STATUS_FAILED,
+    AI_STATUS_PENDING,
+    AIEnrichmentManager,
+    enrichment_job_id,
+)
+
+
+def test_background_job_fills_results_and_dedupes():
+    manager = AIEnrichmentManager()
+    job_id = enrichment_job_id("screen:balanced:test-dedupe")
+    calls, written = [], []
+    release = None
+
+    async def analyze():
+        calls.append(1)
+        await release.wait()
+        return {"600001": "后台分析"}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        state = manager.submit(job_id, analyze,
+                               on_done=lambda done, status: written.append((done, status)),
+                               initial={"000002": "缓存命中"})
+        assert state["status"] == AI_STATUS_PENDING
+        # 进行中的任务不重复提交
+        assert manager.submit(job_id, analyze)["status"] == AI_STATUS_PENDING
+        waiting = await manager.wait(job_id, timeout=0.01)
+        assert waiting["status"] == AI_STATUS_PENDING
+        release.set()
+        return await manager.wait(job_id, timeout=1)
+
+    final = asyncio.run(scenario())
+    assert final["status"] == AI_STATUS_DONE
+    assert final["analyses"] == {"000002": "缓存命中", "600001": "后台分析"}
+    assert written == [(final["analyses"], AI_STATUS_DONE)]
+    assert len(calls) == 1
+
+
+def test_job_timeout_marks_failed():
+    manager = AIEnrichmentManager(timeout=0.01)
+    job_id = enrichment_job_id("screen:balanced:test-timeout")
+
+    async def analyze():
+        await asyncio.sleep(1)
+
+    written = []
+
+    async def scenario():
+        manager.submit(job_id, analyze, on_done=lambda done, status: written.append(status))
+        return await manager.wait(job_id, timeout=1)
+
+    assert asyncio.run(scenario())["status"] == AI_STATUS_FAILED
+    # 失败也回调，筛选缓存不会停留在 pending
+    assert written == [AI_STATUS_FAILED]
+
+
+def test_job_id_changes_with_selected_codes():
+    key = "screen:balanced:test-codes"
+    assert enrichment_job_id(key, ["600001", "000002"]) == enrichment_job_id(key, ["000002", "600001"])
+    assert enrichment_job_id(key, ["600001", "000002"]) != enrichment_job_id(key, ["600001", "000003"])
+
+
+def test_failed_job_is_written_back_to_screen_cache(tmp_path, monkeypatch):
+    from core.cache import memory_cache
+    from core.disk_cache import DiskCache
+    from services import ai_screening
+
+    monkeypatch.setattr(ai_screening, "screen_cache", DiskCache(str(tmp_path)))
+    key = "screen:balanced:test-writeback"
+    job_id = enrichment_job_id(key, ["600001"])
+    entry = {"data": [{"code": "600001"}], "ai_status": AI_STATUS_PENDING, "ai_job_id": job_id}
+    memory_cache.set("screen", key, (entry, time.time()), ttl=60)
+
+    # 旧任务（另一批入选股票）结束时不覆盖新条目
+    ai_screening.apply_ai_analyses(key, {}, AI_STATUS_FAILED, enrichment_job_id(key, ["000002"]))
+    assert memory_cache.get("screen", key)[0]["ai_status"] == AI_STATUS_PENDING
+
+    ai_screening.apply_ai_analyses(key, {}, AI_STATUS_FAILED, job_id)
+    assert memory_cache.get("screen", key)[0]["ai_status"] == AI_STATUS_FAILED
+    memory_cache.delete("screen", key)
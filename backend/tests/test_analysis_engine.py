@@ -0,0 +1,66 @@
+import os, sys, time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from services.analysis_engine import (
+    ANALYSIS_SOURCE_LLM,
+    ANALYSIS_SOURCE_RULE,
+    analyze_candidates,
+    generate_analysis,
+)
+
+
+BANDS = {
+    "margin": "strong_in",
+    "change": "pullback",
+    "volume": "perfect",
+    "market_cap": "prime",
+    "capital": "weak_in",
+    "turnover": "ideal",
+}
+
+
+def _stock(**overrides):
+    stock = {
+        "code": "600001",
+        "name": "甲",
+        "price": 10.0,
+        "change_percent": -0.3,
+        "volume_ratio": 1.8,
+        "score": 78,
+        "risk_level": "low",
+        "trade_points": {"buy_price": 9.95, "stop_loss": 9.45, "target_price": 10.9},
+        "score_bands": BANDS,
+    }
+    stock.update(overrides)
+    return stock
+
+
+def test_generate_analysis_uses_bands_trade_points_and_market():
+    text = generate_analysis(_stock(), BANDS, "conservative", {"status": "sideways"})
+    assert text.startswith("小幅回调-0.3%")
+    assert "主力资金小幅流入" in text and "融资客加仓明显" in text
+    assert "保守型" in text
+    assert "大盘震荡" in text and "止损9.45元" in text
+
+    risky = generate_analysis(
+        _stock(risk_level="high", change_percent=8.2),
+        dict(BANDS, change="overheated"),
+    )
+    assert "先观察" in risky and "止损" not in risky
+
+
+def test_analyze_candidates_keeps_llm_text_and_is_fast():
+    stocks = [_stock(code=f"{600000 + i}") for i in range(500)]
+    stocks[0].update(ai_analysis="LLM 文本", analysis_source=ANALYSIS_SOURCE_LLM)
+
+    start = time.perf_counter()
+    assert analyze_candidates(stocks, "balanced") == 499
+    elapsed = time.perf_counter() - start
+
+    assert stocks[0]["ai_analysis"] == "LLM 文本"
+    assert stocks[1]["analysis_source"] == ANALYSIS_SOURCE_RULE
+    assert elapsed < 0.5
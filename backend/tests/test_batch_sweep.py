@@ -0,0 +1,104 @@
+import os, sys
+import random
+import threading
+import time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from services.batch_sweep import backoff_delay, split_batch, sweep_batches
+
+CODES = [f"sz{i:06d}" for i in range(40)]
+
+
+def _sweep(codes, fetch, **kwargs):
+    options = dict(
+        batch_size=10,
+        retry_batch_size=5,
+        max_workers=4,
+        backoff_base=0.01,
+        backoff_max=0.02,
+        rng=random.Random(0),
+    )
+    options.update(kwargs)
+    return sweep_batches(codes, fetch, **options)
+
+
+def test_failed_batch_is_split_and_recovered():
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(batch):
+        with lock:
+            calls.append(list(batch))
+            first_try = sum(1 for c in calls if c[0] == batch[0]) == 1
+        if len(batch) == 10 and batch[0] == CODES[10]:
+            raise RuntimeError("timeout")
+        if len(batch) == 5 and batch[0] == CODES[15] and first_try:
+            raise RuntimeError("flaky")
+        return list(batch)
+
+    results, report = _sweep(CODES, fetch)
+
+    assert sorted(results) == CODES
+    assert report["completeness"] == 1.0 and report["missing_codes"] == 0
+    assert report["failed_batches"] == 2 and report["retries"] == 3
+    assert [len(c) for c in calls].count(5) == 3  # 失败批次按 retry_batch_size 拆分
+
+
+def test_budget_exhaustion_reports_incomplete_snapshot():
+    def fetch(batch):
+        if batch[0] in (CODES[0], CODES[10]) or len(batch) < 10:
+            raise RuntimeError("down")
+        return list(batch)
+
+    results, report = _sweep(CODES, fetch, retry_budget=1)
+
+    assert len(results) == 20
+    assert report["retries"] == 1
+    assert report["missing_codes"] == 20 and report["fetched_codes"] == 20
+    assert report["completeness"] == 0.5
+
+
+def test_attempt_limit_and_deadline_stop_retries():
+    def fetch(batch):
+        raise RuntimeError("down")
+
+    _, report = _sweep(CODES[:10], fetch, max_attempts=2)
+    assert report["retries"] == 2 and report["batches"] == 3
+    assert report["completeness"] == 0.0
+
+    _, report = _sweep(CODES[:10], fetch, deadline=0)
+    assert report["retries"] == 0 and report["missing_codes"] == 10
+
+
+def test_slow_and_failing_batches_do_not_block_others():
+    done = {}
+
+    def fetch(batch):
+        if batch[0] == CODES[0]:
+            time.sleep(0.3)
+        elif batch[0] == CODES[10] and len(batch) == 10:
+            raise RuntimeError("boom")
+        done[batch[0]] = time.perf_counter()
+        return list(batch)
+
+    start = time.perf_counter()
+    results, report = _sweep(CODES, fetch)
+
+    assert sorted(results) == CODES
+    # 重试在慢批次完成之前已经成功
+    assert done[CODES[10]] - start < 0.2 and done[CODES[15]] - start < 0.2
+    assert time.perf_counter() - start < 0.6
+
+
+def test_helpers():
+    assert split_batch(list("abcde"), 2) == [["a", "b"], ["c", "d"], ["e"]]
+    rng = random.Random(1)
+    for attempt in range(1, 6):
+        delay = backoff_delay(attempt, 0.5, 2.0, rng)
+        assert 0.5 * min(2.0, 0.5 * 2 ** (attempt - 1)) <= delay <= 1.5 * min(2.0, 0.5 * 2 ** (attempt - 1))
+    _, report = sweep_batches([], lambda batch: batch)
+    assert report["completeness"] == 1.0
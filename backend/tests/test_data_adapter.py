@@ -0,0 +1,49 @@
+import os, sys, threading, time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+import pandas as pd
+
+import data_adapter
+from data_adapter import AKShareAdapter
+
+
+def test_concurrent_kline_misses_load_once(monkeypatch):
+    adapter = AKShareAdapter()
+    adapter.cache.clear("akshare.kline")
+    calls = []
+
+    def stock_zh_a_hist(**kwargs):
+        calls.append(kwargs["symbol"])
+        time.sleep(0.05)
+        return pd.DataFrame({
+            "日期": ["2026-10-16"], "开盘": [10.0], "收盘": [10.5],
+            "最高": [10.8], "最低": [9.9], "成交量": [1000],
+        })
+
+    monkeypatch.setattr(data_adapter.ak, "stock_zh_a_hist", stock_zh_a_hist)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(adapter.get_kline_data("sz000001", days=5)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["000001"]
+    assert len(results) == 5 and all(r and r[0]["close"] == 10.5 for r in results)
+    adapter.cache.clear("akshare.kline")
+
+
+def test_empty_kline_is_not_cached(monkeypatch):
+    adapter = AKShareAdapter()
+    adapter.cache.clear("akshare.kline")
+    monkeypatch.setattr(data_adapter.ak, "stock_zh_a_hist", lambda **kwargs: pd.DataFrame())
+
+    assert adapter.get_kline_data("000002", days=5) == []
+    assert adapter.cache.get("akshare.kline", "000002_daily_5") is None
@@ -0,0 +1,54 @@
+import os, sys, time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.disk_cache import DiskCache, normalize_key, screen_cache_key
+
+
+def test_normalized_keys():
+    assert screen_cache_key("balanced", -2, 5, 1.5, 3, 160) == screen_cache_key(
+        "balanced", -2.0, 5.0, 1.5, 3.0, 160.0
+    )
+    assert normalize_key("a", y=1, x=2) == "a:x=2:y=1"
+
+
+def test_roundtrip_and_reload(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    value = {"data": [{"code": "600001", "kline": [{"close": 1.0}] * 500}]}
+    cache.set("k", value)
+    got, created_at = cache.get_entry("k")
+    assert got == value
+    assert time.time() - created_at < 5
+    assert cache.get("missing") is None
+    assert cache.get("k", max_age=-1) is None
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+    # 新实例从目录头信息重建索引
+    reopened = DiskCache(str(tmp_path))
+    assert reopened.stats()["entries"] == 1
+    assert reopened.get("k") == value
+
+
+def test_eviction_by_entries_bytes_and_age(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    small = DiskCache(str(tmp_path / "small"), max_bytes=600)
+    small.set("x", "x" * 300)
+    small.set("y", "y" * 300)
+    assert small.stats()["entries"] == 1
+    assert small.get("y") == "y" * 300
+
+    aged = DiskCache(str(tmp_path / "aged"), max_age=0)
+    aged.set("old", 1)
+    time.sleep(0.01)
+    aged.set("new", 2)
+    assert aged.stats()["entries"] <= 1
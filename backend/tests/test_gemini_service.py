@@ -1,13 +1,16 @@
 from unittest.mock import patch
-import os, sys
+import asyncio, os, sys
 
-# Ensure project root on PYTHONPATH for local imports
+# Ensure project root and backend on PYTHONPATH for local imports
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-if ROOT not in sys.path:
-    sys.path.insert(0, ROOT)
+BACKEND = os.path.join(ROOT, "backend")
+for path in (ROOT, BACKEND):
+    if path not in sys.path:
+        sys.path.insert(0, path)
 
 from backend.services.gemini_service import GeminiService
 from backend.models.gemini_2_0_flash import GeminiFlashResponse
+from benchmarks.llm_stub import LLMStubServer
 
 
 def test_gemini_service_success():
@@ -49,3 +52,38 @@ def test_gemini_service_failure():
         resp = svc.analyze("test input")
         assert resp.success is False
         assert "error" in (resp.details or {})
+
+
+def test_analyze_many_dedupes_caches_and_bounds_concurrency():
+    with LLMStubServer(latency=0.05) as stub:
+        svc = GeminiService(endpoint=stub.gemini_url, api_key="k", max_concurrency=2)
+        texts = [f"候选{i}" for i in range(6)] + ["候选0", "候选1"]
+
+        async def scenario():
+            first = await svc.analyze_many(texts)
+            second = await svc.analyze_many(texts[:3])
+            await svc.aclose()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert [r.success for r in first] == [True] * 8
+        assert first[6] == first[0] and second[2] == first[2]
+        # 重复文本合并为一次请求，第二轮全部命中缓存
+        assert stub.stats["requests"] == 6
+        assert stub.stats["peak_concurrency"] <= 2
+        assert svc.cache_stats()["hits"] >= 3
+
+
+def test_analyze_many_does_not_cache_failures():
+    with LLMStubServer(latency=0.0, error_rate=1.0) as stub:
+        svc = GeminiService(endpoint=stub.gemini_url, api_key="k")
+
+        async def scenario():
+            results = await svc.analyze_many(["a", "a"])
+            results += await svc.analyze_many(["a"])
+            await svc.aclose()
+            return results
+
+        results = asyncio.run(scenario())
+        assert [r.success for r in results] == [False] * 3
+        assert stub.stats["requests"] == 2
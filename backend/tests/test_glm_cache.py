@@ -0,0 +1,119 @@
+import os, sys
+from datetime import date
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+import glm_service
+from core.cache import memory_cache
+from core.disk_cache import DiskCache
+from glm_service import GLMService, analysis_cache_key
+
+
+STOCK = {
+    "code": "600001",
+    "name": "甲",
+    "price": 10.00,
+    "change_percent": 2.1,
+    "volume_ratio": 1.9,
+    "market_cap": 80,
+    "score": 82,
+}
+
+
+def test_cache_key_buckets_features():
+    key = analysis_cache_key(STOCK, "balanced", trade_date="2026-03-02")
+    near = dict(STOCK, price=10.01, change_percent=2.2, score=81)
+    far = dict(STOCK, change_percent=4.0)
+    assert analysis_cache_key(near, "balanced", trade_date="2026-03-02") == key
+    assert analysis_cache_key(far, "balanced", trade_date="2026-03-02") != key
+    assert analysis_cache_key(STOCK, "aggressive", trade_date="2026-03-02") != key
+    assert analysis_cache_key(STOCK, "balanced", trade_date="2026-03-03") != key
+
+
+
+def test_cache_key_defaults_to_quote_date(monkeypatch):
+    class _Weekend:
+        # 周末：行情仍属于上周五
+        @staticmethod
+        def quote_date():
+            return date(2026, 3, 6)
+
+    monkeypatch.setattr(glm_service, "trading_calendar", _Weekend())
+    assert analysis_cache_key(STOCK, "balanced") == analysis_cache_key(
+        STOCK, "balanced", trade_date="2026-03-06"
+    )
+
+def test_analyze_stock_hits_cache_without_api_call(tmp_path, monkeypatch):
+    monkeypatch.setattr(glm_service, "ai_response_cache", DiskCache(str(tmp_path)))
+    memory_cache.clear("glm")
+
+    service = GLMService("test-key")
+    service.enabled = True
+    calls = []
+
+    def fake_call(prompt, max_tokens, temperature, timeout=15):
+        calls.append(prompt)
+        return "量价配合良好"
+
+    monkeypatch.setattr(service, "_call_locked", fake_call)
+
+    assert service.analyze_stock(STOCK) == "量价配合良好"
+    assert service.analyze_stock(dict(STOCK, price=10.01)) == "量价配合良好"
+    assert len(calls) == 1
+
+    # 内存层失效后从磁盘层命中（模拟进程重启）
+    memory_cache.clear("glm")
+    assert service.analyze_stock(STOCK) == "量价配合良好"
+    assert len(calls) == 1
+    memory_cache.clear("glm")
+
+
+def test_parse_batch_response_validates_codes():
+    text = '```json\n{"stocks": {"600001": " 走势稳健 ", "999999": "多余", "000002": ""},' \
+           ' "market_emotion": "情绪回暖", "risk_warning": 3}\n```'
+    parsed = glm_service.parse_batch_response(text, ["600001", "000002"])
+    assert parsed["stocks"] == {"600001": "走势稳健"}
+    assert parsed["market_emotion"] == "情绪回暖"
+    assert parsed["risk_warning"] is None
+    assert glm_service.parse_batch_response("不是JSON", ["600001"])["stocks"] == {}
+
+
+def test_prompts_tolerate_missing_values():
+    # 行情缺字段（None）时按 0 填充，不因格式化失败丢掉整批分析
+    stock = {"code": "600001", "name": None, "price": None, "change_percent": None, "score": None}
+    prompt = glm_service.build_batch_prompt(
+        [stock], "balanced", emotion_data={"score": None, "rise_ratio": None}
+    )
+    assert "代码600001 未知：价格0.00元" in prompt and "情绪指数0分" in prompt
+    assert "当前价格：0.00元" in GLMService._stock_prompt(stock, "balanced")
+    assert "平均涨幅：0.00%" in GLMService._emotion_prompt({"avg_change": None})
+
+
+def test_analyze_batch_single_request_with_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(glm_service, "ai_response_cache", DiskCache(str(tmp_path)))
+    memory_cache.clear("glm")
+
+    service = GLMService("test-key")
+    prompts = []
+
+    def fake_call(prompt, max_tokens, temperature, timeout=15):
+        prompts.append(prompt)
+        if "只输出一个 JSON" in prompt:
+            # 批量结果漏掉了第二只股票
+            return '{"stocks": {"600001": "批量分析"}}'
+        return "单独分析"
+
+    monkeypatch.setattr(service, "_call_locked", fake_call)
+
+    second = dict(STOCK, code="000002", name="乙")
+    result = service.analyze_batch([STOCK, second])
+    assert result["stocks"] == {"600001": "批量分析", "000002": "单独分析"}
+    assert len(prompts) == 2
+
+    # 两只股票都已缓存，再次批量分析不发请求
+    assert service.analyze_batch([STOCK, second])["stocks"]["000002"] == "单独分析"
+    assert len(prompts) == 2
+    memory_cache.clear("glm")
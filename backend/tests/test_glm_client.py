@@ -0,0 +1,95 @@
+import asyncio, os, sys, threading
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from services.glm_client import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_PREHEAT,
+    AsyncGLMClient,
+    TokenBucket,
+)
+
+
+def test_token_bucket_reserves_without_holding_lock():
+    bucket = TokenBucket(rate=20, capacity=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    # 容量内的突发不等待，之后按 1/rate 间隔排开
+    assert waits[0] == 0 and waits[1] == 0
+    assert 0.04 < waits[2] <= 0.05
+    assert 0.09 < waits[3] <= 0.1
+    # 预约只持锁计算，锁立即释放
+    assert not bucket._lock.locked()
+
+
+def _client(record, delay=0.0, request_lock=None):
+    client = AsyncGLMClient(
+        "key", "http://glm.invalid", "glm-4-flash", TokenBucket(rate=1000), request_lock=request_lock
+    )
+
+    async def fake_post(job):
+        record.append(job.payload["messages"][0]["content"])
+        await asyncio.sleep(delay)
+        return "ok:" + job.payload["messages"][0]["content"]
+
+    client._post = fake_post
+    return client
+
+
+def test_interactive_requests_run_before_preheat():
+    record = []
+
+    async def scenario():
+        client = _client(record, delay=0.01)
+        # 第一个请求占住工作协程，其余请求在队列中按优先级排序
+        first = asyncio.ensure_future(client.complete("busy", priority=PRIORITY_PREHEAT))
+        await asyncio.sleep(0)
+        jobs = [
+            asyncio.ensure_future(client.complete("preheat", priority=PRIORITY_PREHEAT)),
+            asyncio.ensure_future(client.complete("user", priority=PRIORITY_INTERACTIVE)),
+        ]
+        results = await asyncio.gather(first, *jobs)
+        await client.aclose()
+        return results
+
+    assert asyncio.run(scenario()) == ["ok:busy", "ok:preheat", "ok:user"]
+    assert record == ["busy", "user", "preheat"]
+
+
+def test_cancelled_requests_are_dropped():
+    record = []
+
+    async def scenario():
+        client = _client(record, delay=0.02)
+        busy = asyncio.ensure_future(client.complete("busy"))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(client.complete("gone"))
+        await asyncio.sleep(0)
+        queued.cancel()
+        assert await busy == "ok:busy"
+        assert await client.complete("next") == "ok:next"
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert record == ["busy", "next"]
+
+
+def test_async_requests_wait_for_sync_request_lock():
+    record = []
+    lock = threading.Lock()
+
+    async def scenario():
+        client = _client(record, request_lock=lock)
+        lock.acquire()  # 同步接口的请求进行中
+        job = asyncio.ensure_future(client.complete("async"))
+        await asyncio.sleep(0.05)
+        assert record == [] and not job.done()
+        lock.release()
+        assert await job == "ok:async"
+        assert not lock.locked()
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert record == ["async"]
@@ -0,0 +1,56 @@
+import os, sys
+from datetime import datetime
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.history import ScreeningHistoryStore
+
+
+def _pick(code, name, score):
+    return {
+        "code": code,
+        "name": name,
+        "price": 10.0,
+        "change_percent": 1.2,
+        "volume_ratio": 1.8,
+        "market_cap": 80.0,
+        "score": score,
+        "board_type": {"type": "sh"},
+        "trade_points": {"buy_price": 10.0, "stop_loss": 9.5, "target_price": 10.6},
+        "reasons": ["温和上涨"],
+    }
+
+
+def test_history_store_queries(tmp_path):
+    store = ScreeningHistoryStore(str(tmp_path / "history.db"))
+    store.record_run(
+        [_pick("600001", "甲", 80), _pick("000002", "乙", 70)],
+        strategy="balanced",
+        source="realtime",
+        criteria={"strategy": "balanced"},
+        run_at=datetime(2026, 3, 2, 10, 0),
+    )
+    store.record_run(
+        [_pick("600001", "甲", 75)],
+        strategy="aggressive",
+        source="realtime",
+        run_at=datetime(2026, 3, 3, 10, 0),
+    )
+
+    by_code = store.get_picks_by_code("600001")
+    assert [p["trade_date"] for p in by_code] == ["2026-03-03", "2026-03-02"]
+    assert by_code[1]["stop_loss"] == 9.5
+    assert by_code[1]["reasons"] == ["温和上涨"]
+    assert len(store.get_picks_by_code("600001", strategy="balanced")) == 1
+
+    by_date = store.get_picks_by_date("2026-03-02")
+    assert [p["code"] for p in by_date] == ["600001", "000002"]
+    assert [p["rank"] for p in by_date] == [1, 2]
+
+    runs = store.list_runs(trade_date="2026-03-02")
+    assert runs[0]["pick_count"] == 2
+    assert runs[0]["criteria"] == {"strategy": "balanced"}
+    store.close()
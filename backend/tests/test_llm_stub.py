@@ -0,0 +1,64 @@
+import os, sys, threading
+
+# Ensure backend and project root on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ROOT = os.path.dirname(BACKEND)
+for path in (BACKEND, ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from benchmarks.fixtures import synthetic_universe
+from benchmarks.llm_stub import LLMStubServer
+from backend.services.gemini_service import GeminiService
+from glm_service import GLMService, build_batch_prompt, parse_batch_response
+from services.glm_client import TokenBucket
+
+
+def _service(url):
+    service = GLMService("stub-key")
+    service.base_url = url
+    service.rate_limiter = TokenBucket(rate=1000)
+    return service
+
+
+def test_glm_chat_and_batch_against_stub():
+    with LLMStubServer(latency=0.01) as stub:
+        service = _service(stub.glm_url)
+        assert service.call("你好") == "走势平稳，量价配合良好，适合轻仓关注"
+
+        stocks = synthetic_universe(3)
+        text = service.call(build_batch_prompt(stocks, "balanced"))
+        parsed = parse_batch_response(text, [s["code"] for s in stocks])
+        assert sorted(parsed["stocks"]) == sorted(s["code"] for s in stocks)
+        assert stub.stats["ok"] == 2
+
+
+def test_stub_errors_and_rate_limits():
+    with LLMStubServer(latency=0.0, error_rate=1.0) as stub:
+        assert _service(stub.glm_url).call("你好") is None
+        assert stub.stats["errors"] == 1
+
+    with LLMStubServer(latency=0.2, max_concurrency=1) as stub:
+        # 两个独立实例同时请求，超出并发上限的一个被 429 拒绝
+        services = [_service(stub.glm_url) for _ in range(2)]
+        results = []
+        threads = [threading.Thread(target=lambda s=s: results.append(s.call("你好")))
+                   for s in services]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert stub.stats["rate_limited"] == 1
+        assert sorted(results, key=str) == [None, "走势平稳，量价配合良好，适合轻仓关注"]
+
+
+def test_gemini_against_stub():
+    with LLMStubServer(latency=0.0) as stub:
+        svc = GeminiService(endpoint=stub.gemini_url, api_key="k")
+        resp = svc.analyze("test input")
+        assert resp.success is True
+        assert 50 <= resp.score < 100
+
+    with LLMStubServer(latency=0.0, rate_limit_rate=1.0) as stub:
+        resp = GeminiService(endpoint=stub.gemini_url, api_key="k").analyze("x")
+        assert resp.success is False
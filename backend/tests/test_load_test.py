@@ -0,0 +1,48 @@
+import os, sys
+
+import pytest
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+import requests
+
+from benchmarks.fixtures import synthetic_universe, tencent_payload
+from benchmarks.load_test import parse_mix, summarize
+from benchmarks.upstream_stub import QuoteStubServer
+
+
+def test_parse_mix():
+    assert parse_mix("realtime=3, ping") == {"realtime": 3.0, "ping": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
+    with pytest.raises(ValueError):
+        parse_mix("ping=0")
+
+
+def test_summarize_percentiles_and_errors():
+    latencies = {"ping": [float(i) for i in range(1, 101)], "hot": []}
+    errors = {"hot": {"http_500": 2}}
+    report = summarize(latencies, errors, duration=10.0)
+
+    assert report["ping"]["requests"] == 100
+    assert report["ping"]["p50"] == 51.0 and report["ping"]["p99"] == 99.0
+    assert report["ping"]["max"] == 100.0 and report["ping"]["rps"] == 10.0
+    assert report["hot"]["errors"] == 2 and report["hot"]["p50"] is None
+    assert report["hot"]["error_kinds"] == {"http_500": 2}
+    assert report["total"]["requests"] == 102 and report["total"]["errors"] == 2
+
+
+def test_quote_stub_serves_tencent_format():
+    stocks = synthetic_universe(5)
+    with QuoteStubServer(payload=tencent_payload(stocks), latency=0.0) as stub:
+        codes = [f"{'sh' if s['code'].startswith('6') else 'sz'}{s['code']}" for s in stocks[:2]]
+        response = requests.get(stub.quote_url + ",".join(codes + ["sh999999"]), timeout=5)
+        lines = response.content.decode("gbk").splitlines()
+
+    assert response.status_code == 200
+    assert [line[2 : line.index("=")] for line in lines] == codes + ["pv_none_match"]
+    assert lines[0].split("~")[2] == stocks[0]["code"]
+    assert stub.stats["ok"] == 1 and stub.stats["codes"] == 3
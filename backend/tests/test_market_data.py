@@ -0,0 +1,54 @@
+import os, sys
+import time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.cache import memory_cache
+from services import market_data
+
+
+class _Session:
+    """交易时段内：不延长任何缓存"""
+
+    @staticmethod
+    def expires_at(created_at, default_ttl):
+        return created_at + default_ttl
+
+    @staticmethod
+    def cache_ttl(default_ttl, at=None):
+        return default_ttl
+
+
+def _setup(monkeypatch, warm_age):
+    monkeypatch.setattr(market_data, "trading_calendar", _Session())
+    monkeypatch.setattr(market_data, "shared_snapshots", None)
+    monkeypatch.setattr(market_data, "persist_value", lambda name, value: None)
+    monkeypatch.setattr(market_data, "_refresh_stock_data_in_background", lambda: None)
+    monkeypatch.setattr(market_data, "_fetch_all_stocks_data", lambda: [{"code": "sh600000", "price": 2.0}])
+    memory_cache.clear("stock_data")
+    memory_cache.set(
+        "stock_data.warm",
+        "all",
+        [{"code": "sh600000", "price": 1.0}],
+        ttl=3600,
+        created_at=time.time() - warm_age,
+    )
+
+
+def test_recent_warm_snapshot_is_served_while_refreshing(monkeypatch):
+    _setup(monkeypatch, warm_age=30)
+    assert market_data.get_all_stocks_data()[0]["price"] == 1.0
+    # 需要最新行情的调用方（定时筛选、收益跟踪）不走预热快照
+    assert market_data.get_all_stocks_data(allow_stale=False)[0]["price"] == 2.0
+    memory_cache.clear("stock_data")
+    memory_cache.clear("stock_data.warm")
+
+
+def test_stale_warm_snapshot_waits_for_fresh_data(monkeypatch):
+    _setup(monkeypatch, warm_age=market_data.config.STOCK_DATA_MAX_STALE + 60)
+    assert market_data.get_all_stocks_data()[0]["price"] == 2.0
+    memory_cache.clear("stock_data")
+    memory_cache.clear("stock_data.warm")
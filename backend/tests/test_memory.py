@@ -0,0 +1,87 @@
+import os, sys
+import tracemalloc
+
+import pytest
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.cache import MemoryCache
+from core.memory import (
+    MemoryGuard,
+    TracemallocDiff,
+    apply_namespace_budgets,
+    parse_budgets,
+    process_rss_bytes,
+)
+
+
+def test_parse_and_apply_budgets():
+    budgets = parse_budgets("stock_data=64, akshare.kline=0.5,bad,screen=x")
+    assert budgets == {"stock_data": 64 * 1024 * 1024, "akshare.kline": 512 * 1024}
+
+    cache = MemoryCache(max_bytes=10**9)
+    for i in range(10):
+        cache.set("kline", i, None, size=100)
+    apply_namespace_budgets({"kline": 350}, cache)
+    stats = cache.stats()["namespaces"]["kline"]
+    assert stats["bytes"] == 300 and stats["max_bytes"] == 350 and stats["evictions"] == 7
+
+
+def test_shrink_evicts_lru_across_namespaces():
+    cache = MemoryCache(max_bytes=10**9)
+    cache.set("a", 1, "x", size=100)
+    cache.set("b", 1, "y", size=100)
+    cache.set("a", 2, "z", size=100)
+    cache.get("a", 1)  # 变为最近使用
+
+    assert cache.shrink(150) == 200
+    assert cache.get("a", 1) == "x"
+    assert cache.get("b", 1) is None and cache.get("a", 2) is None
+
+
+def test_guard_evicts_over_budget_with_cooldown():
+    cache = MemoryCache(max_bytes=10**9)
+    for i in range(8):
+        cache.set("stock_data", i, None, size=1000)
+    rss = {"value": 5000}
+    guard = MemoryGuard(cache, rss_budget=10_000, shrink_ratio=0.25, cooldown=60, rss_reader=lambda: rss["value"])
+
+    assert guard.check() == 0
+    rss["value"] = 10_500
+    assert guard.check() == 2000  # 至少淘汰 25% 缓存
+    assert cache.stats()["bytes"] == 6000 and guard.triggers == 1
+    assert guard.check() == 0  # 冷却中
+
+    guard.last_trigger -= 61
+    rss["value"] = 14_000
+    assert guard.check() == 4000
+    assert guard.stats()["freed_bytes"] == 6000
+
+
+def test_guard_disabled_without_budget():
+    cache = MemoryCache()
+    cache.set("a", 1, "x", size=10)
+    assert MemoryGuard(cache, rss_budget=0, rss_reader=lambda: 10**12).check() == 0
+    assert process_rss_bytes() is None or process_rss_bytes() > 0
+
+
+def test_tracemalloc_diff_reports_growth():
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc 已由外部开启")
+    diff = TracemallocDiff()
+    with pytest.raises(RuntimeError):
+        diff.diff()
+
+    assert diff.snapshot(frames=5)["tracing"] is True
+    retained = [bytearray(1024) for _ in range(200)]
+    report = diff.diff(limit=5)
+    assert report["total_diff"] >= 200 * 1024
+    assert report["top"][0]["location"].startswith(__file__)
+    assert report["top"][0]["count_diff"] >= 200
+
+    diff.stop()
+    assert not tracemalloc.is_tracing() and diff.status()["baseline_at"] is None
+    del retained
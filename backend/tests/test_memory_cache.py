@@ -0,0 +1,78 @@
+import os, sys, threading, time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.cache import MemoryCache
+
+
+def test_ttl_and_stats():
+    cache = MemoryCache()
+    cache.configure_namespace("fast", ttl=0.05)
+    cache.set("fast", "a", 1)
+    cache.set("slow", "a", 2)
+    assert cache.get("fast", "a") == 1
+    time.sleep(0.06)
+    assert cache.get("fast", "a") is None
+    assert cache.get("slow", "a") == 2
+
+    stats = cache.stats()["namespaces"]["fast"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = MemoryCache(max_entries=2)
+    cache.set("ns", 1, "a")
+    cache.set("ns", 2, "b")
+    cache.get("ns", 1)
+    cache.set("ns", 3, "c")
+    assert cache.get("ns", 2) is None
+    assert cache.get("ns", 1) == "a"
+    assert cache.stats()["namespaces"]["ns"]["evictions"] == 1
+
+    budget = MemoryCache()
+    budget.configure_namespace("big", max_bytes=1000)
+    budget.set("big", "x", "x", size=600)
+    budget.set("big", "y", "y", size=600)
+    assert budget.get("big", "x") is None
+    assert budget.stats()["namespaces"]["big"]["bytes"] == 600
+
+
+def test_get_or_load_coalesces_concurrent_loads():
+    cache = MemoryCache()
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("ns", "k", loader)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    stats = cache.stats()["namespaces"]["ns"]
+    assert stats["loads"] == 1
+    assert stats["coalesced"] == 4
+
+
+def test_get_or_load_skips_uncacheable_results():
+    cache = MemoryCache()
+    assert cache.get_or_load("ns", "k", lambda: [], cache_if=bool) == []
+    assert cache.get_or_load("ns", "k", lambda: [1], cache_if=bool) == [1]
+    assert cache.get("ns", "k") == [1]
@@ -0,0 +1,69 @@
+import os, sys
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+import pytest
+
+from core.cache import MemoryCache
+from core.metrics import (
+    CACHE_COALESCED,
+    CACHE_HITS,
+    UPSTREAM_ERRORS,
+    UPSTREAM_SECONDS,
+    MetricsRegistry,
+    collect_cache_metrics,
+    track_upstream,
+)
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests_total", "请求数", ["source"])
+    latency = registry.histogram("demo_seconds", "耗时", ["stage"], buckets=(0.1, 1))
+    size = registry.gauge("demo_size", "大小")
+
+    requests.inc(source='te"st')
+    requests.inc(2, source='te"st')
+    latency.observe(0.05, stage="filter")
+    latency.observe(0.5, stage="filter")
+    latency.observe(3, stage="filter")
+    size.set(42)
+
+    text = registry.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{source="te\\"st"} 3' in text
+    assert 'demo_seconds_bucket{stage="filter",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="filter",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="filter",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="filter"} 3' in text
+    assert "demo_size 42" in text
+
+    with pytest.raises(ValueError):
+        requests.inc(stage="filter")
+
+
+def test_track_upstream_counts_errors():
+    before = UPSTREAM_ERRORS.get(source="test-upstream")
+    with track_upstream("test-upstream"):
+        pass
+    with pytest.raises(RuntimeError):
+        with track_upstream("test-upstream"):
+            raise RuntimeError("boom")
+
+    assert UPSTREAM_ERRORS.get(source="test-upstream") == before + 1
+    assert UPSTREAM_SECONDS.snapshot(source="test-upstream")["count"] >= 2
+
+
+def test_collect_cache_metrics_mirrors_namespace_stats():
+    cache = MemoryCache()
+    cache.set("test.metrics", "a", 1)
+    cache.get("test.metrics", "a")
+    cache.get("test.metrics", "missing")
+    cache._ns("test.metrics").coalesced += 2
+
+    collect_cache_metrics(cache)
+    assert CACHE_HITS.get(namespace="test.metrics") == 1
+    assert CACHE_COALESCED.get(namespace="test.metrics") == 2
@@ -0,0 +1,119 @@
+import os, sys
+from datetime import datetime
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.history import ScreeningHistoryStore
+from core.trading_calendar import CST, TradingCalendar
+from services import performance_tracker
+from services.performance_tracker import PerformanceTracker, evaluate_pick
+
+
+def _bar(date, close, high=None, low=None):
+    return {
+        "trade_date": date,
+        "open": close,
+        "high": high or close,
+        "low": low or close,
+        "close": close,
+        "volume": 1000,
+    }
+
+
+def test_evaluate_pick_stop_before_target():
+    pick = {"price": 10.0, "buy_price": 10.0, "stop_loss": 9.5, "target_price": 10.5}
+    bars = [_bar("d1", 9.8, low=9.4), _bar("d2", 10.6, high=10.7)]
+    perf = evaluate_pick(pick, bars)
+    assert perf["return_1d"] == -2.0
+    assert perf["return_3d"] is None
+    assert perf["outcome"] == "stop"
+    assert perf["hit_target"] == 0
+    assert perf["complete"] == 0
+
+
+def test_tracker_incremental_refresh(tmp_path):
+    store = ScreeningHistoryStore(str(tmp_path / "history.db"))
+    tracker = PerformanceTracker(store)
+    pick = {
+        "code": "600001",
+        "name": "甲",
+        "price": 10.0,
+        "score": 80,
+        "trade_points": {"buy_price": 10.0, "stop_loss": 9.5, "target_price": 10.5},
+    }
+    store.record_run([pick], strategy="balanced", source="realtime",
+                     run_at=datetime(2026, 3, 2, 10, 0))
+
+    closes = [10.2, 10.1, 10.3, 10.6, 10.8]
+    for day, close in zip(range(3, 8), closes):
+        tracker.record_snapshot(
+            [{"code": "600001", "open": close, "high": close, "low": close,
+              "price": close, "volume": 1}],
+            trade_date=f"2026-03-0{day}",
+        )
+        if day == 3:
+            assert tracker.refresh() == 1
+    assert tracker.refresh() == 1
+    # 满 5 个交易日后不再重复计算
+    assert tracker.refresh() == 0
+
+    result = tracker.get_performance(strategy="balanced")
+    row = result["picks"][0]
+    assert row["return_1d"] == 2.0
+    assert row["return_5d"] == 8.0
+    assert row["outcome"] == "target"
+    summary = result["summary"][0]
+    assert summary["win_rate"] == 100.0
+    assert summary["target_hit_rate"] == 100.0
+    store.close()
+
+
+def _ts(day, hour, minute=0):
+    return datetime(2026, 10, day, hour, minute, tzinfo=CST).timestamp()
+
+
+def _quote(code, close):
+    return {"code": code, "open": close, "high": close, "low": close, "price": close, "volume": 1}
+
+
+def test_settled_snapshot_writes_and_corrects_close_bar(tmp_path, monkeypatch):
+    monkeypatch.setattr(performance_tracker, "trading_calendar", TradingCalendar(settle_seconds=300))
+    store = ScreeningHistoryStore(str(tmp_path / "history.db"))
+    tracker = PerformanceTracker(store)
+    pick = {"code": "600001", "name": "甲", "price": 10.0, "score": 80}
+    store.record_run([pick], strategy="balanced", source="scheduler",
+                     run_at=datetime(2026, 10, 12, 10, 0))
+    for day in (13, 14, 15, 16):
+        tracker.record_snapshot([_quote("600001", 10.0)], trade_date=f"2026-10-{day}")
+
+    # 盘中、收盘落定前拉取的快照不写入日线
+    tracker.update_from_snapshot([_quote("600001", 11.0)], _ts(19, 14, 30))
+    tracker.update_from_snapshot([_quote("600001", 11.0)], _ts(19, 15, 2))
+    tracker.update_from_snapshot([_quote("600001", 11.0)], None)
+    assert store.get_daily_bars(["600001"], "2026-10-16")["600001"] == []
+
+    tracker.update_from_snapshot([_quote("600001", 11.0)], _ts(19, 15, 5))
+    row = tracker.get_performance()["picks"][0]
+    assert (row["complete"], row["return_5d"]) == (1, 10.0)
+    # 之后的落定快照改写当日日线，已完成的推荐随之重新计算
+    tracker.update_from_snapshot([_quote("600001", 12.0)], _ts(19, 16))
+    assert tracker.get_performance()["picks"][0]["return_5d"] == 20.0
+    store.close()
+
+
+def test_suspended_picks_stop_tracking(tmp_path):
+    store = ScreeningHistoryStore(str(tmp_path / "history.db"))
+    tracker = PerformanceTracker(store)
+    store.record_run([{"code": "600002", "price": 10.0}], strategy="balanced", source="realtime",
+                     run_at=datetime(2026, 8, 3, 10, 0))
+    tracker.record_snapshot([_quote("600002", 10.5)], trade_date="2026-08-04")
+    tracker.record_snapshot([_quote("600003", 1.0)], trade_date="2026-10-16")
+
+    assert tracker.refresh() == 1
+    row = tracker.get_performance()["picks"][0]
+    assert (row["complete"], row["outcome"], row["return_1d"]) == (1, "expired", 5.0)
+    assert tracker.refresh() == 0  # 停牌超过 MAX_TRACKING_DAYS 不再重复计算
+    store.close()
@@ -0,0 +1,72 @@
+import marshal
+import os, sys
+import threading
+import time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.profiling import ProfileSession, StackSampler, render_flamegraph
+
+
+def _busy_loop(stop):
+    total = 0
+    while not stop.is_set():
+        total += sum(range(200))
+    return total
+
+
+def test_sampler_collapses_busy_thread_and_drops_idle():
+    stop, idle = threading.Event(), threading.Event()
+    busy = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    waiter = threading.Thread(target=idle.wait, name="idle-worker")
+    busy.start()
+    waiter.start()
+    try:
+        with StackSampler(interval=0.002) as sampler:
+            time.sleep(0.1)
+    finally:
+        stop.set()
+        idle.set()
+        busy.join()
+        waiter.join()
+
+    assert sampler.samples > 5
+    busy_stacks = [s for s in sampler.counts if s.startswith("busy-worker;")]
+    assert busy_stacks and all("_busy_loop (tests/test_profiling.py:" in s for s in busy_stacks)
+    assert not any(s.startswith("idle-worker;") for s in sampler.counts)
+    line = sampler.collapsed().splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_top_functions_and_flamegraph():
+    sampler = StackSampler()
+    sampler.counts.update({"main;a;b": 3, "main;a;c": 1, "main;a": 1})
+
+    top = sampler.top_functions()
+    assert top[0] == {"function": "b", "self_samples": 3, "self_pct": 60.0, "total_pct": 60.0}
+    assert {"function": "a", "self_samples": 1, "self_pct": 20.0, "total_pct": 100.0} in top
+
+    svg = render_flamegraph(sampler.counts, title="t<1>")
+    assert svg.startswith("<svg") and svg.rstrip().endswith("</svg>")
+    assert "t&lt;1&gt;（5 samples）" in svg
+    assert "<title>b — 3 samples, 60.0%</title>" in svg
+
+
+def test_profile_session_with_cprofile():
+    with ProfileSession(interval=0.002, cprofile=True) as session:
+        _busy_loop(_set_after(0.05))
+
+    summary = session.summary()
+    assert summary["samples"] > 0 and summary["duration_ms"] >= 50
+    assert "_busy_loop" in summary["cprofile"]
+    stats = marshal.loads(session.pstats_dump())
+    assert any(func[2] == "_busy_loop" for func in stats)
+
+
+def _set_after(seconds):
+    event = threading.Event()
+    threading.Timer(seconds, event.set).start()
+    return event
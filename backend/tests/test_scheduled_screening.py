@@ -0,0 +1,198 @@
+import os, sys
+import asyncio
+import json
+import time
+from datetime import datetime
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from services.scheduled_screening import ResultStore, ScreeningScheduler, single_runner
+from services.screening import board_screen
+
+
+def _payload(count=1):
+    return {"timestamp": datetime.now().isoformat(), "count": count, "data": [{"code": "sh600000"}] * count}
+
+
+def test_store_publishes_versions_and_persists_atomically(tmp_path):
+    path = tmp_path / "screening_result.json"
+    store = ResultStore(str(path))
+    assert store.latest is None and store.load() is None
+
+    first = store.publish(_payload(1))
+    second = store.publish(_payload(2))
+    assert (first.version, second.version) == (1, 2)
+    assert store.latest is second and first.payload["count"] == 1
+    assert json.loads(path.read_text(encoding="utf-8"))["version"] == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["screening_result.json"]  # 无残留临时文件
+
+    restored = ResultStore(str(path))
+    assert restored.load().version == 2 and restored.latest.payload["count"] == 2
+    assert restored.publish(_payload()).version == 3
+
+    path.write_text("{broken", encoding="utf-8")
+    assert ResultStore(str(path)).load() is None
+
+
+def test_store_reloads_only_when_file_is_replaced(tmp_path, monkeypatch):
+    path = str(tmp_path / "screening_result.json")
+    api = ResultStore(path, check_interval=0)
+    writer = ResultStore(path)  # 独立 scheduler.py / 其他 worker
+    assert api.current() is None
+
+    writer.publish(_payload(1))
+    assert api.current().version == 1 and api.reloads == 1
+
+    loads = []
+    original = json.load
+    monkeypatch.setattr(json, "load", lambda f: loads.append(1) or original(f))
+    for _ in range(5):
+        assert api.current().version == 1
+    assert loads == []  # 文件未变化：不重新解析
+
+    writer.publish(_payload(2))
+    assert api.current().payload["count"] == 2 and api.reloads == 2 and len(loads) == 1
+
+    own = api.publish(_payload(3))  # 自己写入的文件不触发重新加载
+    assert api.current() is own and api.reloads == 2
+
+    throttled = ResultStore(path, check_interval=60)
+    assert throttled.current().version == 3
+    writer.publish(_payload(4))
+    assert throttled.current().version == 3  # 间隔内不检查文件
+    throttled._checked_at -= 60
+    assert throttled.current().version == 4
+
+
+def test_scheduler_skips_timed_runs_when_not_elected():
+    calls = []
+    scheduler = ScreeningScheduler(
+        lambda: calls.append(1) or _payload(), ResultStore(), startup_delay=0, should_run=lambda: False
+    )
+
+    async def scenario():
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.05)
+        assert calls == [] and scheduler.skipped == 1
+        assert scheduler.trigger()  # 手动触发不受限制
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if calls:
+                break
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert calls == [1] and scheduler.store.latest.version == 1
+
+
+def test_single_runner_elects_one_process(tmp_path):
+    lock_path = str(tmp_path / "screening_result.json.lock")
+    first, second = single_runner(lock_path), single_runner(lock_path)  # 两个 worker
+    assert first() and first()
+    assert not second() and not second()
+    first.__self__.release()  # 持有者退出（锁随进程释放）
+    assert second() and not first()
+    assert single_runner(None)()  # 仅内存发布：总是执行
+
+
+def test_scheduler_runs_on_trigger_and_publishes():
+    calls = []
+
+    def job():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("upstream down")
+        return _payload(len(calls))
+
+    store = ResultStore()
+    scheduler = ScreeningScheduler(job, store, startup_delay=0)
+
+    async def scenario():
+        task = asyncio.create_task(scheduler.run())
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if store.latest is not None:
+                break
+        assert store.latest.version == 1
+        assert scheduler.next_run > time.time()  # 之后按交易时段等待
+
+        assert scheduler.trigger()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if scheduler.failures:
+                break
+        assert store.latest.version == 1 and "upstream down" in scheduler.last_error
+
+        assert scheduler.trigger()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if store.latest.version == 2:
+                break
+        task.cancel()
+
+    asyncio.run(scenario())
+    stats = scheduler.stats()
+    assert stats["runs"] == 3 and stats["failures"] == 1 and stats["last_error"] is None
+    assert stats["result"]["version"] == 2 and stats["result"]["count"] == 3
+
+
+def test_trigger_without_loop_runs_once():
+    calls = []
+    scheduler = ScreeningScheduler(lambda: calls.append(1) or _payload(), ResultStore())
+
+    async def scenario():
+        # 定时循环未启动：任务开始前的重复触发不会启动第二次筛选
+        assert scheduler.trigger()
+        assert not scheduler.trigger()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if not scheduler.running:
+                break
+        assert scheduler.trigger()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if not scheduler.running:
+                break
+
+    asyncio.run(scenario())
+    assert calls == [1, 1] and scheduler.store.latest.version == 2
+
+
+def test_board_screen_diversifies_without_mutating_snapshot():
+    def stock(code, change, name="测试"):
+        return {
+            "code": code,
+            "name": name,
+            "market_cap": 100,
+            "change_percent": change,
+            "volume_ratio": 2.0,
+        }
+
+    snapshot = [
+        stock("sh600001", 1.0),
+        stock("sh600002", 3.0),
+        stock("sz000001", 2.0),
+        stock("sz300001", 4.0, name="ST测试"),
+        stock("sh688001", 4.0),
+        stock("sz000002", 9.0),  # 涨幅超出范围
+    ]
+    boards = {"sh": "sh", "sz": "sz", "sz3": "cyb"}
+
+    def board_type(code):
+        key = "sz3" if code.startswith("sz3") else code[:2]
+        return {"type": boards[key], "allowed": True}
+
+    output = board_screen(
+        snapshot,
+        lambda code: {"is_margin_eligible": True},
+        board_type,
+        lambda name, code: "银行" if code.startswith("sh") else "券商",
+    )
+
+    assert [s["code"] for s in output["data"]] == ["sh600002", "sz000001", "sh600001"]
+    assert output["board_distribution"] == {"sh_count": 2, "sz_count": 1, "cyb_count": 0}
+    assert output["industry_distribution"] == {"银行": 2, "券商": 1}
+    assert "board_type" not in snapshot[0]
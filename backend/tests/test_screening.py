@@ -0,0 +1,58 @@
+import os, sys
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from services.screening import pre_rank, quick_filter, select_diversified, sort_by_strategy
+
+
+def _stock(code, name="样本", change=1.0, ratio=2.0, cap=80.0, **extra):
+    return dict(
+        code=code, name=name, change_percent=change, volume_ratio=ratio, market_cap=cap, **extra
+    )
+
+
+def test_quick_filter_counts_exclusions():
+    stocks = [
+        _stock("688001"),
+        _stock("600001", name="*ST样本"),
+        _stock("800001"),
+        _stock("600002", cap=300),
+        _stock("600003", change=8.0),
+        _stock("000001"),
+        None,
+    ]
+    passed, excluded = quick_filter(stocks, -2, 5, 1.5, 3.0, 160)
+
+    assert [s["code"] for s in passed] == ["000001"]
+    assert excluded == {"kcb": 1, "st": 1, "board": 1, "market_cap": 1, "criteria": 1}
+
+
+def test_pre_rank_keeps_best_candidates():
+    stocks = [_stock(f"6000{i:02d}", change=3.0, ratio=2.8) for i in range(60)]
+    stocks[59].update(change_percent=-1.0, volume_ratio=2.0)
+
+    ranked = pre_rank(stocks, 50)
+    assert len(ranked) == 50 and ranked[0]["code"] == "600059"
+    assert pre_rank(stocks[:10], 50) == stocks[:10]
+    assert all(set(s) == set(_stock("x")) for s in stocks)  # 不修改共享的行情快照
+
+
+def test_select_diversified_spreads_boards_and_industries():
+    def scored(code, board, industry, score):
+        return _stock(code, score=score, board_type={"type": board}, industry=industry)
+
+    stocks = [
+        scored("600001", "sh", "银行", 90),
+        scored("600002", "sh", "券商", 88),
+        scored("000001", "sz", "银行", 85),
+        scored("000002", "sz", "医药", 80),
+        scored("300001", "cyb", "医药", 70),
+    ]
+    assert sort_by_strategy(stocks, "balanced").startswith("平衡型")
+
+    picks, board_counts = select_diversified(stocks, 3)
+    assert [s["code"] for s in picks] == ["600001", "000002", "600002"]
+    assert board_counts == {"sh": 1, "sz": 1, "cyb": 0}
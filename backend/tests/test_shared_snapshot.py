@@ -0,0 +1,107 @@
+import os, sys
+import math
+import threading
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.shared_snapshot import ColumnarSnapshot, FetcherLock, SharedSnapshotStore
+
+
+def _stocks():
+    return [
+        {"code": "sh600000", "name": "浦发银行", "price": 10.5, "volume": 1200, "tags": ["bank"]},
+        {"code": "sz000001", "name": "平安银行", "price": 12, "volume": 800, "tags": None},
+        {"code": "sz300750", "name": "宁德时代", "price": float("nan"), "volume": 0},
+    ]
+
+
+def test_publish_and_attach_roundtrip(tmp_path):
+    store = SharedSnapshotStore(str(tmp_path))
+    assert store.attach("stock_data") is None
+
+    assert store.publish_records("stock_data", _stocks(), created_at=1000.0) == 1
+    snapshot = store.attach("stock_data")
+    assert (snapshot.version, snapshot.rows, snapshot.created_at) == (1, 3, 1000.0)
+
+    prices = snapshot.column("price")
+    assert isinstance(prices, memoryview) and prices[0] == 10.5 and prices[1] == 12.0
+    assert math.isnan(prices[2])
+    assert list(snapshot.column("volume")) == [1200, 800, 0]
+    assert snapshot.column("name") == ["浦发银行", "平安银行", "宁德时代"]
+
+    records = snapshot.records()
+    assert records[0] == {"code": "sh600000", "name": "浦发银行", "price": 10.5, "volume": 1200, "tags": ["bank"]}
+    assert records[2]["tags"] is None
+    assert snapshot.records() is records  # 每个版本只解码一次
+    assert store.attach("stock_data") is snapshot  # 版本未变化时复用映射
+
+
+def test_new_version_replaces_mapping_and_cleans_old_files(tmp_path):
+    store = SharedSnapshotStore(str(tmp_path), keep=2)
+    reader = SharedSnapshotStore(str(tmp_path))
+    for i in range(4):
+        store.publish("table.margin", {"code": [f"{i:06d}"], "balance": [float(i)]})
+
+    snapshot = reader.attach("table.margin")
+    assert snapshot.version == 4 and snapshot.columns() == {"code": ["000003"], "balance": [3.0]}
+    files = sorted(name for name in os.listdir(tmp_path) if name.endswith(".snap"))
+    assert files == ["table.margin-3.snap", "table.margin-4.snap"]
+
+    store.publish("table.margin", {"code": ["000004"], "balance": [4.0]})
+    assert reader.attach("table.margin").version == 5
+    assert reader.stats()["attached"]["table.margin"]["version"] == 5
+
+
+def test_concurrent_attach_shares_mapping_and_keeps_old_readable(tmp_path):
+    store = SharedSnapshotStore(str(tmp_path), keep=3)
+    reader = SharedSnapshotStore(str(tmp_path))
+    store.publish_records("stock_data", _stocks())
+    old = reader.attach("stock_data")
+    store.publish_records("stock_data", _stocks()[:1])
+
+    results = []
+    barrier = threading.Barrier(8)
+
+    def attach():
+        barrier.wait()
+        results.append(reader.attach("stock_data"))
+
+    threads = [threading.Thread(target=attach) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(snapshot) for snapshot in results}) == 1 and results[0].version == 2
+    assert reader.attaches == 2
+    # 被替换的旧版本不会被关闭：仍在使用它的线程可以继续读取
+    assert old.column("price")[0] == 10.5 and len(old.records()) == 3
+
+
+def test_fetcher_lock_elects_single_leader(tmp_path):
+    first = SharedSnapshotStore(str(tmp_path), elect_interval=0)
+    second = SharedSnapshotStore(str(tmp_path), elect_interval=0)
+
+    assert first.is_leader() and not second.is_leader()
+    assert first.stats()["role"] == "fetcher" and second.stats()["role"] == "reader"
+
+    first.lock.release()  # 拉取进程退出
+    assert second.is_leader() and not first.is_leader()
+
+    lock = FetcherLock(str(tmp_path / "other.lock"))
+    assert lock.try_acquire() and lock.try_acquire()
+    lock.release()
+    assert not lock.held
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "bad.snap"
+    path.write_bytes(b"x" * 64)
+    try:
+        ColumnarSnapshot(str(path))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("应拒绝非快照文件")
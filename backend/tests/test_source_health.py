@@ -0,0 +1,127 @@
+import os, sys
+import time
+
+import pytest
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.source_health import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    SourceHealth,
+    SourceMonitor,
+)
+
+
+def _fail(message="boom"):
+    def fetch():
+        raise RuntimeError(message)
+
+    return fetch
+
+
+def _slow(value, seconds, started=None):
+    def fetch():
+        if started is not None:
+            started.set()
+        time.sleep(seconds)
+        return value
+
+    return fetch
+
+
+def test_circuit_breaker_opens_probes_and_recovers():
+    health = SourceHealth("akshare", failure_threshold=2, reset_timeout=60)
+    health.record(0.1, False, RuntimeError("x"))
+    assert health.state == STATE_CLOSED and health.allow()
+    health.record(0.1, False, RuntimeError("y"))
+    assert health.state == STATE_OPEN and not health.allow()
+    assert health.stats()["last_error"] == "RuntimeError: y"
+
+    health.opened_at -= 61
+    assert health.allow() and health.state == STATE_HALF_OPEN
+    assert not health.allow()  # 半开只放行一个探测
+    health.record(0.1, False, RuntimeError("z"))
+    assert health.state == STATE_OPEN  # 探测失败立即重新熔断
+
+    health.opened_at -= 61
+    assert health.allow()
+    health.record(0.2, True)
+    assert health.state == STATE_CLOSED and health.consecutive_failures == 0
+    assert health.stats()["error_rate"] == 0.75
+
+
+def test_rank_prefers_unsampled_then_fastest_healthy():
+    monitor = SourceMonitor(failure_threshold=1)
+    monitor.health("a").record(2.0, True)
+    monitor.health("b").record(0.5, True)
+    monitor.health("c")
+    monitor.health("d").record(0.1, False)
+
+    assert monitor.rank(["a", "b", "c", "d"]) == ["c", "b", "a", "d"]
+
+
+def test_fetch_falls_back_on_failure():
+    monitor = SourceMonitor(hedge_after=5)
+    result, source = monitor.fetch({"akshare": _fail(), "tencent": lambda: [1]})
+
+    assert (result, source) == ([1], "tencent")
+    assert monitor.hedges == 0
+    stats = monitor.stats()["sources"]
+    assert stats["akshare"]["errors"] == 1 and stats["tencent"]["requests"] == 1
+
+
+def test_fetch_hedges_slow_primary():
+    monitor = SourceMonitor(hedge_after=0.05)
+    start = time.perf_counter()
+    result, source = monitor.fetch({"akshare": _slow("slow", 0.5), "tencent": _slow("fast", 0.01)})
+
+    assert (result, source) == ("fast", "tencent")
+    assert time.perf_counter() - start < 0.4
+    assert monitor.hedges == 1
+
+    time.sleep(0.6)  # 落后的请求完成后仍计入统计
+    assert monitor.health("akshare").stats()["requests"] == 1
+    assert monitor.rank(["akshare", "tencent"]) == ["tencent", "akshare"]
+
+
+def test_fetch_skips_open_circuit_and_raises_when_all_fail():
+    monitor = SourceMonitor(failure_threshold=1, reset_timeout=60)
+    calls = []
+
+    def akshare():
+        calls.append("akshare")
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        monitor.fetch({"akshare": akshare, "tencent": _fail("also down")})
+    assert monitor.health("akshare").state == STATE_OPEN
+    monitor.health("tencent").record(0.1, True)  # 腾讯恢复
+
+    result, source = monitor.fetch({"akshare": akshare, "tencent": lambda: [2]})
+    assert source == "tencent" and calls == ["akshare"]
+
+    # 全部熔断时仍强制尝试
+    monitor.health("tencent").record(0.1, False)
+    result, source = monitor.fetch({"akshare": lambda: [3], "tencent": _fail()})
+    assert (result, source) == ([3], "akshare")
+
+
+def test_snapshot_status_records_only_the_winning_source(monkeypatch):
+    from services import market_data
+
+    sweep = {"completeness": 0.9, "missing_codes": 10}
+    monkeypatch.setattr(market_data, "USE_REAL_DATA", True)
+    monkeypatch.setattr(market_data, "source_monitor", SourceMonitor(hedge_after=0.05))
+    monkeypatch.setattr(market_data, "_fetch_from_akshare", _slow(([{"code": "a"}], None), 0.3))
+    monkeypatch.setattr(market_data, "_fetch_from_tencent", _slow(([{"code": "t"}], sweep), 0.01))
+    monkeypatch.setattr(market_data, "_snapshot_meta", {})
+
+    assert market_data._fetch_all_stocks_data() == [{"code": "t"}]
+    time.sleep(0.4)  # 对冲落败的 AKShare 完成后不覆盖快照来源和完整度
+    status = market_data.snapshot_status()
+    assert (status["source"], status["completeness"], status["sweep"]) == ("tencent", 0.9, sweep)
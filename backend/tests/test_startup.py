@@ -0,0 +1,81 @@
+import os, sys
+import json
+import subprocess
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+# 启动耗时预算（秒）：uvicorn worker 导入 main 并执行 lifespan 启动，命令行工具导入 scheduler
+MAIN_IMPORT_BUDGET = 1.0
+LIFESPAN_STARTUP_BUDGET = 0.5
+SCHEDULER_IMPORT_BUDGET = 0.5
+HEAVY_MODULES = ("akshare", "pandas", "data_adapter", "glm_service", "httpx", "requests")
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+# 不经 TestClient（会导入 httpx），直接进入 lifespan：启动完成（yield）时记录耗时和已导入模块
+_LIFESPAN_PROBE = """
+import asyncio, json, sys, time
+sys.path.insert(0, {backend!r})
+import main
+
+async def startup():
+    start = time.perf_counter()
+    async with main.app.router.lifespan_context(main.app):
+        elapsed = time.perf_counter() - start
+        modules = sorted(sys.modules)
+    return elapsed, modules
+
+elapsed, modules = asyncio.run(startup())
+print(json.dumps({{"elapsed": elapsed, "modules": modules}}))
+"""
+
+
+def _run_probe(code, cwd, **env_overrides):
+    env = dict(os.environ, AKSHARE_ENABLED="true", SCREENING_SCHEDULER_ENABLED="true")
+    env.update(env_overrides)
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(cwd),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result["elapsed"], set(result["modules"])
+
+
+def _import_in_subprocess(module, cwd):
+    return _run_probe(_PROBE.format(backend=BACKEND, module=module), cwd)
+
+
+def test_main_import_defers_heavy_dependencies(tmp_path):
+    elapsed, modules = _import_in_subprocess("main", tmp_path)
+    assert not modules & set(HEAVY_MODULES), "AKShare/pandas/GLM 应在首次使用时才导入"
+    assert elapsed < MAIN_IMPORT_BUDGET, f"导入 main 耗时 {elapsed:.2f}s"
+
+
+def test_scheduler_import_skips_web_stack(tmp_path):
+    elapsed, modules = _import_in_subprocess("scheduler", tmp_path)
+    assert not modules & set(HEAVY_MODULES + ("fastapi", "main"))
+    assert elapsed < SCHEDULER_IMPORT_BUDGET, f"导入 scheduler 耗时 {elapsed:.2f}s"
+
+
+def test_lifespan_startup_defers_heavy_dependencies(tmp_path):
+    # 交易日历在后台线程中加载（会导入 AKShare），此处关闭以免与启动时的模块检查竞争
+    elapsed, modules = _run_probe(
+        _LIFESPAN_PROBE.format(backend=BACKEND), tmp_path, AKSHARE_ENABLED="false"
+    )
+    assert not modules & set(HEAVY_MODULES), "预热数据表应在后台恢复，启动时不导入 pandas"
+    assert elapsed < LIFESPAN_STARTUP_BUDGET, f"lifespan 启动耗时 {elapsed:.2f}s"
@@ -0,0 +1,74 @@
+import os, sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.metrics import track_upstream
+from core.tracing import TraceMiddleware, Tracer, current_span, propagate, span
+
+
+def test_spans_nest_and_cross_thread_pool():
+    tracer = Tracer(capacity=2)
+
+    def batch(i):
+        with track_upstream("test-source", batch=i):
+            return i
+
+    with tracer.start_trace("screen") as trace:
+        with span("fetch"):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                assert sorted(pool.map(propagate(batch), range(3))) == [0, 1, 2]
+        with span("score", code="600001"):
+            pass
+
+    assert current_span() is None
+    waterfall = tracer.get(trace.trace_id)
+    names = [s["name"] for s in waterfall["spans"]]
+    assert names[:2] == ["screen", "fetch"] and names.count("test-source") == 3
+    fetch = next(s for s in waterfall["spans"] if s["name"] == "fetch")
+    for row in waterfall["spans"]:
+        if row["name"] == "test-source":
+            assert row["parent_id"] == fetch["id"] and row["depth"] == 2
+    assert all(s["duration_ms"] is not None for s in waterfall["spans"])
+
+
+def test_unsampled_requests_record_nothing_and_buffer_is_bounded():
+    off = Tracer(sample_rate=0)
+    with off.start_trace("screen") as trace:
+        assert trace is None
+        with span("fetch") as s:
+            assert s is None
+    assert off.recent() == []
+
+    ring = Tracer(capacity=2)
+    ids = []
+    for i in range(3):
+        with ring.start_trace(f"req{i}") as trace:
+            ids.append(trace.trace_id)
+    assert [t["trace_id"] for t in ring.recent()] == [ids[2], ids[1]]
+    assert ring.get(ids[0]) is None
+
+
+def test_middleware_sets_trace_header_and_forced_sampling():
+    tracer = Tracer(sample_rate=0)
+    app = FastAPI()
+    app.add_middleware(TraceMiddleware, tracer=tracer)
+
+    @app.get("/api/ping")
+    async def ping():
+        with span("work"):
+            return {"ok": True}
+
+    client = TestClient(app)
+    assert "x-trace-id" not in client.get("/api/ping").headers
+
+    response = client.get("/api/ping", headers={"X-Debug-Trace": "1"})
+    trace = tracer.get(response.headers["x-trace-id"])
+    assert trace["attrs"]["status"] == 200
+    assert [s["name"] for s in trace["spans"]] == ["GET /api/ping", "work"]
@@ -0,0 +1,103 @@
+import os, sys
+from datetime import date, datetime
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core.trading_calendar import (
+    CST,
+    PHASE_AFTERNOON,
+    PHASE_CLOSED,
+    PHASE_LUNCH,
+    PHASE_MORNING,
+    PHASE_NON_TRADING,
+    PHASE_PRE_OPEN,
+    TradingCalendar,
+    parse_dates,
+)
+
+# 2026-10-16 周五，2026-10-19 周一
+FRIDAY = date(2026, 10, 16)
+
+
+def ts(day: date, hour: int, minute: int = 0) -> float:
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=CST).timestamp()
+
+
+def _calendar(**kwargs):
+    return TradingCalendar(settle_seconds=300, **kwargs)
+
+
+def test_phases_and_holidays():
+    calendar = _calendar()
+    assert calendar.phase(ts(FRIDAY, 9, 20)) == PHASE_PRE_OPEN
+    assert calendar.phase(ts(FRIDAY, 10)) == PHASE_MORNING
+    assert calendar.phase(ts(FRIDAY, 12)) == PHASE_LUNCH
+    assert calendar.phase(ts(FRIDAY, 14, 59)) == PHASE_AFTERNOON
+    assert calendar.phase(ts(FRIDAY, 15)) == PHASE_CLOSED
+    assert calendar.phase(ts(date(2026, 10, 17), 10)) == PHASE_NON_TRADING
+
+    assert parse_dates("2026-10-19, bad,") == {date(2026, 10, 19)}
+    holiday = _calendar(holidays=parse_dates("2026-10-19"))
+    assert holiday.phase(ts(date(2026, 10, 19), 10)) == PHASE_NON_TRADING
+    assert holiday.next_open(ts(FRIDAY, 16)) == ts(date(2026, 10, 20), 9, 15)
+
+    # 交易所日历覆盖范围内以其为准（范围内的工作日休市），范围外按周末判断
+    calendar.load_trade_dates([date(2026, 10, 15), date(2026, 10, 20)])
+    assert not calendar.is_trading_day(FRIDAY)
+    assert calendar.is_trading_day(date(2026, 10, 21))
+
+
+def test_close_snapshot_is_cached_until_next_open():
+    calendar = _calendar()
+    monday_open = ts(date(2026, 10, 19), 9, 15)
+
+    # 交易时段与收盘后尚未落定：默认 TTL
+    assert calendar.cache_ttl(60, ts(FRIDAY, 14)) == 60
+    assert calendar.cache_ttl(60, ts(FRIDAY, 15, 2)) == 60
+    # 落定后：缓存到周一集合竞价
+    assert calendar.cache_ttl(60, ts(FRIDAY, 15, 10)) == monday_open - ts(FRIDAY, 15, 10)
+    assert calendar.expires_at(ts(date(2026, 10, 18), 3), 60) == monday_open
+    # 午休：缓存到 13:00
+    assert calendar.cache_ttl(60, ts(FRIDAY, 11, 40)) == 80 * 60
+
+    # 读取：落定之后生成的条目都视为新鲜，落定之前的按默认年龄
+    at = ts(date(2026, 10, 17), 20)
+    max_age = calendar.max_age(1800, at)
+    assert at - max_age == ts(FRIDAY, 15, 5)
+    assert calendar.max_age(1800, ts(FRIDAY, 10)) == 1800
+
+
+def test_quote_and_settled_dates():
+    calendar = _calendar()
+    monday = date(2026, 10, 19)
+    # 筛选归档：盘中和收盘后为当日，夜间（次日凌晨）、周末、开盘前归入上一个交易日
+    assert calendar.quote_date(ts(FRIDAY, 10)) == FRIDAY
+    assert calendar.quote_date(ts(FRIDAY, 22)) == FRIDAY
+    assert calendar.quote_date(ts(date(2026, 10, 18), 12)) == FRIDAY
+    assert calendar.quote_date(ts(monday, 8)) == FRIDAY
+    # 日线：收盘落定后才有当日日线，盘中不写入
+    assert calendar.settled_date(ts(FRIDAY, 14)) is None
+    assert calendar.settled_date(ts(FRIDAY, 15, 2)) is None
+    assert calendar.settled_date(ts(FRIDAY, 15, 10)) == FRIDAY
+    assert calendar.settled_date(ts(date(2026, 10, 17), 10)) == FRIDAY
+    assert calendar.settled_date(ts(monday, 9)) == FRIDAY
+    assert calendar.settled_date(ts(monday, 9, 20)) is None
+
+
+def test_next_refresh_idles_outside_sessions():
+    calendar = _calendar()
+    interval = 30 * 60
+
+    assert calendar.next_refresh(interval, ts(FRIDAY, 10)) == ts(FRIDAY, 10, 30)
+    # 交易时段末尾：收盘落定后补一次
+    assert calendar.next_refresh(interval, ts(FRIDAY, 11, 20)) == ts(FRIDAY, 11, 35)
+    assert calendar.next_refresh(interval, ts(FRIDAY, 11, 35)) == ts(FRIDAY, 13)
+    assert calendar.next_refresh(interval, ts(FRIDAY, 14, 50)) == ts(FRIDAY, 15, 5)
+    # 收盘后、周末：直到下一个交易日开盘
+    monday = date(2026, 10, 19)
+    assert calendar.next_refresh(interval, ts(FRIDAY, 15, 5)) == ts(monday, 9, 30)
+    assert calendar.next_refresh(interval, ts(date(2026, 10, 18), 12)) == ts(monday, 9, 30)
+    assert calendar.next_refresh(interval, ts(monday, 8)) == ts(monday, 9, 30)
@@ -0,0 +1,64 @@
+import os, sys
+import threading
+import time
+
+# Ensure backend on PYTHONPATH for local imports
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from core import warm_start
+from core.cache import memory_cache
+from core.disk_cache import DiskCache
+
+
+def test_namespaces_survive_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(warm_start, "warm_store", DiskCache(str(tmp_path)))
+    memory_cache.set("warmtest", "600001", {"is_margin_eligible": True})
+    snapshot = [{"code": str(600000 + i), "price": i * 7919 % 10007 / 7} for i in range(40000)]
+    warm_start.persist_value("stock_data", snapshot)
+    assert warm_start.persist_namespaces(["warmtest"]) == 1
+
+    # 模拟重启：内存清空后从磁盘恢复（大快照走 mmap 读取）
+    memory_cache.clear("warmtest")
+    assert warm_start.restore_namespaces(["warmtest"]) == 1
+    assert memory_cache.get("warmtest", "600001") == {"is_margin_eligible": True}
+    value, created_at = warm_start.load_value("stock_data")
+    assert value == snapshot
+    memory_cache.clear("warmtest")
+
+
+def test_restored_entries_keep_remaining_ttl(tmp_path, monkeypatch):
+    monkeypatch.setattr(warm_start, "warm_store", DiskCache(str(tmp_path)))
+    memory_cache.set("warmtest", "fresh", 1, ttl=600)
+    memory_cache.set("warmtest", "expiring", 2, ttl=0.05)
+    assert warm_start.persist_namespaces(["warmtest"]) == 2
+    fresh_expiry = dict((k, e) for k, _, _, e in memory_cache.entries("warmtest"))["fresh"]
+
+    memory_cache.clear("warmtest")
+    time.sleep(0.1)
+    # 已过期的条目不恢复，其余条目沿用写盘时的过期时间而不是重新计时
+    assert warm_start.restore_namespaces(["warmtest"]) == 1
+    (key, value, _, expires_at), = memory_cache.entries("warmtest")
+    assert (key, value) == ("fresh", 1)
+    assert abs(expires_at - fresh_expiry) < 0.01
+    memory_cache.clear("warmtest")
+
+
+def test_schedule_persist_coalesces_in_background(monkeypatch):
+    calls = []
+    done = threading.Event()
+    monkeypatch.setattr(warm_start, "persist_namespaces", lambda: calls.append(1) or done.set() or 0)
+
+    assert warm_start.schedule_persist(delay=0.05)
+    assert not warm_start.schedule_persist(delay=0.05)  # 合并到已安排的写盘
+    assert calls == []  # 调用方不等待写盘
+    assert done.wait(2)
+    time.sleep(0.05)
+    assert calls == [1]
+    assert warm_start.schedule_persist(delay=0)  # 写盘后可再次安排
+    for _ in range(100):
+        if len(calls) == 2:
+            break
+        time.sleep(0.01)
+    assert calls == [1, 1]